@@ -0,0 +1,11 @@
+"""Synthetic data generators and performance benchmarks for the pipeline."""
+
+import os
+
+# Target library sizes; override with e.g. KIPARTBRIDGE_BENCH_SIZES=10,1000 for quick runs
+LIBRARY_SIZES = tuple(
+    int(n) for n in os.environ.get('KIPARTBRIDGE_BENCH_SIZES', '10,1000,10000').split(',')
+)
+
+# Layouts that go through the whole pipeline without kicad-cli (no legacy .lib)
+PIPELINE_LAYOUTS = ('ultra_librarian', 'samacsys', 'snapeda')
@@ -0,0 +1,57 @@
+import sys
+import os
+import shutil
+import pytest
+
+# Add src/python to the path so benchmarks can import modules directly
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+from benchmarks import synthetic
+
+
+@pytest.fixture(scope='session')
+def bench_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp('bench')
+
+
+@pytest.fixture(scope='session')
+def provider_zips(bench_dir):
+    """One synthetic download per provider layout."""
+    zip_dir = bench_dir / 'zips'
+    zip_dir.mkdir()
+    return {
+        layout: synthetic.build_zip(layout, str(zip_dir / f'{layout}.zip'),
+                                    synthetic.mpn_for(1, 'BENCH'), pins=64)
+        for layout in synthetic.LAYOUTS
+    }
+
+
+@pytest.fixture(scope='session')
+def library_templates(bench_dir):
+    """Build target libraries lazily, once per size, and cache them for the session."""
+    cache = {}
+
+    def get(size):
+        if size not in cache:
+            cache[size] = synthetic.build_target_library(str(bench_dir / f'template_{size}.kicad_sym'), size)
+        return cache[size]
+    return get
+
+
+@pytest.fixture
+def target_library(library_templates, tmp_path):
+    """Copy a template library of the requested size into a scratch location."""
+    def make(size, dest=None):
+        dest = dest or str(tmp_path / 'kipartbridge.kicad_sym')
+        shutil.copyfile(library_templates(size), dest)
+        return dest
+    return make
+
+
+@pytest.fixture
+def kicad_config(tmp_path, monkeypatch):
+    """Point KiCad's config dir at a scratch location so lib-table writes stay isolated."""
+    config_home = tmp_path / 'kicad_config'
+    config_home.mkdir()
+    monkeypatch.setenv('KICAD_CONFIG_HOME', str(config_home))
+    return config_home
@@ -0,0 +1,305 @@
+"""Load generator for the sidecar's JSON-RPC stdin/stdout protocol.
+
+Starts the sidecar exactly like src/main/python-bridge.js does in dev mode
+(venv/bin/python3 if present, else python3, running src/python/main.py serve
+with PYTHONPATH=src/python), or a packaged binary with --sidecar-binary. It then
+sends an open-loop stream of requests at a target rate, with a weighted mix of
+methods, and records per-method latency percentiles, throughput and stdout
+framing errors (lines that are neither JSON-RPC responses to a pending request
+nor notifications). Notifications the sidecar sends unasked (library-changed,
+bom-results) carry a method and no id; they are counted per method.
+
+search_components queries are typed one keystroke at a time, like the library
+browser's search box. The sidecar runs against a scratch library and KiCad
+config, seeded with --seed-components rows.
+
+Usage:
+    python -m benchmarks.rpc_load --rate 50 --duration 30 \\
+        --mix process_download=1,search_components=20,list_components=3,ping=1 \\
+        --output load.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_SRC_PYTHON = os.path.join(_PROJECT_ROOT, 'src', 'python')
+sys.path.insert(0, _SRC_PYTHON)
+
+from database import ComponentDB  # noqa: E402
+from metrics import RollingHistogram  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+
+METHODS = ('process_download', 'list_components', 'search_components', 'ping')
+DEFAULT_MIX = 'process_download=1,search_components=20,list_components=3,ping=1'
+
+# Seconds to wait for outstanding responses after the last request is sent
+_DRAIN_TIMEOUT = 60.0
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse "method=weight,..." into a weight dict."""
+    mix = {}
+    for part in spec.split(','):
+        method, _, weight = part.partition('=')
+        method = method.strip()
+        if method not in METHODS:
+            raise ValueError(f'Unknown method {method!r} in mix, expected one of {METHODS}')
+        mix[method] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('Mix has no positive weights')
+    return mix
+
+
+def sidecar_command(sidecar_binary: str | None = None) -> tuple[list[str], dict]:
+    """Command line and env overrides matching PythonBridge.start()."""
+    if sidecar_binary:
+        return [sidecar_binary, 'serve'], {}
+    venv_python = os.path.join(_PROJECT_ROOT, 'venv', 'bin', 'python3')
+    python_bin = venv_python if os.path.exists(venv_python) else 'python3'
+    return [python_bin, os.path.join(_SRC_PYTHON, 'main.py'), 'serve'], {'PYTHONPATH': _SRC_PYTHON}
+
+
+class _Keystrokes:
+    """Yields growing prefixes of known MPNs, like a user typing in the search box."""
+
+    def __init__(self, words: list[str], rng: random.Random):
+        self._words = words
+        self._rng = rng
+        self._current = ''
+        self._pos = 0
+
+    def next(self) -> str:
+        if self._pos >= len(self._current):
+            self._current = self._rng.choice(self._words)
+            self._pos = 0
+        self._pos += 1
+        return self._current[:self._pos]
+
+
+class LoadRun:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.pending = {}          # id -> (method, send_time)
+        self.lock = threading.Lock()
+        self.latency = {m: RollingHistogram(window=1_000_000) for m in METHODS}
+        self.sent = dict.fromkeys(METHODS, 0)
+        self.errors = dict.fromkeys(METHODS, 0)
+        self.framing_errors = 0
+        self.framing_samples = []
+        self.notifications = {}    # method -> count
+        self.last_response = None
+        self.stderr_lines = 0
+
+    # ── Setup ────────────────────────────────────────────────────────────
+
+    def prepare(self, workdir: str) -> None:
+        self.library_root = os.path.join(workdir, 'library')
+        os.makedirs(os.path.join(self.library_root, 'kipartbridge.pretty'), exist_ok=True)
+        os.makedirs(os.path.join(self.library_root, '3dmodels'), exist_ok=True)
+        self.config_home = os.path.join(workdir, 'kicad_config')
+        os.makedirs(self.config_home, exist_ok=True)
+
+        self.mpns = [synthetic.mpn_for(i, 'LOAD') for i in range(self.args.seed_components)]
+        db = ComponentDB(os.path.join(self.library_root, 'components.db'))
+        try:
+            for mpn in self.mpns:
+                db.upsert_component(mpn=mpn, symbol_name=mpn, footprint_name=mpn,
+                                    manufacturer='Synthetic Devices', source_provider='snapeda')
+        finally:
+            db.close()
+
+        zip_dir = os.path.join(workdir, 'zips')
+        os.makedirs(zip_dir)
+        self.zips = [
+            synthetic.build_zip('snapeda', os.path.join(zip_dir, f'{i}.zip'),
+                                synthetic.mpn_for(i, 'IMP'), pins=self.args.pins,
+                                step_size=int(self.args.step_mb * 1024 * 1024))
+            for i in range(self.args.zip_pool)
+        ]
+        self.keystrokes = _Keystrokes(self.mpns or ['LOAD'], self.rng)
+
+    def params_for(self, method: str) -> dict:
+        if method == 'process_download':
+            return {'filepath': self.rng.choice(self.zips), 'library_root': self.library_root,
+                    'source_url': 'https://www.snapeda.com/download/x.zip'}
+        if method == 'list_components':
+            return {'library_root': self.library_root, 'limit': 100, 'offset': 0}
+        if method == 'search_components':
+            return {'library_root': self.library_root, 'query': self.keystrokes.next()}
+        return {}
+
+    # ── I/O threads ──────────────────────────────────────────────────────
+
+    def _read_stdout(self, stream) -> None:
+        for raw in stream:
+            now = time.perf_counter()
+            line = raw.rstrip('\n')
+            try:
+                response = json.loads(line)
+                if 'method' in response and 'id' not in response:
+                    with self.lock:
+                        method = response['method']
+                        self.notifications[method] = self.notifications.get(method, 0) + 1
+                    continue
+                req_id = response['id']
+                with self.lock:
+                    method, sent_at = self.pending.pop(req_id)
+            except (ValueError, KeyError, TypeError):
+                with self.lock:
+                    self.framing_errors += 1
+                    if len(self.framing_samples) < 10:
+                        self.framing_samples.append(line[:200])
+                continue
+            with self.lock:
+                self.latency[method].observe(now - sent_at)
+                if 'error' in response:
+                    self.errors[method] += 1
+                self.last_response = now
+
+    def _drain_stderr(self, stream) -> None:
+        for _ in stream:
+            self.stderr_lines += 1
+
+    # ── Run ──────────────────────────────────────────────────────────────
+
+    def run(self) -> dict:
+        workdir = tempfile.mkdtemp(prefix='kipartbridge_load_')
+        try:
+            self.prepare(workdir)
+            cmd, env_overrides = sidecar_command(self.args.sidecar_binary)
+            env = {**os.environ, **env_overrides, 'KICAD_CONFIG_HOME': self.config_home}
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, env=env, text=True, bufsize=1)
+            readers = [
+                threading.Thread(target=self._read_stdout, args=(proc.stdout,), daemon=True),
+                threading.Thread(target=self._drain_stderr, args=(proc.stderr,), daemon=True),
+            ]
+            for t in readers:
+                t.start()
+            try:
+                return self._drive(proc)
+            finally:
+                proc.stdin.close()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _drive(self, proc) -> dict:
+        methods = list(self.mix)
+        weights = [self.mix[m] for m in methods]
+        interval = 1.0 / self.args.rate
+        ids = itertools.count(1)
+
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        next_send = start
+        while next_send < deadline:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            method = self.rng.choices(methods, weights)[0]
+            req_id = next(ids)
+            request = json.dumps({'jsonrpc': '2.0', 'id': req_id, 'method': method,
+                                  'params': self.params_for(method)})
+            with self.lock:
+                self.pending[req_id] = (method, time.perf_counter())
+                self.sent[method] += 1
+            proc.stdin.write(request + '\n')
+            proc.stdin.flush()
+            next_send += interval
+        send_end = time.perf_counter()
+
+        drain_deadline = send_end + _DRAIN_TIMEOUT
+        while time.perf_counter() < drain_deadline:
+            with self.lock:
+                if not self.pending:
+                    break
+            time.sleep(0.01)
+
+        with self.lock:
+            end = self.last_response or send_end
+            completed = sum(h.count for h in self.latency.values())
+            unanswered = {}
+            for method, _ in self.pending.values():
+                unanswered[method] = unanswered.get(method, 0) + 1
+            return {
+                'config': {
+                    'rate': self.args.rate,
+                    'duration': self.args.duration,
+                    'mix': self.mix,
+                    'seed': self.args.seed,
+                    'seed_components': self.args.seed_components,
+                    'sidecar': self.args.sidecar_binary or 'source',
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                },
+                'sent': sum(self.sent.values()),
+                'completed': completed,
+                'offered_rate': sum(self.sent.values()) / max(send_end - start, 1e-9),
+                'throughput': completed / max(end - start, 1e-9),
+                'framing_errors': self.framing_errors,
+                'framing_error_samples': self.framing_samples,
+                'notifications': dict(self.notifications),
+                'unanswered': unanswered,
+                'methods': {
+                    m: {'sent': self.sent[m], 'errors': self.errors[m], **_ms(self.latency[m].snapshot())}
+                    for m in METHODS if self.sent[m]
+                },
+            }
+
+
+def _ms(snapshot: dict) -> dict:
+    return {
+        'completed': snapshot['count'],
+        'p50_ms': snapshot['p50'] * 1000,
+        'p95_ms': snapshot['p95'] * 1000,
+        'p99_ms': snapshot['p99'] * 1000,
+        'max_ms': snapshot['max'] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON-RPC load generator for the KiPartBridge sidecar')
+    parser.add_argument('--rate', type=float, default=20.0, help='Requests per second to offer')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to send requests for')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Weighted method mix: method=weight,...')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the request stream')
+    parser.add_argument('--seed-components', type=int, default=1000,
+                        help='Components pre-loaded into the scratch library DB')
+    parser.add_argument('--zip-pool', type=int, default=20, help='Distinct ZIPs used by process_download')
+    parser.add_argument('--pins', type=int, default=64, help='Pins per synthetic part')
+    parser.add_argument('--step-mb', type=float, default=0.25, help='STEP model size in MB')
+    parser.add_argument('--sidecar-binary', help='Packaged kipartbridge-sidecar binary to test instead')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    report = LoadRun(args).run()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if report['framing_errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
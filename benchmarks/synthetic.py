@@ -0,0 +1,348 @@
+"""Synthetic provider ZIP generator.
+
+Builds downloads that mirror the layouts the extractors handle, so tests and
+benchmarks do not depend on real vendor fixtures:
+
+    ultra_librarian   KiCADv6/<timestamp>.kicad_sym
+                      KiCADv6/footprints.pretty/<PKG>.kicad_mod (+ -L / -M variants)
+                      <PKG>.step at the root
+    ultra_librarian_legacy
+                      KiCADv5/<timestamp>.lib (legacy EESchema library)
+    samacsys          KiCad/<MPN>.kicad_sym, KiCad/<MPN>.kicad_mod, KiCad/3dmodel/<MPN>.stp
+    snapeda           <uuid>.kicad_sym, <uuid>.kicad_mod, <uuid>.step at the root
+    generic_legacy    <MPN>.lib + <MPN>.kicad_mod
+
+Sizes are configurable: pin count drives symbol/footprint size, step_bytes the
+3D model size. Also builds target .kicad_sym libraries with N symbols and
+components.db files with N rows (build_component_db).
+
+Usage:
+    python -m benchmarks.synthetic OUT_DIR [--count N] [--pins P] [--step-mb M]
+"""
+
+import argparse
+import math
+import os
+import random
+import uuid
+import zipfile
+
+LAYOUTS = ("ultra_librarian", "ultra_librarian_legacy", "samacsys", "snapeda", "generic_legacy")
+
+_FONT = "(effects (font (size 1.27 1.27)))"
+_HIDDEN = "(effects (font (size 1.27 1.27)) hide)"
+
+
+def mpn_for(index: int, prefix: str = "SYN") -> str:
+    """Deterministic, MPN-looking name for the index-th synthetic part."""
+    return f"{prefix}{index:05d}-QFN{8 + index % 57}"
+
+
+# ── File content ─────────────────────────────────────────────────────────────
+
+def symbol_body(name: str, pins: int = 16, reference: str = "U", units: int = 1,
+                manufacturer: str = "Synthetic Devices", indent: str = "  ") -> str:
+    """One top-level (symbol ...) form as found in vendor .kicad_sym files."""
+    per_side = max(1, math.ceil(pins / 2))
+    height = per_side * 2.54 + 2.54
+    lines = [
+        f'{indent}(symbol "{name}" (pin_names (offset 0.254)) (in_bom yes) (on_board yes)',
+        f'{indent}  (property "Reference" "{reference}" (at 0 {height / 2 + 2.54:.2f} 0) {_FONT})',
+        f'{indent}  (property "Value" "{name}" (at 0 {-height / 2 - 2.54:.2f} 0) {_FONT})',
+        f'{indent}  (property "Footprint" "" (at 0 0 0) {_HIDDEN})',
+        f'{indent}  (property "Datasheet" "" (at 0 0 0) {_HIDDEN})',
+        f'{indent}  (property "Manufacturer" "{manufacturer}" (at 0 0 0) {_HIDDEN})',
+        f'{indent}  (symbol "{name}_0_1"',
+        f'{indent}    (rectangle (start -7.62 {height / 2:.2f}) (end 7.62 {-height / 2:.2f})'
+        f' (stroke (width 0.254) (type default)) (fill (type background)))',
+        f'{indent}  )',
+    ]
+    pins_per_unit = max(1, math.ceil(pins / units))
+    pin_no = 1
+    for unit in range(1, units + 1):
+        lines.append(f'{indent}  (symbol "{name}_{unit}_1"')
+        for i in range(pins_per_unit):
+            if pin_no > pins:
+                break
+            left = i < per_side
+            x = -10.16 if left else 10.16
+            y = height / 2 - 2.54 * ((i % per_side) + 1)
+            rot = 0 if left else 180
+            lines.append(
+                f'{indent}    (pin bidirectional line (at {x:.2f} {y:.2f} {rot}) (length 2.54)'
+                f' (name "IO{pin_no}" {_FONT}) (number "{pin_no}" {_FONT}))'
+            )
+            pin_no += 1
+        lines.append(f'{indent}  )')
+    lines.append(f'{indent})')
+    return "\n".join(lines)
+
+
+def symbol_library(names: list[str], pins: int = 16) -> str:
+    """A complete .kicad_sym file containing one symbol per name."""
+    body = "\n".join(symbol_body(n, pins=pins) for n in names)
+    return f'(kicad_symbol_lib (version 20211014) (generator kicad_symbol_editor)\n{body}\n)\n'
+
+
+def footprint_text(name: str, pads: int = 16, smd: bool = True, model: str | None = None) -> str:
+    """A .kicad_mod footprint with a QFN-like pad ring, silk, fab and courtyard."""
+    per_side = max(1, math.ceil(pads / 4))
+    pitch = 0.5
+    half = per_side * pitch / 2 + 0.5
+    lines = [
+        f'(footprint "{name}" (version 20211014) (generator pcbnew)',
+        '  (layer "F.Cu")',
+        f'  (attr {"smd" if smd else "through_hole"})',
+        f'  (fp_text reference "REF**" (at 0 {-half - 1:.2f}) (layer "F.SilkS") {_FONT})',
+        f'  (fp_text value "{name}" (at 0 {half + 1:.2f}) (layer "F.Fab") {_FONT})',
+        f'  (fp_rect (start {-half:.2f} {-half:.2f}) (end {half:.2f} {half:.2f})'
+        f' (stroke (width 0.12) (type solid)) (fill none) (layer "F.SilkS"))',
+        f'  (fp_rect (start {-half - 0.5:.2f} {-half - 0.5:.2f}) (end {half + 0.5:.2f} {half + 0.5:.2f})'
+        f' (stroke (width 0.05) (type solid)) (fill none) (layer "F.CrtYd"))',
+    ]
+    for n in range(pads):
+        side, i = divmod(n, per_side)
+        offset = -per_side * pitch / 2 + pitch * (i + 0.5)
+        x, y = [(-half, offset), (offset, half), (half, -offset), (-offset, -half)][side % 4]
+        if smd:
+            lines.append(
+                f'  (pad "{n + 1}" smd roundrect (at {x:.3f} {y:.3f}) (size 0.8 0.25)'
+                f' (layers "F.Cu" "F.Paste" "F.Mask") (roundrect_rratio 0.25))'
+            )
+        else:
+            lines.append(
+                f'  (pad "{n + 1}" thru_hole circle (at {x:.3f} {y:.3f}) (size 1.6 1.6)'
+                f' (drill 0.8) (layers "*.Cu" "*.Mask"))'
+            )
+    if model:
+        lines.append(f'  (model "{model}" (offset (xyz 0 0 0)) (scale (xyz 1 1 1)) (rotate (xyz 0 0 0)))')
+    lines.append(')')
+    return "\n".join(lines) + "\n"
+
+
+def legacy_library(name: str, pins: int = 16) -> str:
+    """A KiCad 5 EESchema .lib library with one component."""
+    per_side = max(1, math.ceil(pins / 2))
+    lines = [
+        "EESchema-LIBRARY Version 2.4",
+        "#encoding utf-8",
+        "#",
+        f"# {name}",
+        "#",
+        f"DEF {name} U 0 40 Y Y 1 F N",
+        'F0 "U" 0 {} 50 H V C CNN'.format(per_side * 100 + 100),
+        f'F1 "{name}" 0 -{per_side * 100 + 100} 50 H V C CNN',
+        'F2 "" 0 0 50 H I C CNN',
+        'F3 "" 0 0 50 H I C CNN',
+        "DRAW",
+        f"S -300 {per_side * 100} 300 -{per_side * 100} 0 1 10 f",
+    ]
+    for n in range(pins):
+        left = n < per_side
+        y = per_side * 100 - 100 * ((n % per_side) + 1) + 50
+        x = -400 if left else 400
+        lines.append(f"X IO{n + 1} {n + 1} {x} {y} 100 {'R' if left else 'L'} 50 50 1 1 B")
+    lines += ["ENDDRAW", "ENDDEF", "#", "#End Library"]
+    return "\n".join(lines) + "\n"
+
+
+def step_bytes(name: str, size: int) -> bytes:
+    """An ISO-10303-21 file padded with geometry records to roughly ``size`` bytes."""
+    header = (
+        "ISO-10303-21;\nHEADER;\n"
+        "FILE_DESCRIPTION(('synthetic model'),'2;1');\n"
+        f"FILE_NAME('{name}.step','2026-01-01T00:00:00',(''),(''),'kipartbridge','synthetic','');\n"
+        "FILE_SCHEMA(('AUTOMOTIVE_DESIGN { 1 0 10303 214 1 1 1 1 }'));\nENDSEC;\nDATA;\n"
+    )
+    footer = "ENDSEC;\nEND-ISO-10303-21;\n"
+    rng = random.Random(name)
+    records = []
+    total = len(header) + len(footer)
+    n = 1
+    while total < size:
+        rec = (f"#{n}=CARTESIAN_POINT('',({rng.uniform(-10, 10):.6f},"
+               f"{rng.uniform(-10, 10):.6f},{rng.uniform(0, 2):.6f}));\n")
+        records.append(rec)
+        total += len(rec)
+        n += 1
+    return (header + "".join(records) + footer).encode()
+
+
+# ── Provider layouts ─────────────────────────────────────────────────────────
+
+def build_ultra_librarian_zip(path: str, mpn: str, pins: int = 64, step_size: int = 256 * 1024,
+                              legacy: bool = False) -> str:
+    """UL/DigiKey layout: KiCADv6/ timestamped symbol, footprints.pretty with -L/-M variants."""
+    package = f"QFN-{pins}_{mpn[:6]}"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        if legacy:
+            zf.writestr("KiCADv5/2026-02-08_08-16-27.lib", legacy_library(mpn, pins))
+            pretty = "KiCADv5/footprints.pretty"
+        else:
+            zf.writestr("KiCADv6/2026-02-08_08-16-27.kicad_sym", symbol_library([mpn], pins))
+            pretty = "KiCADv6/footprints.pretty"
+        for suffix in ("", "-M", "-L"):
+            fp_name = f"{package}{suffix}"
+            zf.writestr(f"{pretty}/{fp_name}.kicad_mod",
+                        footprint_text(fp_name, pins, model=f"{package}.step"))
+        if step_size:
+            zf.writestr(f"{package}.step", step_bytes(package, step_size))
+    return path
+
+
+def build_samacsys_zip(path: str, mpn: str, pins: int = 64, step_size: int = 256 * 1024) -> str:
+    """SamacSys/Mouser layout under KiCad/ (lowercase d)."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"KiCad/{mpn}.kicad_sym", symbol_library([mpn], pins))
+        zf.writestr(f"KiCad/{mpn}.kicad_mod", footprint_text(mpn, pins, model=f"{mpn}.stp"))
+        if step_size:
+            zf.writestr(f"KiCad/3dmodel/{mpn}.stp", step_bytes(mpn, step_size))
+        zf.writestr(f"{mpn}.txt", f"{mpn} model downloaded from Component Search Engine\n")
+    return path
+
+
+def build_snapeda_zip(path: str, mpn: str, pins: int = 64, step_size: int = 256 * 1024) -> str:
+    """SnapEDA layout: root-level files with UUID names; MPN only inside the files."""
+    rng = random.Random(mpn)
+    names = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(3)]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{names[0]}.kicad_sym", symbol_library([mpn], pins))
+        zf.writestr(f"{names[1]}.kicad_mod", footprint_text(mpn, pins, model=f"{names[2]}.step"))
+        if step_size:
+            zf.writestr(f"{names[2]}.step", step_bytes(mpn, step_size))
+        zf.writestr("how-to-import.htm", "<html><body>SnapEDA import instructions</body></html>\n")
+    return path
+
+
+def build_generic_legacy_zip(path: str, mpn: str, pins: int = 16, step_size: int = 0) -> str:
+    """Unknown vendor: legacy .lib plus .kicad_mod at the root."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{mpn}.lib", legacy_library(mpn, pins))
+        zf.writestr(f"{mpn}.kicad_mod", footprint_text(mpn, pins, smd=False))
+        if step_size:
+            zf.writestr(f"{mpn}.wrl", step_bytes(mpn, step_size))
+    return path
+
+
+def build_multi_step_zip(path: str, mpn: str, pins: int = 64, step_size: int = 64 * 1024 * 1024,
+                         models: int = 4) -> str:
+    """SamacSys layout carrying several large STEP variants (e.g. per package option)."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"KiCad/{mpn}.kicad_sym", symbol_library([mpn], pins))
+        zf.writestr(f"KiCad/{mpn}.kicad_mod", footprint_text(mpn, pins, model=f"{mpn}.stp"))
+        for i in range(models):
+            name = mpn if i == 0 else f"{mpn}_V{i}"
+            zf.writestr(f"KiCad/3dmodel/{name}.stp", step_bytes(name, step_size))
+    return path
+
+
+BUILDERS = {
+    "ultra_librarian": build_ultra_librarian_zip,
+    "ultra_librarian_legacy": lambda path, mpn, **kw: build_ultra_librarian_zip(path, mpn, legacy=True, **kw),
+    "samacsys": build_samacsys_zip,
+    "snapeda": build_snapeda_zip,
+    "generic_legacy": build_generic_legacy_zip,
+}
+
+
+def build_zip(layout: str, path: str, mpn: str, pins: int = 64, step_size: int = 256 * 1024) -> str:
+    """Build a synthetic download for the given provider layout."""
+    if layout not in BUILDERS:
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}")
+    return BUILDERS[layout](path, mpn, pins=pins, step_size=step_size)
+
+
+def build_target_library(path: str, n_symbols: int, pins: int = 8, prefix: str = "LIB") -> str:
+    """Write a .kicad_sym target library with n_symbols small symbols."""
+    names = [mpn_for(i, prefix) for i in range(n_symbols)]
+    with open(path, "w") as f:
+        f.write("(kicad_symbol_lib (version 20211014) (generator kicad_symbol_editor)\n")
+        for name in names:
+            f.write(symbol_body(name, pins=pins))
+            f.write("\n")
+        f.write(")\n")
+    return path
+
+
+_PACKAGES = ("QFN", "SOIC", "TSSOP", "LQFP", "DIP", "SOT-23", "BGA", "0603", "0805")
+_REFERENCES = ("U", "U", "U", "R", "C", "J", "D", "Q")
+_MANUFACTURERS = ("Synthetic Devices", "Acme Semiconductor", "Widget Micro", "Example Analog")
+
+
+_MPN_FAMILIES = ("STM32F", "STM32L", "LM", "TPS", "ATMEGA", "ESP32-", "MAX", "AD", "NE", "TL",
+                 "BQ", "LTC", "MCP", "PIC16F", "NRF52", "SN74HC", "LP", "OPA", "CY8C", "IRF")
+
+
+def vendor_mpn(rng: random.Random) -> str:
+    """A random MPN shaped like real ones: family, part number, suffix letters."""
+    letters = "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(rng.randint(1, 4)))
+    tail = rng.choice(("", str(rng.randint(1, 9)), "-TR", "/NOPB", "G4"))
+    return f"{rng.choice(_MPN_FAMILIES)}{rng.randint(1, 99999)}{letters}{tail}"
+
+
+def build_component_db(path: str, rows: int, seed: int = 0) -> str:
+    """Write a components.db with ``rows`` components (vendor_mpn names) and realistic facets."""
+    from database import FACET_COLUMNS, ComponentDB
+
+    rng = random.Random(seed)
+    mpns = set()
+    while len(mpns) < rows:
+        mpns.add(vendor_mpn(rng))
+    mpns = sorted(mpns)
+    rng.shuffle(mpns)
+    now = "2026-01-01T00:00:00+00:00"
+    columns = ["mpn", "manufacturer", "description", "symbol_name", "footprint_name",
+               "has_3d_model", "source_provider", "created_at", "updated_at", *FACET_COLUMNS]
+
+    def row(i):
+        mpn = mpns[i]
+        package = rng.choice(_PACKAGES)
+        pins = rng.choice((2, 3, 8, 14, 16, 20, 32, 48, 64, 100, 144))
+        half = round(rng.uniform(0.5, 12.0), 2)
+        return (mpn, rng.choice(_MANUFACTURERS), f"{package}-{pins} part {i}", mpn, mpn,
+                rng.random() < 0.8, rng.choice(("ultra_librarian", "samacsys", "snapeda")), now, now,
+                pins, 1 if pins < 100 else 2, rng.choice(_REFERENCES), f"{package}-{pins}", pins,
+                "tht" if package == "DIP" else "smd", -half, -half, half, half)
+
+    db = ComponentDB(path)
+    try:
+        db.conn.executemany(
+            f"INSERT INTO components ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            (row(i) for i in range(rows)))
+        db.conn.commit()
+        db.rebuild_mpn_index()
+    finally:
+        db.close()
+    return path
+
+
+def generate_corpus(out_dir: str, count: int = 10, pins: int = 64,
+                    step_size: int = 256 * 1024, layouts: tuple[str, ...] = LAYOUTS) -> list[str]:
+    """Write ``count`` ZIPs per layout into out_dir. Returns the ZIP paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for layout in layouts:
+        for i in range(count):
+            mpn = mpn_for(i, prefix=layout[:3].upper())
+            paths.append(build_zip(layout, os.path.join(out_dir, f"{layout}_{i:04d}.zip"),
+                                   mpn, pins=pins, step_size=step_size))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic provider ZIPs")
+    parser.add_argument("out_dir", help="Directory to write ZIPs into")
+    parser.add_argument("--count", type=int, default=10, help="ZIPs per layout")
+    parser.add_argument("--pins", type=int, default=64, help="Pins per symbol / pads per footprint")
+    parser.add_argument("--step-mb", type=float, default=0.25, help="STEP model size in MB (0 for none)")
+    parser.add_argument("--layout", action="append", choices=LAYOUTS,
+                        help="Only build this layout (repeatable)")
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out_dir, args.count, args.pins, int(args.step_mb * 1024 * 1024),
+                            tuple(args.layout) if args.layout else LAYOUTS)
+    print(f"Wrote {len(paths)} ZIPs to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Batch import throughput vs. worker count.
+
+Run with ./run_benchmarks.sh (see README). Throughput (imports/s) is stored in
+each benchmark's extra_info; it should grow with workers up to the core count.
+"""
+
+import os
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import batch
+from models import ImportJob
+
+from benchmarks import PIPELINE_LAYOUTS, synthetic
+
+BATCH_SIZE = int(os.environ.get('KIPARTBRIDGE_BENCH_BATCH', '32'))
+
+WORKER_COUNTS = sorted({1, 2, 4, os.cpu_count() or 1})
+
+
+@pytest.fixture(scope='module')
+def batch_jobs(bench_dir):
+    zip_dir = bench_dir / 'batch_zips'
+    zip_dir.mkdir(exist_ok=True)
+    return [
+        ImportJob(synthetic.build_zip(PIPELINE_LAYOUTS[i % len(PIPELINE_LAYOUTS)],
+                                      str(zip_dir / f'{i}.zip'), synthetic.mpn_for(i, 'BATCH'),
+                                      pins=64, step_size=256 * 1024))
+        for i in range(BATCH_SIZE)
+    ]
+
+
+@pytest.mark.benchmark(group='batch-import')
+@pytest.mark.parametrize('workers', WORKER_COUNTS)
+def test_batch_import(benchmark, batch_jobs, kicad_config, tmp_path, workers):
+    pool = batch.start_pool(workers)
+    rounds = iter(range(1000))
+
+    def run():
+        root = tmp_path / f'lib{next(rounds)}'
+        return batch.import_batch(batch_jobs, library_root=str(root), pool=pool)
+
+    try:
+        results = benchmark.pedantic(run, rounds=3)
+    finally:
+        pool.shutdown()
+    assert all(r.status == 'success' for r in results)
+    # No stats under --benchmark-disable
+    if benchmark.stats:
+        benchmark.extra_info['imports_per_second'] = len(batch_jobs) / benchmark.stats.stats.mean
@@ -0,0 +1,58 @@
+"""check_bom on a 400-line BOM against a large components.db.
+
+Run with ./run_benchmarks.sh (see README).
+"""
+
+import os
+import random
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import bom
+from database import ComponentDB
+
+from benchmarks import synthetic
+
+# Rows in the benchmark database
+DB_ROWS = int(os.environ.get('KIPARTBRIDGE_BENCH_DB_ROWS', '100000'))
+
+BOM_LINES = 400
+
+
+@pytest.fixture(scope='module')
+def component_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('bom') / 'components.db')
+    synthetic.build_component_db(path, DB_ROWS)
+    db = ComponentDB(path)
+    yield db
+    db.close()
+
+
+@pytest.fixture(scope='module')
+def bom_csv(component_db, tmp_path_factory):
+    # 90% in the library, 5% typos, 5% unknown parts
+    rng = random.Random(2)
+    mpns = [r['mpn'] for r in component_db.conn.execute('SELECT mpn FROM components')]
+    lines = []
+    for i, mpn in enumerate(rng.sample(mpns, BOM_LINES)):
+        if i % 20 == 0:
+            mpn = mpn[:-1]
+        elif i % 20 == 1:
+            mpn = f'UNKNOWN{i:04d}'
+        lines.append(f'R{i},{mpn}')
+    path = tmp_path_factory.mktemp('bom') / 'bom.csv'
+    path.write_text('Reference,MPN\n' + '\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.mark.benchmark(group='check-bom')
+@pytest.mark.parametrize('fuzzy', [False, True], ids=['exact', 'fuzzy'])
+def test_check_bom(benchmark, component_db, bom_csv, fuzzy):
+    def run():
+        return bom.summarize([r for chunk in bom.check_bom(bom_csv, component_db, fuzzy=fuzzy) for r in chunk])
+
+    summary = benchmark(run)
+    assert summary['total'] == BOM_LINES
+    assert summary['found'] >= BOM_LINES * 0.9
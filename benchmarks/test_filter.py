@@ -0,0 +1,55 @@
+"""Parametric filtering over the facet columns of a large components.db.
+
+Run with ./run_benchmarks.sh (see README).
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import database
+from database import ComponentDB
+
+from benchmarks import synthetic
+
+# Rows in the benchmark database
+DB_ROWS = int(os.environ.get('KIPARTBRIDGE_BENCH_DB_ROWS', '100000'))
+
+QUERIES = {
+    'no_filter': {},
+    'package': {'package': 'QFN-32'},
+    'pins_and_mount': {'min_pin_count': 16, 'max_pin_count': 64, 'mount_type': 'smd'},
+    'courtyard': {'reference': 'U', 'max_courtyard_width': 5.0},
+}
+
+
+@pytest.fixture(scope='module')
+def component_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('filter') / 'components.db')
+    synthetic.build_component_db(path, DB_ROWS)
+    db = ComponentDB(path)
+    yield db
+    db.close()
+
+
+def filter_cold(db, filters):
+    database.clear_filter_cache()
+    return db.filter_components(filters, limit=50)
+
+
+def filter_cached(db, filters):
+    return db.filter_components(filters, limit=50)
+
+
+@pytest.mark.benchmark(group='filter-components')
+@pytest.mark.parametrize('cache', ['cold', 'cached'])
+@pytest.mark.parametrize('query', QUERIES)
+def test_filter_components(benchmark, component_db, query, cache):
+    fn = filter_cold if cache == 'cold' else filter_cached
+    result = benchmark(fn, component_db, QUERIES[query])
+    assert result['total'] > 0
+    assert set(result['facets']) == set(('manufacturer', 'source_provider', 'reference', 'package',
+                                         'mount_type', 'pin_count', 'unit_count', 'pad_count',
+                                         'has_3d_model'))
@@ -0,0 +1,53 @@
+"""Trigram fuzzy MPN search over a large components.db.
+
+Run with ./run_benchmarks.sh (see README).
+"""
+
+import os
+import random
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from database import ComponentDB
+
+from benchmarks import synthetic
+
+# Rows in the benchmark database
+DB_ROWS = int(os.environ.get('KIPARTBRIDGE_BENCH_DB_ROWS', '100000'))
+
+TYPOS = {
+    'dropped_suffix': lambda mpn: mpn[:-1],
+    'extra_suffix': lambda mpn: mpn + '2G',
+    'swapped': lambda mpn: mpn[:3] + mpn[4] + mpn[3] + mpn[5:],
+    'lowercase_no_dash': lambda mpn: mpn.lower().replace('-', ''),
+}
+
+
+@pytest.fixture(scope='module')
+def component_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('fuzzy') / 'components.db')
+    synthetic.build_component_db(path, DB_ROWS)
+    db = ComponentDB(path)
+    yield db
+    db.close()
+
+
+@pytest.fixture(scope='module')
+def targets(component_db):
+    rows = component_db.conn.execute('SELECT mpn FROM components WHERE length(mpn) >= 8').fetchall()
+    return [r['mpn'] for r in random.Random(1).sample(rows, 20)]
+
+
+@pytest.mark.benchmark(group='fuzzy-search')
+@pytest.mark.parametrize('typo', TYPOS)
+def test_fuzzy_search(benchmark, component_db, targets, typo):
+    queries = iter(targets * 1000)
+
+    def search():
+        target = next(queries)
+        return target, component_db.fuzzy_search(TYPOS[typo](target))
+
+    target, results = benchmark(search)
+    assert target in [c['mpn'] for c in results]
@@ -0,0 +1,83 @@
+"""Pipeline benchmarks: classify, extractors, normalizer and process_download.
+
+Run with ./run_benchmarks.sh (see README). Requires pytest-benchmark.
+"""
+
+import os
+import tempfile
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from provider_classifier import classify
+from extractors import get_extractor
+from normalizer import normalize_symbol, normalize_footprint
+from main import process_download
+
+from benchmarks import LIBRARY_SIZES, PIPELINE_LAYOUTS, synthetic
+
+
+def _extract(zip_path, dest):
+    return get_extractor(classify(zip_path)).extract(zip_path, dest)
+
+
+@pytest.mark.benchmark(group='classify')
+@pytest.mark.parametrize('layout', synthetic.LAYOUTS)
+def test_classify(benchmark, provider_zips, layout):
+    benchmark(classify, provider_zips[layout])
+
+
+@pytest.mark.benchmark(group='extract')
+@pytest.mark.parametrize('layout', synthetic.LAYOUTS)
+def test_extract(benchmark, provider_zips, layout, tmp_path):
+    zip_path = provider_zips[layout]
+    extractor = get_extractor(classify(zip_path))
+
+    def setup():
+        return (zip_path, tempfile.mkdtemp(dir=tmp_path)), {}
+
+    component = benchmark.pedantic(extractor.extract, setup=setup, rounds=20)
+    assert component.footprint_file
+
+
+@pytest.mark.benchmark(group='normalize_symbol')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+def test_normalize_symbol(benchmark, provider_zips, target_library, size, tmp_path):
+    component = _extract(provider_zips['snapeda'], str(tmp_path / 'extract'))
+    lib_path = target_library(size)
+    rounds = 5 if size < 10000 else 2
+    name = benchmark.pedantic(normalize_symbol, args=(component, lib_path), rounds=rounds)
+    assert name == component.mpn
+
+
+@pytest.mark.benchmark(group='normalize_footprint')
+@pytest.mark.parametrize('layout', PIPELINE_LAYOUTS)
+def test_normalize_footprint(benchmark, provider_zips, layout, tmp_path):
+    component = _extract(provider_zips[layout], str(tmp_path / 'extract'))
+    fp_dir = tmp_path / 'kipartbridge.pretty'
+    models_dir = tmp_path / '3dmodels'
+    fp_dir.mkdir()
+    models_dir.mkdir()
+    benchmark(normalize_footprint, component, str(fp_dir), str(models_dir))
+
+
+@pytest.mark.benchmark(group='process_download')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+def test_process_download(benchmark, provider_zips, target_library, kicad_config, size, tmp_path):
+    root = tmp_path / 'kipartbridge'
+    root.mkdir()
+    target_library(size, str(root / 'kipartbridge.kicad_sym'))
+    rounds = 5 if size < 10000 else 2
+    result = benchmark.pedantic(process_download, args=(provider_zips['snapeda'],),
+                                kwargs={'library_root': str(root)}, rounds=rounds)
+    assert result.status == 'success', result.error
+
+
+@pytest.mark.benchmark(group='process_download_by_provider')
+@pytest.mark.parametrize('layout', PIPELINE_LAYOUTS)
+def test_process_download_by_provider(benchmark, provider_zips, kicad_config, layout, tmp_path):
+    root = tmp_path / 'kipartbridge'
+    result = benchmark.pedantic(process_download, args=(provider_zips[layout],),
+                                kwargs={'library_root': str(root)}, rounds=5)
+    assert result.status == 'success', result.error
+    assert os.path.exists(root / '3dmodels')
@@ -0,0 +1,66 @@
+"""Tokenizer micro-benchmarks: streaming sexpr vs. the old line scanner vs. kiutils.
+
+The line scanner is a reference copy of the per-line ``(symbol "`` matcher the
+extractors used before they switched to sexpr; it is kept here only as a
+baseline. Run with ./run_benchmarks.sh (see README).
+"""
+
+import re
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import sexpr
+
+from benchmarks import LIBRARY_SIZES
+
+
+def line_scanner_names(path):
+    """Old extractor approach: strip every line and match '(symbol "'."""
+    names = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('(symbol "'):
+                start = line.index('"') + 1
+                name = line[start:line.index('"', start)]
+                if not re.search(r'_\d+_\d+$', name):
+                    names.append(name)
+    return names
+
+
+def sexpr_names(path):
+    return list(sexpr.iter_symbol_names(path))
+
+
+def kiutils_names(path):
+    from kiutils.symbol import SymbolLib
+    return [s.entryName for s in SymbolLib.from_file(path).symbols]
+
+
+SCANNERS = {
+    'line_scanner': line_scanner_names,
+    'sexpr': sexpr_names,
+    'kiutils': kiutils_names,
+}
+
+
+@pytest.mark.benchmark(group='sexpr-all-names')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+@pytest.mark.parametrize('scanner', SCANNERS)
+def test_all_symbol_names(benchmark, library_templates, size, scanner):
+    if scanner == 'kiutils':
+        pytest.importorskip('kiutils')
+        if size > 1000:
+            pytest.skip('kiutils full parse is too slow at this size')
+    path = library_templates(size)
+    names = benchmark(SCANNERS[scanner], path)
+    assert len(names) == size
+
+
+@pytest.mark.benchmark(group='sexpr-first-name')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+def test_first_symbol_name(benchmark, library_templates, size):
+    """Extractor lookup: stops after the first top-level symbol, independent of size."""
+    path = library_templates(size)
+    assert benchmark(sexpr.first_symbol_name, path)
@@ -0,0 +1,60 @@
+"""Symbol library access: lazy SymbolLibView vs. a full SymbolLib parse.
+
+Run with ./run_benchmarks.sh (see README).
+"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from kiutils.symbol import SymbolLib
+
+import symbol_view
+from symbol_view import SymbolLibView
+from normalizer import link_symbol_to_footprint
+
+from benchmarks import LIBRARY_SIZES, synthetic
+
+
+def _middle_name(size):
+    return synthetic.mpn_for(size // 2, 'LIB')
+
+
+def kiutils_symbol(path, name):
+    return next(s for s in SymbolLib.from_file(path).symbols if s.entryName == name)
+
+
+def view_symbol(path, name):
+    with SymbolLibView(path) as view:
+        return view.symbol(name)
+
+
+def view_symbol_cold(path, name):
+    symbol_view.clear_cache()
+    return view_symbol(path, name)
+
+
+LOADERS = {
+    'kiutils': kiutils_symbol,
+    'view_cold_index': view_symbol_cold,
+    'view_cached_index': view_symbol,
+}
+
+
+@pytest.mark.benchmark(group='symbol-lookup')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+@pytest.mark.parametrize('loader', LOADERS)
+def test_symbol_lookup(benchmark, library_templates, size, loader):
+    if loader == 'kiutils' and size > 1000:
+        pytest.skip('full kiutils parse is too slow at this size')
+    path = library_templates(size)
+    name = _middle_name(size)
+    assert benchmark(LOADERS[loader], path, name).entryName == name
+
+
+@pytest.mark.benchmark(group='link-symbol')
+@pytest.mark.parametrize('size', LIBRARY_SIZES)
+def test_link_symbol_to_footprint(benchmark, target_library, size):
+    path = target_library(size)
+    name = _middle_name(size)
+    benchmark(link_symbol_to_footprint, path, name, 'kipartbridge', name)
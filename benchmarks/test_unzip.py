@@ -0,0 +1,53 @@
+"""ZIP extraction: parallel member decompression vs. zipfile.extractall.
+
+Uses a SamacSys-style archive with several large STEP models. Run with
+./run_benchmarks.sh (see README); KIPARTBRIDGE_BENCH_STEP_MB sets the size of
+each model.
+"""
+
+import os
+import shutil
+import zipfile
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from extractors.samacsys import SamacSysExtractor
+
+from benchmarks import synthetic
+
+STEP_MB = int(os.environ.get('KIPARTBRIDGE_BENCH_STEP_MB', '64'))
+MODEL_COUNTS = (1, 4)
+
+
+@pytest.fixture(scope='module')
+def multi_step_zips(bench_dir):
+    return {
+        count: synthetic.build_multi_step_zip(str(bench_dir / f'multi_step_{count}.zip'), 'MULTI1',
+                                              step_size=STEP_MB * 1024 * 1024, models=count)
+        for count in MODEL_COUNTS
+    }
+
+
+def _extractall(zip_path, dest):
+    with zipfile.ZipFile(zip_path) as zf:
+        zf.extractall(dest)
+
+
+def _parallel(zip_path, dest):
+    SamacSysExtractor()._unzip(zip_path, dest)
+
+
+@pytest.mark.benchmark(group='unzip')
+@pytest.mark.parametrize('models', MODEL_COUNTS)
+@pytest.mark.parametrize('method', ['extractall', 'parallel'])
+def test_unzip(benchmark, multi_step_zips, tmp_path, models, method):
+    fn = _extractall if method == 'extractall' else _parallel
+    dest = tmp_path / 'out'
+
+    def setup():
+        shutil.rmtree(dest, ignore_errors=True)
+        return (multi_step_zips[models], str(dest)), {}
+
+    benchmark.pedantic(fn, setup=setup, rounds=3)
+    assert len(os.listdir(dest / 'KiCad' / '3dmodel')) == models
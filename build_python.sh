@@ -25,8 +25,26 @@ python -m PyInstaller --name kipartbridge-sidecar \
   --hidden-import=provider_classifier \
   --hidden-import=normalizer \
   --hidden-import=library_injector \
+  --hidden-import=kicad_config \
+  --hidden-import=sexpr \
+  --hidden-import=symbol_view \
+  --hidden-import=fsutil \
+  --hidden-import=settings \
   --hidden-import=database \
   --hidden-import=models \
+  --hidden-import=metrics \
+  --hidden-import=profiling \
+  --hidden-import=corpus \
+  --hidden-import=batch \
+  --hidden-import=bom \
+  --hidden-import=workers \
+  --hidden-import=limits \
+  --hidden-import=verify \
+  --hidden-import=library_gc \
+  --hidden-import=pack \
+  --hidden-import=rebuild \
+  --hidden-import=snapshot \
+  --hidden-import=sync \
   --paths=. \
   main.py
 
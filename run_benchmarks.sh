@@ -0,0 +1,30 @@
+#!/bin/bash
+# Pipeline benchmarks (pytest-benchmark) against synthetic provider ZIPs.
+#
+#   ./run_benchmarks.sh save        record a new baseline in benchmarks/.benchmarks
+#   ./run_benchmarks.sh             compare against the latest baseline; fails if any
+#                                   benchmark's median regresses by more than
+#                                   BENCH_THRESHOLD (default 15%)
+#
+# Extra arguments are passed to pytest, e.g. -k normalize_symbol.
+# Set KIPARTBRIDGE_BENCH_SIZES=10,1000 to skip the 10k-symbol library.
+set -e
+cd "$(dirname "$0")"
+
+if [ -f venv/bin/activate ]; then
+  source venv/bin/activate
+fi
+
+export PYTHONPATH=src/python
+STORAGE="file://benchmarks/.benchmarks"
+THRESHOLD="${BENCH_THRESHOLD:-15%}"
+
+if [ "$1" = "save" ]; then
+  shift
+  python -m pytest benchmarks/ --benchmark-only \
+    --benchmark-storage="$STORAGE" --benchmark-save=baseline "$@"
+else
+  python -m pytest benchmarks/ --benchmark-only \
+    --benchmark-storage="$STORAGE" --benchmark-compare \
+    --benchmark-compare-fail="median:$THRESHOLD" "$@"
+fi
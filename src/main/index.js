@@ -58,6 +58,13 @@ function createWindow() {
   pythonBridge = new PythonBridge();
   pythonBridge.start();
 
+  // Forward library change notifications so the library browser can patch itself
+  pythonBridge.on('library-changed', (params) => {
+    if (!rendererView.webContents.isDestroyed()) {
+      rendererView.webContents.send('library-changed', params);
+    }
+  });
+
   // Setup download interception
   downloadInterceptor = new DownloadInterceptor(pythonBridge, rendererView);
   downloadInterceptor.setup();
@@ -100,6 +107,58 @@ ipcMain.handle('search-components', async (event, query, options) => {
   return pythonBridge.searchComponents(query, options);
 });
 
+ipcMain.handle('fuzzy-search', async (event, query, options) => {
+  return pythonBridge.fuzzySearch(query, options);
+});
+
+ipcMain.handle('check-bom', async (event, bomPath, options) => {
+  return pythonBridge.checkBom(bomPath, options);
+});
+
+ipcMain.handle('verify-library', async (event, options) => {
+  return pythonBridge.verifyLibrary(options);
+});
+
+ipcMain.handle('collect-garbage', async (event, options) => {
+  return pythonBridge.collectGarbage(options);
+});
+
+ipcMain.handle('rebuild-library', async (event, options) => {
+  return pythonBridge.rebuildLibrary(options);
+});
+
+ipcMain.handle('create-snapshot', async (event, options) => {
+  return pythonBridge.createSnapshot(options);
+});
+
+ipcMain.handle('list-snapshots', async (event, options) => {
+  return pythonBridge.listSnapshots(options);
+});
+
+ipcMain.handle('restore-snapshot', async (event, name, options) => {
+  return pythonBridge.restoreSnapshot(name, options);
+});
+
+ipcMain.handle('sync-library', async (event, options) => {
+  return pythonBridge.syncLibrary(options);
+});
+
+ipcMain.handle('pack-library', async (event, archive, options) => {
+  return pythonBridge.packLibrary(archive, options);
+});
+
+ipcMain.handle('unpack-library', async (event, archive, options) => {
+  return pythonBridge.unpackLibrary(archive, options);
+});
+
+ipcMain.handle('filter-components', async (event, filters, options) => {
+  return pythonBridge.filterComponents(filters, options);
+});
+
+ipcMain.handle('changes-since', async (event, cursor, options) => {
+  return pythonBridge.changesSince(cursor, options);
+});
+
 ipcMain.handle('ping-python', async () => {
   return pythonBridge.ping();
 });
@@ -1,13 +1,18 @@
 /**
  * Python sidecar bridge — JSON-RPC client over stdin/stdout.
+ *
+ * Notifications pushed by the sidecar (messages with a method and no id, e.g.
+ * library-changed) are emitted as events named after the method.
  */
 
 const { spawn } = require('child_process');
+const EventEmitter = require('events');
 const path = require('path');
 const readline = require('readline');
 
-class PythonBridge {
+class PythonBridge extends EventEmitter {
   constructor() {
+    super();
     this._process = null;
     this._requestId = 0;
     this._pending = new Map(); // id -> { resolve, reject, timer }
@@ -78,6 +83,10 @@ class PythonBridge {
   _handleLine(line) {
     try {
       const response = JSON.parse(line);
+      if (response.id === undefined && response.method) {
+        this.emit(response.method, response.params);
+        return;
+      }
       const pending = this._pending.get(response.id);
       if (!pending) return;
 
@@ -125,9 +134,23 @@ class PythonBridge {
       referrer_url: referrerUrl,
       library_root: options.libraryRoot,
       overwrite: options.overwrite || false,
+      profile: options.profile,
     });
   }
 
+  async processBatch(files, options = {}) {
+    return this._call('process_batch', {
+      files: files.map((f) => ({
+        filepath: f.filepath,
+        source_url: f.sourceUrl,
+        referrer_url: f.referrerUrl,
+      })),
+      library_root: options.libraryRoot,
+      overwrite: options.overwrite || false,
+      workers: options.workers,
+    }, options.timeoutMs || 600000);
+  }
+
   async listComponents(options = {}) {
     return this._call('list_components', {
       library_root: options.libraryRoot,
@@ -142,6 +165,150 @@ class PythonBridge {
       library_root: options.libraryRoot,
     });
   }
+
+  async fuzzySearch(query, options = {}) {
+    return this._call('fuzzy_search', {
+      query,
+      library_root: options.libraryRoot,
+      limit: options.limit || 10,
+    });
+  }
+
+  async checkBom(bomPath, options = {}) {
+    // With onResults, entries arrive in bom-results notifications tagged with
+    // this request's id (the one _call assigns next) and the response holds
+    // just the summary
+    const id = this._requestId + 1;
+    const listener = (params) => {
+      if (params.id === id) options.onResults(params.results);
+    };
+    if (options.onResults) this.on('bom-results', listener);
+    try {
+      return await this._call('check_bom', {
+        path: bomPath,
+        library_root: options.libraryRoot,
+        fuzzy: options.fuzzy !== false,
+        stream: Boolean(options.onResults),
+      }, 600000);
+    } finally {
+      if (options.onResults) this.off('bom-results', listener);
+    }
+  }
+
+  async verifyLibrary(options = {}) {
+    return this._call('verify_library', {
+      library_root: options.libraryRoot,
+      fix: options.fix || false,
+      full: options.full || false,
+    }, 600000);
+  }
+
+  async collectGarbage(options = {}) {
+    const params = {
+      library_root: options.libraryRoot,
+      dry_run: options.dryRun || false,
+      quarantine: options.quarantine !== false,
+    };
+    if (options.graceSeconds !== undefined) params.grace_seconds = options.graceSeconds;
+    return this._call('collect_garbage', params, 600000);
+  }
+
+  async rebuildLibrary(options = {}) {
+    return this._call('rebuild_library', {
+      library_root: options.libraryRoot,
+      workers: options.workers,
+      restart: options.restart || false,
+    }, 3600000);
+  }
+
+  async createSnapshot(options = {}) {
+    return this._call('create_snapshot', {
+      library_root: options.libraryRoot,
+      label: options.label,
+    }, 600000);
+  }
+
+  async listSnapshots(options = {}) {
+    return this._call('list_snapshots', { library_root: options.libraryRoot });
+  }
+
+  async restoreSnapshot(name, options = {}) {
+    return this._call('restore_snapshot', {
+      library_root: options.libraryRoot,
+      name,
+      tables: options.tables || false,
+    }, 600000);
+  }
+
+  async syncLibrary(options = {}) {
+    return this._call('sync_library', {
+      library_root: options.libraryRoot,
+      dest: options.dest,
+      threads: options.threads,
+      full: options.full || false,
+    }, 3600000);
+  }
+
+  async packLibrary(archive, options = {}) {
+    return this._call('pack_library', {
+      library_root: options.libraryRoot,
+      archive,
+      threads: options.threads,
+    }, 3600000);
+  }
+
+  async unpackLibrary(archive, options = {}) {
+    return this._call('unpack_library', {
+      library_root: options.libraryRoot,
+      archive,
+      components: options.components,
+      overwrite: options.overwrite || false,
+    }, 3600000);
+  }
+
+  async filterComponents(filters, options = {}) {
+    return this._call('filter_components', {
+      filters,
+      library_root: options.libraryRoot,
+      limit: options.limit || 100,
+      offset: options.offset || 0,
+      facets: options.facets !== false,
+    });
+  }
+
+  async changesSince(cursor, options = {}) {
+    return this._call('changes_since', {
+      cursor,
+      library_root: options.libraryRoot,
+      limit: options.limit,
+    });
+  }
+
+  async getSettings() {
+    return this._call('get_settings');
+  }
+
+  async updateSettings(settings) {
+    return this._call('update_settings', { settings });
+  }
+
+  async getWorkerStats() {
+    return this._call('get_worker_stats');
+  }
+
+  async getLimits() {
+    return this._call('get_limits');
+  }
+
+  async updateLimits(limits) {
+    return this._call('update_limits', { limits });
+  }
+
+  async getMetrics(options = {}) {
+    return this._call('get_metrics', {
+      prometheus_path: options.prometheusPath,
+    });
+  }
 }
 
 module.exports = PythonBridge;
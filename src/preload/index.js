@@ -15,6 +15,19 @@ contextBridge.exposeInMainWorld('kipartbridge', {
   // Components
   listComponents: (options) => ipcRenderer.invoke('list-components', options),
   searchComponents: (query, options) => ipcRenderer.invoke('search-components', query, options),
+  fuzzySearch: (query, options) => ipcRenderer.invoke('fuzzy-search', query, options),
+  checkBom: (bomPath, options) => ipcRenderer.invoke('check-bom', bomPath, options),
+  verifyLibrary: (options) => ipcRenderer.invoke('verify-library', options),
+  collectGarbage: (options) => ipcRenderer.invoke('collect-garbage', options),
+  rebuildLibrary: (options) => ipcRenderer.invoke('rebuild-library', options),
+  createSnapshot: (options) => ipcRenderer.invoke('create-snapshot', options),
+  listSnapshots: (options) => ipcRenderer.invoke('list-snapshots', options),
+  restoreSnapshot: (name, options) => ipcRenderer.invoke('restore-snapshot', name, options),
+  syncLibrary: (options) => ipcRenderer.invoke('sync-library', options),
+  packLibrary: (archive, options) => ipcRenderer.invoke('pack-library', archive, options),
+  unpackLibrary: (archive, options) => ipcRenderer.invoke('unpack-library', archive, options),
+  filterComponents: (filters, options) => ipcRenderer.invoke('filter-components', filters, options),
+  changesSince: (cursor, options) => ipcRenderer.invoke('changes-since', cursor, options),
 
   // Python health
   ping: () => ipcRenderer.invoke('ping-python'),
@@ -33,6 +46,7 @@ contextBridge.exposeInMainWorld('kipartbridge', {
       'processing-complete',
       'processing-error',
       'download-error',
+      'library-changed',
     ];
     if (validChannels.includes(channel)) {
       const listener = (event, ...args) => callback(...args);
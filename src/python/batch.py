@@ -0,0 +1,293 @@
+"""Batch imports — parallel extraction on a process pool, one ordered writer.
+
+classify, the extractor, footprint normalization and symbol preparation are
+independent per ZIP and CPU-bound in kiutils, so they run in worker processes.
+Workers stage their output (footprint, 3D models) in a scratch dir inside the
+library root and return the prepared kiutils Symbol. The parent process is the
+single writer: it consumes results in input order, moves staged files into
+place, merges all symbols into the symbol library with one load and one write,
+then registers lib tables and updates ComponentDB.
+
+Workers are pre-forked before the first job. Where available they fork from a
+forkserver that has already imported kiutils and the extractors, so no worker
+pays the import cost; elsewhere they are spawned and import it in their
+initializer.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from kiutils.symbol import Symbol
+
+import corpus
+from database import ComponentDB
+from extractors import get_extractor
+from fsutil import file_lock
+from library_injector import (
+    LIB_NAME, resolve_library_root, ensure_library_dirs, ensure_library_tables,
+    setup_environment_variable,
+)
+from limits import apply_memory_limit, get_limits
+from metrics import METRICS
+from models import ImportJob, ProcessingResult
+from normalizer import (
+    sanitize_name, prepare_symbol, merge_symbols, normalize_footprint, model_files,
+    set_symbol_footprint, upgrade_symbol_lib,
+)
+from provider_classifier import classify
+from settings import get_setting
+from snapshot import create_snapshot
+from workers import mp_context
+
+
+@dataclass
+class _Prepared:
+    """What a worker hands to the writer for one ZIP."""
+    index: int
+    job: ImportJob
+    provider: str | None = None
+    mpn: str | None = None
+    manufacturer: str | None = None
+    description: str | None = None
+    symbol: Symbol | None = None
+    footprint_name: str | None = None
+    footprint_path: str | None = None     # staged .kicad_mod
+    model_paths: list[str] = field(default_factory=list)   # staged 3D models
+    placed: list[str] = field(default_factory=list)   # library files this job added (not replaced)
+    has_3d_model: bool = False
+    facets: dict = field(default_factory=dict)   # see database.FACET_COLUMNS
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def default_workers() -> int:
+    """Worker count: the batch_workers setting, else one per core."""
+    return int(get_setting("batch_workers") or os.cpu_count() or 1)
+
+
+def _init_worker(memory_bytes: int) -> None:
+    # A no-op under the forkserver (already imported); warms spawned workers
+    import kiutils.symbol  # noqa: F401
+    import kiutils.footprint  # noqa: F401
+    # Workers never record corpus entries; the writer does
+    corpus.configure(None)
+    # Workers parse untrusted downloads; cap them like the isolated parser
+    apply_memory_limit(memory_bytes)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def start_pool(workers: int) -> ProcessPoolExecutor:
+    """Create the worker pool and start every worker before returning."""
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(),
+                               initializer=_init_worker,
+                               initargs=(get_limits()["parse_memory_bytes"],))
+    for f in [pool.submit(_ready) for _ in range(workers)]:
+        f.result()
+    return pool
+
+
+def _prepare(index: int, job: ImportJob, scratch_dir: str) -> _Prepared:
+    """Worker side: classify, extract, normalize footprint, prepare symbol."""
+    start = time.perf_counter()
+    prepared = _Prepared(index=index, job=job)
+    work = os.path.join(scratch_dir, str(index))
+    extract_dir = os.path.join(work, "extract")
+    fp_dir = os.path.join(work, "pretty")
+    models_dir = os.path.join(work, "3dmodels")
+    for d in (extract_dir, fp_dir, models_dir):
+        os.makedirs(d, exist_ok=True)
+    try:
+        provider = classify(job.zip_path, job.source_url, job.referrer_url)
+        prepared.provider = provider.value
+        component = get_extractor(provider).extract(job.zip_path, extract_dir,
+                                                    job.source_url, job.referrer_url)
+        prepared.mpn = sanitize_name(component.mpn)
+        prepared.manufacturer = component.manufacturer
+        prepared.description = component.description
+        prepared.has_3d_model = component.model_step is not None or component.model_wrl is not None
+        if component.symbol_file:
+            prepared.symbol, symbol_facets = prepare_symbol(component, with_facets=True)
+            prepared.facets.update(symbol_facets)
+        if component.footprint_file:
+            prepared.footprint_name, footprint_facets = normalize_footprint(
+                component, fp_dir, models_dir, with_facets=True)
+            prepared.facets.update(footprint_facets)
+            prepared.footprint_path = os.path.join(fp_dir, f"{prepared.footprint_name}.kicad_mod")
+            prepared.model_paths = [os.path.join(models_dir, name) for _, name in model_files(component)]
+    except MemoryError:
+        prepared.error = "Parsing exceeded the memory limit"
+    except Exception as e:
+        prepared.error = str(e)
+    prepared.seconds = time.perf_counter() - start
+    return prepared
+
+
+def import_batch(jobs: list[ImportJob], library_root: str | None = None,
+                 workers: int | None = None, overwrite: bool = False,
+                 pool: ProcessPoolExecutor | None = None) -> list[ProcessingResult]:
+    """Import many ZIPs. Returns one ProcessingResult per job, in job order.
+
+    Pass an existing pool (from start_pool) to reuse warm workers across
+    batches; otherwise one with ``workers`` processes is started and shut down.
+    """
+    if library_root is None:
+        library_root = resolve_library_root()
+    ensure_library_dirs(library_root)
+    if get_setting("snapshot_before_batch"):
+        create_snapshot(library_root, label="batch", auto=True)
+    sym_lib_path = os.path.join(library_root, f"{LIB_NAME}.kicad_sym")
+    fp_dir = os.path.join(library_root, f"{LIB_NAME}.pretty")
+    models_dir = os.path.join(library_root, "3dmodels")
+
+    # Scratch lives in the library root so staged files are moved, not copied
+    scratch_dir = tempfile.mkdtemp(prefix=".batch_", dir=library_root)
+    owns_pool = pool is None
+    if owns_pool:
+        pool = start_pool(workers or default_workers())
+
+    results: list[ProcessingResult | None] = [None] * len(jobs)
+    written: list[_Prepared] = []
+    db = ComponentDB(os.path.join(library_root, "components.db"))
+    try:
+        prepared_iter = pool.map(_prepare, range(len(jobs)), jobs,
+                                 [scratch_dir] * len(jobs))
+        symbols = []
+        with METRICS.stage("batch_write"):
+            # Single writer, in input order, while workers keep going
+            for prepared in prepared_iter:
+                METRICS.observe_stage("batch_prepare", prepared.seconds)
+                if prepared.error is None:
+                    try:
+                        _place_files(prepared, fp_dir, models_dir)
+                    except OSError as e:
+                        _remove_placed(prepared, fp_dir)
+                        prepared.error = str(e)
+                if prepared.error is not None:
+                    results[prepared.index] = _error_result(prepared)
+                    continue
+                if prepared.symbol is not None:
+                    if prepared.footprint_name:
+                        set_symbol_footprint(prepared.symbol, LIB_NAME, prepared.footprint_name)
+                    symbols.append(prepared.symbol)
+                written.append(prepared)
+
+            try:
+                if symbols:
+                    with METRICS.stage("merge_symbols"), file_lock(sym_lib_path, "symbol_lib"):
+                        merge_symbols(sym_lib_path, symbols)
+                        upgrade_symbol_lib(sym_lib_path)
+            except Exception as e:
+                # The symbol library is as it was; take back the footprints and
+                # models placed for it and fail every job that was waiting on it
+                for prepared in written:
+                    _remove_placed(prepared, fp_dir)
+                    prepared.error = str(e)
+                    results[prepared.index] = _error_result(prepared)
+                written = []
+
+            registration_error = None
+            if written:
+                try:
+                    with METRICS.stage("lib_tables"):
+                        ensure_library_tables(library_root)
+                    with METRICS.stage("env_var"):
+                        setup_environment_variable(library_root)
+                except Exception as e:
+                    # The parts are in the library by now, so they are still recorded
+                    registration_error = f"Could not register the library with KiCad: {e}"
+
+            with METRICS.stage("database"):
+                for prepared in written:
+                    results[prepared.index] = _record(db, prepared, overwrite)
+                    if registration_error:
+                        results[prepared.index].warnings.append(registration_error)
+    finally:
+        db.close()
+        if owns_pool:
+            pool.shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    for job, result in zip(jobs, results):
+        corpus.maybe_record(job.zip_path, job.source_url, job.referrer_url, result)
+    return results
+
+
+def _place_files(prepared: _Prepared, fp_dir: str, models_dir: str) -> None:
+    if prepared.footprint_path:
+        with file_lock(fp_dir, "footprints"):
+            _place(prepared, prepared.footprint_path, fp_dir)
+    for path in prepared.model_paths:
+        _place(prepared, path, models_dir)
+
+
+def _place(prepared: _Prepared, staged: str, directory: str) -> None:
+    dest = os.path.join(directory, os.path.basename(staged))
+    new = not os.path.exists(dest)
+    os.replace(staged, dest)
+    if new:
+        prepared.placed.append(dest)
+
+
+def _remove_placed(prepared: _Prepared, fp_dir: str) -> None:
+    """Remove the files _place_files added for a job that failed afterwards.
+
+    Files it replaced stay: the previous version is gone, and the existing
+    database row still refers to them.
+    """
+    with file_lock(fp_dir, "footprints"):
+        for path in prepared.placed:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+    prepared.placed = []
+
+
+def _record(db: ComponentDB, prepared: _Prepared, overwrite: bool) -> ProcessingResult:
+    warnings = []
+    if db.component_exists(prepared.mpn) and not overwrite:
+        warnings.append(f"Component {prepared.mpn} already exists, updating")
+    symbol_name = prepared.symbol.entryName if prepared.symbol is not None else None
+    if symbol_name is None:
+        warnings.append("No symbol file found in download")
+    if prepared.footprint_name is None:
+        warnings.append("No footprint file found in download")
+
+    comp_id = db.upsert_component(
+        mpn=prepared.mpn,
+        symbol_name=symbol_name,
+        footprint_name=prepared.footprint_name,
+        has_3d_model=prepared.has_3d_model,
+        manufacturer=prepared.manufacturer,
+        description=prepared.description,
+        source_provider=prepared.provider,
+        source_url=prepared.job.source_url,
+        referrer_url=prepared.job.referrer_url,
+        facets=prepared.facets,
+    )
+    db.log_import(comp_id, "import", prepared.job.zip_path)
+
+    if not prepared.has_3d_model:
+        warnings.append("No 3D model found in download")
+    METRICS.record_import(prepared.provider, ok=True)
+    return ProcessingResult(
+        status="success" if symbol_name and prepared.footprint_name else "partial",
+        provider=prepared.provider,
+        mpn=prepared.mpn,
+        symbol_name=symbol_name,
+        footprint_name=prepared.footprint_name,
+        has_3d_model=prepared.has_3d_model,
+        warnings=warnings,
+    )
+
+
+def _error_result(prepared: _Prepared) -> ProcessingResult:
+    METRICS.record_import(prepared.provider, ok=False)
+    return ProcessingResult(status="error", provider=prepared.provider, error=prepared.error)
@@ -0,0 +1,251 @@
+"""BOM presence check — which parts of a BOM are already in the library.
+
+A BOM is read from a CSV export, a KiCad schematic (.kicad_sch, including
+its sub-sheets) or a KiCad netlist (.net). Files are scanned incrementally;
+schematic and netlist forms are parsed one placed symbol at a time. Lines are
+grouped by normalized MPN (database.normalize_mpn), so "ESP32-S3" and
+"esp32s3" on two lines are one entry, and resolved BOM_CHUNK_SIZE entries at
+a time with ComponentDB.lookup_mpns. MPNs not found exactly are tried with
+fuzzy_search.
+
+Each result is:
+
+    {"mpn", "references", "quantity",
+     "status": "found" | "fuzzy" | "missing",
+     "component": {mpn, manufacturer, symbol_name, footprint_name, has_3d_model} | None,
+     "candidates": [same fields + "distance"]}    # for fuzzy matches
+"""
+
+import csv
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import sexpr
+from database import ComponentDB, normalize_mpn
+
+# Unique MPNs resolved per lookup_mpns query (and per streamed chunk)
+BOM_CHUNK_SIZE = 500
+
+# Fuzzy candidates reported per missing MPN
+BOM_FUZZY_CANDIDATES = 3
+
+# Column / field names that hold the MPN, best first (compared lowercase, alphanumerics only)
+_MPN_FIELDS = ("mpn", "manufacturerpartnumber", "mfrpartnumber", "mfrpn", "mfgpartnumber",
+               "mfgpn", "mfrpartno", "manufacturerpn", "partnumber")
+_REFERENCE_FIELDS = ("reference", "references", "designator", "designators", "ref", "refs",
+                     "refdes", "referencedesignator", "referencedesignators")
+_QUANTITY_FIELDS = ("quantity", "qty", "qnty", "count")
+
+# Rows searched for the CSV header (exports may start with title rows)
+_CSV_HEADER_ROWS = 20
+
+_FIELD_NAME_RE = re.compile(r"[^0-9a-z]")
+_REFERENCE_SPLIT_RE = re.compile(r"[\s,;]+")
+
+_COMPONENT_FIELDS = ("mpn", "manufacturer", "symbol_name", "footprint_name", "has_3d_model")
+
+
+@dataclass
+class BomLine:
+    """One BOM entry: an MPN and the parts placed with it."""
+    mpn: str
+    references: list[str] = field(default_factory=list)
+    quantity: int = 0
+
+
+def _field_key(name: str) -> str:
+    return _FIELD_NAME_RE.sub("", (name or "").lower())
+
+
+def _pick_field(names: dict[str, object], candidates: tuple[str, ...]):
+    """The value of the first candidate present in names (keyed by _field_key)."""
+    for candidate in candidates:
+        if candidate in names:
+            return names[candidate]
+    return None
+
+
+# ── Readers ──────────────────────────────────────────────────────────────────
+
+def read_bom(path: str) -> Iterator[BomLine]:
+    """BOM lines of a CSV, .kicad_sch or .net file, in file order (not grouped)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".kicad_sch":
+        return _read_schematic(path, set())
+    if ext == ".net":
+        return _read_netlist(path)
+    if ext in (".csv", ".tsv", ".txt"):
+        return _read_csv(path)
+    raise ValueError(f"Unsupported BOM file: {os.path.basename(path)} (expected .csv, .kicad_sch or .net)")
+
+
+def _read_csv(path: str) -> Iterator[BomLine]:
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(8192), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        reader = csv.reader(f, dialect)
+        columns = None
+        for row_no, row in enumerate(reader):
+            if columns is None:
+                keys = {_field_key(name): i for i, name in enumerate(row)}
+                mpn_col = _pick_field(keys, _MPN_FIELDS)
+                if mpn_col is None:
+                    if row_no >= _CSV_HEADER_ROWS:
+                        break
+                    continue
+                columns = (mpn_col, _pick_field(keys, _REFERENCE_FIELDS), _pick_field(keys, _QUANTITY_FIELDS))
+                continue
+            mpn_col, ref_col, qty_col = columns
+            mpn = row[mpn_col].strip() if mpn_col < len(row) else ""
+            if not mpn:
+                continue
+            refs = []
+            if ref_col is not None and ref_col < len(row):
+                refs = [r for r in _REFERENCE_SPLIT_RE.split(row[ref_col]) if r]
+            quantity = len(refs) or 1
+            if qty_col is not None and qty_col < len(row):
+                try:
+                    quantity = int(float(row[qty_col]))
+                except ValueError:
+                    pass
+            yield BomLine(mpn, refs, quantity)
+        if columns is None:
+            raise ValueError(f"No MPN column found in {os.path.basename(path)}")
+
+
+def _children(form: list, head: str) -> Iterator[list]:
+    return (c for c in form if isinstance(c, list) and c and c[0] == head)
+
+
+def _read_forms(path: str, depth: int, heads: tuple[str, ...]) -> Iterator[list]:
+    """Parse each form with one of heads opened at depth, one at a time."""
+    with open(path, "rb") as scan, open(path, "rb") as data:
+        for head, _, start, end in sexpr.iter_form_spans(scan, depth):
+            if head in heads:
+                data.seek(start)
+                yield sexpr.parse(data.read(end - start))
+
+
+def _read_schematic(path: str, seen: set) -> Iterator[BomLine]:
+    seen.add(os.path.realpath(path))
+    for form in _read_forms(path, 1, ("symbol", "sheet")):
+        props = {_field_key(p[1]): p[2] for p in _children(form, "property") if len(p) > 2}
+        if form[0] == "sheet":
+            sheet_file = props.get("sheetfile")
+            if sheet_file:
+                sub = os.path.join(os.path.dirname(path), sheet_file)
+                if os.path.realpath(sub) not in seen and os.path.exists(sub):
+                    yield from _read_schematic(sub, seen)
+            continue
+        if any(len(c) > 1 and c[1] == "no" for c in _children(form, "in_bom")):
+            continue
+        reference = props.get("reference", "")
+        mpn = _pick_field(props, _MPN_FIELDS)
+        if not mpn or reference.startswith("#"):   # power symbols, flags
+            continue
+        yield BomLine(mpn.strip(), [reference] if reference else [], 1)
+
+
+def _read_netlist(path: str) -> Iterator[BomLine]:
+    for form in _read_forms(path, 2, ("comp",)):
+        fields = {}
+        for fields_form in _children(form, "fields"):
+            for f in _children(fields_form, "field"):
+                name = next((n[1] for n in _children(f, "name") if len(n) > 1), None)
+                if name is not None and len(f) > 2 and isinstance(f[2], str):
+                    fields[_field_key(name)] = f[2]
+        properties = {}
+        for p in _children(form, "property"):
+            name = next((n[1] for n in _children(p, "name") if len(n) > 1), None)
+            value = next((v[1] for v in _children(p, "value") if len(v) > 1), "")
+            if name is not None:
+                properties[_field_key(name)] = value
+        if "excludefrombom" in properties:
+            continue
+        mpn = _pick_field(fields, _MPN_FIELDS) or _pick_field(properties, _MPN_FIELDS)
+        if not mpn:
+            continue
+        reference = next((r[1] for r in _children(form, "ref") if len(r) > 1), "")
+        yield BomLine(mpn.strip(), [reference] if reference else [], 1)
+
+
+def group_lines(lines) -> list[BomLine]:
+    """Merge lines whose MPNs normalize alike, keeping first-seen order."""
+    grouped = {}
+    for line in lines:
+        key = normalize_mpn(line.mpn)
+        if not key:
+            continue
+        entry = grouped.get(key)
+        if entry is None:
+            grouped[key] = BomLine(line.mpn, list(line.references), line.quantity)
+        else:
+            new_refs = [r for r in line.references if r not in entry.references]
+            if line.references and not new_refs:
+                continue    # another unit of a part already counted
+            entry.references.extend(new_refs)
+            entry.quantity += line.quantity
+    return list(grouped.values())
+
+
+# ── Check ────────────────────────────────────────────────────────────────────
+
+def _component_summary(row: dict) -> dict:
+    summary = {k: row.get(k) for k in _COMPONENT_FIELDS}
+    summary["has_3d_model"] = bool(summary["has_3d_model"])
+    return summary
+
+
+def _fuzzy_candidates(db: ComponentDB, mpn: str) -> list[dict]:
+    # Edits allowed: a quarter of the MPN, so short MPNs need near-exact matches
+    max_distance = max(1, len(normalize_mpn(mpn)) // 4)
+    candidates = []
+    for row in db.fuzzy_search(mpn, limit=BOM_FUZZY_CANDIDATES):
+        if row["distance"] <= max_distance:
+            candidate = _component_summary(row)
+            candidate["distance"] = row["distance"]
+            candidates.append(candidate)
+    return candidates
+
+
+def check_bom(path: str, db: ComponentDB | None, fuzzy: bool = True,
+              chunk_size: int | None = None) -> Iterator[list[dict]]:
+    """Resolve the BOM at path against db, yielding results chunk_size entries at a time.
+
+    chunk_size defaults to BOM_CHUNK_SIZE. With db None (no library yet)
+    every entry is missing.
+    """
+    chunk_size = chunk_size or BOM_CHUNK_SIZE
+    lines = group_lines(read_bom(path))
+    for start in range(0, len(lines), chunk_size):
+        chunk = lines[start:start + chunk_size]
+        found = db.lookup_mpns([line.mpn for line in chunk]) if db is not None else {}
+        results = []
+        for line in chunk:
+            result = {"mpn": line.mpn, "references": line.references, "quantity": line.quantity,
+                      "status": "missing", "component": None, "candidates": []}
+            row = found.get(line.mpn)
+            if row is not None:
+                result["status"] = "found"
+                result["component"] = _component_summary(row)
+            elif fuzzy and db is not None:
+                result["candidates"] = _fuzzy_candidates(db, line.mpn)
+                if result["candidates"]:
+                    result["status"] = "fuzzy"
+            results.append(result)
+        yield results
+
+
+def summarize(results: list[dict], summary: dict | None = None) -> dict:
+    """Entry counts by status, {"total", "found", "fuzzy", "missing"}, added to summary if given."""
+    if summary is None:
+        summary = {"total": 0, "found": 0, "fuzzy": 0, "missing": 0}
+    for result in results:
+        summary["total"] += 1
+        summary[result["status"]] += 1
+    return summary
@@ -0,0 +1,202 @@
+"""Download corpus — record real vendor downloads and replay them through the pipeline.
+
+Recording is opt-in (configure() or the KIPARTBRIDGE_CORPUS_DIR env var). Each
+processed download is stored once, keyed by content hash:
+
+    <corpus>/<sha256[:16]>/download.zip   copy of the staged ZIP
+    <corpus>/<sha256[:16]>/entry.json     source/referrer URLs + ProcessingResult
+
+replay() runs every entry through process_download on a process pool, each
+against its own scratch library root and KiCad config, and reports throughput,
+per-provider latency and any output that changed since it was recorded.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from models import ProcessingResult
+from metrics import RollingHistogram
+
+ENTRY_FILE = "entry.json"
+ZIP_FILE = "download.zip"
+
+# Result fields compared between the recording and the replay
+COMPARED_FIELDS = ("status", "provider", "mpn", "symbol_name", "footprint_name",
+                   "has_3d_model", "warnings")
+
+# Warnings that depend on the state of the library at import time
+_STATEFUL_WARNING_SUFFIX = "already exists, updating"
+
+_corpus_dir = os.environ.get("KIPARTBRIDGE_CORPUS_DIR") or None
+
+
+def configure(corpus_dir: str | None) -> None:
+    """Enable recording into corpus_dir, or disable it with None."""
+    global _corpus_dir
+    _corpus_dir = corpus_dir
+
+
+def recording_dir() -> str | None:
+    """The directory downloads are recorded into, or None if recording is off."""
+    return _corpus_dir
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def record(corpus_dir: str, zip_path: str, source_url: str | None,
+           referrer_url: str | None, result: ProcessingResult) -> str:
+    """Copy a staged download and its result into the corpus. Returns the entry dir.
+
+    Downloads already in the corpus (same content) are left untouched, so the
+    first recorded result stays the reference.
+    """
+    digest = _file_digest(zip_path)
+    entry_dir = os.path.join(corpus_dir, digest[:16])
+    if os.path.exists(os.path.join(entry_dir, ENTRY_FILE)):
+        return entry_dir
+
+    os.makedirs(entry_dir, exist_ok=True)
+    shutil.copy2(zip_path, os.path.join(entry_dir, ZIP_FILE))
+    entry = {
+        "sha256": digest,
+        "original_name": os.path.basename(zip_path),
+        "source_url": source_url,
+        "referrer_url": referrer_url,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "result": asdict(result),
+    }
+    # Write the metadata last; an entry without it is ignored by load_entries
+    tmp_path = os.path.join(entry_dir, ENTRY_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, os.path.join(entry_dir, ENTRY_FILE))
+    return entry_dir
+
+
+def maybe_record(zip_path: str, source_url: str | None, referrer_url: str | None,
+                 result: ProcessingResult) -> None:
+    """Record the download if recording is enabled. Never raises."""
+    if not _corpus_dir:
+        return
+    try:
+        record(_corpus_dir, zip_path, source_url, referrer_url, result)
+    except OSError as e:
+        print(f"Warning: could not record download in corpus: {e}", file=sys.stderr)
+
+
+def load_entries(corpus_dir: str) -> list[dict]:
+    """Load all complete corpus entries, sorted by entry id."""
+    entries = []
+    for name in sorted(os.listdir(corpus_dir)):
+        entry_dir = os.path.join(corpus_dir, name)
+        meta_path = os.path.join(entry_dir, ENTRY_FILE)
+        if not os.path.isfile(meta_path) or not os.path.isfile(os.path.join(entry_dir, ZIP_FILE)):
+            continue
+        with open(meta_path, "r") as f:
+            entry = json.load(f)
+        entry["id"] = name
+        entry["zip_path"] = os.path.join(entry_dir, ZIP_FILE)
+        entries.append(entry)
+    return entries
+
+
+def _comparable(result: dict, field: str):
+    value = result.get(field)
+    if field == "warnings":
+        return sorted(w for w in (value or []) if not w.endswith(_STATEFUL_WARNING_SUFFIX))
+    return value
+
+
+def diff_results(recorded: dict, replayed: dict) -> list[dict]:
+    """List the compared fields whose values differ."""
+    changes = []
+    for field in COMPARED_FIELDS:
+        before = _comparable(recorded, field)
+        after = _comparable(replayed, field)
+        if before != after:
+            changes.append({"field": field, "recorded": before, "replayed": after})
+    return changes
+
+
+def _init_replay_worker(scratch_root: str) -> None:
+    # Never touch the user's KiCad config, and never re-record replayed downloads
+    config_home = os.path.join(scratch_root, f"kicad_config_{os.getpid()}")
+    os.makedirs(config_home, exist_ok=True)
+    os.environ["KICAD_CONFIG_HOME"] = config_home
+    configure(None)
+
+
+def _replay_entry(entry: dict, scratch_root: str) -> dict:
+    from main import process_download
+
+    library_root = os.path.join(scratch_root, "libraries", entry["id"])
+    start = time.perf_counter()
+    result = process_download(
+        entry["zip_path"],
+        source_url=entry.get("source_url"),
+        referrer_url=entry.get("referrer_url"),
+        library_root=library_root,
+    )
+    elapsed = time.perf_counter() - start
+    return {"id": entry["id"], "seconds": elapsed, "result": asdict(result)}
+
+
+def replay(corpus_dir: str, workers: int | None = None,
+           scratch_root: str | None = None, keep_scratch: bool = False) -> dict:
+    """Run the whole corpus through process_download and compare with the recordings."""
+    entries = load_entries(corpus_dir)
+    owns_scratch = scratch_root is None
+    if owns_scratch:
+        scratch_root = tempfile.mkdtemp(prefix="kipartbridge_replay_")
+    os.makedirs(scratch_root, exist_ok=True)
+
+    outcomes = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker,
+                                 initargs=(scratch_root,)) as pool:
+            futures = [pool.submit(_replay_entry, entry, scratch_root) for entry in entries]
+            outcomes = [f.result() for f in futures]
+    finally:
+        wall = time.perf_counter() - start
+        if owns_scratch and not keep_scratch:
+            shutil.rmtree(scratch_root, ignore_errors=True)
+
+    latency = {}
+    changed = []
+    errors = 0
+    for entry, outcome in zip(entries, outcomes):
+        replayed = outcome["result"]
+        provider = replayed.get("provider") or "unknown"
+        latency.setdefault(provider, RollingHistogram(window=max(1, len(entries)))).observe(outcome["seconds"])
+        if replayed["status"] == "error":
+            errors += 1
+        changes = diff_results(entry["result"], replayed)
+        if changes:
+            changed.append({"id": entry["id"], "original_name": entry.get("original_name"),
+                            "changes": changes})
+
+    return {
+        "entries": len(entries),
+        "workers": workers or os.cpu_count(),
+        "wall_seconds": wall,
+        "throughput_per_second": len(entries) / wall if wall > 0 else 0.0,
+        "errors": errors,
+        "latency_seconds_by_provider": {p: h.snapshot() for p, h in sorted(latency.items())},
+        "changed": changed,
+        "scratch_root": scratch_root if keep_scratch or not owns_scratch else None,
+    }
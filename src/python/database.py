@@ -1,9 +1,31 @@
-"""SQLite database for tracking imported components."""
+"""SQLite database for tracking imported components.
 
+Every insert, update and delete of a component is logged by triggers in
+component_changes under a monotonically increasing sequence number, so
+clients can fetch just the deltas since the cursor they last saw
+(changes_since) instead of re-listing the whole library.
+
+Facets extracted at import time (pin count, package, mount type, ...; see
+normalizer.symbol_facets / footprint_facets) live in indexed columns, so
+filter_components answers parametric queries without touching library files.
+
+MPNs are also indexed in normalized form (mpn_keys, for lookup_mpns) and by
+trigram (mpn_trigrams), so fuzzy_search can find near misses such as a
+dropped suffix letter that a LIKE search cannot.
+"""
+
+import copy
+import json
+import math
 import os
+import re
 import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 
+from metrics import METRICS
+
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS components (
@@ -30,8 +52,156 @@ CREATE TABLE IF NOT EXISTS import_log (
     timestamp TEXT NOT NULL,
     FOREIGN KEY (component_id) REFERENCES components(id)
 );
+
+CREATE TABLE IF NOT EXISTS component_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    component_id INTEGER NOT NULL,
+    mpn TEXT NOT NULL,
+    op TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS components_log_insert AFTER INSERT ON components
+BEGIN
+    INSERT INTO component_changes (component_id, mpn, op) VALUES (new.id, new.mpn, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS components_log_update AFTER UPDATE ON components
+BEGIN
+    INSERT INTO component_changes (component_id, mpn, op) VALUES (new.id, new.mpn, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS components_log_delete AFTER DELETE ON components
+BEGIN
+    INSERT INTO component_changes (component_id, mpn, op) VALUES (old.id, old.mpn, 'delete');
+END;
+"""
+
+# Most changes returned by one changes_since call
+CHANGES_PAGE_SIZE = 1000
+
+# Facet columns filled from normalizer.symbol_facets / footprint_facets
+FACET_COLUMNS = {
+    "pin_count": "INTEGER",
+    "unit_count": "INTEGER",
+    "reference": "TEXT",
+    "package": "TEXT",
+    "pad_count": "INTEGER",
+    "mount_type": "TEXT",
+    "courtyard_x_min": "REAL",
+    "courtyard_y_min": "REAL",
+    "courtyard_x_max": "REAL",
+    "courtyard_y_max": "REAL",
+}
+
+# Columns filter_components filters on by value and reports counts for
+FACET_FIELDS = ("manufacturer", "source_provider", "reference", "package",
+                "mount_type", "pin_count", "unit_count", "pad_count", "has_3d_model")
+
+# Range filters: name -> SQL expression compared against the value
+_RANGE_FILTERS = {
+    "min_pin_count": ("pin_count", ">="),
+    "max_pin_count": ("pin_count", "<="),
+    "min_pad_count": ("pad_count", ">="),
+    "max_pad_count": ("pad_count", "<="),
+    "max_courtyard_width": ("courtyard_x_max - courtyard_x_min", "<="),
+    "max_courtyard_height": ("courtyard_y_max - courtyard_y_min", "<="),
+}
+
+# Every facet is grouped by, and results are ordered by updated_at
+_INDEXED_COLUMNS = FACET_FIELDS + ("updated_at",)
+
+_COVERING_COLUMNS = ("mount_type", "reference", "pin_count", "package", "pad_count", "unit_count",
+                     "manufacturer", "source_provider", "has_3d_model", "courtyard_x_min",
+                     "courtyard_y_min", "courtyard_x_max", "courtyard_y_max")
+
+# Normalized MPNs (exact lookups) and their trigrams (fuzzy search); rows
+# are removed with their component
+_MPN_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mpn_keys (
+    component_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_mpn_keys_key ON mpn_keys(key);
+
+CREATE TABLE IF NOT EXISTS mpn_trigrams (
+    trigram TEXT NOT NULL,
+    component_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, component_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_mpn_trigrams_component ON mpn_trigrams(component_id);
+
+CREATE TRIGGER IF NOT EXISTS components_mpn_index_delete AFTER DELETE ON components
+BEGIN
+    DELETE FROM mpn_trigrams WHERE component_id = old.id;
+    DELETE FROM mpn_keys WHERE component_id = old.id;
+END;
 """
 
+# fuzzy_search defaults: results returned, and the share of the query's
+# trigrams a candidate must contain
+FUZZY_LIMIT = 10
+FUZZY_MIN_SIMILARITY = 0.3
+
+# Candidates ranked by edit distance per fuzzy_search call, per result
+_FUZZY_CANDIDATES_PER_RESULT = 20
+
+_MPN_SEPARATORS_RE = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_mpn(mpn: str) -> str:
+    """Uppercase MPN without separators, so "esp32-s3" and "ESP32S3" compare equal."""
+    return _MPN_SEPARATORS_RE.sub("", (mpn or "").upper())
+
+
+def mpn_trigrams(mpn: str) -> set[str]:
+    """Trigrams of the normalized MPN, padded so the first characters weigh more."""
+    padded = f"  {normalize_mpn(mpn)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between a and b."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+# filter_components results kept per (database, change cursor, query)
+FILTER_CACHE_SIZE = 64
+
+_filter_cache: OrderedDict = OrderedDict()
+_filter_cache_lock = threading.Lock()
+
+
+def clear_filter_cache() -> None:
+    """Forget cached filter_components results."""
+    with _filter_cache_lock:
+        _filter_cache.clear()
+
+
+def backup_database(source: str, dest: str) -> None:
+    """Copy the database at source to dest with SQLite's online backup API.
+
+    The copy is a consistent snapshot even while another connection writes.
+    """
+    src = sqlite3.connect(source)
+    try:
+        dst = sqlite3.connect(dest)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
 
 class ComponentDB:
     def __init__(self, db_path: str):
@@ -40,9 +210,53 @@ class ComponentDB:
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self._migrate_mpn_index()
+        METRICS.gauge_add("open_db_connections", 1)
+
+    def _migrate(self) -> None:
+        # Databases created before facets existed get the columns added in place
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(components)")}
+        for column, sql_type in FACET_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE components ADD COLUMN {column} {sql_type}")
+        for column in _INDEXED_COLUMNS:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_components_{column} "
+                              f"ON components({column})")
+        # Covers every facet column: counting under range filters scans this
+        # narrow index instead of the full rows
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_components_facets "
+                          f"ON components({', '.join(_COVERING_COLUMNS)})")
+        self.conn.commit()
+
+    def _migrate_mpn_index(self) -> None:
+        # Databases created before the MPN index get it built once
+        existing = self.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('mpn_keys', 'mpn_trigrams')").fetchone()[0]
+        self.conn.executescript(_MPN_INDEX_SCHEMA)
+        if existing < 2:
+            self.rebuild_mpn_index()
+
+    def rebuild_mpn_index(self) -> None:
+        """Recompute mpn_keys and mpn_trigrams for every component (after bulk inserts that bypass upsert)."""
+        rows = self.conn.execute("SELECT id, mpn FROM components").fetchall()
+        self.conn.execute("DELETE FROM mpn_keys")
+        self.conn.execute("DELETE FROM mpn_trigrams")
+        self.conn.executemany(
+            "INSERT INTO mpn_keys (component_id, key) VALUES (?, ?)",
+            ((row["id"], normalize_mpn(row["mpn"])) for row in rows))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO mpn_trigrams (trigram, component_id) VALUES (?, ?)",
+            ((trigram, row["id"]) for row in rows for trigram in mpn_trigrams(row["mpn"])))
+        self.conn.commit()
 
     def close(self):
+        if self.conn is None:
+            return
         self.conn.close()
+        self.conn = None
+        METRICS.gauge_add("open_db_connections", -1)
 
     def upsert_component(self, mpn: str, symbol_name: str | None = None,
                          footprint_name: str | None = None,
@@ -51,15 +265,21 @@ class ComponentDB:
                          description: str | None = None,
                          source_provider: str | None = None,
                          source_url: str | None = None,
-                         referrer_url: str | None = None) -> int:
-        """Insert or update a component by MPN. Returns the component ID."""
+                         referrer_url: str | None = None,
+                         facets: dict | None = None) -> int:
+        """Insert or update a component by MPN. Returns the component ID.
+
+        facets maps FACET_COLUMNS names to values; missing ones are stored as NULL.
+        """
         now = datetime.now(timezone.utc).isoformat()
+        facets = facets or {}
+        facet_names = list(FACET_COLUMNS)
         cursor = self.conn.execute(
-            """INSERT INTO components
+            f"""INSERT INTO components
                (mpn, manufacturer, description, symbol_name, footprint_name,
                 has_3d_model, source_provider, source_url, referrer_url,
-                created_at, updated_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                created_at, updated_at, {", ".join(facet_names)})
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?{", ?" * len(facet_names)})
                ON CONFLICT(mpn) DO UPDATE SET
                    manufacturer=excluded.manufacturer,
                    description=excluded.description,
@@ -69,17 +289,23 @@ class ComponentDB:
                    source_provider=excluded.source_provider,
                    source_url=excluded.source_url,
                    referrer_url=excluded.referrer_url,
-                   updated_at=excluded.updated_at
+                   updated_at=excluded.updated_at,
+                   {", ".join(f"{c}=excluded.{c}" for c in facet_names)}
             """,
             (mpn, manufacturer, description, symbol_name, footprint_name,
              int(has_3d_model), source_provider, source_url, referrer_url,
-             now, now)
+             now, now, *(facets.get(c) for c in facet_names))
         )
-        self.conn.commit()
         # Get the ID
         row = self.conn.execute(
             "SELECT id FROM components WHERE mpn = ?", (mpn,)
         ).fetchone()
+        self.conn.execute("INSERT OR REPLACE INTO mpn_keys (component_id, key) VALUES (?, ?)",
+                          (row["id"], normalize_mpn(mpn)))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO mpn_trigrams (trigram, component_id) VALUES (?, ?)",
+            ((trigram, row["id"]) for trigram in mpn_trigrams(mpn)))
+        self.conn.commit()
         return row["id"]
 
     def get_component(self, mpn: str) -> dict | None:
@@ -115,6 +341,234 @@ class ComponentDB:
         ).fetchall()
         return [dict(r) for r in rows]
 
+    def lookup_mpns(self, mpns: list[str]) -> dict[str, dict]:
+        """Components for many MPNs at once, compared after normalize_mpn.
+
+        The normalized MPNs go into a temp table that is joined against
+        mpn_keys in one query. Returns {mpn: component row} for the MPNs
+        found; when several components normalize alike, an exact match wins.
+        """
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_mpns "
+                          "(mpn TEXT PRIMARY KEY, key TEXT NOT NULL)")
+        try:
+            self.conn.executemany("INSERT OR IGNORE INTO lookup_mpns (mpn, key) VALUES (?, ?)",
+                                  ((mpn, normalize_mpn(mpn)) for mpn in mpns))
+            rows = self.conn.execute(
+                """SELECT l.mpn AS lookup_mpn, c.* FROM lookup_mpns l
+                   JOIN mpn_keys k ON k.key = l.key
+                   JOIN components c ON c.id = k.component_id
+                   ORDER BY l.mpn, c.mpn = l.mpn DESC, c.mpn"""
+            ).fetchall()
+        finally:
+            self.conn.execute("DELETE FROM lookup_mpns")
+            self.conn.commit()
+        found = {}
+        for row in rows:
+            comp = dict(row)
+            found.setdefault(comp.pop("lookup_mpn"), comp)
+        return found
+
+    def fuzzy_search(self, query: str, limit: int = FUZZY_LIMIT,
+                     min_similarity: float = FUZZY_MIN_SIMILARITY) -> list[dict]:
+        """Components whose MPN is close to query, best match first.
+
+        Candidates must share at least min_similarity of the query's
+        trigrams; the ones sharing the most are ranked by edit distance
+        between the normalized MPNs. Each result is the component row plus
+        "distance" and "similarity" (shared / query trigrams).
+        """
+        key = normalize_mpn(query)
+        if not key:
+            return []
+        trigrams = sorted(mpn_trigrams(key))
+        needed = max(1, math.ceil(len(trigrams) * min_similarity))
+        rows = self.conn.execute(
+            f"""SELECT component_id, COUNT(*) AS shared FROM mpn_trigrams
+                WHERE trigram IN ({",".join("?" * len(trigrams))})
+                GROUP BY component_id HAVING shared >= ?
+                ORDER BY shared DESC LIMIT ?""",
+            (*trigrams, needed, limit * _FUZZY_CANDIDATES_PER_RESULT)
+        ).fetchall()
+        if not rows:
+            return []
+        shared = {r["component_id"]: r["shared"] for r in rows}
+        components = self.conn.execute(
+            f"SELECT * FROM components WHERE id IN ({','.join('?' * len(shared))})",
+            list(shared)
+        ).fetchall()
+        results = []
+        for row in components:
+            comp = dict(row)
+            comp["distance"] = edit_distance(key, normalize_mpn(comp["mpn"]))
+            comp["similarity"] = round(shared[comp["id"]] / len(trigrams), 3)
+            results.append(comp)
+        results.sort(key=lambda c: (c["distance"], -c["similarity"], c["mpn"]))
+        return results[:limit]
+
+    def filter_components(self, filters: dict | None = None, limit: int = 100,
+                          offset: int = 0, with_facets: bool = True) -> dict:
+        """Components matching all filters, plus facet counts.
+
+        filters maps a FACET_FIELDS name to a value or a list of accepted
+        values, or a range filter (min_pin_count, max_pin_count,
+        min_pad_count, max_pad_count, max_courtyard_width,
+        max_courtyard_height, in mm) to a number; "query" does the same
+        substring match as search_components.
+
+        Returns {"total", "components", "facets"}. facets maps each facet
+        field to {value: count}, counted under all filters except the
+        field's own, so the other values of a selected facet stay visible.
+        Results are cached until the change cursor moves.
+        """
+        filters = dict(filters or {})
+        key = (os.path.abspath(self.db_path), self.change_cursor(),
+               json.dumps(filters, sort_keys=True), limit, offset, with_facets)
+        with _filter_cache_lock:
+            cached = _filter_cache.get(key)
+            if cached is not None:
+                _filter_cache.move_to_end(key)
+        METRICS.record_cache("filter_components", hit=cached is not None)
+        if cached is None:
+            cached = self._filter_components(filters, limit, offset, with_facets)
+            with _filter_cache_lock:
+                _filter_cache[key] = cached
+                while len(_filter_cache) > FILTER_CACHE_SIZE:
+                    _filter_cache.popitem(last=False)
+        return copy.deepcopy(cached)
+
+    def _filter_components(self, filters: dict, limit: int, offset: int,
+                           with_facets: bool) -> dict:
+        clauses = {}
+        for key, value in filters.items():
+            if key in FACET_FIELDS:
+                values = value if isinstance(value, list) else [value]
+                if key == "has_3d_model":
+                    values = [int(bool(v)) for v in values]
+                clauses[key] = (f"{key} IN ({','.join('?' * len(values))})", values)
+            elif key in _RANGE_FILTERS:
+                expr, op = _RANGE_FILTERS[key]
+                clauses[key] = (f"({expr}) {op} ?", [value])
+            elif key == "query":
+                like = f"%{value}%"
+                clauses[key] = ("(mpn LIKE ? OR manufacturer LIKE ? OR description LIKE ?)",
+                                [like, like, like])
+            else:
+                raise ValueError(f"Unknown filter {key!r}")
+
+        def where(skip: str | None = None) -> tuple[str, list]:
+            parts = [(sql, params) for key, (sql, params) in clauses.items() if key != skip]
+            if not parts:
+                return "", []
+            return ("WHERE " + " AND ".join(sql for sql, _ in parts),
+                    [p for _, params in parts for p in params])
+
+        sql, params = where()
+        total = self.conn.execute(f"SELECT COUNT(*) AS n FROM components {sql}", params).fetchone()["n"]
+        rows = self.conn.execute(
+            f"SELECT * FROM components {sql} ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+
+        facets = {}
+        if with_facets:
+            for field in FACET_FIELDS:
+                sql, params = where(skip=field)
+                counts = self.conn.execute(
+                    f"""SELECT {field} AS value, COUNT(*) AS n FROM components {sql}
+                        GROUP BY {field} ORDER BY n DESC, value""",
+                    params
+                ).fetchall()
+                facets[field] = {str(r["value"]): r["n"] for r in counts if r["value"] is not None}
+        return {"total": total, "components": [dict(r) for r in rows], "facets": facets}
+
+    def update_component_files(self, mpn: str, symbol_name: str | None,
+                               footprint_name: str | None, has_3d_model: bool) -> bool:
+        """Set which library files a component has. Returns True if it exists."""
+        cursor = self.conn.execute(
+            """UPDATE components SET symbol_name = ?, footprint_name = ?, has_3d_model = ?,
+                   updated_at = ? WHERE mpn = ?""",
+            (symbol_name, footprint_name, int(has_3d_model),
+             datetime.now(timezone.utc).isoformat(), mpn))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def update_component_facets(self, updates: dict[str, dict]) -> int:
+        """Set has_3d_model and facet columns of many components in one transaction.
+
+        updates maps an MPN to {column: value}; columns left out keep their
+        value. Returns how many components were updated.
+        """
+        allowed = {"has_3d_model", *FACET_COLUMNS}
+        now = datetime.now(timezone.utc).isoformat()
+        updated = 0
+        for mpn, values in updates.items():
+            unknown = values.keys() - allowed
+            if unknown:
+                raise ValueError(f"Not a facet column: {', '.join(sorted(unknown))}")
+            columns = list(values)
+            cursor = self.conn.execute(
+                f"UPDATE components SET {''.join(f'{c} = ?, ' for c in columns)}updated_at = ? WHERE mpn = ?",
+                (*(values[c] for c in columns), now, mpn))
+            updated += cursor.rowcount
+        self.conn.commit()
+        return updated
+
+    def delete_component(self, mpn: str) -> bool:
+        """Delete a component by MPN. Returns True if it existed."""
+        cursor = self.conn.execute("DELETE FROM components WHERE mpn = ?", (mpn,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def change_cursor(self) -> int:
+        """Sequence number of the latest change (0 if nothing has changed yet)."""
+        row = self.conn.execute("SELECT MAX(seq) AS seq FROM component_changes").fetchone()
+        return row["seq"] or 0
+
+    def changes_since(self, cursor: int | None, limit: int = CHANGES_PAGE_SIZE) -> dict:
+        """Component changes after cursor, one entry per component (its latest change).
+
+        Returns {"cursor", "changes", "has_more", "reset"}. Each change is
+        {"seq", "op", "mpn", "component"}; component is the current row, or
+        None for deletes. Pass the returned cursor to the next call; if
+        has_more is set, call again right away. With cursor None only the
+        current cursor is returned. "reset" means the cursor is from a
+        different (e.g. recreated) database and the client must reload.
+        """
+        latest = self.change_cursor()
+        if cursor is None:
+            return {"cursor": latest, "changes": [], "has_more": False, "reset": False}
+        if cursor > latest:
+            return {"cursor": latest, "changes": [], "has_more": False, "reset": True}
+        rows = self.conn.execute(
+            """SELECT seq, component_id, mpn, op FROM component_changes
+               WHERE seq > ? ORDER BY seq LIMIT ?""",
+            (cursor, limit + 1)
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return {"cursor": cursor, "changes": [], "has_more": False, "reset": False}
+
+        latest_change = {}
+        for row in rows:
+            latest_change.pop(row["component_id"], None)
+            latest_change[row["component_id"]] = row
+        live_ids = [cid for cid, row in latest_change.items() if row["op"] != "delete"]
+        components = {}
+        if live_ids:
+            placeholders = ",".join("?" * len(live_ids))
+            for row in self.conn.execute(
+                    f"SELECT * FROM components WHERE id IN ({placeholders})", live_ids):
+                components[row["id"]] = dict(row)
+        changes = []
+        for cid, row in latest_change.items():
+            component = components.get(cid)
+            # Deleted by a change past this page
+            op = row["op"] if component is not None else "delete"
+            changes.append({"seq": row["seq"], "op": op, "mpn": row["mpn"], "component": component})
+        return {"cursor": rows[-1]["seq"], "changes": changes,
+                "has_more": has_more, "reset": False}
+
     def log_import(self, component_id: int | None, action: str,
                    source_file: str | None = None,
                    error_message: str | None = None) -> None:
@@ -1,12 +1,82 @@
 """Base extractor with common helpers."""
 
 import os
+import re
+import threading
 import zipfile
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 
+import sexpr
+from limits import check_archive
 from models import ComponentFiles
 
 
+# Members at least this large (uncompressed) are decompressed on the thread pool
+PARALLEL_MEMBER_SIZE = 4 * 1024 * 1024
+
+# Copy buffer per decompression thread, reused across members
+COPY_BUFFER_SIZE = 1024 * 1024
+
+DECOMPRESS_WORKERS = min(8, os.cpu_count() or 1)
+
+# Symbol properties vendors keep the manufacturer and description in, tried in order
+MANUFACTURER_PROPERTIES = ("Manufacturer_Name", "Manufacturer", "MANUFACTURER")
+DESCRIPTION_PROPERTIES = ("Description", "ki_description")
+
+_pool = None
+_pool_lock = threading.Lock()
+_buffers = threading.local()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DECOMPRESS_WORKERS,
+                                       thread_name_prefix="kipartbridge-unzip")
+        return _pool
+
+
+def _member_path(extract_dir: str, info: zipfile.ZipInfo) -> str | None:
+    """Safe destination for a member, sanitized like ZipFile.extract (no '..', no absolute paths)."""
+    arcname = info.filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [p for p in arcname.split(os.path.sep) if p not in ("", os.path.curdir, os.path.pardir)]
+    if not parts:
+        return None
+    return os.path.join(extract_dir, *parts)
+
+
+def _extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dest: str) -> None:
+    """Decompress one member into dest using this thread's reusable buffer.
+
+    The destination is allocated up front (posix_fallocate where available,
+    else truncate to size) so large models are written without re-growing the
+    file. zlib releases the GIL, so several members decompress in parallel.
+    """
+    buf = getattr(_buffers, "buf", None)
+    if buf is None:
+        buf = _buffers.buf = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buf)
+    with zf.open(info) as src, open(dest, "wb") as out:
+        if info.file_size:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(out.fileno(), 0, info.file_size)
+                except OSError:
+                    pass  # e.g. unsupported on this filesystem; plain writes still work
+            else:
+                out.truncate(info.file_size)
+        while True:
+            n = src.readinto(view)
+            if not n:
+                break
+            out.write(view[:n])
+
+
 class BaseExtractor(ABC):
     """Abstract base class for provider extractors."""
 
@@ -28,11 +98,45 @@ class BaseExtractor(ABC):
         ...
 
     def _unzip(self, zip_path: str, extract_dir: str) -> list[str]:
-        """Extract ZIP and return list of extracted file paths."""
+        """Extract ZIP and return list of extracted file paths.
+
+        Large members (STEP models can be 50-150 MB) are decompressed
+        concurrently on a thread pool while the small ones are written here.
+        The archive is checked against the extraction limits first (raises
+        limits.LimitExceeded).
+        """
         with zipfile.ZipFile(zip_path, 'r') as zf:
-            zf.extractall(extract_dir)
-            return [os.path.join(extract_dir, name) for name in zf.namelist()
-                    if not name.endswith('/')]
+            os.makedirs(extract_dir, exist_ok=True)
+            check_archive(zf, extract_dir)
+            infos = zf.infolist()
+            extracted = []
+            small, large = [], []
+            for info in infos:
+                dest = _member_path(extract_dir, info)
+                if dest is None:
+                    continue
+                if info.is_dir():
+                    os.makedirs(dest, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                extracted.append(dest)
+                (large if info.file_size >= PARALLEL_MEMBER_SIZE else small).append((info, dest))
+
+            # Large members go to the pool first; small ones are written meanwhile
+            futures = []
+            if len(large) > 1:
+                pool = _get_pool()
+                futures = [pool.submit(_extract_member, zf, info, dest) for info, dest in large]
+            else:
+                small.extend(large)
+            try:
+                for info, dest in small:
+                    _extract_member(zf, info, dest)
+            finally:
+                wait(futures)
+            for future in futures:
+                future.result()
+            return extracted
 
     def _find_files(self, directory: str, extensions: tuple[str, ...]) -> list[str]:
         """Recursively find files matching given extensions."""
@@ -46,3 +150,50 @@ class BaseExtractor(ABC):
     def _guess_mpn_from_filename(self, filepath: str) -> str:
         """Extract MPN guess from a filename (strip extension)."""
         return os.path.splitext(os.path.basename(filepath))[0]
+
+    def _extract_mpn_from_symbol(self, symbol_path: str | None) -> str | None:
+        """Read the first top-level symbol name from a .kicad_sym file.
+
+        Streams the file and stops at the first match, so large libraries are
+        not read in full. Sub-symbols (e.g. "PartName_0_1") are nested and
+        never seen at top level; UUID names are skipped.
+        """
+        if not symbol_path or not os.path.exists(symbol_path):
+            return None
+        try:
+            return sexpr.first_symbol_name(symbol_path, skip=self._looks_like_uuid)
+        except (OSError, ValueError):
+            return None
+
+    def _extract_mpn_from_footprint(self, footprint_path: str | None) -> str | None:
+        """Read the footprint name from a .kicad_mod file: (footprint "NAME" ..."""
+        if not footprint_path or not os.path.exists(footprint_path):
+            return None
+        try:
+            name = sexpr.footprint_name(footprint_path)
+        except (OSError, ValueError):
+            return None
+        if name and not self._looks_like_uuid(name):
+            return name
+        return None
+
+    def _symbol_property(self, symbol_path: str | None, keys: tuple[str, ...]) -> str | None:
+        """First non-empty value among properties keys of the first symbol in a .kicad_sym."""
+        if not symbol_path or not symbol_path.endswith(".kicad_sym") or not os.path.exists(symbol_path):
+            return None
+        for key in keys:
+            try:
+                value = sexpr.find_property(symbol_path, key)
+            except (OSError, ValueError):
+                return None
+            if value and value.strip():
+                return value.strip()
+        return None
+
+    @staticmethod
+    def _looks_like_uuid(name: str) -> bool:
+        """Check if a string looks like a UUID (8-4-4-4-12 hex pattern)."""
+        return bool(re.match(
+            r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
+            name, re.IGNORECASE
+        ))
@@ -3,7 +3,7 @@
 import os
 
 from models import ComponentFiles, Provider
-from extractors.base import BaseExtractor
+from extractors.base import DESCRIPTION_PROPERTIES, MANUFACTURER_PROPERTIES, BaseExtractor
 
 
 class GenericExtractor(BaseExtractor):
@@ -42,6 +42,8 @@ class GenericExtractor(BaseExtractor):
             footprint_files=mod_files,
             model_step=step_files[0] if step_files else None,
             model_wrl=wrl_files[0] if wrl_files else None,
+            manufacturer=self._symbol_property(symbol_file, MANUFACTURER_PROPERTIES),
+            description=self._symbol_property(symbol_file, DESCRIPTION_PROPERTIES),
             symbol_format=symbol_format,
             source_provider=Provider.GENERIC,
             source_url=source_url,
@@ -9,7 +9,7 @@ ZIP structure:
 import os
 
 from models import ComponentFiles, Provider
-from extractors.base import BaseExtractor
+from extractors.base import DESCRIPTION_PROPERTIES, MANUFACTURER_PROPERTIES, BaseExtractor
 
 
 class SamacSysExtractor(BaseExtractor):
@@ -54,6 +54,8 @@ class SamacSysExtractor(BaseExtractor):
             footprint_files=mod_files,
             model_step=step_files[0] if step_files else None,
             model_wrl=wrl_files[0] if wrl_files else None,
+            manufacturer=self._symbol_property(symbol_file, MANUFACTURER_PROPERTIES),
+            description=self._symbol_property(symbol_file, DESCRIPTION_PROPERTIES),
             symbol_format="kicad_sym",
             source_provider=Provider.SAMACSYS,
             source_url=source_url,
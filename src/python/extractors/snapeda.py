@@ -6,7 +6,6 @@ SnapEDA often uses UUID filenames (e.g. "a1b2c3d4-...-e5f6.kicad_sym"), so the
 MPN must be extracted from inside the file content, not from the filename.
 """
 
-import os
 import re
 from urllib.parse import unquote
 
@@ -67,57 +66,6 @@ class SnapEDAExtractor(BaseExtractor):
             extract_dir=extract_dir,
         )
 
-    def _extract_mpn_from_symbol(self, symbol_path: str | None) -> str | None:
-        """Read the symbol entry name from a .kicad_sym file.
-
-        Looks for the top-level: (symbol "PART_NAME" ...
-        Skips sub-symbols (those containing _0_1, _1_1 suffixes).
-        """
-        if not symbol_path or not os.path.exists(symbol_path):
-            return None
-        try:
-            with open(symbol_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    # Match top-level symbol declaration
-                    if line.startswith('(symbol "'):
-                        # Extract name between quotes
-                        start = line.index('"') + 1
-                        end = line.index('"', start)
-                        name = line[start:end]
-                        # Skip sub-symbols (e.g. "PartName_0_1")
-                        if re.search(r'_\d+_\d+$', name):
-                            continue
-                        # Skip UUIDs
-                        if self._looks_like_uuid(name):
-                            continue
-                        return name
-        except (OSError, ValueError):
-            pass
-        return None
-
-    def _extract_mpn_from_footprint(self, footprint_path: str | None) -> str | None:
-        """Read the footprint name from a .kicad_mod file.
-
-        Looks for: (footprint "PART_NAME" ...
-        """
-        if not footprint_path or not os.path.exists(footprint_path):
-            return None
-        try:
-            with open(footprint_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('(footprint "'):
-                        start = line.index('"') + 1
-                        end = line.index('"', start)
-                        name = line[start:end]
-                        if not self._looks_like_uuid(name):
-                            return name
-                        break
-        except (OSError, ValueError):
-            pass
-        return None
-
     def _mpn_from_referrer_url(self, url: str) -> str | None:
         """Try to extract MPN from a referrer URL.
 
@@ -134,11 +82,3 @@ class SnapEDAExtractor(BaseExtractor):
         if m:
             return m.group(1)
         return None
-
-    @staticmethod
-    def _looks_like_uuid(name: str) -> bool:
-        """Check if a string looks like a UUID (8-4-4-4-12 hex pattern)."""
-        return bool(re.match(
-            r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-            name, re.IGNORECASE
-        ))
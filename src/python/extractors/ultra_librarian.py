@@ -96,34 +96,6 @@ class UltraLibrarianExtractor(BaseExtractor):
             extract_dir=extract_dir,
         )
 
-    def _extract_mpn_from_symbol(self, symbol_path: str) -> str | None:
-        """Read the symbol name from a .kicad_sym file.
-
-        The symbol name is the MPN in Ultra Librarian downloads.
-        Looks for the top-level: (symbol "PART_NAME" ...
-        Skips sub-symbols (those with _N_N suffix) and UUIDs.
-        """
-        if not symbol_path or not os.path.exists(symbol_path):
-            return None
-        try:
-            with open(symbol_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('(symbol "'):
-                        start = line.index('"') + 1
-                        end = line.index('"', start)
-                        name = line[start:end]
-                        # Skip sub-symbols (e.g. "PartName_0_1")
-                        if re.search(r'_\d+_\d+$', name):
-                            continue
-                        # Skip UUIDs
-                        if self._looks_like_uuid(name):
-                            continue
-                        return name
-        except (OSError, ValueError):
-            pass
-        return None
-
     def _mpn_from_referrer_url(self, url: str) -> str | None:
         """Try to extract MPN from a referrer URL.
 
@@ -145,11 +117,3 @@ class UltraLibrarianExtractor(BaseExtractor):
             if not self._looks_like_uuid(candidate):
                 return candidate
         return None
-
-    @staticmethod
-    def _looks_like_uuid(name: str) -> bool:
-        """Check if a string looks like a UUID (8-4-4-4-12 hex pattern)."""
-        return bool(re.match(
-            r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
-            name, re.IGNORECASE
-        ))
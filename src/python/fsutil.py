@@ -0,0 +1,152 @@
+"""Filesystem helpers shared by the library writers.
+
+Writers that read-modify-write a shared file (the symbol library, lib tables,
+kicad_common.json) hold file_lock() around the whole sequence, so several
+importer processes (GUI sidecar, CLI, batch) can share one library root
+without losing each other's updates.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """Write text to path atomically (temp file in the same dir + rename).
+
+    Readers such as KiCad's file watchers see either the old or the new content,
+    never a truncated file.
+    """
+    _atomic_write(path, "w", text)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """Binary counterpart of atomic_write_text (no newline translation)."""
+    _atomic_write(path, "wb", data)
+
+
+def atomic_copy(source: str, dest: str) -> None:
+    """Copy source to dest atomically (same temp file + rename as the writers)."""
+    _atomic_write(dest, "wb", None, source=source)
+
+
+def atomic_write_chunks(path: str, chunks) -> None:
+    """Write an iterable of bytes chunks to path atomically, without holding them all in memory."""
+    _atomic_write(path, "wb", None, chunks=chunks)
+
+
+def _atomic_write(path: str, mode: str, content, source: str | None = None, chunks=None) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            if chunks is not None:
+                for chunk in chunks:
+                    f.write(chunk)
+            elif source is None:
+                f.write(content)
+            else:
+                with open(source, "rb") as src:
+                    shutil.copyfileobj(src, f, 1024 * 1024)
+            f.flush()
+            os.fsync(f.fileno())
+        if source is not None:
+            mode = os.stat(source).st_mode & 0o7777
+        else:
+            mode = os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_signature(path: str) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a file, or None if it does not exist. Used as a cache key."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# ── Locking ──────────────────────────────────────────────────────────────────
+
+_held = threading.local()
+
+
+def lock_path(path: str) -> str:
+    """Lock file guarding path: a hidden sibling, e.g. .kipartbridge.kicad_sym.lock."""
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.lock")
+
+
+@contextmanager
+def file_lock(path: str, name: str = "file"):
+    """Hold an exclusive advisory lock on path (a file or directory) across processes.
+
+    Blocks until the lock is free; the wait is recorded as the lock_wait
+    metric under name. Re-entrant within a thread, so a locked helper may be
+    called while its caller already holds the lock. Other threads and
+    processes are excluded. The lock dies with the process, so a crashed
+    importer never leaves the library locked.
+    """
+    target = lock_path(path)
+    held = _held.__dict__.setdefault("counts", {})
+    if held.get(target):
+        held[target] += 1
+        try:
+            yield
+        finally:
+            held[target] -= 1
+        return
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd = os.open(target, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        start = time.perf_counter()
+        _lock_fd(fd)
+        METRICS.observe_lock_wait(name, time.perf_counter() - start)
+        held[target] = 1
+        try:
+            yield
+        finally:
+            held.pop(target, None)
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+def _lock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)   # retries for ~10 s, then raises
+            return
+        except OSError:
+            continue
+
+
+def _unlock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,255 @@
+"""KiCad config manager — parsed, cached, change-detecting lib-table and kicad_common.json writes.
+
+sym-lib-table / fp-lib-table files are parsed as s-expressions and cached by
+(mtime, size), so repeated imports do not re-read or re-parse them. Callers
+describe the intended state (entries that must be present, env vars that must
+be set); a file is only rewritten, atomically, when its content would actually
+change. This keeps KiCad's file watchers quiet and avoids roaming-profile I/O.
+Each read-modify-write holds the file's fsutil.file_lock, so concurrent
+importer processes do not drop each other's entries.
+"""
+
+import copy
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+from fsutil import atomic_write_text, file_lock, file_signature
+from metrics import METRICS
+from sexpr import Atom, parse
+
+SYM_TABLE = "sym-lib-table"
+FP_TABLE = "fp-lib-table"
+
+_TABLE_ROOTS = {SYM_TABLE: "sym_lib_table", FP_TABLE: "fp_lib_table"}
+
+
+# ── S-expressions ────────────────────────────────────────────────────────────
+
+def parse_sexpr(text: str) -> list:
+    """Parse a single s-expression into nested lists of Atom / str (quoted)."""
+    return parse(text)
+
+
+def _render_atom(value) -> str:
+    if isinstance(value, Atom):
+        return str(value)
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def render_sexpr(expr) -> str:
+    """Render a parsed expression compactly, KiCad lib-table style: (a (b "c")(d "e"))."""
+    if not isinstance(expr, list):
+        return _render_atom(expr)
+    parts = [render_sexpr(x) for x in expr]
+    out = "("
+    for i, part in enumerate(parts):
+        if i and not (part.startswith("(") and parts[i - 1].endswith(")")):
+            out += " "
+        out += part
+    return out + ")"
+
+
+# ── Lib tables ───────────────────────────────────────────────────────────────
+
+@dataclass
+class LibTableEntry:
+    """One library to register in a lib table."""
+    name: str
+    uri: str
+    type: str = "KiCad"
+    options: str = ""
+    descr: str = ""
+
+    def to_sexpr(self) -> list:
+        return [Atom("lib"), [Atom("name"), self.name], [Atom("type"), self.type],
+                [Atom("uri"), self.uri], [Atom("options"), self.options],
+                [Atom("descr"), self.descr]]
+
+
+def _field(item: list, key: str):
+    for child in item[1:]:
+        if isinstance(child, list) and child and child[0] == key and len(child) > 1:
+            return child[1]
+    return None
+
+
+def _set_field(item: list, key: str, value) -> None:
+    for child in item[1:]:
+        if isinstance(child, list) and child and child[0] == key:
+            child[1:] = [value]
+            return
+    item.append([Atom(key), value])
+
+
+class LibTable:
+    """Parsed sym-lib-table / fp-lib-table. Unknown items and fields are preserved."""
+
+    def __init__(self, root: str, items: list | None = None):
+        self.root = root
+        self.items = items if items is not None else []
+
+    @classmethod
+    def parse(cls, text: str, root: str) -> "LibTable":
+        if not text.strip():
+            return cls(root)
+        expr = parse_sexpr(text)
+        if not expr or expr[0] != root:
+            raise ValueError(f"Expected ({root} ...), found ({expr[0] if expr else ''} ...)")
+        return cls(root, expr[1:])
+
+    def libs(self) -> list[list]:
+        return [i for i in self.items if isinstance(i, list) and i and i[0] == "lib"]
+
+    def find(self, name: str) -> list | None:
+        for lib in self.libs():
+            if _field(lib, "name") == name:
+                return lib
+        return None
+
+    def uri(self, name: str) -> str | None:
+        lib = self.find(name)
+        return _field(lib, "uri") if lib is not None else None
+
+    def ensure(self, entry: LibTableEntry) -> bool:
+        """Make sure entry is registered with its URI. Returns True if the table changed."""
+        lib = self.find(entry.name)
+        if lib is None:
+            self.items.append(entry.to_sexpr())
+            return True
+        if _field(lib, "uri") != entry.uri:
+            _set_field(lib, "uri", entry.uri)
+            return True
+        return False
+
+    def render(self) -> str:
+        lines = [f"({self.root}"]
+        lines += [f"  {render_sexpr(item)}" for item in self.items]
+        lines.append(")")
+        return "\n".join(lines) + "\n"
+
+
+_lock = threading.Lock()
+_table_cache: dict[str, tuple[tuple[int, int], LibTable]] = {}
+_json_cache: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def load_lib_table(path: str) -> LibTable:
+    """Parse a lib table, reusing the cached parse while the file is unchanged.
+
+    The returned table is a private copy and may be modified freely.
+    """
+    kind = os.path.basename(path)
+    root = _TABLE_ROOTS.get(kind, kind.replace("-", "_"))
+    sig = file_signature(path)
+    if sig is None:
+        return LibTable(root)
+    with _lock:
+        cached = _table_cache.get(path)
+    if cached and cached[0] == sig:
+        METRICS.record_cache("lib_table", hit=True)
+        table = cached[1]
+    else:
+        METRICS.record_cache("lib_table", hit=False)
+        with open(path, "r") as f:
+            text = f.read()
+        try:
+            table = LibTable.parse(text, root)
+        except ValueError as e:
+            raise ValueError(f"Cannot parse {path}: {e}") from e
+        with _lock:
+            _table_cache[path] = (sig, table)
+    return LibTable(table.root, copy.deepcopy(table.items))
+
+
+def _store_table(path: str, table: LibTable) -> None:
+    atomic_write_text(path, table.render())
+    with _lock:
+        _table_cache[path] = (file_signature(path), LibTable(table.root, copy.deepcopy(table.items)))
+
+
+def ensure_lib_table_entries(path: str, entries: list[LibTableEntry]) -> bool:
+    """Register all entries in the lib table at path, writing at most once.
+
+    Works for the global tables in KiCad's config dir as well as per-project
+    tables next to a .kicad_pro. Returns True if the file was written.
+    """
+    with file_lock(path, "lib_table"):
+        table = load_lib_table(path)
+        changed = False
+        for entry in entries:
+            changed |= table.ensure(entry)
+        if not changed:
+            return False
+        _store_table(path, table)
+        return True
+
+
+def register_libraries(table_dir: str, sym_entries: list[LibTableEntry] = (),
+                       fp_entries: list[LibTableEntry] = ()) -> list[str]:
+    """Register many symbol and footprint libraries in one pass.
+
+    Returns the paths of the tables that were actually rewritten.
+    """
+    written = []
+    for kind, entries in ((SYM_TABLE, sym_entries), (FP_TABLE, fp_entries)):
+        if not entries:
+            continue
+        path = os.path.join(table_dir, kind)
+        if ensure_lib_table_entries(path, list(entries)):
+            written.append(path)
+    return written
+
+
+# ── kicad_common.json ────────────────────────────────────────────────────────
+
+def load_json_config(path: str) -> dict:
+    """Load a KiCad JSON config (cached by mtime). Returns a private copy."""
+    sig = file_signature(path)
+    if sig is None:
+        return {}
+    with _lock:
+        cached = _json_cache.get(path)
+    if cached and cached[0] == sig:
+        METRICS.record_cache("kicad_json", hit=True)
+        return copy.deepcopy(cached[1])
+    METRICS.record_cache("kicad_json", hit=False)
+    with open(path, "r") as f:
+        config = json.load(f)
+    with _lock:
+        _json_cache[path] = (sig, config)
+    return copy.deepcopy(config)
+
+
+def set_environment_vars(config_dir: str, variables: dict[str, str]) -> bool:
+    """Ensure kicad_common.json defines the given path variables.
+
+    Handles a missing file and "environment.vars": null. Returns True if the
+    file was written.
+    """
+    path = os.path.join(config_dir, "kicad_common.json")
+    with file_lock(path, "kicad_common"):
+        config = load_json_config(path)
+
+        env = config.get("environment")
+        if not isinstance(env, dict):
+            env = config["environment"] = {}
+        if not isinstance(env.get("vars"), dict):
+            env["vars"] = {}
+
+        if os.path.exists(path) and all(env["vars"].get(k) == v for k, v in variables.items()):
+            return False
+
+        env["vars"].update(variables)
+        atomic_write_text(path, json.dumps(config, indent=2))
+        with _lock:
+            _json_cache[path] = (file_signature(path), copy.deepcopy(config))
+        return True
+
+
+def clear_caches() -> None:
+    """Forget all cached parses (e.g. after external edits with coarse mtimes)."""
+    with _lock:
+        _table_cache.clear()
+        _json_cache.clear()
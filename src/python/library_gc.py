@@ -0,0 +1,156 @@
+"""Garbage collection of footprints and 3D models nothing refers to.
+
+normalize_footprint and copy_model only ever add files, so re-importing a
+part under a corrected MPN leaves the old .kicad_mod and STEP/WRL behind.
+collect_garbage finds them and either quarantines (moves to
+.quarantine/<timestamp>/ in the library root, the default) or deletes them.
+
+A footprint is kept if a DB row names it or a symbol's Footprint property
+links to it. A model is kept if a kept footprint references it via
+${KIPARTBRIDGE_3DMODELS}, or shares its name (in case that footprint cannot
+be parsed). Files modified within the grace period are never collected, so
+an import that has written its files but not yet its DB row is safe. Stale
+temp files from interrupted atomic writes are collected too.
+
+Both directories are walked with os.scandir one entry at a time; memory is
+bounded by the set of referenced names, not by the size of the tree, and at
+most GC_REPORT_LIMIT collected files are listed in the report.
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+
+from database import ComponentDB
+from fsutil import file_lock
+from library_injector import LIB_NAME
+from verify import MODEL_VAR, footprint_models, symbol_links
+
+QUARANTINE_DIR = ".quarantine"
+
+# Files younger than this are never collected
+GC_GRACE_SECONDS = 24 * 3600
+
+# Collected files listed individually in the report (all are counted)
+GC_REPORT_LIMIT = 1000
+
+
+def _referenced_footprints(root: str) -> set[str]:
+    referenced = set()
+    db_path = os.path.join(root, "components.db")
+    if os.path.exists(db_path):
+        db = ComponentDB(db_path)
+        try:
+            for row in db.conn.execute(
+                    "SELECT footprint_name FROM components WHERE footprint_name IS NOT NULL"):
+                referenced.add(row["footprint_name"])
+        finally:
+            db.close()
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    if os.path.exists(sym_path):
+        for link in symbol_links(sym_path).values():
+            lib, _, name = link.partition(":")
+            if lib == LIB_NAME and name:
+                referenced.add(name)
+    return referenced
+
+
+def _is_temp(name: str) -> bool:
+    # Left behind by fsutil's atomic writes when the writer was killed
+    return name.startswith(".") and name.endswith(".tmp")
+
+
+class _Collector:
+    """Moves (or deletes, or only counts) collected files and builds the report."""
+
+    def __init__(self, root: str, dry_run: bool, quarantine: bool):
+        self.root = root
+        self.dry_run = dry_run
+        self.quarantine_dir = None
+        if quarantine and not dry_run:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            self.quarantine_dir = os.path.join(root, QUARANTINE_DIR, stamp)
+        self.counts = {"footprints": 0, "models": 0, "temp": 0}
+        self.bytes = 0
+        self.items = []
+
+    def collect(self, entry: os.DirEntry, kind: str, size: int) -> None:
+        rel = os.path.relpath(entry.path, self.root)
+        if not self.dry_run:
+            if self.quarantine_dir is not None:
+                dest = os.path.join(self.quarantine_dir, rel)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(entry.path, dest)
+            else:
+                os.unlink(entry.path)
+        self.counts[kind] += 1
+        self.bytes += size
+        if len(self.items) < GC_REPORT_LIMIT:
+            self.items.append({"path": rel, "kind": kind, "bytes": size})
+
+
+def collect_garbage(root: str, dry_run: bool = False, grace_seconds: float = GC_GRACE_SECONDS,
+                    quarantine: bool = True) -> dict:
+    """Remove unreferenced footprints, models and stale temp files under root.
+
+    Returns {"dry_run", "quarantine_dir", "collected": {kind: count}, "bytes",
+    "skipped_recent", "items", "truncated", "seconds"}. quarantine_dir is
+    where the files went (None for dry runs and deletes); items lists the
+    first GC_REPORT_LIMIT files and truncated says whether there were more.
+    """
+    start = time.perf_counter()
+    cutoff = time.time() - grace_seconds
+    fp_dir = os.path.join(root, f"{LIB_NAME}.pretty")
+    models_dir = os.path.join(root, "3dmodels")
+    referenced_fps = _referenced_footprints(root)
+    referenced_models = set()
+    collector = _Collector(root, dry_run, quarantine)
+    skipped_recent = 0
+
+    if os.path.isdir(fp_dir):
+        # Imports write footprints under this lock; none is replaced mid-move
+        with file_lock(fp_dir, "footprints"), os.scandir(fp_dir) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                name = entry.name
+                if name.endswith(".kicad_mod") and name[:-len(".kicad_mod")] in referenced_fps:
+                    for ref in footprint_models(entry.path)["models"]:
+                        if ref.startswith(MODEL_VAR):
+                            referenced_models.add(ref[len(MODEL_VAR):])
+                    continue
+                if not (name.endswith(".kicad_mod") or _is_temp(name)):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                if st.st_mtime > cutoff:
+                    skipped_recent += 1
+                    continue
+                collector.collect(entry, "temp" if _is_temp(name) else "footprints", st.st_size)
+
+    if os.path.isdir(models_dir):
+        with os.scandir(models_dir) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                name = entry.name
+                temp = _is_temp(name)
+                if not temp and (name.startswith(".") or name in referenced_models
+                                 or os.path.splitext(name)[0] in referenced_fps):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                if st.st_mtime > cutoff:
+                    skipped_recent += 1
+                    continue
+                collector.collect(entry, "temp" if temp else "models", st.st_size)
+
+    collected = sum(collector.counts.values())
+    return {
+        "dry_run": dry_run,
+        "quarantine_dir": collector.quarantine_dir if collected else None,
+        "collected": collector.counts,
+        "bytes": collector.bytes,
+        "skipped_recent": skipped_recent,
+        "items": collector.items,
+        "truncated": collected > len(collector.items),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -1,14 +1,33 @@
 """Library injector — manages KiCad library registration and directory structure."""
 
-import json
 import os
 import re
 import sys
+import threading
+
+from fsutil import file_signature
+from kicad_config import SYM_TABLE, LibTableEntry, register_libraries, set_environment_vars
+from metrics import METRICS
+from settings import get_setting
+
+# Name of the symbol and footprint libraries, their lib-table entries and files
+LIB_NAME = "kipartbridge"
+
+# (config_dir, lib_name) -> (sym-lib-table signature, detected root or None)
+_root_cache: dict[tuple[str, str], tuple[tuple[int, int] | None, str | None]] = {}
+_root_cache_lock = threading.Lock()
 
 
 def get_kicad_config_dir(version: str = "9.0") -> str:
-    """Get the KiCad configuration directory for the given version."""
-    if sys.platform == "darwin":
+    """Get the KiCad configuration directory for the given version.
+
+    Honors KiCad's own KICAD_CONFIG_HOME override, which lets benchmarks and
+    scratch runs use an isolated config instead of the user's.
+    """
+    override = os.environ.get("KICAD_CONFIG_HOME")
+    if override:
+        base = override
+    elif sys.platform == "darwin":
         base = os.path.expanduser("~/Library/Preferences/kicad")
     elif sys.platform == "win32":
         base = os.path.join(os.environ.get("APPDATA", ""), "kicad")
@@ -23,7 +42,7 @@ def get_default_library_root() -> str:
 
 
 def detect_existing_library_root(config_dir: str | None = None,
-                                  lib_name: str = "kipartbridge") -> str | None:
+                                  lib_name: str = LIB_NAME) -> str | None:
     """Check KiCad's sym-lib-table for an existing kipartbridge entry.
 
     Returns the library root directory if found (parent of the .kicad_sym file),
@@ -46,6 +65,48 @@ def detect_existing_library_root(config_dir: str | None = None,
     return None
 
 
+def resolve_library_root(config_dir: str | None = None,
+                         lib_name: str = LIB_NAME) -> str:
+    """Resolve the library root for calls that did not pass one.
+
+    An explicit "library_root" in the sidecar settings wins and skips detection.
+    Otherwise the root detected from sym-lib-table is cached per config dir and
+    re-validated with a single stat of the table; it falls back to the default
+    root when KiCad has no entry.
+    """
+    configured = get_setting("library_root")
+    if configured:
+        return os.path.expanduser(configured)
+
+    if config_dir is None:
+        config_dir = get_kicad_config_dir()
+    key = (config_dir, lib_name)
+    sig = file_signature(os.path.join(config_dir, SYM_TABLE))
+    with _root_cache_lock:
+        cached = _root_cache.get(key)
+    if cached and cached[0] == sig:
+        METRICS.record_cache("library_root", hit=True)
+        root = cached[1]
+    else:
+        METRICS.record_cache("library_root", hit=False)
+        root = detect_existing_library_root(config_dir, lib_name)
+        with _root_cache_lock:
+            _root_cache[key] = (sig, root)
+    return root or get_default_library_root()
+
+
+def note_library_root(config_dir: str, root: str, lib_name: str = LIB_NAME) -> None:
+    """Tell the resolver that we just registered root in config_dir's sym-lib-table."""
+    sig = file_signature(os.path.join(config_dir, SYM_TABLE))
+    with _root_cache_lock:
+        _root_cache[(config_dir, lib_name)] = (sig, root)
+
+
+def invalidate_library_root_cache() -> None:
+    with _root_cache_lock:
+        _root_cache.clear()
+
+
 def ensure_library_dirs(root: str) -> None:
     """Create the library directory structure if it doesn't exist."""
     os.makedirs(root, exist_ok=True)
@@ -53,134 +114,52 @@ def ensure_library_dirs(root: str) -> None:
     os.makedirs(os.path.join(root, "3dmodels"), exist_ok=True)
 
 
-def _read_lib_table(path: str) -> str:
-    """Read a lib-table file, or return empty template if missing."""
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            return f.read()
-    return ""
-
+def _sym_entry(root: str, lib_name: str) -> LibTableEntry:
+    return LibTableEntry(name=lib_name, uri=os.path.join(root, f"{lib_name}.kicad_sym"),
+                         descr="KiPartBridge imported symbols")
 
-def _lib_table_has_entry(content: str, lib_name: str) -> bool:
-    """Check if a lib-table already contains an entry for the given library."""
-    return f'(name "{lib_name}")' in content
 
+def _fp_entry(root: str, lib_name: str) -> LibTableEntry:
+    return LibTableEntry(name=lib_name, uri=os.path.join(root, f"{lib_name}.pretty"),
+                         descr="KiPartBridge imported footprints")
 
-def _update_lib_table_uri(content: str, lib_name: str, new_uri: str) -> str:
-    """Update the URI of an existing entry in a lib-table."""
-    pattern = rf'(\(lib\s+\(name\s+"{re.escape(lib_name)}"\)\s*\(type\s+"[^"]*"\)\s*\(uri\s+")[^"]*(")'
-    return re.sub(pattern, rf'\g<1>{new_uri}\2', content)
 
-
-def ensure_sym_lib_table(root: str, config_dir: str, lib_name: str = "kipartbridge") -> None:
+def ensure_sym_lib_table(root: str, config_dir: str, lib_name: str = LIB_NAME) -> None:
     """Ensure the symbol library is registered in sym-lib-table.
 
     If an entry exists but points to a different path, updates the URI.
+    The file is only rewritten when its content changes.
     """
-    table_path = os.path.join(config_dir, "sym-lib-table")
-    sym_lib_path = os.path.join(root, f"{lib_name}.kicad_sym")
-
-    content = _read_lib_table(table_path)
-
-    if _lib_table_has_entry(content, lib_name):
-        # Entry exists — ensure it points to the right path
-        if sym_lib_path not in content:
-            content = _update_lib_table_uri(content, lib_name, sym_lib_path)
-            with open(table_path, 'w') as f:
-                f.write(content)
-        return
-
-    entry = f'  (lib (name "{lib_name}")(type "KiCad")(uri "{sym_lib_path}")(options "")(descr "KiPartBridge imported symbols"))\n'
-
-    if content.strip():
-        # Insert before closing paren
-        content = content.rstrip()
-        if content.endswith(')'):
-            content = content[:-1] + entry + ')\n'
-        else:
-            content += '\n' + entry
-    else:
-        content = f'(sym_lib_table\n{entry})\n'
-
-    os.makedirs(os.path.dirname(table_path), exist_ok=True)
-    with open(table_path, 'w') as f:
-        f.write(content)
+    register_libraries(config_dir, sym_entries=[_sym_entry(root, lib_name)])
+    note_library_root(config_dir, root, lib_name)
 
 
-def ensure_fp_lib_table(root: str, config_dir: str, lib_name: str = "kipartbridge") -> None:
+def ensure_fp_lib_table(root: str, config_dir: str, lib_name: str = LIB_NAME) -> None:
     """Ensure the footprint library is registered in fp-lib-table.
 
     If an entry exists but points to a different path, updates the URI.
+    The file is only rewritten when its content changes.
     """
-    table_path = os.path.join(config_dir, "fp-lib-table")
-    fp_lib_path = os.path.join(root, f"{lib_name}.pretty")
-
-    content = _read_lib_table(table_path)
-
-    if _lib_table_has_entry(content, lib_name):
-        # Entry exists — ensure it points to the right path
-        if fp_lib_path not in content:
-            content = _update_lib_table_uri(content, lib_name, fp_lib_path)
-            with open(table_path, 'w') as f:
-                f.write(content)
-        return
-
-    entry = f'  (lib (name "{lib_name}")(type "KiCad")(uri "{fp_lib_path}")(options "")(descr "KiPartBridge imported footprints"))\n'
-
-    if content.strip():
-        content = content.rstrip()
-        if content.endswith(')'):
-            content = content[:-1] + entry + ')\n'
-        else:
-            content += '\n' + entry
-    else:
-        content = f'(fp_lib_table\n{entry})\n'
-
-    os.makedirs(os.path.dirname(table_path), exist_ok=True)
-    with open(table_path, 'w') as f:
-        f.write(content)
+    register_libraries(config_dir, fp_entries=[_fp_entry(root, lib_name)])
 
 
 def ensure_library_tables(root: str, config_dir: str | None = None,
-                          lib_name: str = "kipartbridge") -> None:
+                          lib_name: str = LIB_NAME) -> None:
     """Register both symbol and footprint libraries in KiCad's config."""
     if config_dir is None:
         config_dir = get_kicad_config_dir()
-    ensure_sym_lib_table(root, config_dir, lib_name)
-    ensure_fp_lib_table(root, config_dir, lib_name)
+    register_libraries(config_dir, sym_entries=[_sym_entry(root, lib_name)],
+                       fp_entries=[_fp_entry(root, lib_name)])
+    note_library_root(config_dir, root, lib_name)
 
 
 def setup_environment_variable(root: str, config_dir: str | None = None,
                                var_name: str = "KIPARTBRIDGE_3DMODELS") -> None:
     """Set the 3D models environment variable in kicad_common.json.
 
-    Handles the case where "environment.vars" is null.
+    Handles the case where "environment.vars" is null. The file is left
+    untouched when the variable already has the right value.
     """
     if config_dir is None:
         config_dir = get_kicad_config_dir()
-
-    common_path = os.path.join(config_dir, "kicad_common.json")
-    models_dir = os.path.join(root, "3dmodels")
-
-    if os.path.exists(common_path):
-        with open(common_path, 'r') as f:
-            config = json.load(f)
-    else:
-        config = {}
-
-    # Navigate to environment.vars, handling null
-    if "environment" not in config:
-        config["environment"] = {}
-    env = config["environment"]
-    if not isinstance(env, dict):
-        config["environment"] = {}
-        env = config["environment"]
-
-    if "vars" not in env or env["vars"] is None:
-        env["vars"] = {}
-
-    env["vars"][var_name] = models_dir
-
-    os.makedirs(os.path.dirname(common_path), exist_ok=True)
-    with open(common_path, 'w') as f:
-        json.dump(config, f, indent=2)
+    set_environment_vars(config_dir, {var_name: os.path.join(root, "3dmodels")})
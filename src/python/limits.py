@@ -0,0 +1,199 @@
+"""Resource limits for untrusted downloads.
+
+Two layers keep one bad or huge ZIP from taking down the shared sidecar:
+
+1. check_archive() validates the ZIP's central directory before a single byte
+   is written: member count, per-member and total uncompressed size,
+   compression ratio (zip bombs) and free space at the destination.
+2. run_isolated() runs kiutils parsing of the download in a child process
+   under RLIMIT_AS (address space) and a per-call RLIMIT_CPU budget, so a
+   runaway parse kills a disposable child instead of the sidecar.
+
+Limits are defaults overridden by the ``extraction_limits`` setting; read and
+tune them with get_limits() / update_limits() (RPCs of the same names). A
+limit of 0 disables that check. Violations raise LimitExceeded, which the
+pipeline reports as the ProcessingResult error.
+"""
+
+import multiprocessing
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from settings import get_setting, update_settings
+from workers import mp_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MIB = 1024 * 1024
+
+DEFAULT_LIMITS = {
+    "max_members": 5000,                   # entries in the archive
+    "max_member_bytes": 1024 * MIB,        # uncompressed size of any one member
+    "max_total_bytes": 2048 * MIB,         # uncompressed size of all members
+    "max_ratio": 200,                      # uncompressed/compressed, per member
+    "parse_memory_bytes": 4096 * MIB,      # RLIMIT_AS of the parsing child
+    "parse_cpu_seconds": 120,              # RLIMIT_CPU budget per parse
+    "isolate_parsing": True,               # parse in a child process at all
+}
+
+# Members smaller than this are not ratio-checked (tiny text files compress well)
+_RATIO_MIN_BYTES = MIB
+
+# Parallel parses (symbol and footprint of one import run concurrently)
+PARSE_WORKERS = 2
+
+
+class LimitExceeded(ValueError):
+    """A download exceeded one of the configured resource limits."""
+
+
+def get_limits() -> dict:
+    """Effective limits: defaults overridden by the extraction_limits setting."""
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(get_setting("extraction_limits") or {})
+    return limits
+
+
+def update_limits(updates: dict) -> dict:
+    """Change limits. A value of None restores the default. Returns the effective limits."""
+    overrides = dict(get_setting("extraction_limits") or {})
+    for key, value in updates.items():
+        if key not in DEFAULT_LIMITS:
+            raise ValueError(f"Unknown limit {key!r}, expected one of {sorted(DEFAULT_LIMITS)}")
+        if value is None:
+            overrides.pop(key, None)
+        elif key == "isolate_parsing":
+            overrides[key] = bool(value)
+        elif not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"Limit {key!r} must be a non-negative number")
+        else:
+            overrides[key] = value
+    update_settings({"extraction_limits": overrides or None})
+    return get_limits()
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def check_archive(zf: zipfile.ZipFile, dest_dir: str | None = None,
+                  limits: dict | None = None) -> None:
+    """Validate a ZIP's central directory against the limits. Writes nothing.
+
+    zipfile itself stops reading a member at its declared size, so a central
+    directory that understates sizes cannot be used to get past these checks.
+    """
+    limits = limits or get_limits()
+    infos = zf.infolist()
+    if limits["max_members"] and len(infos) > limits["max_members"]:
+        raise LimitExceeded(f"Archive has {len(infos)} entries (limit {limits['max_members']})")
+    total = 0
+    for info in infos:
+        total += info.file_size
+        if limits["max_member_bytes"] and info.file_size > limits["max_member_bytes"]:
+            raise LimitExceeded(f"Archive member {info.filename} is {_size(info.file_size)} "
+                                f"uncompressed (limit {_size(limits['max_member_bytes'])})")
+        if (limits["max_ratio"] and info.file_size >= _RATIO_MIN_BYTES
+                and info.file_size > limits["max_ratio"] * max(info.compress_size, 1)):
+            ratio = info.file_size / max(info.compress_size, 1)
+            raise LimitExceeded(f"Archive member {info.filename} has compression ratio {ratio:.0f}:1 "
+                                f"(limit {limits['max_ratio']}:1), possible zip bomb")
+    if limits["max_total_bytes"] and total > limits["max_total_bytes"]:
+        raise LimitExceeded(f"Archive expands to {_size(total)} "
+                            f"(limit {_size(limits['max_total_bytes'])})")
+    if dest_dir is not None:
+        free = shutil.disk_usage(dest_dir).free
+        if total > free:
+            raise LimitExceeded(f"Archive expands to {_size(total)} but only {_size(free)} "
+                                f"is free in {dest_dir}")
+
+
+# ── Isolated parsing ─────────────────────────────────────────────────────────
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def apply_memory_limit(memory_bytes: int) -> None:
+    """Cap this process's address space (no-op where unsupported)."""
+    if resource is None or not memory_bytes:
+        return
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            memory_bytes = min(memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+    except (ValueError, OSError):
+        pass  # e.g. macOS does not enforce RLIMIT_AS
+
+
+def run_with_limits(limits: dict, fn, args=(), kwargs=None):
+    """Run fn in this (child) process under the memory and CPU limits.
+
+    RLIMIT_CPU counts the process's lifetime, so a warm child is granted
+    parse_cpu_seconds on top of what it has already used.
+    """
+    apply_memory_limit(limits["parse_memory_bytes"])
+    cpu_seconds = limits["parse_cpu_seconds"]
+    if resource is not None and cpu_seconds:
+        used = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(used.ru_utime + used.ru_stime) + int(cpu_seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        return fn(*args, **(kwargs or {}))
+    except MemoryError:
+        raise LimitExceeded("Parsing exceeded the memory limit") from None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=mp_context())
+        return _pool
+
+
+def reset_parse_pool() -> None:
+    """Shut down the parsing children (they are started again on next use)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_isolated(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in a resource-limited child and return its result.
+
+    fn and its arguments and result must be picklable. Runs inline when
+    isolate_parsing is off, and inside pool workers (batch, replay), which
+    are disposable children already and may not start their own. A child killed by the CPU limit (or otherwise)
+    becomes LimitExceeded and the pool is rebuilt for the next call.
+    """
+    global _pool
+    limits = get_limits()
+    if not limits["isolate_parsing"] or multiprocessing.parent_process() is not None:
+        return fn(*args, **kwargs)
+    pool = _get_pool()
+    try:
+        return pool.submit(run_with_limits, limits, fn, args, kwargs).result()
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise LimitExceeded(f"Parsing was killed after exceeding the resource limits "
+                            f"(CPU {limits['parse_cpu_seconds']}s, "
+                            f"memory {_size(limits['parse_memory_bytes'])})") from None
@@ -1,42 +1,177 @@
 """KiPartBridge Python sidecar — CLI and JSON-RPC server."""
 
 import argparse
+import concurrent.futures
 import json
+import multiprocessing
 import os
+import queue
 import shutil
 import sys
 import tempfile
+import threading
+import time
 import traceback
 
-from models import Provider, ProcessingResult
+from models import ImportJob, Provider, ProcessingResult
 from provider_classifier import classify
 from extractors import get_extractor
-from normalizer import sanitize_name, normalize_symbol, normalize_footprint, link_symbol_to_footprint, upgrade_symbol_lib
+from normalizer import (
+    sanitize_name, prepare_symbol, merge_symbols, normalize_footprint,
+    link_symbol_to_footprint, upgrade_symbol_lib, model_files, copy_model,
+)
 from library_injector import (
-    get_default_library_root, detect_existing_library_root,
-    ensure_library_dirs, ensure_library_tables, setup_environment_variable,
-    get_kicad_config_dir,
+    LIB_NAME, resolve_library_root, ensure_library_dirs, ensure_library_tables,
+    setup_environment_variable,
 )
-from database import ComponentDB
+from database import CHANGES_PAGE_SIZE, FUZZY_LIMIT, FUZZY_MIN_SIMILARITY, ComponentDB
+from batch import import_batch
+from metrics import METRICS, StageTimeline
+from limits import get_limits, update_limits, run_isolated, run_with_limits
+from workers import RecyclingWorker, WorkerDied
+from settings import load_settings, update_settings
+import bom
+import corpus
+import library_gc
+import pack
+import rebuild
+import snapshot
+import sync
+import verify
+from profiling import PROFILE_KINDS, configure_sampling, run_profiled, sampled_profile_kind
+
+# Seconds between Prometheus dumps when serve() is given a metrics file
+METRICS_DUMP_INTERVAL = 15.0
+
+# Threads for the I/O-bound pipeline stages (footprint write, 3D model copies)
+IO_WORKERS = 4
 
+# Import worker recycling defaults (worker_max_jobs / worker_max_rss_mb settings)
+WORKER_MAX_JOBS = 200
+WORKER_MAX_RSS_MB = 1024
 
-LIB_NAME = "kipartbridge"
+_io_pool = None
+_io_pool_lock = threading.Lock()
+
+
+def _get_io_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=IO_WORKERS, thread_name_prefix="kipartbridge-io")
+        return _io_pool
 
 
 def process_download(zip_path: str, source_url: str | None = None,
                      referrer_url: str | None = None,
                      library_root: str | None = None,
-                     overwrite: bool = False) -> ProcessingResult:
+                     overwrite: bool = False,
+                     profile: str | None = None) -> ProcessingResult:
     """Process a downloaded ZIP through the full pipeline.
 
-    Steps: classify -> extract -> normalize symbol -> normalize footprint ->
-           link -> register lib tables -> setup env var -> insert DB -> cleanup
+    Steps: classify -> extract -> normalize symbol | normalize footprint + copy
+           3D models -> link -> register lib tables -> setup env var -> insert DB
+           -> cleanup
+
+    The footprint write and model copies run on an I/O thread pool while the
+    symbol is normalized on this thread; both join before linking.
+    ProcessingResult.stage_timings lists every stage with its start/end offset
+    and thread, so the overlap is visible.
+
+    If profile is "cpu" or "memory" (or sampling picks this run), the pipeline
+    runs under that profiler and the report paths are returned in
+    ProcessingResult.profile_paths. The profilers only see the calling thread,
+    so a profiled run parses the symbol and footprint there, not in an
+    isolated child or on the I/O pool.
     """
+    if profile is None:
+        profile = sampled_profile_kind()
+    worker = _get_import_worker()
+    if worker is None:
+        result = _run_job(zip_path, source_url, referrer_url, library_root, overwrite, profile)
+    else:
+        result = _run_in_worker(worker, zip_path, source_url, referrer_url,
+                                library_root, overwrite, profile)
+    corpus.maybe_record(zip_path, source_url, referrer_url, result)
+    return result
+
+
+def _run_job(zip_path: str, source_url: str | None, referrer_url: str | None,
+             library_root: str | None, overwrite: bool, profile: str | None) -> ProcessingResult:
+    if profile is None:
+        return _run_pipeline(zip_path, source_url, referrer_url, library_root, overwrite)
+    result, paths = run_profiled(profile, zip_path, _run_pipeline,
+                                 zip_path, source_url, referrer_url, library_root, overwrite,
+                                 profiled=True)
+    result.profile_paths = paths
+    return result
+
+
+# ── Import worker ────────────────────────────────────────────────────────────
+
+_import_worker = None
+_import_worker_lock = threading.Lock()
+
+
+def _get_import_worker() -> RecyclingWorker | None:
+    """The recycling child for imports if the import_worker setting is on, else None."""
+    global _import_worker
+    settings = load_settings()
+    with _import_worker_lock:
+        if not settings.get("import_worker"):
+            if _import_worker is not None:
+                _import_worker.close()
+                _import_worker = None
+            return None
+        max_jobs = settings.get("worker_max_jobs", WORKER_MAX_JOBS)
+        max_rss_bytes = settings.get("worker_max_rss_mb", WORKER_MAX_RSS_MB) * 1024 * 1024
+        if _import_worker is None:
+            _import_worker = RecyclingWorker(max_jobs=max_jobs, max_rss_bytes=max_rss_bytes)
+        else:
+            _import_worker.max_jobs = max_jobs
+            _import_worker.max_rss_bytes = max_rss_bytes
+        return _import_worker
+
+
+def close_import_worker() -> None:
+    """Stop the import worker and its standby (if running)."""
+    global _import_worker
+    with _import_worker_lock:
+        if _import_worker is not None:
+            _import_worker.close()
+            _import_worker = None
+
+
+def _run_in_worker(worker: RecyclingWorker, zip_path: str, source_url: str | None,
+                   referrer_url: str | None, library_root: str | None, overwrite: bool,
+                   profile: str | None) -> ProcessingResult:
+    # Resolve here: the child does not see later changes to our environment
+    if library_root is None:
+        library_root = resolve_library_root()
+    try:
+        result = worker.run(run_with_limits, get_limits(), _run_job,
+                            (zip_path, source_url, referrer_url, library_root, overwrite, profile))
+    except WorkerDied as e:
+        METRICS.record_import(None, ok=False)
+        return ProcessingResult(status="error", error=f"Import failed: {e}")
+    # The child's metrics die with it; account for the import here
+    for timing in result.stage_timings:
+        METRICS.observe_stage(timing["stage"], timing["end"] - timing["start"])
+    METRICS.record_import(result.provider, ok=result.status != "error")
+    return result
+
+
+def _run_pipeline(zip_path: str, source_url: str | None,
+                  referrer_url: str | None, library_root: str | None,
+                  overwrite: bool, profiled: bool = False) -> ProcessingResult:
     if library_root is None:
-        # Use existing KiCad-registered path if available, else default
-        library_root = detect_existing_library_root() or get_default_library_root()
+        # Settings override, else existing KiCad-registered path, else default
+        library_root = resolve_library_root()
 
     warnings = []
+    provider = None
+    timeline = StageTimeline()
     extract_dir = tempfile.mkdtemp(prefix="kipartbridge_")
 
     try:
@@ -48,11 +183,13 @@ def process_download(zip_path: str, source_url: str | None = None,
         models_dir = os.path.join(library_root, "3dmodels")
 
         # 1. Classify provider
-        provider = classify(zip_path, source_url, referrer_url)
+        with timeline.stage("classify"):
+            provider = classify(zip_path, source_url, referrer_url)
 
         # 2. Extract
-        extractor = get_extractor(provider)
-        component = extractor.extract(zip_path, extract_dir, source_url, referrer_url)
+        with timeline.stage("extract"):
+            extractor = get_extractor(provider)
+            component = extractor.extract(zip_path, extract_dir, source_url, referrer_url)
 
         mpn = sanitize_name(component.mpn)
 
@@ -63,75 +200,130 @@ def process_download(zip_path: str, source_url: str | None = None,
             if db.component_exists(mpn) and not overwrite:
                 warnings.append(f"Component {mpn} already exists, updating")
 
-            # 3. Normalize symbol
+            # 3. Normalize footprint and copy 3D models on the I/O pool ...
+            footprint = footprint_future = None
+            io_futures = []
+            if component.footprint_file:
+                pool = _get_io_pool()
+                if profiled:
+                    # Parsed where the profiler can see it
+                    footprint = _timed(timeline, "normalize_footprint", normalize_footprint,
+                                       component, fp_dir, models_dir, copy_models=False, with_facets=True)
+                else:
+                    footprint_future = pool.submit(
+                        _timed, timeline, "normalize_footprint", run_isolated,
+                        normalize_footprint, component, fp_dir, models_dir,
+                        copy_models=False, with_facets=True)
+                    io_futures.append(footprint_future)
+                for source, filename in model_files(component):
+                    stage = "copy_model_" + os.path.splitext(filename)[1].lstrip(".").lower()
+                    io_futures.append(pool.submit(
+                        _timed, timeline, stage, copy_model, source, models_dir, filename))
+
+            # 4. ... while the symbol is normalized here
             symbol_name = None
-            if component.symbol_file:
-                symbol_name = normalize_symbol(component, sym_lib_path)
-            else:
-                warnings.append("No symbol file found in download")
+            facets = {}
+            try:
+                if component.symbol_file:
+                    with timeline.stage("normalize_symbol"):
+                        # Parse the untrusted download in a resource-limited child
+                        if profiled:
+                            symbol, symbol_facets = prepare_symbol(component, with_facets=True)
+                        else:
+                            symbol, symbol_facets = run_isolated(prepare_symbol, component, with_facets=True)
+                        facets.update(symbol_facets)
+                        merge_symbols(sym_lib_path, [symbol])
+                        symbol_name = symbol.entryName
+                else:
+                    warnings.append("No symbol file found in download")
+            finally:
+                # Join before linking, and before extract_dir is removed
+                concurrent.futures.wait(io_futures)
 
-            # 4. Normalize footprint
             footprint_name = None
             if component.footprint_file:
-                footprint_name = normalize_footprint(component, fp_dir, models_dir)
+                if footprint_future is not None:
+                    footprint = footprint_future.result()
+                footprint_name, footprint_facets = footprint
+                facets.update(footprint_facets)
+                for future in io_futures:
+                    future.result()
             else:
                 warnings.append("No footprint file found in download")
 
             # 5. Link symbol to footprint
             if symbol_name and footprint_name:
-                link_symbol_to_footprint(sym_lib_path, symbol_name, LIB_NAME, footprint_name)
+                with timeline.stage("link"):
+                    link_symbol_to_footprint(sym_lib_path, symbol_name, LIB_NAME, footprint_name)
 
             # 5b. Upgrade symbol lib to KiCad 9 format (must run AFTER all kiutils writes)
             if symbol_name:
-                upgrade_symbol_lib(sym_lib_path)
+                with timeline.stage("upgrade_symbol_lib"):
+                    upgrade_symbol_lib(sym_lib_path)
 
             # 6. Register library tables
-            ensure_library_tables(library_root)
+            with timeline.stage("lib_tables"):
+                ensure_library_tables(library_root)
 
             # 7. Setup environment variable
-            setup_environment_variable(library_root)
+            with timeline.stage("env_var"):
+                setup_environment_variable(library_root)
 
             # 8. Insert into database
             has_3d = component.model_step is not None or component.model_wrl is not None
-            comp_id = db.upsert_component(
-                mpn=mpn,
-                symbol_name=symbol_name,
-                footprint_name=footprint_name,
-                has_3d_model=has_3d,
-                manufacturer=component.manufacturer,
-                description=component.description,
-                source_provider=provider.value if provider else None,
-                source_url=source_url,
-                referrer_url=referrer_url,
-            )
-            db.log_import(comp_id, "import", zip_path)
+            with timeline.stage("database"):
+                comp_id = db.upsert_component(
+                    mpn=mpn,
+                    symbol_name=symbol_name,
+                    footprint_name=footprint_name,
+                    has_3d_model=has_3d,
+                    manufacturer=component.manufacturer,
+                    description=component.description,
+                    source_provider=provider.value if provider else None,
+                    source_url=source_url,
+                    referrer_url=referrer_url,
+                    facets=facets,
+                )
+                db.log_import(comp_id, "import", zip_path)
 
             if not has_3d:
                 warnings.append("No 3D model found in download")
 
             status = "success" if symbol_name and footprint_name else "partial"
+            METRICS.record_import(provider.value, ok=True)
             return ProcessingResult(
                 status=status,
+                provider=provider.value,
                 mpn=mpn,
                 symbol_name=symbol_name,
                 footprint_name=footprint_name,
                 has_3d_model=has_3d,
                 warnings=warnings,
+                stage_timings=timeline.entries(),
             )
         finally:
             db.close()
 
     except Exception as e:
+        METRICS.record_import(provider.value if provider else None, ok=False)
         return ProcessingResult(
             status="error",
+            provider=provider.value if provider else None,
             error=str(e),
             warnings=warnings,
+            stage_timings=timeline.entries(),
         )
     finally:
         # Cleanup extract dir
         shutil.rmtree(extract_dir, ignore_errors=True)
 
 
+def _timed(timeline: StageTimeline, stage: str, fn, *args, **kwargs):
+    """Run fn under a timeline stage (used for tasks on the I/O pool)."""
+    with timeline.stage(stage):
+        return fn(*args, **kwargs)
+
+
 # ── JSON-RPC Server ──────────────────────────────────────────────────────────
 
 def _jsonrpc_response(id, result=None, error=None):
@@ -143,8 +335,35 @@ def _jsonrpc_response(id, result=None, error=None):
     return resp
 
 
-def handle_jsonrpc(request: dict) -> dict:
-    """Handle a single JSON-RPC request."""
+def _result_dict(result: ProcessingResult) -> dict:
+    return {
+        "status": result.status,
+        "provider": result.provider,
+        "mpn": result.mpn,
+        "symbol_name": result.symbol_name,
+        "footprint_name": result.footprint_name,
+        "has_3d_model": result.has_3d_model,
+        "error": result.error,
+        "warnings": result.warnings,
+        "profile_paths": result.profile_paths,
+        "stage_timings": result.stage_timings,
+    }
+
+
+def handle_jsonrpc(request: dict, notify=None) -> dict:
+    """Handle a single JSON-RPC request, recording its latency.
+
+    notify(method, params), if given, sends a notification ahead of the
+    response; methods that stream partial results (check_bom) use it.
+    """
+    start = time.perf_counter()
+    response = _dispatch(request, notify)
+    METRICS.observe_rpc(request.get("method", ""), time.perf_counter() - start,
+                        ok="error" not in response)
+    return response
+
+
+def _dispatch(request: dict, notify=None) -> dict:
     req_id = request.get("id")
     method = request.get("method", "")
     params = request.get("params", {})
@@ -160,19 +379,24 @@ def handle_jsonrpc(request: dict) -> dict:
                 referrer_url=params.get("referrer_url"),
                 library_root=params.get("library_root"),
                 overwrite=params.get("overwrite", False),
+                profile=params.get("profile"),
             )
-            return _jsonrpc_response(req_id, {
-                "status": result.status,
-                "mpn": result.mpn,
-                "symbol_name": result.symbol_name,
-                "footprint_name": result.footprint_name,
-                "has_3d_model": result.has_3d_model,
-                "error": result.error,
-                "warnings": result.warnings,
-            })
+            return _jsonrpc_response(req_id, _result_dict(result))
+
+        elif method == "process_batch":
+            jobs = [ImportJob(zip_path=f["filepath"], source_url=f.get("source_url"),
+                              referrer_url=f.get("referrer_url"))
+                    for f in params["files"]]
+            results = import_batch(
+                jobs,
+                library_root=params.get("library_root"),
+                workers=params.get("workers"),
+                overwrite=params.get("overwrite", False),
+            )
+            return _jsonrpc_response(req_id, [_result_dict(r) for r in results])
 
         elif method == "list_components":
-            root = params.get("library_root") or detect_existing_library_root() or get_default_library_root()
+            root = params.get("library_root") or resolve_library_root()
             db_path = os.path.join(root, "components.db")
             if not os.path.exists(db_path):
                 return _jsonrpc_response(req_id, [])
@@ -187,7 +411,7 @@ def handle_jsonrpc(request: dict) -> dict:
                 db.close()
 
         elif method == "search_components":
-            root = params.get("library_root") or detect_existing_library_root() or get_default_library_root()
+            root = params.get("library_root") or resolve_library_root()
             db_path = os.path.join(root, "components.db")
             if not os.path.exists(db_path):
                 return _jsonrpc_response(req_id, [])
@@ -198,6 +422,123 @@ def handle_jsonrpc(request: dict) -> dict:
             finally:
                 db.close()
 
+        elif method == "fuzzy_search":
+            root = params.get("library_root") or resolve_library_root()
+            db_path = os.path.join(root, "components.db")
+            if not os.path.exists(db_path):
+                return _jsonrpc_response(req_id, [])
+            db = ComponentDB(db_path)
+            try:
+                return _jsonrpc_response(req_id, db.fuzzy_search(
+                    params.get("query", ""),
+                    limit=params.get("limit", FUZZY_LIMIT),
+                    min_similarity=params.get("min_similarity", FUZZY_MIN_SIMILARITY),
+                ))
+            finally:
+                db.close()
+
+        elif method == "check_bom":
+            return _jsonrpc_response(req_id, _check_bom_rpc(req_id, params, notify))
+
+        elif method == "verify_library":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, verify.verify_library(
+                root, fix=params.get("fix", False), full=params.get("full", False),
+                workers=params.get("workers")))
+
+        elif method == "collect_garbage":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, library_gc.collect_garbage(
+                root, dry_run=params.get("dry_run", False),
+                grace_seconds=params.get("grace_seconds", library_gc.GC_GRACE_SECONDS),
+                quarantine=params.get("quarantine", True)))
+
+        elif method == "rebuild_library":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, rebuild.rebuild_library(
+                root, workers=params.get("workers"), restart=params.get("restart", False)))
+
+        elif method == "create_snapshot":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, snapshot.create_snapshot(root, label=params.get("label")))
+
+        elif method == "list_snapshots":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, snapshot.list_snapshots(root))
+
+        elif method == "restore_snapshot":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, snapshot.restore_snapshot(
+                root, params["name"], tables=params.get("tables", False)))
+
+        elif method == "sync_library":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, sync.sync_library(
+                root, params.get("dest"), threads=params.get("threads"), full=params.get("full", False)))
+
+        elif method == "pack_library":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, pack.pack_library(root, params["archive"],
+                                                               threads=params.get("threads")))
+
+        elif method == "unpack_library":
+            root = params.get("library_root") or resolve_library_root()
+            return _jsonrpc_response(req_id, pack.unpack_library(
+                params["archive"], root, components=params.get("components"),
+                overwrite=params.get("overwrite", False)))
+
+        elif method == "filter_components":
+            root = params.get("library_root") or resolve_library_root()
+            db_path = os.path.join(root, "components.db")
+            if not os.path.exists(db_path):
+                return _jsonrpc_response(req_id, {"total": 0, "components": [], "facets": {}})
+            db = ComponentDB(db_path)
+            try:
+                return _jsonrpc_response(req_id, db.filter_components(
+                    params.get("filters"),
+                    limit=params.get("limit", 100),
+                    offset=params.get("offset", 0),
+                    with_facets=params.get("facets", True),
+                ))
+            finally:
+                db.close()
+
+        elif method == "changes_since":
+            root = params.get("library_root") or resolve_library_root()
+            db_path = os.path.join(root, "components.db")
+            if not os.path.exists(db_path):
+                return _jsonrpc_response(req_id, {"cursor": 0, "changes": [],
+                                                  "has_more": False, "reset": False})
+            db = ComponentDB(db_path)
+            try:
+                return _jsonrpc_response(req_id, db.changes_since(
+                    params.get("cursor"), limit=params.get("limit", CHANGES_PAGE_SIZE)))
+            finally:
+                db.close()
+
+        elif method == "get_metrics":
+            metrics = METRICS.snapshot()
+            if params.get("prometheus_path"):
+                metrics["prometheus_path"] = METRICS.write_prometheus(params["prometheus_path"])
+            return _jsonrpc_response(req_id, metrics)
+
+        elif method == "get_worker_stats":
+            worker = _get_import_worker()
+            stats = worker.stats() if worker is not None else {}
+            return _jsonrpc_response(req_id, {"enabled": worker is not None, **stats})
+
+        elif method == "get_limits":
+            return _jsonrpc_response(req_id, get_limits())
+
+        elif method == "update_limits":
+            return _jsonrpc_response(req_id, update_limits(params.get("limits", {})))
+
+        elif method == "get_settings":
+            return _jsonrpc_response(req_id, load_settings())
+
+        elif method == "update_settings":
+            return _jsonrpc_response(req_id, update_settings(params.get("settings", {})))
+
         else:
             return _jsonrpc_response(req_id, error=f"Unknown method: {method}")
 
@@ -205,26 +546,167 @@ def handle_jsonrpc(request: dict) -> dict:
         return _jsonrpc_response(req_id, error=str(e))
 
 
-def serve():
-    """Run JSON-RPC server on stdin/stdout."""
+def _check_bom_rpc(req_id, params: dict, notify) -> dict:
+    """check_bom: all results in the response, or with "stream" each chunk as a bom-results notification."""
+    root = params.get("library_root") or resolve_library_root()
+    db_path = os.path.join(root, "components.db")
+    db = ComponentDB(db_path) if os.path.exists(db_path) else None
+    stream = params.get("stream", False) and notify is not None
+    try:
+        summary = bom.summarize([])
+        results = []
+        for chunk in bom.check_bom(params["path"], db, fuzzy=params.get("fuzzy", True)):
+            bom.summarize(chunk, summary)
+            if stream:
+                notify("bom-results", {"id": req_id, "results": chunk})
+            else:
+                results.extend(chunk)
+        response = {"summary": summary}
+        if not stream:
+            response["results"] = results
+        return response
+    finally:
+        if db is not None:
+            db.close()
+
+
+# Methods that may change the component database (followed by library-changed)
+_LIBRARY_WRITES = {"process_download", "process_batch", "verify_library", "restore_snapshot",
+                   "unpack_library", "rebuild_library"}
+
+
+def _library_changed_notification(request: dict, last_cursors: dict) -> dict | None:
+    """A library-changed JSON-RPC notification if request moved the change cursor."""
+    if request.get("method") not in _LIBRARY_WRITES:
+        return None
+    params = request.get("params") or {}
+    try:
+        root = params.get("library_root") or resolve_library_root()
+        db_path = os.path.join(root, "components.db")
+        if not os.path.exists(db_path):
+            return None
+        db = ComponentDB(db_path)
+        try:
+            cursor = db.change_cursor()
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Warning: could not read library change cursor: {e}", file=sys.stderr, flush=True)
+        return None
+    if last_cursors.get(root) == cursor:
+        return None
+    last_cursors[root] = cursor
+    return {"jsonrpc": "2.0", "method": "library-changed",
+            "params": {"library_root": root, "cursor": cursor}}
+
+
+def serve(metrics_file: str | None = None,
+          metrics_interval: float = METRICS_DUMP_INTERVAL):
+    """Run JSON-RPC server on stdin/stdout.
+
+    Lines are read on a separate thread and queued, so the number of requests
+    waiting behind a long import is visible as the queue_depth metric. If
+    metrics_file is given, a Prometheus text dump is rewritten there every
+    metrics_interval seconds. After a request that changed the component
+    database, a library-changed notification (no id) with the new change
+    cursor follows its response.
+    """
     print("KiPartBridge sidecar ready", file=sys.stderr, flush=True)
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+    pending = queue.Queue()
+
+    def read_stdin():
+        for raw in sys.stdin:
+            raw = raw.strip()
+            if raw:
+                METRICS.gauge_add("queue_depth", 1)
+                pending.put(raw)
+        pending.put(None)
+
+    def dump_metrics():
+        while True:
+            try:
+                METRICS.write_prometheus(metrics_file)
+            except OSError as e:
+                print(f"Warning: could not write metrics file: {e}", file=sys.stderr, flush=True)
+            time.sleep(metrics_interval)
+
+    threading.Thread(target=read_stdin, name="stdin-reader", daemon=True).start()
+    if metrics_file:
+        threading.Thread(target=dump_metrics, name="metrics-dump", daemon=True).start()
+
+    def notify(method, params):
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "method": method, "params": params}) + "\n")
+        sys.stdout.flush()
+
+    last_cursors = {}
+    while True:
+        line = pending.get()
+        if line is None:
+            break
         try:
             request = json.loads(line)
-            response = handle_jsonrpc(request)
+            response = handle_jsonrpc(request, notify)
             sys.stdout.write(json.dumps(response) + "\n")
+            notification = _library_changed_notification(request, last_cursors)
+            if notification is not None:
+                sys.stdout.write(json.dumps(notification) + "\n")
             sys.stdout.flush()
         except json.JSONDecodeError as e:
             err = _jsonrpc_response(None, error=f"Invalid JSON: {e}")
             sys.stdout.write(json.dumps(err) + "\n")
             sys.stdout.flush()
+        finally:
+            METRICS.gauge_add("queue_depth", -1)
+
+    close_import_worker()
+    if metrics_file:
+        METRICS.write_prometheus(metrics_file)
 
 
 # ── CLI ──────────────────────────────────────────────────────────────────────
 
+def _print_replay_report(report: dict) -> None:
+    print(f"Entries: {report['entries']} ({report['workers']} workers)")
+    print(f"Wall time: {report['wall_seconds']:.2f}s, "
+          f"throughput: {report['throughput_per_second']:.2f} imports/s")
+    for provider, h in report["latency_seconds_by_provider"].items():
+        print(f"  {provider}: n={h['count']} p50={h['p50'] * 1000:.0f}ms "
+              f"p95={h['p95'] * 1000:.0f}ms p99={h['p99'] * 1000:.0f}ms")
+    print(f"Errors: {report['errors']}")
+    print(f"Changed: {len(report['changed'])}")
+    for entry in report["changed"]:
+        print(f"  {entry['id']} ({entry['original_name']})")
+        for change in entry["changes"]:
+            print(f"    {change['field']}: {change['recorded']!r} -> {change['replayed']!r}")
+    if report["scratch_root"]:
+        print(f"Scratch libraries kept in {report['scratch_root']}")
+
+
+def _print_bom_result(r: dict) -> None:
+    refs = ",".join(r["references"]) or "-"
+    if r["status"] == "found":
+        c = r["component"]
+        detail = f"{c['symbol_name'] or '-'} / {c['footprint_name'] or '-'}"
+    elif r["status"] == "fuzzy":
+        detail = "did you mean " + ", ".join(c["mpn"] for c in r["candidates"])
+    else:
+        detail = ""
+    print(f"{r['status']:<8} {r['mpn']:<32} {refs:<16} {detail}".rstrip())
+
+
+def _print_verify_report(report: dict) -> None:
+    counts = report["counts"]
+    print(f"{counts['components']} components, {counts['symbols']} symbols, "
+          f"{counts['footprints']} footprints, {counts['models']} models "
+          f"({report['rescanned']['footprints']} footprints and "
+          f"{report['rescanned']['models']} models re-read, {report['seconds']:.2f}s)")
+    for i in report["issues"]:
+        print(f"  {i['kind']:<22} {i['name']}" + (f"  ({i['detail']})" if i["detail"] else ""))
+    for f in report["fixed"]:
+        print(f"  fixed: {f['mpn']} {f['action']}" + (f" {', '.join(f['fields'])}" if f.get("fields") else ""))
+    print(f"{len(report['issues'])} issues")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="KiPartBridge — KiCad library manager pipeline"
@@ -238,12 +720,122 @@ def main():
     proc.add_argument("--referrer-url", help="Referrer page URL")
     proc.add_argument("--library-root", help="Library root directory")
     proc.add_argument("--overwrite", action="store_true", help="Overwrite existing component")
+    proc.add_argument("--profile", choices=PROFILE_KINDS, help="Profile the pipeline run")
+    proc.add_argument("--record-corpus", metavar="DIR", help="Record the download into a replay corpus")
+    proc.add_argument("--timings", action="store_true", help="Print per-stage start/end times")
 
     # serve command
-    subparsers.add_parser("serve", help="Run JSON-RPC server on stdin/stdout")
+    srv = subparsers.add_parser("serve", help="Run JSON-RPC server on stdin/stdout")
+    srv.add_argument("--metrics-file", help="Periodically write Prometheus metrics to this file")
+    srv.add_argument("--metrics-interval", type=float, default=METRICS_DUMP_INTERVAL,
+                     help="Seconds between metrics file writes")
+    srv.add_argument("--profile-sample-rate", type=float,
+                     help="Fraction of imports to profile (0.0-1.0)")
+    srv.add_argument("--profile-kind", choices=PROFILE_KINDS, default="cpu",
+                     help="Profiler used for sampled imports")
+    srv.add_argument("--record-corpus", metavar="DIR", help="Record every download into a replay corpus")
+
+    # batch command
+    bat = subparsers.add_parser("batch", help="Import many ZIP files using a worker pool")
+    bat.add_argument("zipfiles", nargs="+", help="Paths to the ZIP files")
+    bat.add_argument("--library-root", help="Library root directory")
+    bat.add_argument("--workers", type=int,
+                     help="Worker processes (default: batch_workers setting, else CPU count)")
+    bat.add_argument("--overwrite", action="store_true", help="Overwrite existing components")
+    bat.add_argument("--record-corpus", metavar="DIR", help="Record the downloads into a replay corpus")
+    bat.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    # replay command
+    rep = subparsers.add_parser("replay", help="Replay a recorded corpus through the pipeline")
+    rep.add_argument("corpus_dir", help="Corpus directory written by --record-corpus")
+    rep.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    rep.add_argument("--scratch", help="Scratch directory for replay libraries (default: temp dir)")
+    rep.add_argument("--keep-scratch", action="store_true", help="Keep the scratch libraries afterwards")
+    rep.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    # check-bom command
+    chk = subparsers.add_parser("check-bom", aliases=["check_bom"],
+                                help="Report which BOM parts are already in the library")
+    chk.add_argument("bom_file", help="BOM as CSV, KiCad schematic (.kicad_sch) or netlist (.net)")
+    chk.add_argument("--library-root", help="Library root directory")
+    chk.add_argument("--no-fuzzy", action="store_true", help="Skip fuzzy matching of missing MPNs")
+    chk.add_argument("--json", action="store_true", help="Print one JSON object per entry, then the summary")
+
+    # verify command
+    ver = subparsers.add_parser("verify", help="Check the database against the library files")
+    ver.add_argument("--library-root", help="Library root directory")
+    ver.add_argument("--fix", action="store_true", help="Update database rows to match the files")
+    ver.add_argument("--full", action="store_true", help="Re-read every file, not just changed ones")
+    ver.add_argument("--workers", type=int,
+                     help="Footprint scan processes (default: batch_workers setting, else CPU count)")
+    ver.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # gc command
+    gcp = subparsers.add_parser("gc", help="Remove footprints and 3D models nothing refers to")
+    gcp.add_argument("--library-root", help="Library root directory")
+    gcp.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    gcp.add_argument("--delete", action="store_true",
+                     help=f"Delete files instead of moving them to {library_gc.QUARANTINE_DIR}/")
+    gcp.add_argument("--grace-hours", type=float, default=library_gc.GC_GRACE_SECONDS / 3600,
+                     help="Keep files modified within this many hours")
+    gcp.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # rebuild command
+    reb = subparsers.add_parser("rebuild", help="Re-normalize every footprint and symbol in the library")
+    reb.add_argument("--library-root", help="Library root directory")
+    reb.add_argument("--workers", type=int,
+                     help="Footprint worker processes (default: batch_workers setting, else CPU count)")
+    reb.add_argument("--restart", action="store_true",
+                     help="Start over instead of resuming an interrupted rebuild")
+    reb.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # snapshot commands
+    snp = subparsers.add_parser("snapshot", help="Take a snapshot of the library for rollback")
+    snp.add_argument("--library-root", help="Library root directory")
+    snp.add_argument("--label", help="Short label appended to the snapshot name")
+    snp.add_argument("--json", action="store_true", help="Print the manifest as JSON")
+
+    lsn = subparsers.add_parser("list-snapshots", aliases=["list_snapshots"],
+                                help="List library snapshots, newest first")
+    lsn.add_argument("--library-root", help="Library root directory")
+    lsn.add_argument("--json", action="store_true", help="Print the manifests as JSON")
+
+    rst = subparsers.add_parser("restore", help="Roll the library back to a snapshot")
+    rst.add_argument("name", help="Snapshot name (see list-snapshots)")
+    rst.add_argument("--library-root", help="Library root directory")
+    rst.add_argument("--tables", action="store_true",
+                     help="Also restore the KiCad sym-lib-table and fp-lib-table")
+    rst.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # export command
+    exp = subparsers.add_parser("export", aliases=["sync"],
+                                help="Mirror the library to a shared folder, copying only what changed")
+    exp.add_argument("dest", nargs="?", help="Destination folder (default: sync_destination setting)")
+    exp.add_argument("--library-root", help="Library root directory")
+    exp.add_argument("--threads", type=int, default=sync.SYNC_THREADS, help="Parallel file copies")
+    exp.add_argument("--full", action="store_true", help="Copy everything again, ignoring the manifest")
+    exp.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    # pack / unpack commands
+    pk = subparsers.add_parser("pack", help="Write the whole library to one archive")
+    pk.add_argument("archive", help="Archive to write (.kpack)")
+    pk.add_argument("--library-root", help="Library root directory")
+    pk.add_argument("--threads", type=int, help="Compression threads (default: CPU count)")
+    pk.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    upk = subparsers.add_parser("unpack", help="Restore a library, or single components, from an archive")
+    upk.add_argument("archive", help="Archive written by pack")
+    upk.add_argument("--library-root", help="Library root directory")
+    upk.add_argument("--component", action="append", metavar="MPN",
+                     help="Only add this component to the library (repeatable)")
+    upk.add_argument("--overwrite", action="store_true", help="Unpack over an existing library")
+    upk.add_argument("--json", action="store_true", help="Print the report as JSON")
 
     args = parser.parse_args()
 
+    if getattr(args, "record_corpus", None):
+        corpus.configure(args.record_corpus)
+
     if args.command == "process":
         result = process_download(
             zip_path=args.zipfile,
@@ -251,6 +843,7 @@ def main():
             referrer_url=args.referrer_url,
             library_root=args.library_root,
             overwrite=args.overwrite,
+            profile=args.profile,
         )
         print(f"Status: {result.status}")
         if result.mpn:
@@ -263,12 +856,208 @@ def main():
         if result.warnings:
             for w in result.warnings:
                 print(f"Warning: {w}")
+        for path in result.profile_paths:
+            print(f"Profile: {path}")
+        if args.timings:
+            for t in result.stage_timings:
+                print(f"Stage: {t['stage']:<22} {t['start'] * 1000:9.1f} -> {t['end'] * 1000:9.1f} ms  [{t['thread']}]")
         if result.error:
             print(f"Error: {result.error}")
             sys.exit(1)
 
+    elif args.command == "batch":
+        start = time.perf_counter()
+        results = import_batch([ImportJob(zip_path=z) for z in args.zipfiles],
+                               library_root=args.library_root, workers=args.workers,
+                               overwrite=args.overwrite)
+        elapsed = time.perf_counter() - start
+        if args.json:
+            print(json.dumps([_result_dict(r) for r in results], indent=2))
+        else:
+            for zip_path, r in zip(args.zipfiles, results):
+                print(f"{r.status:<8} {r.mpn or '-':<32} {os.path.basename(zip_path)}"
+                      + (f"  ({r.error})" if r.error else ""))
+            print(f"{len(results)} files in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s)")
+        if any(r.status == "error" for r in results):
+            sys.exit(1)
+
     elif args.command == "serve":
-        serve()
+        if args.profile_sample_rate is not None:
+            configure_sampling(args.profile_sample_rate, args.profile_kind)
+        serve(metrics_file=args.metrics_file, metrics_interval=args.metrics_interval)
+
+    elif args.command == "replay":
+        report = corpus.replay(args.corpus_dir, workers=args.workers,
+                               scratch_root=args.scratch, keep_scratch=args.keep_scratch)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            _print_replay_report(report)
+        if report["changed"] or report["errors"]:
+            sys.exit(1)
+
+    elif args.command in ("check-bom", "check_bom"):
+        root = args.library_root or resolve_library_root()
+        db_path = os.path.join(root, "components.db")
+        db = ComponentDB(db_path) if os.path.exists(db_path) else None
+        try:
+            summary = bom.summarize([])
+            for chunk in bom.check_bom(args.bom_file, db, fuzzy=not args.no_fuzzy):
+                bom.summarize(chunk, summary)
+                for r in chunk:
+                    if args.json:
+                        print(json.dumps(r))
+                    else:
+                        _print_bom_result(r)
+                sys.stdout.flush()
+        finally:
+            if db is not None:
+                db.close()
+        if args.json:
+            print(json.dumps({"summary": summary}))
+        else:
+            print(f"{summary['total']} MPNs: {summary['found']} found, "
+                  f"{summary['fuzzy']} fuzzy, {summary['missing']} missing")
+        if summary["fuzzy"] or summary["missing"]:
+            sys.exit(1)
+
+    elif args.command == "verify":
+        report = verify.verify_library(args.library_root or resolve_library_root(),
+                                       fix=args.fix, full=args.full, workers=args.workers)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            _print_verify_report(report)
+        if report["issues"]:
+            sys.exit(1)
+
+    elif args.command == "gc":
+        report = library_gc.collect_garbage(args.library_root or resolve_library_root(),
+                                            dry_run=args.dry_run, grace_seconds=args.grace_hours * 3600,
+                                            quarantine=not args.delete)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            for item in report["items"]:
+                print(f"  {item['kind']:<10} {item['bytes']:>12,}  {item['path']}")
+            if report["truncated"]:
+                print("  ...")
+            c = report["collected"]
+            verb = "Would remove" if report["dry_run"] else "Removed"
+            print(f"{verb} {c['footprints']} footprints, {c['models']} models, {c['temp']} temp files "
+                  f"({report['bytes'] / 1e6:.1f} MB); {report['skipped_recent']} recent files kept")
+            if report["quarantine_dir"]:
+                print(f"Quarantined in {report['quarantine_dir']}")
+
+    elif args.command == "rebuild":
+        def progress(done, total):
+            print(f"\r  {done}/{total} footprints", end="", file=sys.stderr, flush=True)
+
+        report = rebuild.rebuild_library(args.library_root or resolve_library_root(),
+                                         workers=args.workers, restart=args.restart,
+                                         progress=None if args.json else progress)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(file=sys.stderr)
+            fp = report["footprints"]
+            if report["resumed"]:
+                print(f"Resumed: {fp['skipped']} footprints already rebuilt")
+            print(f"Rebuilt {fp['rebuilt']}/{fp['total']} footprints, {report['symbols']} symbols "
+                  f"({report['linked']} linked) in {report['seconds']:.1f}s")
+            print(f"Updated facets of {report['components_updated']} components")
+            for e in fp["errors"]:
+                print(f"  {e['name']}: {e['error']}")
+        if report["footprints"]["errors"]:
+            sys.exit(1)
+
+    elif args.command == "snapshot":
+        manifest = snapshot.create_snapshot(args.library_root or resolve_library_root(), label=args.label)
+        if args.json:
+            print(json.dumps(manifest, indent=2))
+        else:
+            files = manifest["files"]
+            print(f"Snapshot {manifest['name']}: {files['linked']} files linked, {files['copied']} copied "
+                  f"({manifest['bytes_copied'] / 1e6:.1f} MB) in {manifest['seconds']:.1f}s")
+
+    elif args.command in ("list-snapshots", "list_snapshots"):
+        manifests = snapshot.list_snapshots(args.library_root or resolve_library_root())
+        if args.json:
+            print(json.dumps(manifests, indent=2))
+        else:
+            for m in manifests:
+                files = m["files"]
+                print(f"{m['name']:<48} {'auto' if m['auto'] else '':<5} "
+                      f"{files['linked'] + files['copied']:>7} files")
+
+    elif args.command == "restore":
+        try:
+            report = snapshot.restore_snapshot(args.library_root or resolve_library_root(), args.name,
+                                               tables=args.tables)
+        except snapshot.SnapshotError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            fp, models = report["footprints"], report["models"]
+            print(f"Restored {report['name']}: {fp['restored']} footprints and {models['restored']} models "
+                  f"put back, {fp['removed']} footprints and {models['removed']} models removed")
+            print(f"The previous state was saved as snapshot {report['safety_snapshot']}")
+
+    elif args.command in ("export", "sync"):
+        def progress(done, total, copied):
+            print(f"\r  {done}/{total} files, {copied / 1e6:.1f} MB copied", end="", file=sys.stderr, flush=True)
+
+        try:
+            report = sync.sync_library(args.library_root or resolve_library_root(), args.dest,
+                                       threads=args.threads, full=args.full,
+                                       progress=None if args.json else progress)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(file=sys.stderr)
+            f, sym = report["files"], report["symbols"]
+            print(f"Files: {f['copied']} copied ({report['bytes_copied'] / 1e6:.1f} MB), "
+                  f"{f['unchanged']} unchanged, {f['deleted']} deleted")
+            print(f"Symbol library: {sym['blocks_changed']}/{sym['blocks']} blocks changed, "
+                  f"{sym['bytes_written'] / 1e6:.1f} MB written")
+            print(f"Database: {'copied' if report['database_copied'] else 'unchanged'}")
+            print(f"{report['seconds']:.1f}s, {report['mb_per_second']:.1f} MB/s")
+            for e in f["errors"]:
+                print(f"  {e['path']}: {e['error']}")
+        if report["files"]["errors"]:
+            sys.exit(1)
+
+    elif args.command == "pack":
+        def progress(done, total):
+            print(f"\r  {done / 1e6:.1f}/{total / 1e6:.1f} MB", end="", file=sys.stderr, flush=True)
+
+        report = pack.pack_library(args.library_root or resolve_library_root(), args.archive,
+                                   threads=args.threads, progress=None if args.json else progress)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(file=sys.stderr)
+            print(f"Packed {report['components']} components ({report['members']} files) into "
+                  f"{report['archive']}: {report['bytes_in'] / 1e6:.1f} MB -> {report['bytes_out'] / 1e6:.1f} MB "
+                  f"in {report['seconds']:.1f}s ({report['mb_per_second']:.1f} MB/s)")
+
+    elif args.command == "unpack":
+        try:
+            report = pack.unpack_library(args.archive, args.library_root or resolve_library_root(),
+                                         components=args.component, overwrite=args.overwrite)
+        except pack.PackError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(f"Unpacked {len(report['components'])} components ({report['files']} files, "
+                  f"{report['bytes'] / 1e6:.1f} MB) into {report['root']} in {report['seconds']:.1f}s")
 
     else:
         parser.print_help()
@@ -276,4 +1065,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Worker processes of frozen (PyInstaller) builds re-enter here
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,301 @@
+"""Runtime metrics — rolling latency histograms, counters and gauges for the sidecar.
+
+A single process-wide registry (``METRICS``) is updated by the JSON-RPC loop,
+the import pipeline and the database layer. It can be read as a dict for the
+``get_metrics`` RPC or rendered in Prometheus text exposition format.
+"""
+
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+# Number of most recent samples kept per histogram
+HISTOGRAM_WINDOW = 1024
+
+# Window used for the imports-per-minute rate
+_RATE_WINDOW_SECONDS = 60.0
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+class RollingHistogram:
+    """Keeps the last N observations plus lifetime count and sum."""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> dict:
+        values = sorted(self._samples)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1] if values else 0.0,
+        }
+
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is the peak, not the current RSS, but it is the best we have
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metrics:
+    """Thread-safe registry of sidecar metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._rpc_latency = defaultdict(RollingHistogram)
+            self._stage_latency = defaultdict(RollingHistogram)
+            self._lock_wait = defaultdict(RollingHistogram)
+            self._rpc_errors = Counter()
+            self._imports = Counter()
+            self._provider_errors = Counter()
+            self._import_times = deque()
+            self._cache_hits = Counter()
+            self._cache_misses = Counter()
+            self._gauges = defaultdict(int)
+
+    # ── Recording ────────────────────────────────────────────────────────
+
+    def observe_rpc(self, method: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self._rpc_latency[method].observe(seconds)
+            if not ok:
+                self._rpc_errors[method] += 1
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stage_latency[stage].observe(seconds)
+
+    def observe_lock_wait(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._lock_wait[name].observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage: ``with METRICS.stage("classify"): ...``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def record_import(self, provider: str | None, ok: bool) -> None:
+        provider = provider or "unknown"
+        now = time.time()
+        with self._lock:
+            self._imports[provider] += 1
+            if not ok:
+                self._provider_errors[provider] += 1
+            self._import_times.append(now)
+            self._trim_import_times(now)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._cache_hits[name] += 1
+            else:
+                self._cache_misses[name] += 1
+
+    def gauge_add(self, name: str, delta: int) -> None:
+        with self._lock:
+            self._gauges[name] += delta
+
+    def gauge_set(self, name: str, value: int) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def _trim_import_times(self, now: float) -> None:
+        cutoff = now - _RATE_WINDOW_SECONDS
+        while self._import_times and self._import_times[0] < cutoff:
+            self._import_times.popleft()
+
+    # ── Reading ──────────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        """Return all metrics as a JSON-serializable dict."""
+        now = time.time()
+        with self._lock:
+            self._trim_import_times(now)
+            caches = {}
+            for name in sorted(set(self._cache_hits) | set(self._cache_misses)):
+                hits = self._cache_hits[name]
+                misses = self._cache_misses[name]
+                caches[name] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                }
+            return {
+                "uptime_seconds": now - self.started_at,
+                "rss_bytes": current_rss_bytes(),
+                "queue_depth": self._gauges["queue_depth"],
+                "open_db_connections": self._gauges["open_db_connections"],
+                "gauges": dict(self._gauges),
+                "imports_per_minute": len(self._import_times) * 60.0 / _RATE_WINDOW_SECONDS,
+                "imports_total": dict(self._imports),
+                "errors_by_provider": dict(self._provider_errors),
+                "rpc_errors": dict(self._rpc_errors),
+                "rpc_latency_seconds": {m: h.snapshot() for m, h in sorted(self._rpc_latency.items())},
+                "stage_latency_seconds": {s: h.snapshot() for s, h in sorted(self._stage_latency.items())},
+                "lock_wait_seconds": {n: h.snapshot() for n, h in sorted(self._lock_wait.items())},
+                "caches": caches,
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the current snapshot in Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def emit(name, kind, help_text, samples):
+            lines.append(f"# HELP kipartbridge_{name} {help_text}")
+            lines.append(f"# TYPE kipartbridge_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                label_str = f"{{{label_str}}}" if label_str else ""
+                lines.append(f"kipartbridge_{name}{suffix}{label_str} {_format_value(value)}")
+
+        def summary(name, help_text, label, histograms):
+            samples = []
+            for key, h in histograms.items():
+                for q in ("50", "95", "99"):
+                    samples.append(("", {label: key, "quantile": f"0.{q}"}, h[f"p{q}"]))
+                samples.append(("_sum", {label: key}, h["sum"]))
+                samples.append(("_count", {label: key}, h["count"]))
+            emit(name, "summary", help_text, samples)
+
+        emit("uptime_seconds", "gauge", "Seconds since the sidecar started.",
+             [("", {}, snap["uptime_seconds"])])
+        if snap["rss_bytes"] is not None:
+            emit("rss_bytes", "gauge", "Resident set size of the sidecar process.",
+                 [("", {}, snap["rss_bytes"])])
+        emit("queue_depth", "gauge", "JSON-RPC requests received but not yet answered.",
+             [("", {}, snap["queue_depth"])])
+        emit("open_db_connections", "gauge", "Open ComponentDB connections.",
+             [("", {}, snap["open_db_connections"])])
+        emit("imports_per_minute", "gauge", "Imports completed in the last minute.",
+             [("", {}, snap["imports_per_minute"])])
+        emit("imports_total", "counter", "Imports processed, by provider.",
+             [("", {"provider": p}, n) for p, n in sorted(snap["imports_total"].items())])
+        emit("import_errors_total", "counter", "Failed imports, by provider.",
+             [("", {"provider": p}, n) for p, n in sorted(snap["errors_by_provider"].items())])
+        emit("rpc_errors_total", "counter", "JSON-RPC calls that returned an error, by method.",
+             [("", {"method": m}, n) for m, n in sorted(snap["rpc_errors"].items())])
+        summary("rpc_latency_seconds", "JSON-RPC latency by method.", "method",
+                snap["rpc_latency_seconds"])
+        summary("stage_latency_seconds", "Import pipeline latency by stage.", "stage",
+                snap["stage_latency_seconds"])
+        summary("lock_wait_seconds", "Time spent waiting for library file locks.", "lock",
+                snap["lock_wait_seconds"])
+        emit("cache_hits_total", "counter", "Internal cache hits.",
+             [("", {"cache": c}, v["hits"]) for c, v in snap["caches"].items()])
+        emit("cache_misses_total", "counter", "Internal cache misses.",
+             [("", {"cache": c}, v["misses"]) for c, v in snap["caches"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        """Write the Prometheus text dump to ``path`` atomically. Returns the path."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # A unique temp file per write: the periodic dump and get_metrics can
+        # run at once in one process. (fsutil imports this module, so its
+        # atomic writers cannot be used here; the naming matches theirs.)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.to_prometheus())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return path
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+METRICS = Metrics()
+
+
+class StageTimeline:
+    """Start/end offsets of the stages of one pipeline run.
+
+    Stages may run on several threads; the offsets (seconds since the timeline
+    was created) show which of them overlapped. Every stage is also observed
+    on METRICS, like Metrics.stage.
+    """
+
+    def __init__(self, metrics: Metrics | None = None):
+        self._metrics = metrics or METRICS
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._entries = []
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._metrics.observe_stage(name, end - start)
+            with self._lock:
+                self._entries.append({
+                    "stage": name,
+                    "start": start - self._origin,
+                    "end": end - self._origin,
+                    "thread": threading.current_thread().name,
+                })
+
+    def entries(self) -> list[dict]:
+        """Recorded stages ordered by start time."""
+        with self._lock:
+            return sorted((dict(e) for e in self._entries), key=lambda e: e["start"])
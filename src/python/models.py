@@ -35,9 +35,20 @@ class ComponentFiles:
 class ProcessingResult:
     """Result of processing a component through the full pipeline."""
     status: str  # "success", "partial", "error"
+    provider: Optional[str] = None
     mpn: Optional[str] = None
     symbol_name: Optional[str] = None
     footprint_name: Optional[str] = None
     has_3d_model: bool = False
     error: Optional[str] = None
     warnings: list[str] = field(default_factory=list)
+    profile_paths: list[str] = field(default_factory=list)
+    stage_timings: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class ImportJob:
+    """One downloaded ZIP queued for a batch import."""
+    zip_path: str
+    source_url: Optional[str] = None
+    referrer_url: Optional[str] = None
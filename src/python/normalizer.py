@@ -6,19 +6,25 @@ Handles:
 - 3D model path rewriting to use ${KIPARTBRIDGE_3DMODELS}
 - Legacy .lib -> .kicad_sym conversion via kicad-cli
 - Appending to a unified symbol library
+
+Library mutations hold fsutil.file_lock on their target and write atomically,
+so several importer processes can share one library root.
 """
 
+import math
 import os
 import re
 import shutil
 import subprocess
 import sys
 
-from kiutils.symbol import SymbolLib
+from kiutils.symbol import Symbol, SymbolLib
 from kiutils.footprint import Footprint, Model
 from kiutils.items.common import Property
 
+from fsutil import atomic_copy, atomic_write_text, file_lock
 from models import ComponentFiles
+from symbol_view import SymbolLibView, replace_symbol
 
 # Characters not allowed in file/symbol names
 _SANITIZE_RE = re.compile(r'[/\\:*?"<>|]')
@@ -71,21 +77,21 @@ def upgrade_symbol_lib(lib_path: str) -> None:
     kiutils 1.4.8 writes version 20211014 and generator None, which KiCad 9 cannot load.
     We fix the header so kicad-cli can parse it, then run kicad-cli sym upgrade --force.
     """
-    # Fix the header: replace "(generator None)" with "(generator "kipartbridge")"
-    with open(lib_path, 'r') as f:
-        content = f.read()
-    content = content.replace('(generator None)', '(generator "kipartbridge")')
-    with open(lib_path, 'w') as f:
-        f.write(content)
-
-    # Run kicad-cli to upgrade to current format
-    cli = _find_kicad_cli()
-    if not cli:
-        return  # Can't upgrade, but the header fix alone may suffice for some KiCad versions
-    result = subprocess.run(
-        [cli, "sym", "upgrade", lib_path, "--force"],
-        capture_output=True, text=True
-    )
+    with file_lock(lib_path, "symbol_lib"):
+        # Fix the header: replace "(generator None)" with "(generator "kipartbridge")"
+        with open(lib_path, 'r') as f:
+            content = f.read()
+        if '(generator None)' in content:
+            atomic_write_text(lib_path, content.replace('(generator None)', '(generator "kipartbridge")'))
+
+        # Run kicad-cli to upgrade to current format
+        cli = _find_kicad_cli()
+        if not cli:
+            return  # Can't upgrade, but the header fix alone may suffice for some KiCad versions
+        result = subprocess.run(
+            [cli, "sym", "upgrade", lib_path, "--force"],
+            capture_output=True, text=True
+        )
     if result.returncode != 0:
         # Non-fatal: log but don't fail the whole pipeline
         print(f"Warning: kicad-cli sym upgrade failed: {result.stderr}", file=sys.stderr)
@@ -101,6 +107,17 @@ def normalize_symbol(component: ComponentFiles, target_lib_path: str) -> str:
 
     Returns the symbol name.
     """
+    symbol = prepare_symbol(component)
+    merge_symbols(target_lib_path, [symbol])
+    return symbol.entryName
+
+
+def prepare_symbol(component: ComponentFiles, with_facets: bool = False):
+    """Load the component's symbol, renamed to its MPN, ready to merge into a library.
+
+    With with_facets, returns (symbol, symbol_facets) instead, the facets taken
+    from the vendor's symbol before its properties are standardized.
+    """
     if not component.symbol_file:
         raise ValueError("No symbol file in component")
 
@@ -120,85 +137,181 @@ def normalize_symbol(component: ComponentFiles, target_lib_path: str) -> str:
 
     # Take the first symbol and rename it
     symbol = source_lib.symbols[0]
-    symbol.entryName = mpn
+    facets = symbol_facets(symbol) if with_facets else None
+    standardize_symbol(symbol, mpn)
+    return (symbol, facets) if with_facets else symbol
+
+
+_SUB_SUFFIX_RE = re.compile(r'_(\d+)_(\d+)$')
+
+
+def standardize_symbol(symbol: Symbol, name: str) -> None:
+    """Rename a symbol (and its units) to name and set the standard properties."""
+    symbol.entryName = name
 
     # Update sub-symbol names (e.g. "OrigName_0_1" -> "MPN_0_1")
     # KiCad sub-symbols always end with _<digit>_<digit> suffix
-    _SUB_SUFFIX = re.compile(r'_(\d+)_(\d+)$')
     for sub in symbol.units:
-        m = _SUB_SUFFIX.search(sub.entryName)
+        m = _SUB_SUFFIX_RE.search(sub.entryName)
         if m:
-            sub.entryName = f"{mpn}_{m.group(1)}_{m.group(2)}"
+            sub.entryName = f"{name}_{m.group(1)}_{m.group(2)}"
         else:
-            sub.entryName = mpn
+            sub.entryName = name
 
     # Ensure standard properties
     _set_property(symbol, "Reference", "U")
-    _set_property(symbol, "Value", mpn)
+    _set_property(symbol, "Value", name)
 
-    # Load or create target library
-    if os.path.exists(target_lib_path):
-        target_lib = SymbolLib.from_file(target_lib_path)
-    else:
-        target_lib = SymbolLib()
 
-    # Remove existing symbol with same name (for overwrite/update)
-    target_lib.symbols = [s for s in target_lib.symbols if s.entryName != mpn]
+def merge_symbols(target_lib_path: str, symbols: list[Symbol]) -> None:
+    """Replace-or-append symbols in the target library with one load and one write.
+
+    Same result as merging them one at a time, in order: a later symbol with
+    the same name replaces an earlier one and moves to the end.
+    """
+    incoming = {}
+    for symbol in symbols:
+        incoming.pop(symbol.entryName, None)
+        incoming[symbol.entryName] = symbol
+
+    with file_lock(target_lib_path, "symbol_lib"):
+        # Load or create target library
+        if os.path.exists(target_lib_path):
+            target_lib = SymbolLib.from_file(target_lib_path)
+        else:
+            target_lib = SymbolLib()
+
+        # Remove existing symbols with the same names (for overwrite/update), then append
+        target_lib.symbols = [s for s in target_lib.symbols if s.entryName not in incoming]
+        target_lib.symbols.extend(incoming.values())
+        atomic_write_text(target_lib_path, target_lib.to_sexpr())
+
 
-    # Append
-    target_lib.symbols.append(symbol)
-    target_lib.to_file(target_lib_path)
+def model_files(component: ComponentFiles) -> list[tuple[str, str]]:
+    """(source path, target filename) of each 3D model to copy, STEP first."""
+    mpn = sanitize_name(component.mpn)
+    return [(src, f"{mpn}{os.path.splitext(src)[1]}")
+            for src in (component.model_step, component.model_wrl) if src]
 
-    return mpn
+
+def copy_model(source: str, models_dir: str, filename: str) -> str:
+    """Copy one 3D model into models_dir. Returns the destination path."""
+    dest = os.path.join(models_dir, filename)
+    atomic_copy(source, dest)
+    return dest
 
 
 def normalize_footprint(component: ComponentFiles, footprint_dir: str,
-                        models_dir: str) -> str:
+                        models_dir: str, copy_models: bool = True,
+                        with_facets: bool = False):
     """Normalize a footprint and copy it to the library directory.
 
     - Renames footprint to sanitized MPN
     - Rewrites 3D model paths to use ${KIPARTBRIDGE_3DMODELS}
-    - Copies .step/.wrl files to models_dir
+    - Copies .step/.wrl files to models_dir (unless copy_models is False, for
+      callers that copy them concurrently via copy_model)
 
-    Returns the footprint name.
+    Returns the footprint name, or (name, footprint_facets) with with_facets.
     """
     if not component.footprint_file:
         raise ValueError("No footprint file in component")
 
     mpn = sanitize_name(component.mpn)
     fp = Footprint.from_file(component.footprint_file)
+    facets = footprint_facets(fp) if with_facets else None
 
     # Rename footprint
     fp.entryName = mpn
 
-    # Copy 3D model files and set up references
-    model_filename = None
-    if component.model_step:
-        ext = os.path.splitext(component.model_step)[1]
-        model_filename = f"{mpn}{ext}"
-        dest = os.path.join(models_dir, model_filename)
-        shutil.copy2(component.model_step, dest)
-
-    if component.model_wrl:
-        ext = os.path.splitext(component.model_wrl)[1]
-        wrl_filename = f"{mpn}{ext}"
-        dest = os.path.join(models_dir, wrl_filename)
-        shutil.copy2(component.model_wrl, dest)
-        if not model_filename:
-            model_filename = wrl_filename
+    # Copy 3D model files and set up references (STEP preferred over WRL)
+    models = model_files(component)
+    if copy_models:
+        for source, filename in models:
+            copy_model(source, models_dir, filename)
 
     # Rewrite 3D model references
-    if model_filename:
-        model_path = f"${{KIPARTBRIDGE_3DMODELS}}/{model_filename}"
+    if models:
+        model_path = f"${{KIPARTBRIDGE_3DMODELS}}/{models[0][1]}"
         fp.models = [Model(path=model_path)]
     else:
         fp.models = []
 
     # Write footprint to target directory
     target_path = os.path.join(footprint_dir, f"{mpn}.kicad_mod")
-    fp.to_file(target_path)
+    with file_lock(footprint_dir, "footprints"):
+        atomic_write_text(target_path, fp.to_sexpr())
+
+    return (mpn, facets) if with_facets else mpn
 
-    return mpn
+
+# ── Facets ───────────────────────────────────────────────────────────────────
+
+_REFERENCE_PREFIX_RE = re.compile(r'[A-Za-z_#]+')
+_COURTYARD_LAYERS = {"F.CrtYd", "B.CrtYd"}
+
+
+def symbol_facets(symbol: Symbol) -> dict:
+    """Searchable attributes of a vendor symbol: pin_count, unit_count, reference.
+
+    Pins are counted by distinct number (De Morgan alternates and pins shared
+    by all units count once); reference is the designator prefix, e.g. "R".
+    """
+    numbers = {pin.number for pin in symbol.pins}
+    units = set()
+    for sub in symbol.units:
+        numbers.update(pin.number for pin in sub.pins)
+        if sub.unitId:    # unit 0 holds what all units share
+            units.add(sub.unitId)
+    reference = None
+    for prop in symbol.properties:
+        if prop.key == "Reference":
+            m = _REFERENCE_PREFIX_RE.match(prop.value or "")
+            reference = m.group(0).upper() if m else None
+    return {"pin_count": len(numbers), "unit_count": max(len(units), 1), "reference": reference}
+
+
+def footprint_facets(fp: Footprint) -> dict:
+    """Searchable attributes of a vendor footprint.
+
+    package is its original name, pad_count the number of distinct numbered
+    pads, mount_type "smd", "tht" or "mixed", and courtyard_* the courtyard's
+    bounding box in mm (None without a courtyard).
+    """
+    pad_types = {pad.type for pad in fp.pads}
+    if fp.attributes.type == "smd" or pad_types & {"smd"} and not pad_types & {"thru_hole"}:
+        mount_type = "smd"
+    elif fp.attributes.type == "through_hole" or pad_types & {"thru_hole"} and not pad_types & {"smd"}:
+        mount_type = "tht"
+    elif pad_types & {"smd"} and pad_types & {"thru_hole"}:
+        mount_type = "mixed"
+    else:
+        mount_type = None
+
+    xs, ys = [], []
+    for item in fp.graphicItems:
+        if getattr(item, "layer", None) not in _COURTYARD_LAYERS:
+            continue
+        if hasattr(item, "coordinates"):             # fp_poly
+            points = item.coordinates
+        elif hasattr(item, "center"):                # fp_circle
+            r = math.hypot(item.end.X - item.center.X, item.end.Y - item.center.Y)
+            xs += [item.center.X - r, item.center.X + r]
+            ys += [item.center.Y - r, item.center.Y + r]
+            continue
+        else:                                        # fp_line, fp_rect, fp_arc
+            points = [p for p in (item.start, getattr(item, "mid", None), item.end) if p is not None]
+        xs += [p.X for p in points]
+        ys += [p.Y for p in points]
+    bbox = (min(xs), min(ys), max(xs), max(ys)) if xs else (None, None, None, None)
+
+    facets = {
+        "package": fp.entryName.split(":")[-1] if fp.entryName else None,
+        "pad_count": len({pad.number for pad in fp.pads if pad.number}),
+        "mount_type": mount_type,
+    }
+    for key, value in zip(("courtyard_x_min", "courtyard_y_min", "courtyard_x_max", "courtyard_y_max"), bbox):
+        facets[key] = round(value, 4) if value is not None else None
+    return facets
 
 
 def link_symbol_to_footprint(target_lib_path: str, symbol_name: str,
@@ -206,15 +319,21 @@ def link_symbol_to_footprint(target_lib_path: str, symbol_name: str,
     """Set the Footprint property on a symbol to point to the correct footprint.
 
     Sets it to "library_name:footprint_name" (e.g. "kipartbridge:STM32C071RBT6").
+    Only that symbol is parsed and rewritten; the rest of the library is
+    spliced through unchanged (see symbol_view).
     """
-    lib = SymbolLib.from_file(target_lib_path)
-    for symbol in lib.symbols:
-        if symbol.entryName == symbol_name:
-            footprint_ref = f"{library_name}:{footprint_name}"
-            _set_property(symbol, "Footprint", footprint_ref)
-            lib.to_file(target_lib_path)
-            return
-    raise ValueError(f"Symbol '{symbol_name}' not found in {target_lib_path}")
+    with file_lock(target_lib_path, "symbol_lib"):
+        with SymbolLibView(target_lib_path) as view:
+            if symbol_name not in view:
+                raise ValueError(f"Symbol '{symbol_name}' not found in {target_lib_path}")
+            symbol = view.symbol(symbol_name)
+        set_symbol_footprint(symbol, library_name, footprint_name)
+        replace_symbol(target_lib_path, symbol_name, symbol)
+
+
+def set_symbol_footprint(symbol: Symbol, library_name: str, footprint_name: str) -> None:
+    """Point a symbol's Footprint property at library_name:footprint_name."""
+    _set_property(symbol, "Footprint", f"{library_name}:{footprint_name}")
 
 
 def _set_property(symbol, key: str, value: str) -> None:
@@ -0,0 +1,417 @@
+"""Library packs — the whole library root in one archive, for onboarding and backups.
+
+A pack (.kpack) holds the symbol library, components.db, every footprint and
+every 3D model. pack_library streams them into the archive in one pass: each
+file is read in PACK_CHUNK_SIZE chunks, text chunks are deflated on a thread
+pool (zlib releases the GIL, so this scales with cores) and written in order
+as they complete, so no temp copy of the library is made. Models that are
+already compressed (.stpz, .wrz, ...) are stored as they are, as is any chunk
+that deflate does not shrink. The database is taken with SQLite's backup API
+into a temp file next to the archive and streamed from there, so a writer
+running at the same time cannot tear it.
+
+Layout:
+
+    PACK_MAGIC
+    chunk data of every member, in member order
+    index: zlib-compressed JSON
+    trailer: index offset (u64), index length (u64), PACK_MAGIC
+
+The index lists each member's chunks (compressed length and whether stored),
+size, CRC-32 and mtime. It also maps each component to its database row, its
+footprint and model members and the byte range of its symbol inside the
+symbol library. unpack_library with components reads only the chunks those
+cover, so pulling one part out of a multi-GB pack does not read the rest.
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from kiutils.symbol import Symbol
+from kiutils.utils import sexpr as kiutils_sexpr
+
+from database import FACET_COLUMNS, ComponentDB, backup_database
+from fsutil import atomic_write_chunks, file_lock
+from library_injector import (
+    LIB_NAME, ensure_library_dirs, ensure_library_tables, setup_environment_variable,
+)
+from normalizer import merge_symbols, upgrade_symbol_lib
+from symbol_view import SymbolLibView
+from verify import MODEL_VAR, footprint_models
+
+PACK_MAGIC = b"KPBPACK1"
+
+# Unit of parallel compression and of random access
+PACK_CHUNK_SIZE = 1024 * 1024
+
+PACK_LEVEL = 6
+
+# Model formats that are compressed already; deflating them again only costs time
+_STORED_EXTS = {".stpz", ".wrz", ".gz", ".zip", ".7z", ".glb"}
+
+_TRAILER = struct.Struct("<QQ8s")
+_INDEX_VERSION = 1
+_PACKED_DIRS = (f"{LIB_NAME}.pretty", "3dmodels")
+_ROW_FIELDS = ("mpn", "symbol_name", "footprint_name", "has_3d_model", "manufacturer", "description",
+               "source_provider", "source_url", "referrer_url")
+
+
+class PackError(ValueError):
+    """Not a pack, a damaged pack, or a component the pack does not hold."""
+
+
+# ── Writing ──────────────────────────────────────────────────────────────────
+
+def _deflate(data: bytes) -> tuple[bytes, bool]:
+    """Thread side: (payload, stored) for one chunk."""
+    packed = zlib.compress(data, PACK_LEVEL)
+    return (data, True) if len(packed) >= len(data) else (packed, False)
+
+
+class _Writer:
+    """Writes chunks in member order while a thread pool compresses the ones ahead."""
+
+    def __init__(self, out, pool: ThreadPoolExecutor, window: int, progress=None, total: int = 0):
+        self.out = out
+        self.pool = pool
+        self.window = window
+        self.progress = progress
+        self.total = total
+        self.offset = 0
+        self.done = 0
+        self.members = []
+        self._pending = deque()    # (member, raw length, future)
+        self._write(PACK_MAGIC)
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self.offset += len(data)
+
+    def add(self, name: str, f, mtime: float, compress: bool = True) -> None:
+        member = {"name": name, "offset": None, "size": 0, "crc": 0, "mtime": mtime, "chunks": []}
+        self.members.append(member)
+        for data in iter(lambda: f.read(PACK_CHUNK_SIZE), b""):
+            member["size"] += len(data)
+            member["crc"] = zlib.crc32(data, member["crc"])
+            if compress:
+                future = self.pool.submit(_deflate, data)
+            else:
+                future = Future()
+                future.set_result((data, True))
+            self._pending.append((member, len(data), future))
+            while len(self._pending) >= self.window:
+                self._emit()
+
+    def _emit(self) -> None:
+        member, size, future = self._pending.popleft()
+        payload, stored = future.result()
+        if member["offset"] is None:
+            member["offset"] = self.offset
+        self._write(payload)
+        member["chunks"].append([len(payload), stored])
+        self.done += size
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+    def finish(self, index: dict) -> None:
+        while self._pending:
+            self._emit()
+        for member in self.members:
+            if member["offset"] is None:    # empty file
+                member["offset"] = self.offset
+        index["members"] = self.members
+        data = zlib.compress(json.dumps(index).encode("utf-8"), PACK_LEVEL)
+        index_offset = self.offset
+        self._write(data)
+        self._write(_TRAILER.pack(index_offset, len(data), PACK_MAGIC))
+
+
+def _snapshot_database(db_path: str, dest: str) -> dict:
+    """Back the database up to dest with the backup API. Returns its {mpn: row}."""
+    backup_database(db_path, dest)
+    conn = sqlite3.connect(dest)
+    try:
+        conn.row_factory = sqlite3.Row
+        columns = _ROW_FIELDS + tuple(FACET_COLUMNS)
+        return {r["mpn"]: dict(r) for r in conn.execute(f"SELECT {', '.join(columns)} FROM components")}
+    finally:
+        conn.close()
+
+
+def _library_files(root: str) -> list[str]:
+    rels = []
+    for sub in _PACKED_DIRS:
+        directory = os.path.join(root, sub)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            rels.extend(f"{sub}/{e.name}" for e in entries
+                        if e.is_file(follow_symlinks=False) and not e.name.startswith("."))
+    return sorted(rels)
+
+
+def _component_index(root: str, rows: dict, spans: dict, names: set[str]) -> dict:
+    """{mpn: {"row", "symbol": [start, end] or None, "files"}} for the index."""
+    components = {}
+    for mpn, row in rows.items():
+        files = []
+        fp_name = row["footprint_name"]
+        fp_member = f"{LIB_NAME}.pretty/{fp_name}.kicad_mod"
+        if fp_name and fp_member in names:
+            files.append(fp_member)
+            for ref in footprint_models(os.path.join(root, fp_member))["models"]:
+                model_member = f"3dmodels/{ref[len(MODEL_VAR):]}"
+                if ref.startswith(MODEL_VAR) and model_member in names:
+                    files.append(model_member)
+        span = spans.get(row["symbol_name"]) if row["symbol_name"] else None
+        components[mpn] = {"row": row, "symbol": list(span) if span else None, "files": files}
+    return components
+
+
+def pack_library(root: str, archive: str, threads: int | None = None, progress=None) -> dict:
+    """Write the library under root to archive in one pass.
+
+    progress, if given, is called as progress(bytes done, bytes total).
+    Returns {"archive", "members", "components", "bytes_in", "bytes_out",
+    "stored_chunks", "seconds", "mb_per_second"}.
+    """
+    start = time.perf_counter()
+    threads = threads or os.cpu_count() or 1
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    db_path = os.path.join(root, "components.db")
+    out_dir = os.path.dirname(os.path.abspath(archive))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(archive)}.", suffix=".tmp", dir=out_dir)
+    os.close(fd)
+    # The database is packed from a consistent backup next to the archive
+    db_copy = None
+    sym_file = None
+    try:
+        rows = {}
+        if os.path.exists(db_path):
+            fd, db_copy = tempfile.mkstemp(prefix=".components.db.", suffix=".tmp", dir=out_dir)
+            os.close(fd)
+            rows = _snapshot_database(db_path, db_copy)
+        spans = {}
+        # Open under the lock: the handle keeps this version even if an import
+        # replaces the library while we read it
+        with file_lock(sym_path, "symbol_lib"):
+            if os.path.exists(sym_path):
+                sym_file = open(sym_path, "rb")
+                with SymbolLibView(sym_path) as view:
+                    spans = {name: view.span(name) for name in view.names()}
+        rels = _library_files(root)
+        names = set(rels)
+        total = sum(os.path.getsize(os.path.join(root, rel)) for rel in rels)
+        total += os.path.getsize(db_copy) if db_copy else 0
+        total += os.fstat(sym_file.fileno()).st_size if sym_file else 0
+
+        index = {"version": _INDEX_VERSION, "chunk_size": PACK_CHUNK_SIZE,
+                 "created": datetime.now(timezone.utc).isoformat(),
+                 "components": _component_index(root, rows, spans, names)}
+
+        with open(tmp, "wb") as out, \
+                ThreadPoolExecutor(max_workers=threads, thread_name_prefix="pack") as pool:
+            writer = _Writer(out, pool, window=threads * 4, progress=progress, total=total)
+            if sym_file is not None:
+                writer.add(os.path.basename(sym_path), sym_file, os.fstat(sym_file.fileno()).st_mtime)
+            if db_copy is not None:
+                with open(db_copy, "rb") as f:
+                    writer.add("components.db", f, time.time())
+            for rel in rels:
+                path = os.path.join(root, rel)
+                with open(path, "rb") as f:
+                    writer.add(rel, f, os.fstat(f.fileno()).st_mtime,
+                               compress=os.path.splitext(rel)[1].lower() not in _STORED_EXTS)
+            writer.finish(index)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, archive)
+    finally:
+        if sym_file is not None:
+            sym_file.close()
+        for path in (tmp, db_copy):
+            if path is not None and os.path.exists(path):
+                os.unlink(path)
+
+    seconds = time.perf_counter() - start
+    return {
+        "archive": archive,
+        "members": len(writer.members),
+        "components": len(rows),
+        "bytes_in": writer.done,
+        "bytes_out": writer.offset,
+        "stored_chunks": sum(stored for m in writer.members for _, stored in m["chunks"]),
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(writer.done / 1e6 / seconds, 2) if seconds > 0 else 0.0,
+    }
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────
+
+def _check_member_name(name) -> None:
+    """Reject member names that would land anywhere but their place in the library root."""
+    if name in (f"{LIB_NAME}.kicad_sym", "components.db"):
+        return
+    sub, _, base = name.partition("/") if isinstance(name, str) else ("", "", "")
+    # Hidden names also rule out "." and ".."
+    if (sub not in _PACKED_DIRS or not base or base.startswith(".")
+            or any(c in base for c in "/\\\0:")):
+        raise PackError(f"Pack member {name!r} is outside the library layout")
+
+
+class _Reader:
+    """Random access to the members of a pack through its index."""
+
+    def __init__(self, path: str):
+        self.f = open(path, "rb")
+        try:
+            self.f.seek(0, os.SEEK_END)
+            end = self.f.tell()
+            if end < len(PACK_MAGIC) + _TRAILER.size:
+                raise PackError(f"{path} is not a KiPartBridge pack")
+            self.f.seek(end - _TRAILER.size)
+            index_offset, index_length, magic = _TRAILER.unpack(self.f.read(_TRAILER.size))
+            self.f.seek(0)
+            if magic != PACK_MAGIC or self.f.read(len(PACK_MAGIC)) != PACK_MAGIC:
+                raise PackError(f"{path} is not a KiPartBridge pack")
+            self.f.seek(index_offset)
+            try:
+                self.index = json.loads(zlib.decompress(self.f.read(index_length)))
+            except (zlib.error, ValueError) as e:
+                raise PackError(f"{path}: damaged index ({e})") from e
+            if self.index.get("version") != _INDEX_VERSION:
+                raise PackError(f"{path}: unsupported pack version {self.index.get('version')}")
+        except BaseException:
+            self.f.close()
+            raise
+        for member in self.index["members"]:
+            _check_member_name(member["name"])
+        self.members = {m["name"]: m for m in self.index["members"]}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.close()
+        return False
+
+    def _chunk(self, offset: int, length: int, stored: bool) -> bytes:
+        self.f.seek(offset)
+        payload = self.f.read(length)
+        if stored:
+            return payload
+        try:
+            return zlib.decompress(payload)
+        except zlib.error as e:
+            raise PackError(f"Damaged chunk at offset {offset}: {e}") from e
+
+    def chunks(self, name: str):
+        """The member's content, chunk by chunk, checked against its CRC at the end."""
+        member = self.members[name]
+        offset, crc = member["offset"], 0
+        for length, stored in member["chunks"]:
+            data = self._chunk(offset, length, stored)
+            crc = zlib.crc32(data, crc)
+            offset += length
+            yield data
+        if crc != member["crc"]:
+            raise PackError(f"{name}: CRC mismatch, the pack is damaged")
+
+    def read_range(self, name: str, start: int, end: int) -> bytes:
+        """Bytes [start, end) of a member, decompressing only the chunks that hold them."""
+        member = self.members[name]
+        chunk_size = self.index["chunk_size"]
+        offset, parts = member["offset"], []
+        for i, (length, stored) in enumerate(member["chunks"]):
+            lo = i * chunk_size
+            if lo >= end:
+                break
+            if lo + chunk_size > start:
+                data = self._chunk(offset, length, stored)
+                parts.append(data[max(start - lo, 0):end - lo])
+            offset += length
+        return b"".join(parts)
+
+
+def _extract(reader: _Reader, name: str, root: str) -> int:
+    path = os.path.join(root, *name.split("/"))
+    atomic_write_chunks(path, reader.chunks(name))
+    mtime = reader.members[name]["mtime"]
+    os.utime(path, (mtime, mtime))
+    return reader.members[name]["size"]
+
+
+def unpack_library(archive: str, root: str, components: list[str] | None = None,
+                   overwrite: bool = False) -> dict:
+    """Restore a pack into root and register it with KiCad.
+
+    Without components the whole library is unpacked; root must not already
+    hold one unless overwrite is set. With components only those parts are
+    added to the library in root: their footprint and models are written,
+    their symbols merged into the symbol library and their rows upserted.
+    Returns {"root", "files", "bytes", "components", "seconds"}.
+    """
+    start = time.perf_counter()
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    db_path = os.path.join(root, "components.db")
+    files = size = 0
+    with _Reader(archive) as reader:
+        if components is None:
+            if not overwrite and (os.path.exists(sym_path) or os.path.exists(db_path)):
+                raise PackError(f"{root} already holds a library; unpack single components "
+                                f"or overwrite it")
+            ensure_library_dirs(root)
+            for name in reader.members:
+                size += _extract(reader, name, root)
+                files += 1
+            unpacked = sorted(reader.index["components"])
+        else:
+            missing = [mpn for mpn in components if mpn not in reader.index["components"]]
+            if missing:
+                raise PackError(f"Not in the pack: {', '.join(missing)}")
+            ensure_library_dirs(root)
+            entries = [reader.index["components"][mpn] for mpn in components]
+            for entry in entries:
+                unknown = [name for name in entry["files"] if name not in reader.members]
+                if unknown:
+                    raise PackError(f"Pack index names missing members: {', '.join(map(repr, unknown))}")
+            symbols = []
+            sym_member = os.path.basename(sym_path)
+            for entry in entries:
+                for name in entry["files"]:
+                    size += _extract(reader, name, root)
+                    files += 1
+                if entry["symbol"]:
+                    text = reader.read_range(sym_member, *entry["symbol"]).decode("utf-8")
+                    symbols.append(Symbol.from_sexpr(kiutils_sexpr.parse_sexp(text)))
+            if symbols:
+                with file_lock(sym_path, "symbol_lib"):
+                    merge_symbols(sym_path, symbols)
+                    upgrade_symbol_lib(sym_path)
+            db = ComponentDB(db_path)
+            try:
+                for entry in entries:
+                    row = entry["row"]
+                    db.upsert_component(**{k: row[k] for k in _ROW_FIELDS},
+                                        facets={c: row.get(c) for c in FACET_COLUMNS})
+            finally:
+                db.close()
+            unpacked = list(components)
+
+    ensure_library_tables(root)
+    setup_environment_variable(root)
+    return {
+        "root": root,
+        "files": files,
+        "bytes": size,
+        "components": unpacked,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
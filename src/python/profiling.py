@@ -0,0 +1,143 @@
+"""On-demand and sampled profiling of pipeline runs.
+
+A run can be wrapped in cProfile ("cpu") or tracemalloc ("memory"). Reports are
+written next to the staging file being processed:
+
+    <staging>.<timestamp>.prof       cProfile stats (open with snakeviz/pstats)
+    <staging>.<timestamp>.cpu.txt    top functions by cumulative time
+    <staging>.<timestamp>.mem.txt    top allocation sites and peak traced memory
+
+Sampling lets profiling stay enabled for a fraction of production imports. It is
+configured with configure_sampling() or the KIPARTBRIDGE_PROFILE_SAMPLE_RATE
+(0.0-1.0) and KIPARTBRIDGE_PROFILE_SAMPLE_KIND ("cpu"/"memory") env vars.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_KINDS = ("cpu", "memory")
+
+# Number of entries in the text reports
+_REPORT_TOP_N = 40
+
+# Frames recorded per allocation in memory mode
+_TRACEMALLOC_FRAMES = 10
+
+_sample_rate = 0.0
+_sample_kind = "cpu"
+
+# cProfile and tracemalloc are process-global; only one profiled run at a time
+_profile_lock = threading.Lock()
+
+
+def configure_sampling(rate: float, kind: str = "cpu") -> None:
+    """Profile a random fraction ``rate`` of runs that did not ask for a profile."""
+    global _sample_rate, _sample_kind
+    if kind not in PROFILE_KINDS:
+        raise ValueError(f"Unknown profile kind: {kind!r} (expected one of {PROFILE_KINDS})")
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"Profile sample rate must be between 0 and 1, got {rate}")
+    _sample_rate = rate
+    _sample_kind = kind
+
+
+def _configure_from_env() -> None:
+    rate = os.environ.get("KIPARTBRIDGE_PROFILE_SAMPLE_RATE")
+    if not rate:
+        return
+    try:
+        configure_sampling(float(rate), os.environ.get("KIPARTBRIDGE_PROFILE_SAMPLE_KIND", "cpu"))
+    except ValueError as e:
+        print(f"Warning: ignoring profile sampling config: {e}", file=sys.stderr)
+
+
+def sampled_profile_kind() -> str | None:
+    """Return the profile kind to use for this run, or None to skip profiling."""
+    if _sample_rate > 0.0 and random.random() < _sample_rate:
+        return _sample_kind
+    return None
+
+
+def _report_base(staging_path: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+    return f"{staging_path}.{stamp}"
+
+
+def run_profiled(kind: str, staging_path: str, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) under the given profiler.
+
+    Returns (result, report_paths). If another profiled run is in progress the
+    call runs unprofiled and report_paths is empty.
+    """
+    if kind not in PROFILE_KINDS:
+        raise ValueError(f"Unknown profile kind: {kind!r} (expected one of {PROFILE_KINDS})")
+    if not _profile_lock.acquire(blocking=False):
+        return fn(*args, **kwargs), []
+    try:
+        base = _report_base(staging_path)
+        if kind == "cpu":
+            return _run_cpu(base, fn, args, kwargs)
+        return _run_memory(base, fn, args, kwargs)
+    finally:
+        _profile_lock.release()
+
+
+def _run_cpu(base: str, fn, args, kwargs):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+
+    prof_path = f"{base}.prof"
+    profiler.dump_stats(prof_path)
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats("cumulative").print_stats(_REPORT_TOP_N)
+    report_path = f"{base}.cpu.txt"
+    with open(report_path, "w") as f:
+        f.write(text.getvalue())
+    return result, [prof_path, report_path]
+
+
+def _run_memory(base: str, fn, args, kwargs):
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(_TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    try:
+        result = fn(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    report_path = f"{base}.mem.txt"
+    with open(report_path, "w") as f:
+        f.write(f"Traced memory: current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB\n\n")
+        f.write(f"Top {_REPORT_TOP_N} allocation sites:\n")
+        for i, stat in enumerate(snapshot.statistics("lineno")[:_REPORT_TOP_N], 1):
+            f.write(f"#{i}: {stat}\n")
+        f.write(f"\nTop {_REPORT_TOP_N} allocation tracebacks:\n")
+        for stat in snapshot.statistics("traceback")[:_REPORT_TOP_N]:
+            f.write(f"\n{stat.count} blocks, {stat.size / 1024:.1f} KiB\n")
+            for line in stat.traceback.format():
+                f.write(f"{line}\n")
+    return result, [report_path]
+
+
+_configure_from_env()
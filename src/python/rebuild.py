@@ -0,0 +1,238 @@
+"""Library rebuild — re-apply the current normalization rules to a whole library.
+
+When normalization changes (property defaults, the model path scheme, a KiCad
+format upgrade), rebuild_library brings existing parts up to date without
+their original ZIPs:
+
+1. Every footprint in kipartbridge.pretty goes through normalize_footprint
+   again on the batch worker pool, with its 3D models taken from the
+   references it already has (or, failing that, 3dmodels/<name>.*).
+2. The symbol library is loaded once; every symbol is re-standardized and
+   linked to its footprint from components.db, then the library is written
+   once and upgraded like after an import.
+3. The facets recomputed from the footprints and symbols, and has_3d_model,
+   are written back to components.db in one transaction (on every run,
+   resumed or not). package and
+   reference are left as they are: they come from the vendor's footprint
+   name and designator, which normalization has already replaced.
+
+Each finished footprint is appended to REBUILD_CHECKPOINT in the library
+root, with its facets. An interrupted rebuild resumes from there: footprints
+already done are skipped and only the rest (and the symbol and database
+passes) run again. The checkpoint is removed once the rebuild completes.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import as_completed
+
+from kiutils.symbol import SymbolLib
+
+from batch import default_workers, start_pool
+from database import ComponentDB
+from fsutil import atomic_write_text, file_lock
+from library_injector import LIB_NAME
+from models import ComponentFiles
+from normalizer import (
+    copy_model, model_files, normalize_footprint, set_symbol_footprint,
+    standardize_symbol, symbol_facets, upgrade_symbol_lib,
+)
+from verify import MODEL_VAR, footprint_models
+
+REBUILD_CHECKPOINT = ".rebuild-checkpoint"
+
+_MODEL_EXTS = {".step": "step", ".stp": "step", ".wrl": "wrl"}
+
+# Facets taken from vendor names that normalization overwrites; a rebuild
+# would only see the normalized ones, so the database keeps what it has
+_VENDOR_FACETS = ("package", "reference")
+
+
+def _find_models(fp_path: str, models_dir: str, name: str) -> dict:
+    """{"step": path, "wrl": path} of the models a footprint uses now."""
+    found = {}
+    candidates = []
+    for ref in footprint_models(fp_path)["models"]:
+        if ref.startswith(MODEL_VAR):
+            candidates.append(os.path.join(models_dir, ref[len(MODEL_VAR):]))
+        elif os.path.isabs(ref):
+            candidates.append(ref)
+    candidates += [os.path.join(models_dir, name + ext) for ext in _MODEL_EXTS]
+    for path in candidates:
+        kind = _MODEL_EXTS.get(os.path.splitext(path)[1].lower())
+        if kind and kind not in found and os.path.isfile(path):
+            found[kind] = path
+    return found
+
+
+def _rebuild_footprint(fp_dir: str, models_dir: str, name: str) -> tuple[str, dict]:
+    """Worker side: re-normalize one footprint in place.
+
+    Returns (name, {"has_3d_model", **footprint_facets}).
+    """
+    fp_path = os.path.join(fp_dir, f"{name}.kicad_mod")
+    models = _find_models(fp_path, models_dir, name)
+    component = ComponentFiles(mpn=name, footprint_file=fp_path,
+                               model_step=models.get("step"), model_wrl=models.get("wrl"))
+    _, facets = normalize_footprint(component, fp_dir, models_dir, copy_models=False, with_facets=True)
+    # Models already in place under their normalized name are not copied again
+    for source, filename in model_files(component):
+        if os.path.abspath(source) != os.path.abspath(os.path.join(models_dir, filename)):
+            copy_model(source, models_dir, filename)
+    return name, {"has_3d_model": bool(models), **facets}
+
+
+def _read_checkpoint(path: str) -> tuple[dict[str, dict], bool]:
+    """({footprint done: its facets}, symbol pass done) recorded by an interrupted rebuild."""
+    done, symbols_done = {}, False
+    try:
+        with open(path) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break    # cut off mid-write
+                kind, _, value = line.rstrip("\n").partition("\t")
+                if kind == "footprint":
+                    name, _, facets = value.partition("\t")
+                    done[name] = json.loads(facets) if facets else {}
+                elif kind == "symbols":
+                    symbols_done = True
+    except FileNotFoundError:
+        pass
+    return done, symbols_done
+
+
+def _components(root: str) -> list[dict]:
+    """Rows of components.db, or none without a database."""
+    db_path = os.path.join(root, "components.db")
+    if not os.path.exists(db_path):
+        return []
+    db = ComponentDB(db_path)
+    try:
+        return [dict(r) for r in db.conn.execute("SELECT * FROM components")]
+    finally:
+        db.close()
+
+
+def _rebuild_symbols(sym_path: str, links: dict[str, str],
+                     footprints: set[str]) -> tuple[int, int, dict[str, dict]]:
+    """Re-standardize and re-link every symbol with one load and one write.
+
+    Returns (symbols, linked, {symbol name: symbol_facets}).
+    """
+    facets = {}
+    with file_lock(sym_path, "symbol_lib"):
+        lib = SymbolLib.from_file(sym_path)
+        linked = 0
+        for symbol in lib.symbols:
+            name = symbol.entryName
+            facets[name] = symbol_facets(symbol)
+            standardize_symbol(symbol, name)
+            fp_name = links.get(name)
+            if fp_name in footprints:
+                set_symbol_footprint(symbol, LIB_NAME, fp_name)
+                linked += 1
+        atomic_write_text(sym_path, lib.to_sexpr())
+    upgrade_symbol_lib(sym_path)
+    return len(lib.symbols), linked, facets
+
+
+def _refresh_database(root: str, rows: list[dict], footprints: dict[str, dict],
+                      symbols: dict[str, dict]) -> int:
+    """Write recomputed facets and has_3d_model back in one pass. Returns rows changed."""
+    updates = {}
+    for row in rows:
+        values = {**symbols.get(row["symbol_name"], {}), **footprints.get(row["footprint_name"], {})}
+        changed = {k: v for k, v in values.items() if k not in _VENDOR_FACETS and row.get(k) != v}
+        if changed:
+            updates[row["mpn"]] = changed
+    if not updates:
+        return 0
+    db = ComponentDB(os.path.join(root, "components.db"))
+    try:
+        return db.update_component_facets(updates)
+    finally:
+        db.close()
+
+
+def rebuild_library(root: str, workers: int | None = None, restart: bool = False,
+                    progress=None) -> dict:
+    """Re-normalize every footprint and symbol under root.
+
+    restart ignores a checkpoint from an interrupted run. progress, if given,
+    is called as progress(done, total) after each footprint. Returns
+    {"resumed", "footprints": {"total", "rebuilt", "skipped", "errors"},
+    "symbols", "linked", "components_updated", "seconds"}.
+    """
+    start = time.perf_counter()
+    workers = workers or default_workers()
+    fp_dir = os.path.join(root, f"{LIB_NAME}.pretty")
+    models_dir = os.path.join(root, "3dmodels")
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    checkpoint = os.path.join(root, REBUILD_CHECKPOINT)
+    if restart and os.path.exists(checkpoint):
+        os.unlink(checkpoint)
+    done, symbols_done = _read_checkpoint(checkpoint)
+    resumed = bool(done) or symbols_done
+
+    names = sorted(n[:-len(".kicad_mod")] for n in os.listdir(fp_dir)
+                   if n.endswith(".kicad_mod")) if os.path.isdir(fp_dir) else []
+    todo = [n for n in names if n not in done]
+    errors = []
+    rebuilt = 0
+
+    fp_facets = dict(done)
+    with open(checkpoint, "a") as log:
+        def finished(result):
+            nonlocal rebuilt
+            name, facets = result
+            rebuilt += 1
+            fp_facets[name] = facets
+            log.write(f"footprint\t{name}\t{json.dumps(facets)}\n")
+            log.flush()
+            if progress is not None:
+                progress(len(names) - len(todo) + rebuilt, len(names))
+
+        if todo and workers > 1:
+            pool = start_pool(min(workers, len(todo)))
+            try:
+                futures = {pool.submit(_rebuild_footprint, fp_dir, models_dir, n): n for n in todo}
+                for future in as_completed(futures):
+                    try:
+                        finished(future.result())
+                    except Exception as e:
+                        errors.append({"name": futures[future], "error": str(e)})
+            finally:
+                pool.shutdown(cancel_futures=True)
+        else:
+            for name in todo:
+                try:
+                    finished(_rebuild_footprint(fp_dir, models_dir, name))
+                except Exception as e:
+                    errors.append({"name": name, "error": str(e)})
+
+        rows = _components(root)
+        symbols = linked = 0
+        sym_facets = {}
+        redo_symbols = os.path.exists(sym_path) and not symbols_done
+        if redo_symbols:
+            links = {r["symbol_name"]: r["footprint_name"] for r in rows
+                     if r["symbol_name"] and r["footprint_name"]}
+            symbols, linked, sym_facets = _rebuild_symbols(sym_path, links, set(names))
+        # Runs on every rebuild, so footprints retried after an error get theirs
+        updated = _refresh_database(root, rows, fp_facets, sym_facets)
+        if redo_symbols:
+            log.write("symbols\n")
+
+    # Failed footprints stay out of the checkpoint, so a rerun retries them
+    if not errors:
+        os.unlink(checkpoint)
+    return {
+        "resumed": resumed,
+        "footprints": {"total": len(names), "rebuilt": rebuilt,
+                       "skipped": len(names) - len(todo), "errors": errors},
+        "symbols": symbols,
+        "linked": linked,
+        "components_updated": updated,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,80 @@
+"""Sidecar settings — a small JSON file of user overrides.
+
+Lives next to Electron's userData (KiPartBridge/settings.json in the platform's
+per-user app-data dir) unless KIPARTBRIDGE_SETTINGS points elsewhere. Parsed
+contents are cached by (mtime, size), so reading a setting costs one stat.
+
+Known keys:
+    library_root       explicit library root; skips sym-lib-table detection
+    batch_workers      worker processes for batch imports (default: CPU count)
+    extraction_limits  overrides of limits.DEFAULT_LIMITS (see limits.py)
+    import_worker      run imports in a recycled child process (default: off)
+    worker_max_jobs    imports before that child is replaced (default: 200)
+    worker_max_rss_mb  child RSS in MiB that triggers a replacement (default: 1024)
+"""
+
+import copy
+import json
+import os
+import sys
+import threading
+
+from fsutil import atomic_write_text, file_signature
+
+_lock = threading.Lock()
+_cache: dict[str, tuple[tuple[int, int] | None, dict]] = {}
+
+
+def get_settings_path() -> str:
+    """Path of the sidecar settings file."""
+    override = os.environ.get("KIPARTBRIDGE_SETTINGS")
+    if override:
+        return override
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    elif sys.platform == "win32":
+        base = os.environ.get("APPDATA", "")
+    else:  # Linux
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "KiPartBridge", "settings.json")
+
+
+def load_settings(path: str | None = None) -> dict:
+    """Return all settings (a private copy). Missing file means no overrides."""
+    path = path or get_settings_path()
+    sig = file_signature(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == sig:
+            return copy.deepcopy(cached[1])
+    settings = {}
+    if sig is not None:
+        with open(path, "r") as f:
+            settings = json.load(f)
+        if not isinstance(settings, dict):
+            raise ValueError(f"Settings file {path} must contain a JSON object")
+    with _lock:
+        _cache[path] = (sig, settings)
+    return copy.deepcopy(settings)
+
+
+def get_setting(key: str, default=None, path: str | None = None):
+    return load_settings(path).get(key, default)
+
+
+def update_settings(updates: dict, path: str | None = None) -> dict:
+    """Merge updates into the settings file. A value of None removes the key.
+
+    Returns the new settings.
+    """
+    path = path or get_settings_path()
+    settings = load_settings(path)
+    for key, value in updates.items():
+        if value is None:
+            settings.pop(key, None)
+        else:
+            settings[key] = value
+    atomic_write_text(path, json.dumps(settings, indent=2) + "\n")
+    with _lock:
+        _cache[path] = (file_signature(path), copy.deepcopy(settings))
+    return settings
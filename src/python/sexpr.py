@@ -0,0 +1,283 @@
+"""Streaming s-expression tokenizer for KiCad files.
+
+Files are read incrementally through a bounded buffer, so looking up the first
+symbol name of a multi-megabyte library touches only its first few KiB. The
+tokenizer tracks nesting depth, so it does not care how forms are spread over
+lines (several forms per line, or one token per line, both work).
+
+Tokens are (kind, value, offset) tuples; offset is the byte offset of the
+token in the source, which lets callers slice out or index whole forms.
+
+Helpers:
+    first_symbol_name(path)       first top-level (symbol "NAME") in a .kicad_sym
+    footprint_name(path)          NAME of (footprint "NAME") / (module "NAME")
+    find_property(path, key)      (property "key" "value") of the first symbol
+                                  (or footprint, with parent="footprint")
+    parse(text)                   full parse into nested lists (small files only)
+"""
+
+import io
+import re
+from typing import BinaryIO, Callable, Iterator
+
+LPAREN = "("
+RPAREN = ")"
+ATOM = "atom"
+STRING = "string"
+
+# Bytes read per refill of the tokenizer buffer
+CHUNK_SIZE = 64 * 1024
+
+# A single token larger than this is treated as a corrupt file
+MAX_TOKEN_SIZE = 16 * 1024 * 1024
+
+_TOKEN_RE = re.compile(rb'\s+|(\()|(\))|"([^"\\]*(?:\\.[^"\\]*)*)"|([^\s()"]+)')
+_ESCAPE_RE = re.compile(rb'\\(.)', re.DOTALL)
+
+
+class Atom(str):
+    """An unquoted token (e.g. ``lib``, ``yes``, ``1.27``)."""
+
+
+def _unescape(raw: bytes) -> str:
+    if b"\\" in raw:
+        raw = _ESCAPE_RE.sub(lambda m: b"\n" if m.group(1) == b"n" else m.group(1), raw)
+    return raw.decode("utf-8", errors="replace")
+
+
+def iter_tokens(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, str | None, int]]:
+    """Yield (kind, value, offset) tokens from a binary stream.
+
+    kind is LPAREN, RPAREN, ATOM or STRING; value is None for parens.
+    """
+    buf = b""
+    base = 0   # absolute offset of buf[0]
+    pos = 0
+    eof = False
+    while True:
+        if not eof and len(buf) - pos < chunk_size // 2:
+            chunk = stream.read(chunk_size)
+            if chunk:
+                buf = buf[pos:] + chunk
+                base += pos
+                pos = 0
+            else:
+                eof = True
+        m = _TOKEN_RE.match(buf, pos)
+        # Need more data: nothing matched (e.g. unterminated string), or an
+        # atom/whitespace run touches the end of the buffer and may continue.
+        if (m is None or m.end() == len(buf)) and not eof:
+            if len(buf) - pos > MAX_TOKEN_SIZE:
+                raise ValueError(f"Token at offset {base + pos} exceeds {MAX_TOKEN_SIZE} bytes")
+            chunk = stream.read(chunk_size)
+            if chunk:
+                buf = buf[pos:] + chunk
+                base += pos
+                pos = 0
+            else:
+                eof = True
+            continue
+        if m is None:
+            if pos >= len(buf):
+                return
+            raise ValueError(f"Unterminated string at offset {base + pos}")
+        offset = base + pos
+        pos = m.end()
+        if m.group(1):
+            yield LPAREN, None, offset
+        elif m.group(2):
+            yield RPAREN, None, offset
+        elif m.group(3) is not None:
+            yield STRING, _unescape(m.group(3)), offset
+        elif m.group(4):
+            yield ATOM, m.group(4).decode("utf-8", errors="replace"), offset
+
+
+# Structural scan for iter_forms: an opening paren with its head and optional
+# first argument, a closing paren, a complete string, or a lone quote (string
+# not yet terminated). Atoms and whitespace between them are skipped by the
+# regex engine instead of being tokenized one by one in Python. The match's
+# lastindex tells the cases apart (see _OPEN ... _QUOTE).
+_FORM_RE = re.compile(
+    rb'(\()(?:\s*([^\s()"]+)(?:\s+(?:"([^"\\]*(?:\\.[^"\\]*)*)"|([^\s()"]+)))?)?'
+    rb'|(\))|"[^"\\]*(?:\\.[^"\\]*)*"|(")')
+_OPEN, _OPEN_HEAD, _OPEN_STRING_ARG, _OPEN_ATOM_ARG, _CLOSE, _QUOTE = range(1, 7)
+_PENDING_RE = re.compile(rb'\s*(?:"|\Z)')
+
+
+def iter_forms(stream: BinaryIO, depth: int,
+               chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, str | None, int]]:
+    """Yield (head, first_argument, offset) for every form opened at ``depth``.
+
+    Depth 0 is the file's outer form, depth 1 its children, and so on. The
+    first argument is the token after the head (e.g. the symbol name), or None
+    if it is a nested form. Forms are yielded as soon as they open.
+    """
+    for head, arg, start, _ in _scan_forms(stream, depth, chunk_size, spans=False):
+        yield head, arg, start
+
+
+def iter_form_spans(stream: BinaryIO, depth: int,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, str | None, int, int]]:
+    """Like iter_forms, but yield (head, first_argument, start, end) once each form closes.
+
+    data[start:end] is the complete form, from its "(" to its ")".
+    """
+    return _scan_forms(stream, depth, chunk_size, spans=True)
+
+
+def _scan_forms(stream, depth, chunk_size, spans):
+    buf = b""
+    base = 0     # absolute offset of buf[0]
+    keep = 0     # start of the unprocessed tail of buf
+    level = -1
+    pending = None   # open form at the target depth, when collecting spans
+    while True:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        if len(buf) - keep > MAX_TOKEN_SIZE:
+            raise ValueError(f"Token at offset {base + keep} exceeds {MAX_TOKEN_SIZE} bytes")
+        buf = buf[keep:] + chunk
+        base += keep
+        keep = len(buf)
+        end = len(buf)
+        for m in _FORM_RE.finditer(buf):
+            kind = m.lastindex
+            if not eof and (m.end() == end or kind == _QUOTE
+                            or (kind == _OPEN_HEAD and _PENDING_RE.match(buf, m.end()))):
+                # The match may continue in the next chunk; rescan it then
+                keep = m.start()
+                break
+            if kind == _CLOSE:
+                if spans and level == depth and pending is not None:
+                    yield pending + (base + m.end(),)
+                    pending = None
+                level -= 1
+                if level < -1:
+                    raise ValueError(f"Unbalanced ')' at offset {base + m.start()}")
+            elif kind is None:
+                continue   # a string outside a form head
+            elif kind == _QUOTE:
+                raise ValueError(f"Unterminated string at offset {base + m.start()}")
+            else:
+                level += 1
+                if level == depth and kind != _OPEN:
+                    if kind == _OPEN_STRING_ARG:
+                        arg = _unescape(m.group(3))
+                    elif kind == _OPEN_ATOM_ARG:
+                        arg = m.group(4).decode("utf-8", errors="replace")
+                    else:
+                        arg = None
+                    form = (m.group(2).decode("utf-8", errors="replace"), arg, base + m.start())
+                    if spans:
+                        pending = form
+                    else:
+                        yield form + (None,)
+        if eof:
+            return
+
+
+def _open(path_or_stream):
+    if isinstance(path_or_stream, (str, bytes)) or hasattr(path_or_stream, "__fspath__"):
+        return open(path_or_stream, "rb")
+    return _NoClose(path_or_stream)
+
+
+class _NoClose:
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __enter__(self):
+        return self._stream
+
+    def __exit__(self, *exc):
+        return False
+
+
+def iter_symbol_names(path) -> Iterator[str]:
+    """Yield the names of top-level symbols in a .kicad_sym, in file order."""
+    with _open(path) as f:
+        for head, name, _ in iter_forms(f, depth=1):
+            if head == "symbol" and name is not None:
+                yield name
+
+
+def first_symbol_name(path, skip: Callable[[str], bool] | None = None) -> str | None:
+    """Name of the first top-level symbol not rejected by ``skip``. Stops early."""
+    for name in iter_symbol_names(path):
+        if skip is None or not skip(name):
+            return name
+    return None
+
+
+def footprint_name(path) -> str | None:
+    """Name of a .kicad_mod footprint (KiCad 6+ ``footprint`` or legacy ``module``)."""
+    with _open(path) as f:
+        for head, name, _ in iter_forms(f, depth=0):
+            if head in ("footprint", "module"):
+                return name
+            return None
+    return None
+
+
+def find_property(path, key: str, parent: str = "symbol") -> str | None:
+    """Value of (property "key" "value") in the first ``parent`` form. Stops early.
+
+    parent is "symbol" for the first top-level symbol of a .kicad_sym and
+    "footprint" for a .kicad_mod. Returns None once that form closes without
+    the property.
+    """
+    with _open(path) as f:
+        level = -1
+        parent_level = None
+        awaiting_head = False
+        state = None   # "key" -> "value" inside a (property ...) of the parent
+        for kind, value, _ in iter_tokens(f):
+            if kind == LPAREN:
+                level += 1
+                awaiting_head = True
+                state = None
+            elif kind == RPAREN:
+                if level == parent_level:
+                    return None
+                level -= 1
+                awaiting_head = False
+                state = None
+            elif awaiting_head:
+                awaiting_head = False
+                if parent_level is None and value == parent:
+                    parent_level = level
+                elif parent_level is not None and level == parent_level + 1 and value == "property":
+                    state = "key"
+            elif state == "key":
+                state = "value" if value == key else None
+            elif state == "value":
+                return value
+    return None
+
+
+def parse(text: str | bytes) -> list:
+    """Parse one complete s-expression into nested lists of Atom / str.
+
+    Quoted strings become str, bare tokens Atom. Intended for small files such
+    as lib tables; use the streaming helpers for libraries.
+    """
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    stack = [[]]
+    for kind, value, offset in iter_tokens(io.BytesIO(data)):
+        if kind == LPAREN:
+            stack.append([])
+        elif kind == RPAREN:
+            if len(stack) == 1:
+                raise ValueError(f"Unbalanced ')' at offset {offset}")
+            done = stack.pop()
+            stack[-1].append(done)
+        elif kind == STRING:
+            stack[-1].append(value)
+        else:
+            stack[-1].append(Atom(value))
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '('")
+    if len(stack[0]) != 1 or not isinstance(stack[0][0], list):
+        raise ValueError("Expected exactly one top-level list")
+    return stack[0][0]
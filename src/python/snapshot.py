@@ -0,0 +1,248 @@
+"""Library snapshots — cheap point-in-time copies of a library root for rollback.
+
+A snapshot lives in SNAPSHOT_DIR/<name>/ inside the library root. The small
+mutable files are copied: the symbol library, the KiCad lib tables and
+components.db (through the SQLite backup API, so a concurrent writer never
+leaves it half-written). Footprints and 3D models are hardlinked instead.
+That is safe because no writer modifies them in place: atomic writes and the
+batch writer replace a file with a new inode, so the snapshot keeps the old
+content. A snapshot of a multi-GB library therefore takes seconds and costs
+little more than its symbol library and database. Where hardlinks are not
+supported (another filesystem, FAT) files are copied.
+
+restore_snapshot first takes a "pre-restore" snapshot of the current state,
+then puts the snapshot's files back the same way: footprints and models are
+re-linked, files added since are removed, and the database is restored
+through the backup API.
+
+Snapshots are built in a hidden temp directory and renamed into place, so an
+interrupted snapshot is never listed. With the snapshot_before_batch setting,
+import_batch takes one automatically; only the newest SNAPSHOT_KEEP_AUTO of
+those are kept.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from database import backup_database, clear_filter_cache
+from fsutil import atomic_copy, file_lock
+from kicad_config import FP_TABLE, SYM_TABLE
+from library_injector import LIB_NAME, get_kicad_config_dir
+from settings import get_setting
+
+SNAPSHOT_DIR = ".snapshots"
+MANIFEST = "snapshot.json"
+
+# Automatic (pre-batch) snapshots kept; older ones are deleted
+SNAPSHOT_KEEP_AUTO = 10
+
+_TABLES_DIR = "lib-tables"
+_LINKED_DIRS = (f"{LIB_NAME}.pretty", "3dmodels")
+_LABEL_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class SnapshotError(ValueError):
+    """A snapshot that does not exist or cannot be restored."""
+
+
+def _link_or_copy(source: str, dest: str) -> bool:
+    """Hardlink source to dest, falling back to a copy. True if linked."""
+    try:
+        os.link(source, dest)
+        return True
+    except OSError:
+        shutil.copy2(source, dest)
+        return False
+
+
+def _files(directory: str) -> list[str]:
+    """Names of the regular, non-hidden files in directory."""
+    if not os.path.isdir(directory):
+        return []
+    with os.scandir(directory) as entries:
+        return [e.name for e in entries
+                if e.is_file(follow_symlinks=False) and not e.name.startswith(".")]
+
+
+def create_snapshot(root: str, label: str | None = None, auto: bool = False,
+                    config_dir: str | None = None) -> dict:
+    """Snapshot the library under root. Returns its manifest.
+
+    The manifest is {"name", "created", "label", "auto", "files": {"linked",
+    "copied"}, "bytes_copied", "seconds"}.
+    """
+    start = time.perf_counter()
+    config_dir = config_dir or get_kicad_config_dir()
+    created = datetime.now(timezone.utc)
+    name = created.strftime("%Y%m%dT%H%M%S%fZ")
+    if label:
+        name += "-" + _LABEL_RE.sub("_", label)
+    base = os.path.join(root, SNAPSHOT_DIR)
+    os.makedirs(base, exist_ok=True)
+    work = tempfile.mkdtemp(prefix=f".{name}.", suffix=".tmp", dir=base)
+    linked = copied = bytes_copied = 0
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    fp_dir = os.path.join(root, f"{LIB_NAME}.pretty")
+    try:
+        # Imports hold these while placing files, so the snapshot never sees
+        # a symbol without its footprint
+        with file_lock(sym_path, "symbol_lib"), file_lock(fp_dir, "footprints"):
+            if os.path.exists(sym_path):
+                shutil.copy2(sym_path, os.path.join(work, os.path.basename(sym_path)))
+                copied += 1
+                bytes_copied += os.path.getsize(sym_path)
+            db_path = os.path.join(root, "components.db")
+            if os.path.exists(db_path):
+                snap_db = os.path.join(work, "components.db")
+                backup_database(db_path, snap_db)
+                copied += 1
+                bytes_copied += os.path.getsize(snap_db)
+            for table in (SYM_TABLE, FP_TABLE):
+                path = os.path.join(config_dir, table)
+                if os.path.exists(path):
+                    os.makedirs(os.path.join(work, _TABLES_DIR), exist_ok=True)
+                    shutil.copy2(path, os.path.join(work, _TABLES_DIR, table))
+                    copied += 1
+                    bytes_copied += os.path.getsize(path)
+            for sub in _LINKED_DIRS:
+                os.makedirs(os.path.join(work, sub))
+                for fname in _files(os.path.join(root, sub)):
+                    source = os.path.join(root, sub, fname)
+                    if _link_or_copy(source, os.path.join(work, sub, fname)):
+                        linked += 1
+                    else:
+                        copied += 1
+                        bytes_copied += os.path.getsize(source)
+
+        manifest = {
+            "name": name,
+            "created": created.isoformat(),
+            "label": label,
+            "auto": auto,
+            "files": {"linked": linked, "copied": copied},
+            "bytes_copied": bytes_copied,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        with open(os.path.join(work, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(work, os.path.join(base, name))
+    except BaseException:
+        shutil.rmtree(work, ignore_errors=True)
+        raise
+    if auto:
+        _prune_auto(root)
+    return manifest
+
+
+def list_snapshots(root: str) -> list[dict]:
+    """Manifests of the snapshots under root, newest first."""
+    base = os.path.join(root, SNAPSHOT_DIR)
+    snapshots = []
+    for name in _dirs(base):
+        try:
+            with open(os.path.join(base, name, MANIFEST)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(snapshots, key=lambda m: m["name"], reverse=True)
+
+
+def _dirs(base: str) -> list[str]:
+    if not os.path.isdir(base):
+        return []
+    with os.scandir(base) as entries:
+        return [e.name for e in entries if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")]
+
+
+def _snapshot_path(root: str, name: str) -> str:
+    path = os.path.join(root, SNAPSHOT_DIR, name)
+    if os.path.basename(name) != name or name.startswith(".") or not os.path.exists(
+            os.path.join(path, MANIFEST)):
+        raise SnapshotError(f"No snapshot named {name!r}")
+    return path
+
+
+def _prune_auto(root: str) -> None:
+    keep = int(get_setting("snapshot_keep_auto") or SNAPSHOT_KEEP_AUTO)
+    auto = [m["name"] for m in list_snapshots(root) if m.get("auto")]
+    for name in auto[keep:]:
+        shutil.rmtree(os.path.join(root, SNAPSHOT_DIR, name), ignore_errors=True)
+
+
+def _restore_dir(snap_dir: str, live_dir: str) -> dict:
+    """Make live_dir hold exactly the files of snap_dir. Returns {"restored", "removed"}."""
+    os.makedirs(live_dir, exist_ok=True)
+    wanted = set(_files(snap_dir))
+    restored = removed = 0
+    for fname in _files(live_dir):
+        if fname not in wanted:
+            os.unlink(os.path.join(live_dir, fname))
+            removed += 1
+    for fname in wanted:
+        source = os.path.join(snap_dir, fname)
+        dest = os.path.join(live_dir, fname)
+        if os.path.exists(dest) and os.path.samefile(source, dest):
+            continue
+        # Same temp naming as fsutil's atomic writes, so gc collects leftovers
+        fd, tmp = tempfile.mkstemp(prefix=f".{fname}.", suffix=".tmp", dir=live_dir)
+        os.close(fd)
+        os.unlink(tmp)
+        try:
+            _link_or_copy(source, tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        restored += 1
+    return {"restored": restored, "removed": removed}
+
+
+def restore_snapshot(root: str, name: str, tables: bool = False,
+                     config_dir: str | None = None) -> dict:
+    """Roll the library under root back to snapshot name.
+
+    A "pre-restore" snapshot of the current state is taken first. tables
+    also puts back the KiCad lib tables saved in the snapshot; they are
+    shared with every other library, so by default they are left alone.
+    Returns {"name", "safety_snapshot", "footprints", "models", "seconds"};
+    footprints and models are {"restored", "removed"} counts.
+    """
+    start = time.perf_counter()
+    path = _snapshot_path(root, name)
+    config_dir = config_dir or get_kicad_config_dir()
+    safety = create_snapshot(root, label="pre-restore", config_dir=config_dir)
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    fp_dir = os.path.join(root, f"{LIB_NAME}.pretty")
+
+    with file_lock(sym_path, "symbol_lib"), file_lock(fp_dir, "footprints"):
+        footprints = _restore_dir(os.path.join(path, _LINKED_DIRS[0]), fp_dir)
+        models = _restore_dir(os.path.join(path, _LINKED_DIRS[1]), os.path.join(root, "3dmodels"))
+        snap_sym = os.path.join(path, os.path.basename(sym_path))
+        if os.path.exists(snap_sym):
+            atomic_copy(snap_sym, sym_path)
+        elif os.path.exists(sym_path):
+            os.unlink(sym_path)
+        snap_db = os.path.join(path, "components.db")
+        if os.path.exists(snap_db):
+            backup_database(snap_db, os.path.join(root, "components.db"))
+            clear_filter_cache()
+        if tables:
+            for table in (SYM_TABLE, FP_TABLE):
+                saved = os.path.join(path, _TABLES_DIR, table)
+                if os.path.exists(saved):
+                    with file_lock(os.path.join(config_dir, table), "lib_table"):
+                        atomic_copy(saved, os.path.join(config_dir, table))
+
+    return {
+        "name": name,
+        "safety_snapshot": safety["name"],
+        "footprints": footprints,
+        "models": models,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
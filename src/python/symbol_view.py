@@ -0,0 +1,141 @@
+"""Lazy, memory-mapped view over a .kicad_sym library.
+
+SymbolLib.from_file builds the object graph of every symbol in a library; on a
+15k-symbol library that is hundreds of MB and several seconds just to touch one
+of them. SymbolLibView instead memory-maps the file, indexes the byte span of
+each top-level symbol once (cached by (mtime, size), like the lib-table cache),
+and materializes a kiutils Symbol only for the names that are asked for.
+
+replace_symbol() rewrites a single symbol in place by splicing its span, so the
+rest of the library is copied byte for byte and never parsed.
+"""
+
+import mmap
+import threading
+
+from kiutils.symbol import Symbol
+from kiutils.utils import sexpr as kiutils_sexpr
+
+import sexpr
+from fsutil import atomic_write_bytes, file_lock, file_signature
+from metrics import METRICS
+
+_lock = threading.Lock()
+# path -> (signature, {name: (start, end)}) of top-level symbols, in file order
+_index_cache: dict[str, tuple[tuple[int, int], dict[str, tuple[int, int]]]] = {}
+
+
+class SymbolLibView:
+    """Read-only view of a .kicad_sym file. Use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        sig = file_signature(path)
+        try:
+            if sig and sig[1] > 0:
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = b""
+            self._index = _load_index(path, sig, self._data)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "SymbolLibView":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        data = getattr(self, "_data", None)
+        if isinstance(data, mmap.mmap):
+            data.close()
+        self._data = b""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def names(self) -> list[str]:
+        """Top-level symbol names in file order."""
+        return list(self._index)
+
+    def span(self, name: str) -> tuple[int, int]:
+        """(start, end) byte offsets of a symbol's form. Raises KeyError if absent."""
+        return self._index[name]
+
+    def raw(self, name: str) -> bytes:
+        """The symbol's s-expression exactly as stored in the file."""
+        start, end = self.span(name)
+        return self._data[start:end]
+
+    def symbol(self, name: str) -> Symbol:
+        """Parse just this symbol into a kiutils Symbol."""
+        text = self.raw(name).decode("utf-8")
+        return Symbol.from_sexpr(kiutils_sexpr.parse_sexp(text))
+
+
+def _load_index(path: str, sig, data) -> dict[str, tuple[int, int]]:
+    with _lock:
+        cached = _index_cache.get(path)
+    if cached and cached[0] == sig:
+        METRICS.record_cache("symbol_index", hit=True)
+        return cached[1]
+    METRICS.record_cache("symbol_index", hit=False)
+    index = {}
+    if data:
+        data.seek(0)
+        for head, name, start, end in sexpr.iter_form_spans(data, depth=1):
+            if head == "symbol" and name is not None:
+                index.setdefault(name, (start, end))
+    with _lock:
+        _index_cache[path] = (sig, index)
+    return index
+
+
+def render_symbol(symbol: Symbol) -> bytes:
+    """kiutils rendering of a top-level symbol, without leading indent or newline."""
+    return symbol.to_sexpr(indent=2).strip().encode("utf-8")
+
+
+def replace_symbol(path: str, name: str, symbol: Symbol) -> None:
+    """Replace the top-level symbol ``name`` with ``symbol``, rewriting only its span.
+
+    The file is written atomically under the library's file lock, and the
+    cached index is updated in place (later spans shifted) instead of being
+    rebuilt.
+    """
+    new = render_symbol(symbol)
+    with file_lock(path, "symbol_lib"):
+        with SymbolLibView(path) as view:
+            start, end = view.span(name)
+            index = dict(view._index)
+            data = view._data[:start] + new + view._data[end:]
+        atomic_write_bytes(path, data)
+        sig = file_signature(path)
+
+    delta = len(new) - (end - start)
+    new_name = symbol.entryName
+    shifted = {}
+    for key, (s, e) in index.items():
+        if key == name:
+            shifted[new_name] = (start, start + len(new))
+        elif s > start:
+            shifted[key] = (s + delta, e + delta)
+        else:
+            shifted[key] = (s, e)
+    with _lock:
+        _index_cache[path] = (sig, shifted)
+
+
+def clear_cache() -> None:
+    """Forget all cached symbol indexes."""
+    with _lock:
+        _index_cache.clear()
@@ -0,0 +1,235 @@
+"""Delta export — mirror a library root to a shared location, copying only what changed.
+
+sync_library keeps SYNC_MANIFEST in the destination with, for every file it
+exported, the source's (mtime, size) and SHA-256. A file whose signature is
+unchanged is skipped without reading it; one whose signature changed is
+hashed and only copied if the content differs. Footprints and 3D models are
+checked and copied on a bounded thread pool, each copy atomic (temp file in
+the destination + rename). Files removed from the library since the last
+export are removed from the destination too; files the manifest does not
+list are never touched. The destination defaults to the sync_destination
+setting.
+
+The symbol library is compared block by block: the manifest holds a hash of
+each SYNC_BLOCK_SIZE block as exported, and the library's blocks are hashed
+locally against it. If none changed (a save that rewrote the same content)
+and the destination copy is still the one exported, nothing is written.
+Otherwise the library is copied whole, atomically: the destination copy is
+never patched in place, where KiCad on a teammate's machine could read it
+half-written, and building a patched temp copy on the share would send the
+unchanged blocks over the link as well. The report gives the blocks that
+changed and the bytes actually written. If the library has no symbol library
+any more, the exported copy is removed.
+
+components.db is written with SQLite's online backup API to a temp file in
+the destination, then renamed into place, so teammates never open a
+half-written database.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from database import backup_database
+from fsutil import atomic_copy, atomic_write_text, file_lock, file_signature
+from library_injector import LIB_NAME
+from settings import get_setting
+
+SYNC_MANIFEST = ".kipartbridge-sync.json"
+
+# Threads checking and copying footprints and models (copies to a network
+# share are I/O-bound; more threads only queue on the link)
+SYNC_THREADS = 8
+
+# Block size for the symbol library delta
+SYNC_BLOCK_SIZE = 64 * 1024
+
+_MANIFEST_VERSION = 1
+_SYNCED_DIRS = (f"{LIB_NAME}.pretty", "3dmodels")
+
+
+def _load_manifest(dest: str) -> dict:
+    try:
+        with open(os.path.join(dest, SYNC_MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == _MANIFEST_VERSION else {}
+
+
+def _source_files(root: str) -> list[str]:
+    """Relative paths of the footprints and models to export."""
+    rels = []
+    for sub in _SYNCED_DIRS:
+        directory = os.path.join(root, sub)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            rels.extend(os.path.join(sub, e.name) for e in entries
+                        if e.is_file(follow_symlinks=False) and not e.name.startswith("."))
+    return sorted(rels)
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sync_file(root: str, dest: str, rel: str, record: dict | None) -> tuple[str, dict | None, int]:
+    """Thread side: bring one file up to date. Returns (rel, new record, bytes copied)."""
+    source = os.path.join(root, rel)
+    target = os.path.join(dest, rel)
+    sig = file_signature(source)
+    if sig is None:
+        return rel, None, 0    # removed while we were running
+    target_there = os.path.exists(target)
+    if record is not None and record["sig"] == list(sig) and target_there:
+        return rel, record, 0
+    digest = _sha256(source)
+    if record is not None and record["sha256"] == digest and target_there:
+        return rel, {"sig": list(sig), "sha256": digest}, 0
+    atomic_copy(source, target)
+    return rel, {"sig": list(sig), "sha256": digest}, sig[1]
+
+
+def _blocks(f):
+    """(data, hash) of each SYNC_BLOCK_SIZE block read from f."""
+    for data in iter(lambda: f.read(SYNC_BLOCK_SIZE), b""):
+        yield data, hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _sync_symbols(source: str, target: str, record: dict) -> tuple[dict, dict]:
+    """Bring the exported symbol library up to date. Returns (stats, new record)."""
+    stats = {"blocks": 0, "blocks_changed": 0, "bytes_written": 0}
+    # Held so an import cannot rewrite the library halfway through the read
+    with file_lock(source, "symbol_lib"):
+        sig = file_signature(source)
+        if sig is None:
+            if record and os.path.exists(target):
+                os.unlink(target)    # exported before, gone from the library since
+            return stats, {}
+        target_sig = file_signature(target)
+        current = (target_sig is not None and record.get("target_sig") == list(target_sig)
+                   and record.get("block_size") == SYNC_BLOCK_SIZE)
+        if current and record.get("sig") == list(sig):
+            stats["blocks"] = len(record["blocks"])
+            return stats, record
+        with open(source, "rb") as src:
+            blocks = [digest for _, digest in _blocks(src)]
+        old = record.get("blocks", []) if current else []
+        stats["blocks"] = len(blocks)
+        stats["blocks_changed"] = sum(1 for i, digest in enumerate(blocks) if i >= len(old) or old[i] != digest)
+        if current and blocks == old:
+            return stats, {**record, "sig": list(sig)}
+        atomic_copy(source, target)
+        stats["bytes_written"] = sig[1]
+    return stats, {"sig": list(sig), "target_sig": list(file_signature(target)),
+                   "block_size": SYNC_BLOCK_SIZE, "blocks": blocks}
+
+
+def _sync_database(source: str, target: str, record: dict) -> tuple[bool, dict]:
+    """Back the database up into target if it changed. Returns (copied, new record)."""
+    sig = file_signature(source)
+    if sig is None:
+        return False, {}
+    if record.get("sig") == list(sig) and os.path.exists(target):
+        return False, record
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".tmp",
+                               dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        backup_database(source, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return True, {"sig": list(sig)}
+
+
+def sync_library(root: str, dest: str | None = None, threads: int | None = None, full: bool = False,
+                 progress=None) -> dict:
+    """Export the library under root to dest, copying only what changed since the last export.
+
+    dest defaults to the sync_destination setting. full copies every file
+    again, whatever the manifest says. progress, if
+    given, is called as progress(done, total, bytes_copied) as files are
+    checked. Returns {"dest", "files": {"total", "copied", "unchanged",
+    "deleted", "errors"}, "bytes_copied", "symbols": {"blocks",
+    "blocks_changed", "bytes_written"}, "database_copied", "seconds",
+    "mb_per_second"}.
+    """
+    dest = dest or get_setting("sync_destination")
+    if not dest:
+        raise ValueError("No export destination given and the sync_destination setting is not set")
+    if os.path.realpath(dest) == os.path.realpath(root):
+        raise ValueError("Export destination is the library root itself")
+    start = time.perf_counter()
+    threads = threads or SYNC_THREADS
+    for sub in _SYNCED_DIRS:
+        os.makedirs(os.path.join(dest, sub), exist_ok=True)
+    manifest = _load_manifest(dest)
+    old_files = manifest.get("files", {})
+    rels = _source_files(root)
+
+    files, errors = {}, []
+    copied = unchanged = bytes_copied = 0
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="sync") as pool:
+        futures = {pool.submit(_sync_file, root, dest, rel, None if full else old_files.get(rel)): rel
+                   for rel in rels}
+        for done, future in enumerate(as_completed(futures), 1):
+            rel = futures[future]
+            try:
+                _, record, size = future.result()
+            except OSError as e:
+                errors.append({"path": rel, "error": str(e)})
+                if rel in old_files:
+                    files[rel] = old_files[rel]    # keep it; the next export retries
+                continue
+            if record is not None:
+                files[rel] = record
+                if size:
+                    copied += 1
+                    bytes_copied += size
+                else:
+                    unchanged += 1
+            if progress is not None:
+                progress(done, len(rels), bytes_copied)
+
+    # Exported before but no longer in the library
+    deleted = 0
+    for rel in old_files.keys() - files.keys():
+        try:
+            os.unlink(os.path.join(dest, rel))
+            deleted += 1
+        except FileNotFoundError:
+            pass
+
+    sym_name = f"{LIB_NAME}.kicad_sym"
+    symbols, symbols_record = _sync_symbols(os.path.join(root, sym_name), os.path.join(dest, sym_name),
+                                            {} if full else manifest.get("symbols", {}))
+    db_copied, db_record = _sync_database(os.path.join(root, "components.db"),
+                                          os.path.join(dest, "components.db"),
+                                          {} if full else manifest.get("database", {}))
+
+    atomic_write_text(os.path.join(dest, SYNC_MANIFEST), json.dumps({
+        "version": _MANIFEST_VERSION, "files": files, "symbols": symbols_record, "database": db_record}))
+
+    seconds = time.perf_counter() - start
+    moved = bytes_copied + symbols["bytes_written"]
+    return {
+        "dest": dest,
+        "files": {"total": len(rels), "copied": copied, "unchanged": unchanged,
+                  "deleted": deleted, "errors": errors},
+        "bytes_copied": bytes_copied,
+        "symbols": symbols,
+        "database_copied": db_copied,
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(moved / 1e6 / seconds, 2) if seconds > 0 else 0.0,
+    }
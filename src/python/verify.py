@@ -0,0 +1,322 @@
+"""Library integrity scanner — find where components.db and the files disagree.
+
+components.db, kipartbridge.kicad_sym, kipartbridge.pretty/ and 3dmodels/
+drift apart after manual edits or interrupted imports. verify_library reads
+all four at once: the database on one thread, the symbol library through
+SymbolLibView, footprints on a process pool (each is scanned for its
+(model ...) references) and models on a thread pool (stat plus a header
+check). Footprint and model results are kept in VERIFY_STATE_FILE with each
+file's (mtime, size), so a later run re-reads only files that changed.
+
+Issues are {"kind", "name", "detail"} with kind one of:
+
+    missing_symbol        DB row whose symbol is not in the library
+    orphaned_symbol       library symbol without a DB row
+    missing_footprint     DB row whose footprint file does not exist
+    orphaned_footprint    footprint file without a DB row
+    unreadable_footprint  footprint that does not parse
+    broken_symbol_link    symbol whose Footprint property names a missing footprint
+    missing_model         DB row with has_3d_model but no model reference resolves
+    broken_model_ref      ${KIPARTBRIDGE_3DMODELS} reference to a missing or corrupt model
+    orphaned_model        model file no footprint references
+
+With fix, DB rows are updated to match the files: names of missing symbols
+and footprints are cleared, has_3d_model is corrected, and rows with nothing
+left on disk are deleted. Files are never touched.
+"""
+
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import sexpr
+from batch import default_workers
+from database import ComponentDB
+from fsutil import atomic_write_text, file_signature
+from library_injector import LIB_NAME
+from symbol_view import SymbolLibView
+from workers import mp_context
+
+VERIFY_STATE_FILE = ".verify-state.json"
+
+# Below this many changed footprints, scanning inline beats starting a pool
+VERIFY_POOL_MIN_FILES = 64
+
+# Threads stat'ing and reading model headers
+MODEL_THREADS = 8
+
+MODEL_VAR = "${KIPARTBRIDGE_3DMODELS}/"
+
+# First bytes of valid model files, by extension
+_MODEL_MAGIC = {".step": b"ISO-10303-21", ".stp": b"ISO-10303-21", ".wrl": b"#VRML"}
+
+_STATE_VERSION = 1
+
+
+# ── Per-file scans ───────────────────────────────────────────────────────────
+
+def footprint_models(path: str) -> dict:
+    """{"models": the footprint's (model ...) paths, "error": why it cannot be read or None}."""
+    try:
+        with open(path, "rb") as f:
+            # Yielded only once the outer form closes, so a truncated file has none
+            outer = [head for head, _, _, _ in sexpr.iter_form_spans(f, depth=0)]
+            if not outer:
+                return {"models": [], "error": "truncated file"}
+            if outer[0] not in ("footprint", "module"):
+                return {"models": [], "error": "not a footprint"}
+            f.seek(0)
+            models = [arg for head, arg, _ in sexpr.iter_forms(f, depth=1) if head == "model" and arg]
+    except (OSError, ValueError) as e:
+        return {"models": [], "error": str(e)}
+    return {"models": models, "error": None}
+
+
+def _check_model(path: str) -> dict:
+    """Thread side: {"error": None} if the model looks valid, else what is wrong with it."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+    except OSError as e:
+        return {"error": str(e)}
+    if not head:
+        return {"error": "empty file"}
+    magic = _MODEL_MAGIC.get(os.path.splitext(path)[1].lower())
+    if magic and not head.lstrip().startswith(magic):
+        return {"error": "unrecognized header"}
+    return {"error": None}
+
+
+def _rescan(directory: str, names: list[str], cached: dict, scan, pool_factory) -> tuple[dict, int]:
+    """Results for every file in names, re-running scan only where the signature changed."""
+    results, todo = {}, []
+    for name in names:
+        sig = file_signature(os.path.join(directory, name))
+        if sig is None:
+            continue
+        entry = cached.get(name)
+        if entry is not None and entry.get("sig") == list(sig):
+            results[name] = entry
+        else:
+            results[name] = {"sig": list(sig)}
+            todo.append(name)
+    if todo:
+        with pool_factory(len(todo)) as pool:
+            paths = [os.path.join(directory, name) for name in todo]
+            for name, result in zip(todo, pool.map(scan, paths)):
+                results[name].update(result)
+    return results, len(todo)
+
+
+class _Inline:
+    """Executor stand-in that maps in the calling thread."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, items):
+        return map(fn, items)
+
+
+# ── Scan ─────────────────────────────────────────────────────────────────────
+
+def _load_state(root: str, full: bool) -> dict:
+    if full:
+        return {}
+    try:
+        with open(os.path.join(root, VERIFY_STATE_FILE)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if state.get("version") == _STATE_VERSION else {}
+
+
+def _read_db(db_path: str) -> dict:
+    if not os.path.exists(db_path):
+        return {}
+    db = ComponentDB(db_path)
+    try:
+        rows = db.conn.execute(
+            "SELECT mpn, symbol_name, footprint_name, has_3d_model FROM components").fetchall()
+        return {r["mpn"]: dict(r) for r in rows}
+    finally:
+        db.close()
+
+
+def symbol_links(sym_path: str) -> dict[str, str]:
+    """{symbol name: its Footprint property ("" if unset)} for a .kicad_sym."""
+    links = {}
+    with SymbolLibView(sym_path) as view:
+        for name in view.names():
+            links[name] = sexpr.find_property(io.BytesIO(view.raw(name)), "Footprint") or ""
+    return links
+
+
+def _read_symbols(sym_path: str, cached: dict) -> dict:
+    """{"sig", "links"} of the symbol library, reusing cached if it has not changed."""
+    sig = file_signature(sym_path)
+    if sig is None:
+        return {"sig": None, "links": {}}
+    if cached.get("sig") == list(sig):
+        return cached
+    return {"sig": list(sig), "links": symbol_links(sym_path)}
+
+
+def _scan_footprints(fp_dir: str, cached: dict, workers: int) -> tuple[dict, int]:
+    names = sorted(n for n in os.listdir(fp_dir) if n.endswith(".kicad_mod")) if os.path.isdir(fp_dir) else []
+
+    def pool(n):
+        if n < VERIFY_POOL_MIN_FILES or workers <= 1:
+            return _Inline()
+        return ProcessPoolExecutor(max_workers=min(workers, n), mp_context=mp_context())
+
+    return _rescan(fp_dir, names, cached, footprint_models, pool)
+
+
+def _scan_models(models_dir: str, cached: dict) -> tuple[dict, int]:
+    names = sorted(os.listdir(models_dir)) if os.path.isdir(models_dir) else []
+    names = [n for n in names if not n.startswith(".")]
+    return _rescan(models_dir, names, cached, _check_model,
+                   lambda n: ThreadPoolExecutor(max_workers=min(MODEL_THREADS, n),
+                                                thread_name_prefix="verify-model"))
+
+
+def verify_library(root: str, fix: bool = False, full: bool = False,
+                   workers: int | None = None) -> dict:
+    """Check components.db against the symbol library, footprints and models under root.
+
+    Returns {"root", "counts", "issues", "rescanned", "fixed", "seconds"};
+    rescanned counts the footprints and models read this run (the rest came
+    from VERIFY_STATE_FILE), fixed lists the DB changes made with fix. full
+    ignores the saved state and re-reads everything.
+    """
+    start = time.perf_counter()
+    workers = workers or default_workers()
+    db_path = os.path.join(root, "components.db")
+    sym_path = os.path.join(root, f"{LIB_NAME}.kicad_sym")
+    fp_dir = os.path.join(root, f"{LIB_NAME}.pretty")
+    models_dir = os.path.join(root, "3dmodels")
+    state = _load_state(root, full)
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="verify") as pool:
+        db_future = pool.submit(_read_db, db_path)
+        sym_future = pool.submit(_read_symbols, sym_path, state.get("symbols", {}))
+        fp_future = pool.submit(_scan_footprints, fp_dir, state.get("footprints", {}), workers)
+        model_future = pool.submit(_scan_models, models_dir, state.get("models", {}))
+        rows = db_future.result()
+        symbols = sym_future.result()
+        footprints, fp_rescanned = fp_future.result()
+        models, model_rescanned = model_future.result()
+
+    issues = []
+
+    def issue(kind, name, detail=""):
+        issues.append({"kind": kind, "name": name, "detail": detail})
+
+    links = symbols["links"]
+    fp_names = {name[:-len(".kicad_mod")]: info for name, info in footprints.items()}
+
+    # Model references of every readable footprint
+    referenced_models = set()
+    fp_models_ok = {}
+    for fp_name, info in fp_names.items():
+        if info.get("error"):
+            issue("unreadable_footprint", fp_name, info["error"])
+            continue
+        ok = False
+        for ref in info["models"]:
+            if not ref.startswith(MODEL_VAR):
+                continue
+            model = ref[len(MODEL_VAR):]
+            referenced_models.add(model)
+            if model not in models:
+                issue("broken_model_ref", fp_name, f"{model} does not exist")
+            elif models[model].get("error"):
+                issue("broken_model_ref", fp_name, f"{model}: {models[model]['error']}")
+            else:
+                ok = True
+        fp_models_ok[fp_name] = ok
+
+    for model, info in models.items():
+        if model not in referenced_models:
+            issue("orphaned_model", model)
+
+    # Database rows against the files
+    fixes = {}
+    db_symbols, db_footprints = set(), set()
+    for mpn, row in rows.items():
+        update = {}
+        if row["symbol_name"]:
+            db_symbols.add(row["symbol_name"])
+            if row["symbol_name"] not in links:
+                issue("missing_symbol", mpn, row["symbol_name"])
+                update["symbol_name"] = None
+        if row["footprint_name"]:
+            db_footprints.add(row["footprint_name"])
+            if row["footprint_name"] not in fp_names:
+                issue("missing_footprint", mpn, row["footprint_name"])
+                update["footprint_name"] = None
+        fp_name = row["footprint_name"]
+        if fp_name in fp_models_ok:
+            has_model = fp_models_ok[fp_name]
+            if row["has_3d_model"] and not has_model:
+                issue("missing_model", mpn, fp_name)
+        elif fp_name in fp_names:
+            has_model = bool(row["has_3d_model"])    # unreadable footprint: leave as is
+        else:
+            has_model = False
+        if bool(row["has_3d_model"]) != has_model:
+            update["has_3d_model"] = has_model
+        if update:
+            fixes[mpn] = update
+
+    for name, link in links.items():
+        if name not in db_symbols:
+            issue("orphaned_symbol", name)
+        lib, _, fp_name = link.partition(":")
+        if lib == LIB_NAME and fp_name and fp_name not in fp_names:
+            issue("broken_symbol_link", name, link)
+    for fp_name in fp_names:
+        if fp_name not in db_footprints:
+            issue("orphaned_footprint", fp_name)
+
+    fixed = _apply_fixes(db_path, rows, fixes) if fix and fixes else []
+
+    new_state = {"version": _STATE_VERSION, "symbols": symbols,
+                 "footprints": footprints, "models": models}
+    if os.path.isdir(root):
+        atomic_write_text(os.path.join(root, VERIFY_STATE_FILE), json.dumps(new_state))
+
+    return {
+        "root": root,
+        "counts": {"components": len(rows), "symbols": len(links),
+                   "footprints": len(fp_names), "models": len(models)},
+        "issues": issues,
+        "rescanned": {"footprints": fp_rescanned, "models": model_rescanned},
+        "fixed": fixed,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def _apply_fixes(db_path: str, rows: dict, fixes: dict) -> list[dict]:
+    """Write fixes to the DB. Rows left with no symbol and no footprint are deleted."""
+    fixed = []
+    db = ComponentDB(db_path)
+    try:
+        for mpn, update in fixes.items():
+            row = {**rows[mpn], **update}
+            if not row["symbol_name"] and not row["footprint_name"]:
+                db.delete_component(mpn)
+                fixed.append({"mpn": mpn, "action": "deleted"})
+            else:
+                db.update_component_files(mpn, row["symbol_name"], row["footprint_name"],
+                                          row["has_3d_model"])
+                fixed.append({"mpn": mpn, "action": "updated", "fields": sorted(update)})
+    finally:
+        db.close()
+    return fixed
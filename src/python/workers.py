@@ -0,0 +1,149 @@
+"""Child-process helpers shared by batch imports, isolated parsing and the import worker."""
+
+import multiprocessing
+import signal
+import threading
+import time
+from collections import Counter, deque
+
+# Modules the forkserver imports once, so forked children start with kiutils
+# and the pipeline already loaded
+PRELOAD = ["normalizer", "extractors", "provider_classifier"]
+
+
+def mp_context():
+    """forkserver where available (fast, warm, thread-safe), else spawn."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(PRELOAD)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class WorkerDied(RuntimeError):
+    """The child process exited while running a job (crash, or killed by a limit)."""
+
+
+def _worker_main(conn) -> None:
+    from metrics import current_rss_bytes
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        fn, args, kwargs = job
+        try:
+            reply = ("ok", fn(*args, **kwargs))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply + (current_rss_bytes(),))
+        except Exception as e:  # unpicklable result or exception
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}"), current_rss_bytes()))
+
+
+class RecyclingWorker:
+    """Runs jobs one at a time in a child process that is replaced periodically.
+
+    The child is recycled after max_jobs jobs, or as soon as its RSS after a
+    job reaches max_rss_bytes (0 disables either threshold), so leaks and
+    fragmentation from long sessions die with it. A standby child is always
+    started ahead of time and takes over immediately, so recycling never adds
+    a cold start to a job. Jobs are (fn, args, kwargs) and must be picklable.
+    """
+
+    def __init__(self, max_jobs: int = 200, max_rss_bytes: int = 1024 * 1024 * 1024,
+                 history: int = 100):
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_bytes
+        self._ctx = mp_context()
+        self._lock = threading.Lock()
+        self._jobs_total = 0
+        self._jobs = 0
+        self._recycles = Counter()
+        self._rss_history = deque(maxlen=history)
+        self._active = self._start()
+        self._standby = self._start()
+
+    def _start(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(child_conn,),
+                                 name="kipartbridge-worker", daemon=True)
+        proc.start()
+        child_conn.close()
+        return proc, parent_conn
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the child and return its result (or raise its exception)."""
+        with self._lock:
+            proc, conn = self._active
+            try:
+                conn.send((fn, args, kwargs))
+                status, value, rss = conn.recv()
+            except (EOFError, OSError):
+                proc.join(timeout=1)
+                self._recycle("crashed")
+                raise WorkerDied(f"Worker process {proc.pid} exited unexpectedly "
+                                 f"({_describe_exit(proc.exitcode)})") from None
+            self._jobs += 1
+            self._jobs_total += 1
+            self._rss_history.append({"time": time.time(), "pid": proc.pid,
+                                      "jobs": self._jobs, "rss_bytes": rss})
+            if self.max_jobs and self._jobs >= self.max_jobs:
+                self._recycle("max_jobs")
+            elif self.max_rss_bytes and rss and rss >= self.max_rss_bytes:
+                self._recycle("rss")
+        if status == "error":
+            raise value
+        return value
+
+    def _recycle(self, reason: str) -> None:
+        old = self._active
+        self._active = self._standby
+        self._standby = self._start()
+        self._jobs = 0
+        self._recycles[reason] += 1
+        threading.Thread(target=_retire, args=old, name="kipartbridge-retire", daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active_pid": self._active[0].pid,
+                "standby_pid": self._standby[0].pid,
+                "active_jobs": self._jobs,
+                "jobs_total": self._jobs_total,
+                "max_jobs": self.max_jobs,
+                "max_rss_bytes": self.max_rss_bytes,
+                "recycles": dict(self._recycles),
+                "rss_history": list(self._rss_history),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for proc, conn in (self._active, self._standby):
+                _retire(proc, conn)
+
+
+def _retire(proc, conn) -> None:
+    try:
+        conn.send(None)
+    except OSError:
+        pass
+    conn.close()
+    proc.join(timeout=5)
+    if proc.is_alive():
+        proc.kill()
+        proc.join()
+
+
+def _describe_exit(exitcode: int | None) -> str:
+    if exitcode is None:
+        return "still running"
+    if exitcode < 0:
+        try:
+            return f"killed by {signal.Signals(-exitcode).name}"
+        except ValueError:
+            return f"killed by signal {-exitcode}"
+    return f"exit code {exitcode}"
@@ -268,14 +268,38 @@ librarySearch.addEventListener('input', () => {
   searchTimeout = setTimeout(() => loadLibrary(librarySearch.value), 300);
 });
 
+// Change cursor the table reflects (null until loaded)
+let libraryCursor = null;
+
+function renderComponentRow(comp, tr = document.createElement('tr')) {
+  const date = comp.updated_at ? new Date(comp.updated_at).toLocaleDateString() : '-';
+  const has3d = comp.has_3d_model ? '\u2713' : '-';
+  tr.dataset.mpn = comp.mpn;
+  tr.innerHTML = `
+    <td style="color:var(--text-primary);font-weight:500">${comp.mpn || '-'}</td>
+    <td>${comp.manufacturer || '-'}</td>
+    <td>${comp.source_provider || '-'}</td>
+    <td style="text-align:center">${has3d}</td>
+    <td>${date}</td>
+  `;
+  return tr;
+}
+
 async function loadLibrary(query) {
   try {
+    // Take the cursor first: changes racing the list are re-applied, harmlessly
+    const { cursor } = await window.kipartbridge.changesSince(null);
     let components;
     if (query && query.trim()) {
       components = await window.kipartbridge.searchComponents(query.trim());
+      if (!components || components.length === 0) {
+        // Probably a typo: show the closest MPNs instead of an empty table
+        components = await window.kipartbridge.fuzzySearch(query.trim());
+      }
     } else {
       components = await window.kipartbridge.listComponents();
     }
+    libraryCursor = cursor;
 
     libraryTbody.innerHTML = '';
     if (!components || components.length === 0) {
@@ -285,17 +309,7 @@ async function loadLibrary(query) {
     libraryEmpty.style.display = 'none';
 
     for (const comp of components) {
-      const tr = document.createElement('tr');
-      const date = comp.updated_at ? new Date(comp.updated_at).toLocaleDateString() : '-';
-      const has3d = comp.has_3d_model ? '\u2713' : '-';
-      tr.innerHTML = `
-        <td style="color:var(--text-primary);font-weight:500">${comp.mpn || '-'}</td>
-        <td>${comp.manufacturer || '-'}</td>
-        <td>${comp.source_provider || '-'}</td>
-        <td style="text-align:center">${has3d}</td>
-        <td>${date}</td>
-      `;
-      libraryTbody.appendChild(tr);
+      libraryTbody.appendChild(renderComponentRow(comp));
     }
   } catch (err) {
     console.error('Failed to load library:', err);
@@ -303,3 +317,53 @@ async function loadLibrary(query) {
     libraryEmpty.style.display = 'block';
   }
 }
+
+// Patch the open library browser in place when the sidecar reports changes
+let patching = false;
+let patchAgain = false;
+
+async function applyLibraryChanges() {
+  if (libraryCursor === null || !libraryOverlay.classList.contains('visible')) return;
+  if (patching) {
+    patchAgain = true;
+    return;
+  }
+  if (librarySearch.value.trim()) {
+    await loadLibrary(librarySearch.value);
+    return;
+  }
+  patching = true;
+  try {
+    let page;
+    do {
+      page = await window.kipartbridge.changesSince(libraryCursor);
+      if (page.reset) {
+        await loadLibrary();
+        return;
+      }
+      for (const change of page.changes) {
+        const existing = [...libraryTbody.children].find((tr) => tr.dataset.mpn === change.mpn);
+        if (change.op === 'delete') {
+          if (existing) existing.remove();
+          continue;
+        }
+        // Most recently updated first, like list_components
+        libraryTbody.prepend(renderComponentRow(change.component, existing || undefined));
+      }
+      libraryCursor = page.cursor;
+    } while (page.has_more);
+    libraryEmpty.style.display = libraryTbody.children.length ? 'none' : 'block';
+  } catch (err) {
+    console.error('Failed to apply library changes:', err);
+  } finally {
+    patching = false;
+    if (patchAgain) {
+      patchAgain = false;
+      applyLibraryChanges();
+    }
+  }
+}
+
+window.kipartbridge.on('library-changed', (d) => {
+  if (libraryCursor === null || d.cursor > libraryCursor) applyLibraryChanges();
+});
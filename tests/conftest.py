@@ -5,6 +5,9 @@ import pytest
 # Add src/python to the path so tests can import modules directly
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
 
+import main  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
 
 
@@ -29,3 +32,44 @@ def tmp_library(tmp_path):
     (lib_root / 'kipartbridge.pretty').mkdir()
     (lib_root / '3dmodels').mkdir()
     return lib_root
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'library(parts=3, layouts=("samacsys",), step_size=4096): contents of the library fixture')
+
+
+@pytest.fixture
+def import_part(tmp_path):
+    """import_part(root, i, layout='samacsys', step_size=4096) imports synthetic part i; returns its ZIP."""
+    def do(root, i, layout='samacsys', step_size=4096):
+        zip_path = synthetic.build_zip(layout, str(tmp_path / f'{i}.zip'), synthetic.mpn_for(i), pins=8,
+                                       step_size=step_size)
+        assert main.process_download(zip_path, library_root=root).status == 'success'
+        return zip_path
+    return do
+
+
+@pytest.fixture
+def library(request, tmp_path, import_part):
+    """A library root with synthetic parts 0..parts-1 imported, layouts taken in turn.
+
+    Set the contents with @pytest.mark.library(parts=..., layouts=..., step_size=...)
+    on the test or as the module's pytestmark.
+    """
+    marker = request.node.get_closest_marker('library')
+    options = {'parts': 3, 'layouts': ('samacsys',), 'step_size': 4096, **(marker.kwargs if marker else {})}
+    root = str(tmp_path / 'lib')
+    layouts = options['layouts']
+    for i in range(options['parts']):
+        import_part(root, i, layouts[i % len(layouts)], options['step_size'])
+    return root
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_config(tmp_path_factory, monkeypatch):
+    """Keep tests away from the real KiCad config and sidecar settings."""
+    home = tmp_path_factory.mktemp('user_config')
+    monkeypatch.setenv('KICAD_CONFIG_HOME', str(home / 'kicad'))
+    monkeypatch.setenv('KIPARTBRIDGE_SETTINGS', str(home / 'settings.json'))
+    return home
@@ -0,0 +1,97 @@
+"""Tests for process-pool batch imports."""
+
+import os
+import pytest
+from kiutils.symbol import SymbolLib
+
+import batch
+from database import ComponentDB
+from models import ImportJob
+from settings import update_settings
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    layouts = ["ultra_librarian", "samacsys", "snapeda"]
+    return [ImportJob(synthetic.build_zip(layout, str(tmp_path / f"{i}.zip"), synthetic.mpn_for(i),
+                                          pins=8, step_size=4096))
+            for i, layout in enumerate(layouts)]
+
+
+def _footprints(lib_path):
+    return {s.entryName: {p.key: p.value for p in s.properties}["Footprint"]
+            for s in SymbolLib.from_file(lib_path).symbols}
+
+
+def test_imports_in_job_order(jobs, tmp_path):
+    root = tmp_path / "lib"
+    results = batch.import_batch(jobs, library_root=str(root), workers=2)
+
+    names = [synthetic.mpn_for(i) for i in range(len(jobs))]
+    assert [r.status for r in results] == ["success"] * 3
+    assert [r.mpn for r in results] == names
+    assert _footprints(str(root / "kipartbridge.kicad_sym")) == {n: f"kipartbridge:{n}" for n in names}
+    for name in names:
+        assert (root / "kipartbridge.pretty" / f"{name}.kicad_mod").exists()
+    assert len(os.listdir(root / "3dmodels")) == 3
+    # Scratch dir is cleaned up
+    assert not [d for d in os.listdir(root) if d.startswith(".batch_")]
+
+    db = ComponentDB(str(root / "components.db"))
+    try:
+        assert {c["mpn"] for c in db.list_components()} == set(names)
+    finally:
+        db.close()
+
+
+def test_bad_zip_does_not_stop_batch(jobs, tmp_path):
+    bad = tmp_path / "bad.zip"
+    bad.write_bytes(b"not a zip")
+    results = batch.import_batch([jobs[0], ImportJob(str(bad)), jobs[1]],
+                                 library_root=str(tmp_path / "lib"), workers=2)
+    assert [r.status for r in results] == ["success", "error", "success"]
+    assert results[1].error
+
+
+def test_later_duplicate_wins(tmp_path):
+    first = synthetic.build_zip("samacsys", str(tmp_path / "a.zip"), "DUP1", pins=4, step_size=0)
+    second = synthetic.build_zip("samacsys", str(tmp_path / "b.zip"), "DUP1", pins=12, step_size=0)
+    root = tmp_path / "lib"
+    batch.import_batch([ImportJob(first), ImportJob(second)], library_root=str(root), workers=2)
+
+    symbols = SymbolLib.from_file(str(root / "kipartbridge.kicad_sym")).symbols
+    assert [s.entryName for s in symbols] == ["DUP1"]
+    pins = sum(len(unit.pins) for unit in symbols[0].units)
+    assert pins == 12
+
+
+def test_worker_count_setting():
+    update_settings({"batch_workers": 3})
+    assert batch.default_workers() == 3
+
+
+def test_failed_merge_takes_back_placed_files(jobs, tmp_path, monkeypatch):
+    root = tmp_path / "lib"
+    assert batch.import_batch(jobs[:1], library_root=str(root), workers=1)[0].status == "success"
+    kept = root / "kipartbridge.pretty" / f"{synthetic.mpn_for(0)}.kicad_mod"
+
+    def broken(path, symbols):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(batch, "merge_symbols", broken)
+    results = batch.import_batch(jobs, library_root=str(root), workers=1)
+    assert [r.status for r in results] == ["error"] * 3
+    # Only the part imported before is left; its re-imported files replaced the old ones
+    assert os.listdir(root / "kipartbridge.pretty") == [kept.name]
+    assert len(os.listdir(root / "3dmodels")) == 1
+
+
+def test_failed_registration_still_records_parts(jobs, tmp_path, monkeypatch):
+    def broken(root):
+        raise OSError("read-only config")
+
+    monkeypatch.setattr(batch, "ensure_library_tables", broken)
+    results = batch.import_batch(jobs, library_root=str(tmp_path / "lib"), workers=1)
+    assert [r.status for r in results] == ["success"] * 3
+    assert all("Could not register the library with KiCad: read-only config" in r.warnings for r in results)
@@ -0,0 +1,193 @@
+"""Tests for the BOM presence check."""
+
+import json
+import os
+
+import pytest
+
+import bom
+import main
+from database import ComponentDB
+
+
+def _placed(ref, mpn, in_bom="yes", lib_id="Device:R"):
+    mpn_prop = f'\n    (property "MPN" "{mpn}" (at 0 0 0))' if mpn else ""
+    return (f'  (symbol (lib_id "{lib_id}") (at 10 10 0) (unit 1)\n'
+            f'    (in_bom {in_bom}) (on_board yes)\n'
+            f'    (property "Reference" "{ref}" (at 0 0 0))'
+            f'{mpn_prop}\n'
+            f'  )\n')
+
+
+SCHEMATIC = (
+    '(kicad_sch (version 20230121) (generator eeschema)\n'
+    '  (lib_symbols\n'
+    '    (symbol "Device:R" (property "Reference" "R" (at 0 0 0)) (property "MPN" "LIBRARY-ONLY" (at 0 0 0)))\n'
+    '  )\n'
+    + _placed("U1", "STM32C071RBT6", lib_id="MCU:STM32")
+    + _placed("U1", "STM32C071RBT6", lib_id="MCU:STM32")      # second unit of U1
+    + _placed("U2", "LM358DR2G")
+    + _placed("R1", "RC0603FR-0710KL")
+    + _placed("R2", "RC0603FR-0710KL")
+    + _placed("TP1", "NOT-ON-BOM", in_bom="no")
+    + _placed("#PWR01", "POWER", lib_id="power:GND")
+    + _placed("C1", None)
+    + '  (sheet (at 0 0) (size 10 10)\n'
+    '    (property "Sheetname" "Power" (at 0 0 0))\n'
+    '    (property "Sheetfile" "power.kicad_sch" (at 0 0 0))\n'
+    '  )\n'
+    ')\n'
+)
+
+SUB_SHEET = (
+    '(kicad_sch (version 20230121) (generator eeschema)\n'
+    + _placed("U3", "tps5430-ddar")
+    + ')\n'
+)
+
+NETLIST = '''(export (version "E")
+  (design (source "board.kicad_sch"))
+  (components
+    (comp (ref "U1") (value "STM32") (footprint "kipartbridge:STM32C071RBT6")
+      (fields (field (name "Footprint") "x") (field (name "Manufacturer Part Number") "STM32C071RBT6")))
+    (comp (ref "U2") (value "LM358")
+      (property (name "MPN") (value "LM358DR")))
+    (comp (ref "TP1") (value "TP")
+      (fields (field (name "MPN") "TESTPOINT"))
+      (property (name "exclude_from_bom")))
+    (comp (ref "R1") (value "10k")))
+  (libparts (libpart (lib "Device") (part "R") (fields (field (name "MPN") "LIBPART-ONLY"))))
+  (nets (net (code "1") (name "GND"))))
+'''
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "lib"
+    db = ComponentDB(str(root / "components.db"))
+    db.upsert_component(mpn="STM32C071RBT6", symbol_name="STM32C071RBT6", footprint_name="LQFP64",
+                        has_3d_model=True, manufacturer="ST")
+    db.upsert_component(mpn="LM358DR", symbol_name="LM358DR", footprint_name="SOIC-8")
+    db.upsert_component(mpn="TPS5430DDAR", symbol_name="TPS5430DDAR", footprint_name="SO-8")
+    yield db
+    db.close()
+
+
+def by_mpn(results):
+    return {r["mpn"]: r for chunk in results for r in chunk}
+
+
+class TestReaders:
+    def test_csv_with_title_rows_and_semicolons(self, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_text("Project;Board\n\nRef Des;Qty;Mfr. Part Number\n"
+                        '"R1, R2";2;RC0603\nU1;1;STM32\n;;\nJ1;;\n')
+        lines = list(bom.read_bom(str(path)))
+        assert [(l.mpn, l.references, l.quantity) for l in lines] == [
+            ("RC0603", ["R1", "R2"], 2), ("STM32", ["U1"], 1)]
+
+    def test_csv_prefers_mpn_over_part_number(self, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_text("Part Number,MPN\nINT-001,LM358DR\n")
+        assert [l.mpn for l in bom.read_bom(str(path))] == ["LM358DR"]
+
+    def test_csv_without_mpn_column(self, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_text("Reference,Value\nR1,10k\n")
+        with pytest.raises(ValueError, match="No MPN column"):
+            list(bom.read_bom(str(path)))
+
+    def test_schematic_and_sub_sheets(self, tmp_path):
+        (tmp_path / "board.kicad_sch").write_text(SCHEMATIC)
+        (tmp_path / "power.kicad_sch").write_text(SUB_SHEET)
+        lines = bom.group_lines(bom.read_bom(str(tmp_path / "board.kicad_sch")))
+        assert [(l.mpn, l.references, l.quantity) for l in lines] == [
+            ("STM32C071RBT6", ["U1"], 1),
+            ("LM358DR2G", ["U2"], 1),
+            ("RC0603FR-0710KL", ["R1", "R2"], 2),
+            ("tps5430-ddar", ["U3"], 1),
+        ]
+
+    def test_netlist(self, tmp_path):
+        path = tmp_path / "board.net"
+        path.write_text(NETLIST)
+        assert [(l.mpn, l.references) for l in bom.read_bom(str(path))] == [
+            ("STM32C071RBT6", ["U1"]), ("LM358DR", ["U2"])]
+
+    def test_unsupported_file(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported BOM file"):
+            bom.read_bom(str(tmp_path / "bom.xlsx"))
+
+
+class TestCheckBom:
+    def test_found_fuzzy_missing(self, library, tmp_path):
+        (tmp_path / "board.kicad_sch").write_text(SCHEMATIC)
+        (tmp_path / "power.kicad_sch").write_text(SUB_SHEET)
+        results = by_mpn(bom.check_bom(str(tmp_path / "board.kicad_sch"), library))
+
+        found = results["STM32C071RBT6"]
+        assert found["status"] == "found"
+        assert found["component"] == {"mpn": "STM32C071RBT6", "manufacturer": "ST",
+                                      "symbol_name": "STM32C071RBT6", "footprint_name": "LQFP64",
+                                      "has_3d_model": True}
+        # Compared after normalization
+        assert results["tps5430-ddar"]["component"]["mpn"] == "TPS5430DDAR"
+
+        fuzzy = results["LM358DR2G"]
+        assert fuzzy["status"] == "fuzzy"
+        assert [(c["mpn"], c["distance"]) for c in fuzzy["candidates"]] == [("LM358DR", 2)]
+
+        assert results["RC0603FR-0710KL"]["status"] == "missing"
+        assert results["RC0603FR-0710KL"]["candidates"] == []
+
+    def test_chunks_and_no_fuzzy(self, library, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_text("MPN\n" + "\n".join(["LM358DR", "LM358DR2G", "STM32C071RBT6", "X1", "lm358-dr"]))
+        chunks = list(bom.check_bom(str(path), library, fuzzy=False, chunk_size=2))
+        assert [len(c) for c in chunks] == [2, 2]
+        statuses = {r["mpn"]: r["status"] for c in chunks for r in c}
+        assert statuses == {"LM358DR": "found", "LM358DR2G": "missing",
+                            "STM32C071RBT6": "found", "X1": "missing"}
+        assert bom.summarize([r for c in chunks for r in c]) == {
+            "total": 4, "found": 2, "fuzzy": 0, "missing": 2}
+
+    def test_lookup_mpns_prefers_exact_match(self, library):
+        library.upsert_component(mpn="LM358-DR")
+        found = library.lookup_mpns(["LM358-DR", "lm358dr", "NOPE"])
+        assert found["LM358-DR"]["mpn"] == "LM358-DR"
+        assert found["lm358dr"]["mpn"] in ("LM358-DR", "LM358DR")
+        assert "NOPE" not in found
+        # The temp table is emptied after each lookup
+        assert library.lookup_mpns(["NOPE"]) == {}
+
+
+def test_check_bom_rpc_streams_chunks(library, tmp_path, monkeypatch):
+    path = tmp_path / "board.net"
+    path.write_text(NETLIST)
+    root = os.path.dirname(library.db_path)
+    request = {"id": 7, "method": "check_bom", "params": {"library_root": root, "path": str(path)}}
+
+    resp = main.handle_jsonrpc(request)["result"]
+    assert resp["summary"] == {"total": 2, "found": 2, "fuzzy": 0, "missing": 0}
+    assert [r["mpn"] for r in resp["results"]] == ["STM32C071RBT6", "LM358DR"]
+
+    monkeypatch.setattr(bom, "BOM_CHUNK_SIZE", 1)
+    sent = []
+    request["params"]["stream"] = True
+    resp = main.handle_jsonrpc(request, notify=lambda method, params: sent.append((method, params)))
+    assert "results" not in resp["result"]
+    assert [(m, p["id"], [r["mpn"] for r in p["results"]]) for m, p in sent] == [
+        ("bom-results", 7, ["STM32C071RBT6"]), ("bom-results", 7, ["LM358DR"])]
+
+
+def test_check_bom_cli(library, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "bom.csv"
+    path.write_text("MPN,Reference\nLM358DR,U2\nLM358DR2G,U3\n")
+    root = os.path.dirname(library.db_path)
+    monkeypatch.setattr("sys.argv", ["main.py", "check-bom", str(path), "--library-root", root, "--json"])
+    with pytest.raises(SystemExit) as exc:
+        main.main()
+    assert exc.value.code == 1
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert [l.get("status") for l in lines[:2]] == ["found", "fuzzy"]
+    assert lines[-1] == {"summary": {"total": 2, "found": 1, "fuzzy": 1, "missing": 0}}
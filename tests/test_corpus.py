@@ -0,0 +1,94 @@
+"""Tests for the download corpus recorder and replay harness."""
+
+import json
+import os
+import pytest
+
+import corpus
+from models import ProcessingResult
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def snapeda_zip(tmp_path):
+    return synthetic.build_zip("snapeda", str(tmp_path / "1700000000_part.zip"),
+                               "SYN00001-QFN9", pins=8, step_size=2048)
+
+
+def _success(mpn="SYN00001-QFN9", **kw):
+    fields = dict(status="success", provider="snapeda", mpn=mpn, symbol_name=mpn,
+                  footprint_name=mpn, has_3d_model=True, warnings=[])
+    fields.update(kw)
+    return ProcessingResult(**fields)
+
+
+class TestRecord:
+    def test_record_and_load(self, snapeda_zip, tmp_path):
+        corpus_dir = str(tmp_path / "corpus")
+        entry_dir = corpus.record(corpus_dir, snapeda_zip, "https://snapeda.com/x.zip",
+                                  "https://www.snapeda.com/parts/X/Y/view-part/", _success())
+
+        assert os.path.isfile(os.path.join(entry_dir, corpus.ZIP_FILE))
+        entries = corpus.load_entries(corpus_dir)
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["original_name"] == "1700000000_part.zip"
+        assert entry["source_url"] == "https://snapeda.com/x.zip"
+        assert entry["result"]["mpn"] == "SYN00001-QFN9"
+
+    def test_same_download_recorded_once(self, snapeda_zip, tmp_path):
+        corpus_dir = str(tmp_path / "corpus")
+        first = corpus.record(corpus_dir, snapeda_zip, None, None, _success())
+        second = corpus.record(corpus_dir, snapeda_zip, None, None, _success(mpn="OTHER"))
+        assert first == second
+        assert corpus.load_entries(corpus_dir)[0]["result"]["mpn"] == "SYN00001-QFN9"
+
+    def test_maybe_record_is_opt_in(self, snapeda_zip, tmp_path):
+        corpus_dir = tmp_path / "corpus"
+        corpus.configure(None)
+        corpus.maybe_record(snapeda_zip, None, None, _success())
+        assert not corpus_dir.exists()
+
+        corpus.configure(str(corpus_dir))
+        try:
+            corpus.maybe_record(snapeda_zip, None, None, _success())
+        finally:
+            corpus.configure(None)
+        assert len(corpus.load_entries(str(corpus_dir))) == 1
+
+
+class TestDiffResults:
+    def test_no_changes(self):
+        r = json.loads(json.dumps(_success().__dict__))
+        assert corpus.diff_results(r, r) == []
+
+    def test_ignores_library_state_warnings(self):
+        before = _success(warnings=["Component X already exists, updating"]).__dict__
+        after = _success().__dict__
+        assert corpus.diff_results(before, after) == []
+
+    def test_reports_changed_fields(self):
+        before = _success().__dict__
+        after = _success(warnings=["No 3D model found in download"]).__dict__
+        after["mpn"] = "UUID"
+        fields = [c["field"] for c in corpus.diff_results(before, after)]
+        assert fields == ["mpn", "warnings"]
+
+
+class TestReplay:
+    def test_replay_detects_changes(self, snapeda_zip, tmp_path):
+        corpus_dir = str(tmp_path / "corpus")
+        corpus.record(corpus_dir, snapeda_zip, None, None, _success(footprint_name="OLD_NAME"))
+
+        report = corpus.replay(corpus_dir, workers=1, scratch_root=str(tmp_path / "scratch"))
+
+        assert report["entries"] == 1
+        assert report["errors"] == 0
+        assert report["throughput_per_second"] > 0
+        assert report["latency_seconds_by_provider"]["snapeda"]["count"] == 1
+        [changed] = report["changed"]
+        assert changed["changes"] == [
+            {"field": "footprint_name", "recorded": "OLD_NAME", "replayed": "SYN00001-QFN9"}
+        ]
+        # Replay must not touch the real KiCad config
+        assert os.listdir(str(tmp_path / "scratch"))
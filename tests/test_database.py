@@ -2,7 +2,8 @@
 
 import os
 import pytest
-from database import ComponentDB
+import sqlite3
+from database import ComponentDB, clear_filter_cache, edit_distance, mpn_trigrams
 
 
 @pytest.fixture
@@ -65,3 +66,199 @@ class TestComponentDB:
         comp_id = db.upsert_component(mpn="TEST1")
         db.log_import(comp_id, "import", "test.zip")
         # Should not raise
+
+
+class TestChangeFeed:
+    def test_cursor_tracks_inserts_updates_deletes(self, db):
+        assert db.change_cursor() == 0
+        db.upsert_component(mpn="A")
+        db.upsert_component(mpn="B")
+        start = db.changes_since(None)["cursor"]
+        db.upsert_component(mpn="A", manufacturer="Acme")
+        assert db.delete_component("B")
+        assert not db.delete_component("B")
+
+        feed = db.changes_since(start)
+        assert feed["cursor"] == db.change_cursor() > start
+        assert [(c["op"], c["mpn"]) for c in feed["changes"]] == [("update", "A"), ("delete", "B")]
+        assert feed["changes"][0]["component"]["manufacturer"] == "Acme"
+        assert feed["changes"][1]["component"] is None
+        assert db.changes_since(feed["cursor"])["changes"] == []
+
+    def test_one_entry_per_component(self, db):
+        for i in range(3):
+            db.upsert_component(mpn="A", description=f"rev {i}")
+        [change] = db.changes_since(0)["changes"]
+        assert change["op"] == "update"
+        assert change["component"]["description"] == "rev 2"
+
+    def test_paging(self, db):
+        for i in range(5):
+            db.upsert_component(mpn=f"P{i}")
+        first = db.changes_since(0, limit=3)
+        assert first["has_more"]
+        rest = db.changes_since(first["cursor"], limit=3)
+        assert not rest["has_more"]
+        assert [c["mpn"] for c in first["changes"] + rest["changes"]] == [f"P{i}" for i in range(5)]
+
+    def test_cursor_from_another_database_resets(self, db):
+        db.upsert_component(mpn="A")
+        assert db.changes_since(99)["reset"]
+
+
+class TestFilterComponents:
+    @pytest.fixture
+    def parts(self, db):
+        clear_filter_cache()
+        box = lambda w, h: {"courtyard_x_min": -w / 2, "courtyard_y_min": -h / 2,
+                            "courtyard_x_max": w / 2, "courtyard_y_max": h / 2}
+        db.upsert_component(mpn="MCU1", manufacturer="ST", facets={
+            "reference": "U", "pin_count": 16, "package": "QFN-16", "pad_count": 17,
+            "mount_type": "smd", **box(4, 4)})
+        db.upsert_component(mpn="MCU2", manufacturer="ST", facets={
+            "reference": "U", "pin_count": 48, "package": "LQFP-48", "pad_count": 48,
+            "mount_type": "smd", **box(9, 9)})
+        db.upsert_component(mpn="OPAMP", manufacturer="TI", facets={
+            "reference": "U", "pin_count": 8, "package": "DIP-8", "pad_count": 8,
+            "mount_type": "tht", **box(10, 7)})
+        db.upsert_component(mpn="RES", manufacturer="Yageo", facets={
+            "reference": "R", "pin_count": 2, "package": "0603", "pad_count": 2,
+            "mount_type": "smd", **box(2, 1)})
+        return db
+
+    def mpns(self, result):
+        return sorted(c["mpn"] for c in result["components"])
+
+    def test_equality_and_in(self, parts):
+        assert self.mpns(parts.filter_components({"mount_type": "tht"})) == ["OPAMP"]
+        result = parts.filter_components({"package": ["QFN-16", "0603"], "reference": "U"})
+        assert self.mpns(result) == ["MCU1"]
+        assert result["total"] == 1
+
+    def test_ranges(self, parts):
+        assert self.mpns(parts.filter_components({"min_pin_count": 8, "max_pin_count": 16})) == ["MCU1", "OPAMP"]
+        assert self.mpns(parts.filter_components({"max_courtyard_width": 5})) == ["MCU1", "RES"]
+        assert self.mpns(parts.filter_components({"max_courtyard_height": 8, "min_pad_count": 3})) == ["MCU1", "OPAMP"]
+
+    def test_facet_counts_ignore_own_filter(self, parts):
+        facets = parts.filter_components({"manufacturer": "ST", "mount_type": "smd"})["facets"]
+        assert facets["manufacturer"] == {"ST": 2, "Yageo": 1}
+        assert facets["mount_type"] == {"smd": 2}
+        assert facets["package"] == {"LQFP-48": 1, "QFN-16": 1}
+
+    def test_unknown_filter(self, parts):
+        with pytest.raises(ValueError, match="pin_cnt"):
+            parts.filter_components({"pin_cnt": 3})
+
+    def test_cache_invalidated_by_writes(self, parts):
+        assert parts.filter_components({"reference": "R"})["total"] == 1
+        assert parts.filter_components({"reference": "R"})["total"] == 1
+        parts.upsert_component(mpn="RES2", facets={"reference": "R"})
+        assert parts.filter_components({"reference": "R"})["total"] == 2
+
+    def test_migrates_old_schema(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE components (id INTEGER PRIMARY KEY AUTOINCREMENT, mpn TEXT UNIQUE NOT NULL,"
+                     " manufacturer TEXT, description TEXT, symbol_name TEXT, footprint_name TEXT,"
+                     " has_3d_model INTEGER DEFAULT 0, source_provider TEXT, source_file TEXT,"
+                     " created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO components (mpn) VALUES ('LEGACY')")
+        conn.commit()
+        conn.close()
+        db = ComponentDB(path)
+        try:
+            result = db.filter_components({})
+            assert self.mpns(result) == ["LEGACY"]
+            assert result["components"][0]["pin_count"] is None
+        finally:
+            db.close()
+
+
+class TestFuzzySearch:
+    @pytest.fixture
+    def parts(self, db):
+        for mpn in ("STM32C071RBT6", "STM32C031K6T6", "LM358DR", "LM358DR2G", "ESP32-S3", "NE555P"):
+            db.upsert_component(mpn=mpn)
+        return db
+
+    def mpns(self, results):
+        return [c["mpn"] for c in results]
+
+    def test_edit_distance(self):
+        assert edit_distance("LM358DR", "LM358DR2G") == 2
+        assert edit_distance("kitten", "sitting") == 3
+        assert edit_distance("", "ABC") == 3
+
+    def test_trigrams_ignore_case_and_separators(self):
+        assert mpn_trigrams("esp32-s3") == mpn_trigrams("ESP32S3")
+        assert "  S" in mpn_trigrams("STM32")
+
+    def test_ranks_by_edit_distance(self, parts):
+        results = parts.fuzzy_search("STM32C071RBT")
+        assert self.mpns(results)[:2] == ["STM32C071RBT6", "STM32C031K6T6"]
+        assert results[0]["distance"] == 1
+        assert 0 < results[0]["similarity"] <= 1
+        assert self.mpns(parts.fuzzy_search("LM358DR2G"))[:2] == ["LM358DR2G", "LM358DR"]
+        assert self.mpns(parts.fuzzy_search("esp32s3"))[0] == "ESP32-S3"
+
+    def test_limit_and_threshold(self, parts):
+        assert len(parts.fuzzy_search("STM32", limit=1)) == 1
+        assert parts.fuzzy_search("QQQQQQ") == []
+        assert parts.fuzzy_search("--") == []
+
+    def test_index_follows_deletes(self, parts):
+        parts.delete_component("NE555P")
+        assert parts.fuzzy_search("NE555") == []
+        assert parts.conn.execute("SELECT COUNT(*) FROM mpn_trigrams WHERE component_id NOT IN "
+                                  "(SELECT id FROM components)").fetchone()[0] == 0
+
+    def test_builds_index_for_existing_database(self, parts):
+        parts.conn.execute("DROP TABLE mpn_trigrams")
+        parts.conn.commit()
+        reopened = ComponentDB(parts.db_path)
+        try:
+            assert self.mpns(reopened.fuzzy_search("NE555"))[0] == "NE555P"
+        finally:
+            reopened.close()
+
+
+def test_changes_since_rpc_and_notification(tmp_path):
+    import main
+    root = str(tmp_path / "lib")
+    db = ComponentDB(os.path.join(root, "components.db"))
+    db.upsert_component(mpn="A")
+    db.close()
+
+    request = {"id": 1, "method": "process_download", "params": {"library_root": root}}
+    last = {}
+    note = main._library_changed_notification(request, last)
+    assert note == {"jsonrpc": "2.0", "method": "library-changed",
+                    "params": {"library_root": root, "cursor": 1}}
+    # Only sent when the cursor moved
+    assert main._library_changed_notification(request, last) is None
+    assert main._library_changed_notification({"id": 2, "method": "ping"}, {}) is None
+
+    resp = main.handle_jsonrpc({"id": 3, "method": "changes_since",
+                                "params": {"library_root": root, "cursor": 0}})
+    assert [c["mpn"] for c in resp["result"]["changes"]] == ["A"]
+
+    resp = main.handle_jsonrpc({"id": 4, "method": "fuzzy_search",
+                                "params": {"library_root": root, "query": "a"}})
+    assert [c["mpn"] for c in resp["result"]] == ["A"]
+
+
+def test_import_records_facets(tmp_path):
+    import main
+    from benchmarks import synthetic
+    root = str(tmp_path / "lib")
+    zip_path = synthetic.build_zip("ultra_librarian", str(tmp_path / "part.zip"), "FACET1", pins=8)
+    assert main.process_download(zip_path, library_root=root).status == "success"
+
+    resp = main.handle_jsonrpc({"id": 1, "method": "filter_components",
+                                "params": {"library_root": root, "filters": {"min_pin_count": 8}}})
+    [comp] = resp["result"]["components"]
+    assert comp["mpn"] == "FACET1"
+    assert (comp["pin_count"], comp["reference"], comp["mount_type"]) == (8, "U", "smd")
+    assert comp["pad_count"] == 8
+    assert resp["result"]["facets"]["mount_type"] == {"smd": 1}
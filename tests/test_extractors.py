@@ -7,6 +7,9 @@ from models import Provider
 from extractors import get_extractor
 from extractors.ultra_librarian import UltraLibrarianExtractor
 from extractors.snapeda import SnapEDAExtractor
+from extractors.samacsys import SamacSysExtractor
+from extractors.generic import GenericExtractor
+from extractors import base
 
 
 class TestUltraLibrarianExtractor:
@@ -178,6 +181,78 @@ class TestSnapEDAExtractor:
         assert not ext._looks_like_uuid("")
 
 
+class TestSymbolProperties:
+    SYMBOL = """(kicad_symbol_lib (version 20211014) (generator SamacSys_ECAD_Model)
+  (symbol "LM358DR" (in_bom yes) (on_board yes)
+    (property "Reference" "IC" (id 0) (at 0 0 0))
+    (property "Description" "Dual \\"op-amp\\", 8-SOIC" (id 4) (at 0 0 0))
+    (property "Manufacturer_Name" "Texas Instruments" (id 5) (at 0 0 0))
+    (symbol "LM358DR_1_1" (property "Manufacturer_Name" "nested" (at 0 0 0)))
+  )
+)"""
+
+    def _zip(self, tmp_path, symbol):
+        zip_path = str(tmp_path / "LM358DR.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("LM358DR/KiCad/LM358DR.kicad_sym", symbol)
+        return zip_path
+
+    def test_samacsys_manufacturer_and_description(self, tmp_path):
+        result = SamacSysExtractor().extract(self._zip(tmp_path, self.SYMBOL), str(tmp_path / "out"))
+        assert result.manufacturer == "Texas Instruments"
+        assert result.description == 'Dual "op-amp", 8-SOIC'
+
+    def test_generic_falls_back_to_other_keys(self, tmp_path):
+        symbol = self.SYMBOL.replace('"Manufacturer_Name" "Texas Instruments"', '"MANUFACTURER" "TI"')
+        symbol = symbol.replace('"Description"', '"ki_description"')
+        result = GenericExtractor().extract(self._zip(tmp_path, symbol), str(tmp_path / "out"))
+        assert result.manufacturer == "TI"
+        assert result.description == 'Dual "op-amp", 8-SOIC'
+
+    def test_missing_properties(self, tmp_path):
+        symbol = '(kicad_symbol_lib (symbol "X" (property "Reference" "U" (at 0 0 0))))'
+        result = SamacSysExtractor().extract(self._zip(tmp_path, symbol), str(tmp_path / "out"))
+        assert result.manufacturer is None
+        assert result.description is None
+
+
+class TestUnzip:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        path = tmp_path / "models.zip"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("KiCad/part.kicad_sym", "(kicad_symbol_lib)")
+            for i in range(4):
+                zf.writestr(f"KiCad/3dmodel/variant{i}.step", bytes([i]) * 200_000 + os.urandom(1000))
+            zf.writestr("empty.txt", "")
+            zf.writestr("docs/", "")
+        return path
+
+    def test_parallel_members_match(self, archive, tmp_path, monkeypatch):
+        monkeypatch.setattr(base, "PARALLEL_MEMBER_SIZE", 100_000)
+        monkeypatch.setattr(base, "COPY_BUFFER_SIZE", 4096)
+        out = tmp_path / "out"
+        files = SnapEDAExtractor()._unzip(str(archive), str(out))
+
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                if not name.endswith("/"):
+                    assert (out / name).read_bytes() == zf.read(name)
+        assert len(files) == 6
+        assert (out / "docs").is_dir()
+
+    def test_unsafe_member_names_stay_inside(self, tmp_path):
+        path = tmp_path / "evil.zip"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("../../escape.txt", "x")
+            zf.writestr("/abs/model.step", "y")
+        out = tmp_path / "out"
+        SnapEDAExtractor()._unzip(str(path), str(out))
+        assert (out / "escape.txt").read_text() == "x"
+        assert (out / "abs" / "model.step").read_text() == "y"
+        assert not (tmp_path.parent / "escape.txt").exists()
+
+
 class TestExtractorFactory:
     def test_get_ultra_librarian(self):
         ext = get_extractor(Provider.ULTRA_LIBRARIAN)
@@ -0,0 +1,75 @@
+"""Tests for atomic writes and cross-process library locks."""
+
+import os
+import threading
+import time
+
+from kiutils.symbol import Symbol, SymbolLib
+
+from fsutil import atomic_copy, file_lock, lock_path
+from metrics import METRICS
+from normalizer import merge_symbols
+from workers import mp_context
+
+
+def _merge_many(lib_path: str, prefix: str, count: int) -> None:
+    for i in range(count):
+        merge_symbols(lib_path, [Symbol(entryName=f"{prefix}{i}")])
+
+
+def test_lock_file_is_hidden_sibling(tmp_path):
+    assert lock_path(str(tmp_path / "kipartbridge.pretty")) == str(tmp_path / ".kipartbridge.pretty.lock")
+
+
+def test_lock_is_reentrant_within_a_thread(tmp_path):
+    path = str(tmp_path / "lib.kicad_sym")
+    with file_lock(path):
+        with file_lock(path):
+            pass
+
+
+def test_lock_excludes_other_threads_and_records_wait(tmp_path):
+    path = str(tmp_path / "lib.kicad_sym")
+    before = METRICS.snapshot()["lock_wait_seconds"].get("test_lock", {}).get("count", 0)
+    acquired = threading.Event()
+    waited = []
+
+    def contender():
+        start = time.perf_counter()
+        with file_lock(path, "test_lock"):
+            waited.append(time.perf_counter() - start)
+
+    with file_lock(path, "test_lock"):
+        thread = threading.Thread(target=contender)
+        thread.start()
+        acquired.wait(0.2)
+        assert not waited
+    thread.join()
+
+    assert waited[0] >= 0.15
+    assert METRICS.snapshot()["lock_wait_seconds"]["test_lock"]["count"] == before + 2
+
+
+def test_concurrent_processes_do_not_lose_symbols(tmp_path):
+    lib_path = str(tmp_path / "kipartbridge.kicad_sym")
+    ctx = mp_context()
+    procs = [ctx.Process(target=_merge_many, args=(lib_path, prefix, 10)) for prefix in "AB"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    assert all(p.exitcode == 0 for p in procs)
+    names = {s.entryName for s in SymbolLib.from_file(lib_path).symbols}
+    assert names == {f"{prefix}{i}" for prefix in "AB" for i in range(10)}
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+
+def test_atomic_copy_keeps_mode(tmp_path):
+    source = tmp_path / "model.step"
+    source.write_bytes(b"ISO-10303-21;")
+    os.chmod(source, 0o640)
+    dest = tmp_path / "models" / "model.step"
+    atomic_copy(str(source), str(dest))
+    assert dest.read_bytes() == b"ISO-10303-21;"
+    assert os.stat(dest).st_mode & 0o777 == 0o640
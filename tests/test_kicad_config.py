@@ -0,0 +1,128 @@
+"""Tests for the KiCad config manager."""
+
+import json
+import os
+import pytest
+
+import kicad_config
+from kicad_config import (
+    LibTable, LibTableEntry, parse_sexpr, render_sexpr, load_lib_table,
+    ensure_lib_table_entries, register_libraries, set_environment_vars,
+)
+from library_injector import get_kicad_config_dir
+from metrics import METRICS
+
+
+EXISTING_TABLE = '''(sym_lib_table
+  (version 7)
+  (lib (name "other")(type "KiCad")(uri "${KICAD8_SYMBOL_DIR}/other.kicad_sym")(options "")(descr "Other \\"quoted\\" lib")(disabled))
+)
+'''
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    kicad_config.clear_caches()
+    yield
+    kicad_config.clear_caches()
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Record every file the config manager writes."""
+    written = []
+    real = kicad_config.atomic_write_text
+
+    def tracking(path, text):
+        written.append(path)
+        real(path, text)
+    monkeypatch.setattr(kicad_config, "atomic_write_text", tracking)
+    return written
+
+
+class TestSexpr:
+    def test_round_trip_preserves_unknown_fields(self):
+        table = LibTable.parse(EXISTING_TABLE, "sym_lib_table")
+        assert table.uri("other") == "${KICAD8_SYMBOL_DIR}/other.kicad_sym"
+        assert table.render() == EXISTING_TABLE
+
+    def test_unbalanced(self):
+        with pytest.raises(ValueError):
+            parse_sexpr('(sym_lib_table (lib (name "x")')
+
+    def test_render_escapes_quotes(self):
+        assert render_sexpr(parse_sexpr('(descr "a \\"b\\" c")')) == '(descr "a \\"b\\" c")'
+
+
+class TestLibTableWrites:
+    def test_no_write_when_unchanged(self, tmp_path, writes):
+        path = str(tmp_path / "sym-lib-table")
+        entry = LibTableEntry(name="kipartbridge", uri="/lib/kipartbridge.kicad_sym")
+
+        assert ensure_lib_table_entries(path, [entry])
+        mtime = os.stat(path).st_mtime_ns
+        assert not ensure_lib_table_entries(path, [entry])
+        assert writes == [path]
+        assert os.stat(path).st_mtime_ns == mtime
+
+    def test_preserves_existing_entries(self, tmp_path):
+        path = tmp_path / "sym-lib-table"
+        path.write_text(EXISTING_TABLE)
+        ensure_lib_table_entries(str(path), [LibTableEntry(name="kipartbridge", uri="/lib/k.kicad_sym")])
+
+        content = path.read_text()
+        assert '(version 7)' in content
+        assert '(descr "Other \\"quoted\\" lib")(disabled))' in content
+        assert '(lib (name "kipartbridge")(type "KiCad")(uri "/lib/k.kicad_sym")' in content
+
+    def test_many_libraries_one_write(self, tmp_path, writes):
+        sym = [LibTableEntry(name=f"shard{i}", uri=f"/lib/shard{i}.kicad_sym") for i in range(50)]
+        fp = [LibTableEntry(name=f"shard{i}", uri=f"/lib/shard{i}.pretty") for i in range(50)]
+        written = register_libraries(str(tmp_path), sym, fp)
+
+        assert sorted(written) == sorted(writes)
+        assert len(writes) == 2
+        assert len(load_lib_table(str(tmp_path / "fp-lib-table")).libs()) == 50
+
+    def test_per_project_table(self, tmp_path):
+        project = tmp_path / "myboard"
+        project.mkdir()
+        register_libraries(str(project), sym_entries=[LibTableEntry(name="proj", uri="${KIPRJMOD}/proj.kicad_sym")])
+        assert load_lib_table(str(project / "sym-lib-table")).uri("proj") == "${KIPRJMOD}/proj.kicad_sym"
+
+    def test_cached_parse_is_reused(self, tmp_path):
+        path = tmp_path / "sym-lib-table"
+        path.write_text(EXISTING_TABLE)
+        load_lib_table(str(path))
+        before = METRICS.snapshot()["caches"].get("lib_table", {}).get("hits", 0)
+        table = load_lib_table(str(path))
+        assert METRICS.snapshot()["caches"]["lib_table"]["hits"] == before + 1
+        # Callers get a private copy
+        table.ensure(LibTableEntry(name="x", uri="/x"))
+        assert load_lib_table(str(path)).find("x") is None
+
+    def test_rejects_unparseable_table(self, tmp_path):
+        path = tmp_path / "sym-lib-table"
+        path.write_text("(sym_lib_table (lib (name ")
+        with pytest.raises(ValueError, match="Cannot parse"):
+            load_lib_table(str(path))
+
+
+class TestEnvironmentVars:
+    def test_no_write_when_unchanged(self, tmp_path, writes):
+        assert set_environment_vars(str(tmp_path), {"KIPARTBRIDGE_3DMODELS": "/lib/3dmodels"})
+        assert not set_environment_vars(str(tmp_path), {"KIPARTBRIDGE_3DMODELS": "/lib/3dmodels"})
+        assert len(writes) == 1
+
+    def test_writes_when_value_changes(self, tmp_path):
+        path = tmp_path / "kicad_common.json"
+        path.write_text(json.dumps({"environment": {"vars": None}, "other": 1}))
+        assert set_environment_vars(str(tmp_path), {"KIPARTBRIDGE_3DMODELS": "/new"})
+        config = json.loads(path.read_text())
+        assert config["environment"]["vars"] == {"KIPARTBRIDGE_3DMODELS": "/new"}
+        assert config["other"] == 1
+
+
+def test_kicad_config_home_override(tmp_path, monkeypatch):
+    monkeypatch.setenv("KICAD_CONFIG_HOME", str(tmp_path))
+    assert get_kicad_config_dir() == os.path.join(str(tmp_path), "9.0")
@@ -0,0 +1,114 @@
+"""Tests for garbage collection of orphaned footprints and models."""
+
+import os
+import time
+
+import pytest
+
+import library_gc
+import main
+from benchmarks import synthetic
+from database import ComponentDB
+
+
+def _age(path, seconds=48 * 3600):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+pytestmark = pytest.mark.library(parts=2)
+
+
+@pytest.fixture
+def library(library):
+    """Two imported parts, plus the leftovers of a re-import under a new MPN."""
+    root = library
+    fp_dir = os.path.join(root, "kipartbridge.pretty")
+    models_dir = os.path.join(root, "3dmodels")
+    with open(os.path.join(fp_dir, "OLD-MPN.kicad_mod"), "w") as f:
+        f.write(synthetic.footprint_text("OLD-MPN", model="${KIPARTBRIDGE_3DMODELS}/OLD-MPN.step"))
+    with open(os.path.join(models_dir, "OLD-MPN.step"), "wb") as f:
+        f.write(synthetic.step_bytes("OLD-MPN", 2048))
+    with open(os.path.join(models_dir, ".OLD-MPN.wrl.abc123.tmp"), "wb") as f:
+        f.write(b"partial")
+    for d in (fp_dir, models_dir):
+        for name in os.listdir(d):
+            _age(os.path.join(d, name))
+    return root
+
+
+def paths(report):
+    return sorted(item["path"] for item in report["items"])
+
+
+LEFTOVERS = [os.path.join("3dmodels", ".OLD-MPN.wrl.abc123.tmp"),
+             os.path.join("3dmodels", "OLD-MPN.step"),
+             os.path.join("kipartbridge.pretty", "OLD-MPN.kicad_mod")]
+
+
+def test_dry_run_changes_nothing(library):
+    report = library_gc.collect_garbage(library, dry_run=True)
+    assert paths(report) == LEFTOVERS
+    assert report["collected"] == {"footprints": 1, "models": 1, "temp": 1}
+    assert report["quarantine_dir"] is None
+    assert all(os.path.exists(os.path.join(library, p)) for p in LEFTOVERS)
+
+
+def test_quarantine(library):
+    report = library_gc.collect_garbage(library)
+    assert report["bytes"] > 0
+    qdir = report["quarantine_dir"]
+    assert qdir.startswith(os.path.join(library, library_gc.QUARANTINE_DIR))
+    for p in LEFTOVERS:
+        assert not os.path.exists(os.path.join(library, p))
+        assert os.path.exists(os.path.join(qdir, p))
+    # Imported parts are untouched
+    assert len(os.listdir(os.path.join(library, "kipartbridge.pretty"))) >= 2
+    assert library_gc.collect_garbage(library)["collected"] == {"footprints": 0, "models": 0, "temp": 0}
+
+
+def test_delete(library):
+    report = library_gc.collect_garbage(library, quarantine=False)
+    assert report["quarantine_dir"] is None
+    assert not os.path.exists(os.path.join(library, library_gc.QUARANTINE_DIR))
+    assert not any(os.path.exists(os.path.join(library, p)) for p in LEFTOVERS)
+
+
+def test_grace_period_keeps_recent_files(library):
+    now = time.time()
+    for p in LEFTOVERS:
+        os.utime(os.path.join(library, p), (now, now))
+    report = library_gc.collect_garbage(library)
+    assert report["items"] == []
+    assert report["skipped_recent"] == 3
+    assert paths(library_gc.collect_garbage(library, dry_run=True, grace_seconds=0)) == LEFTOVERS
+
+
+def test_symbol_link_keeps_footprint_and_its_model(library):
+    # Only the symbol library still points at OLD-MPN: the DB row is gone
+    db = ComponentDB(os.path.join(library, "components.db"))
+    db.upsert_component(mpn="OLD-MPN", footprint_name="OLD-MPN")
+    db.delete_component("OLD-MPN")
+    db.close()
+    sym_path = os.path.join(library, "kipartbridge.kicad_sym")
+    text = open(sym_path).read()
+    body = synthetic.symbol_body("OLD-MPN").replace('(property "Footprint" ""',
+                                                    '(property "Footprint" "kipartbridge:OLD-MPN"')
+    with open(sym_path, "w") as f:
+        f.write(text.rstrip()[:-1] + body + "\n)\n")
+
+    assert paths(library_gc.collect_garbage(library, dry_run=True)) == [LEFTOVERS[0]]
+
+
+def test_report_is_capped(library, monkeypatch):
+    monkeypatch.setattr(library_gc, "GC_REPORT_LIMIT", 1)
+    report = library_gc.collect_garbage(library, dry_run=True)
+    assert len(report["items"]) == 1
+    assert report["truncated"]
+    assert sum(report["collected"].values()) == 3
+
+
+def test_gc_rpc(library):
+    resp = main.handle_jsonrpc({"id": 1, "method": "collect_garbage",
+                                "params": {"library_root": library, "dry_run": True}})
+    assert resp["result"]["collected"]["footprints"] == 1
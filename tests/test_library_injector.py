@@ -4,11 +4,14 @@ import json
 import os
 import pytest
 
+import library_injector
 from library_injector import (
     ensure_library_dirs, ensure_sym_lib_table, ensure_fp_lib_table,
     ensure_library_tables, setup_environment_variable,
-    detect_existing_library_root,
+    detect_existing_library_root, get_default_library_root,
+    resolve_library_root, invalidate_library_root_cache,
 )
+from settings import update_settings
 
 
 class TestEnsureLibraryDirs:
@@ -189,3 +192,58 @@ class TestSetupEnvironmentVariable:
         config = json.load(open(config_path))
         assert config["environment"]["vars"]["EXISTING_VAR"] == "/some/path"
         assert "KIPARTBRIDGE_3DMODELS" in config["environment"]["vars"]
+
+
+class TestResolveLibraryRoot:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        invalidate_library_root_cache()
+        yield
+        invalidate_library_root_cache()
+
+    @pytest.fixture
+    def detect_calls(self, monkeypatch):
+        calls = []
+        real = library_injector.detect_existing_library_root
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return real(*args, **kwargs)
+        monkeypatch.setattr(library_injector, "detect_existing_library_root", counting)
+        return calls
+
+    def _write_table(self, config_dir, root):
+        with open(os.path.join(config_dir, "sym-lib-table"), 'w') as f:
+            f.write(f'(sym_lib_table\n  (lib (name "kipartbridge")(type "KiCad")(uri "{root}/kipartbridge.kicad_sym")(options "")(descr ""))\n)\n')
+
+    def test_falls_back_to_default(self, tmp_path):
+        assert resolve_library_root(str(tmp_path)) == get_default_library_root()
+
+    def test_caches_detection(self, tmp_path, detect_calls):
+        self._write_table(str(tmp_path), "/libs/a")
+        assert resolve_library_root(str(tmp_path)) == "/libs/a"
+        assert resolve_library_root(str(tmp_path)) == "/libs/a"
+        assert len(detect_calls) == 1
+
+    def test_revalidates_when_table_changes(self, tmp_path, detect_calls):
+        self._write_table(str(tmp_path), "/libs/a")
+        resolve_library_root(str(tmp_path))
+        self._write_table(str(tmp_path), "/libs/bb")
+        assert resolve_library_root(str(tmp_path)) == "/libs/bb"
+        assert len(detect_calls) == 2
+
+    def test_own_writes_update_cache(self, tmp_path, detect_calls):
+        root = str(tmp_path / "lib")
+        config_dir = str(tmp_path / "config")
+        ensure_library_tables(root, config_dir)
+        assert resolve_library_root(config_dir) == root
+        assert detect_calls == []
+
+    def test_configured_root_skips_detection(self, tmp_path, detect_calls):
+        self._write_table(str(tmp_path), "/libs/a")
+        update_settings({"library_root": "/configured/root"})
+        try:
+            assert resolve_library_root(str(tmp_path)) == "/configured/root"
+        finally:
+            update_settings({"library_root": None})
+        assert detect_calls == []
@@ -0,0 +1,114 @@
+"""Tests for download limits and resource-limited parsing."""
+
+import io
+import zipfile
+import pytest
+
+import limits
+from limits import LimitExceeded, check_archive, get_limits, run_isolated, update_limits
+from main import process_download
+from benchmarks import synthetic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    limits.reset_parse_pool()
+    yield
+    limits.reset_parse_pool()
+
+
+def _zip(members: dict[str, bytes]) -> zipfile.ZipFile:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return zipfile.ZipFile(buf)
+
+
+def _spin():
+    while True:
+        pass
+
+
+def _allocate(n: int) -> int:
+    return len(bytearray(n))
+
+
+def _add(a, b):
+    return a + b
+
+
+class TestCheckArchive:
+    def test_accepts_normal_archive(self, tmp_path):
+        check_archive(_zip({"a.kicad_sym": b"(kicad_symbol_lib)"}), str(tmp_path))
+
+    def test_too_many_members(self):
+        with pytest.raises(LimitExceeded, match="3 entries"):
+            check_archive(_zip({f"{i}.txt": b"x" for i in range(3)}),
+                          limits=dict(get_limits(), max_members=2))
+
+    def test_member_too_large(self):
+        with pytest.raises(LimitExceeded, match="big.step"):
+            check_archive(_zip({"big.step": b"x" * 2048}),
+                          limits=dict(get_limits(), max_member_bytes=1024, max_ratio=0))
+
+    def test_total_too_large(self):
+        members = {f"{i}.step": b"x" * 1024 for i in range(4)}
+        with pytest.raises(LimitExceeded, match="expands to"):
+            check_archive(_zip(members), limits=dict(get_limits(), max_total_bytes=3000))
+
+    def test_zip_bomb_ratio(self):
+        with pytest.raises(LimitExceeded, match="possible zip bomb"):
+            check_archive(_zip({"bomb.bin": bytes(4 * limits.MIB)}))
+
+    def test_zero_disables_check(self):
+        check_archive(_zip({"bomb.bin": bytes(4 * limits.MIB)}),
+                      limits=dict(get_limits(), max_ratio=0))
+
+
+class TestUpdateLimits:
+    def test_override_and_reset(self):
+        assert update_limits({"max_members": 10})["max_members"] == 10
+        assert get_limits()["max_members"] == 10
+        assert update_limits({"max_members": None})["max_members"] == limits.DEFAULT_LIMITS["max_members"]
+
+    def test_rejects_unknown_and_negative(self):
+        with pytest.raises(ValueError, match="Unknown limit"):
+            update_limits({"max_files": 1})
+        with pytest.raises(ValueError, match="non-negative"):
+            update_limits({"max_ratio": -1})
+
+    def test_violation_is_reported_as_result_error(self, tmp_path):
+        zip_path = synthetic.build_zip("snapeda", str(tmp_path / "part.zip"), "SYN00001", pins=8)
+        update_limits({"max_members": 1})
+        result = process_download(zip_path, library_root=str(tmp_path / "lib"))
+        assert result.status == "error"
+        assert "limit 1" in result.error
+
+
+class TestRunIsolated:
+    def test_returns_result(self):
+        assert run_isolated(_add, 2, b=3) == 5
+
+    def test_inline_when_disabled(self):
+        update_limits({"isolate_parsing": False})
+        assert run_isolated(_add, 1, 1) == 2
+
+    @pytest.mark.skipif(resource is None, reason="needs POSIX resource limits")
+    def test_cpu_limit_kills_child(self):
+        update_limits({"parse_cpu_seconds": 1})
+        with pytest.raises(LimitExceeded, match="CPU 1s"):
+            run_isolated(_spin)
+        # The pool is rebuilt for the next parse
+        assert run_isolated(_add, 1, 2) == 3
+
+    @pytest.mark.skipif(resource is None, reason="needs POSIX resource limits")
+    def test_memory_limit(self):
+        update_limits({"parse_memory_bytes": 512 * limits.MIB})
+        with pytest.raises(LimitExceeded, match="memory limit"):
+            run_isolated(_allocate, 1024 * limits.MIB)
@@ -0,0 +1,149 @@
+"""Tests for the metrics module."""
+
+import os
+import threading
+
+import pytest
+
+from metrics import Metrics, RollingHistogram, StageTimeline
+import main
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+class TestRollingHistogram:
+    def test_percentiles(self):
+        h = RollingHistogram()
+        for i in range(1, 101):
+            h.observe(float(i))
+        snap = h.snapshot()
+        assert snap["count"] == 100
+        assert snap["p50"] == 50.0
+        assert snap["p95"] == 95.0
+        assert snap["p99"] == 99.0
+        assert snap["max"] == 100.0
+
+    def test_window_is_rolling(self):
+        h = RollingHistogram(window=10)
+        for i in range(100):
+            h.observe(float(i))
+        snap = h.snapshot()
+        assert snap["count"] == 100
+        assert snap["p50"] >= 90.0
+
+    def test_empty(self):
+        assert RollingHistogram().snapshot()["p99"] == 0.0
+
+
+class TestMetrics:
+    def test_rpc_and_stage_latency(self, metrics):
+        metrics.observe_rpc("ping", 0.001)
+        metrics.observe_rpc("ping", 0.002, ok=False)
+        with metrics.stage("classify"):
+            pass
+
+        snap = metrics.snapshot()
+        assert snap["rpc_latency_seconds"]["ping"]["count"] == 2
+        assert snap["rpc_errors"] == {"ping": 1}
+        assert snap["stage_latency_seconds"]["classify"]["count"] == 1
+
+    def test_imports_and_provider_errors(self, metrics):
+        metrics.record_import("snapeda", ok=True)
+        metrics.record_import("snapeda", ok=False)
+        metrics.record_import(None, ok=False)
+
+        snap = metrics.snapshot()
+        assert snap["imports_per_minute"] == 3
+        assert snap["imports_total"] == {"snapeda": 2, "unknown": 1}
+        assert snap["errors_by_provider"] == {"snapeda": 1, "unknown": 1}
+
+    def test_cache_hit_ratio(self, metrics):
+        metrics.record_cache("lib_table", hit=True)
+        metrics.record_cache("lib_table", hit=True)
+        metrics.record_cache("lib_table", hit=False)
+        cache = metrics.snapshot()["caches"]["lib_table"]
+        assert cache["hits"] == 2
+        assert cache["misses"] == 1
+        assert cache["hit_ratio"] == pytest.approx(2 / 3)
+
+    def test_prometheus_format(self, metrics, tmp_path):
+        metrics.observe_rpc("search_components", 0.01)
+        metrics.record_import("ultra_librarian", ok=False)
+
+        path = metrics.write_prometheus(str(tmp_path / "kipartbridge.prom"))
+        text = open(path).read()
+        assert "# TYPE kipartbridge_rpc_latency_seconds summary" in text
+        assert 'kipartbridge_rpc_latency_seconds{method="search_components",quantile="0.99"}' in text
+        assert 'kipartbridge_rpc_latency_seconds_count{method="search_components"} 1' in text
+        assert 'kipartbridge_import_errors_total{provider="ultra_librarian"} 1' in text
+
+    def test_concurrent_prometheus_writes(self, metrics, tmp_path):
+        # The periodic dump and get_metrics write the same file from one process
+        path = str(tmp_path / "kipartbridge.prom")
+        metrics.observe_rpc("ping", 0.001)
+        errors = []
+
+        def dump():
+            try:
+                for _ in range(50):
+                    metrics.write_prometheus(path)
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=dump) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert os.listdir(tmp_path) == ["kipartbridge.prom"]
+        assert "kipartbridge_rpc_latency_seconds_count" in open(path).read()
+
+
+class TestStageTimeline:
+    def test_records_offsets_and_threads(self, metrics):
+        timeline = StageTimeline(metrics)
+        with timeline.stage("b"):
+            pass
+        with timeline.stage("a"):
+            pass
+        entries = timeline.entries()
+        assert [e["stage"] for e in entries] == ["b", "a"]
+        assert 0 <= entries[0]["start"] <= entries[0]["end"] <= entries[1]["start"]
+        assert entries[0]["thread"] == "MainThread"
+        assert metrics.snapshot()["stage_latency_seconds"]["a"]["count"] == 1
+
+    def test_pipeline_overlaps_footprint_and_symbol(self, tmp_path):
+        zip_path = synthetic.build_zip("snapeda", str(tmp_path / "part.zip"), "SYN1", pins=8, step_size=4096)
+        root = tmp_path / "lib"
+        result = main.process_download(zip_path, library_root=str(root))
+        assert result.status == "success"
+
+        stages = {t["stage"]: t for t in result.stage_timings}
+        assert stages["normalize_footprint"]["thread"].startswith("kipartbridge-io")
+        assert stages["copy_model_step"]["thread"].startswith("kipartbridge-io")
+        assert stages["normalize_symbol"]["thread"] == "MainThread"
+        # I/O tasks start before the symbol stage ends; everything joins before link
+        assert stages["normalize_footprint"]["start"] < stages["normalize_symbol"]["end"]
+        for name in ("normalize_footprint", "copy_model_step", "normalize_symbol"):
+            assert stages[name]["end"] <= stages["link"]["start"]
+        assert (root / "3dmodels" / "SYN1.step").exists()
+
+
+class TestGetMetricsRPC:
+    def test_get_metrics(self, tmp_path):
+        main.handle_jsonrpc({"jsonrpc": "2.0", "id": 1, "method": "ping"})
+        prom_path = str(tmp_path / "metrics.prom")
+        resp = main.handle_jsonrpc({
+            "jsonrpc": "2.0", "id": 2, "method": "get_metrics",
+            "params": {"prometheus_path": prom_path},
+        })
+        result = resp["result"]
+        assert result["rpc_latency_seconds"]["ping"]["count"] >= 1
+        assert "open_db_connections" in result
+        assert result["prometheus_path"] == prom_path
+        assert "kipartbridge_rpc_latency_seconds" in open(prom_path).read()
@@ -5,7 +5,8 @@ import pytest
 from kiutils.symbol import SymbolLib
 from kiutils.footprint import Footprint
 
-from normalizer import sanitize_name, normalize_symbol, normalize_footprint, link_symbol_to_footprint
+from normalizer import (sanitize_name, normalize_symbol, normalize_footprint, link_symbol_to_footprint,
+                        symbol_facets, footprint_facets)
 from extractors.ultra_librarian import UltraLibrarianExtractor
 
 
@@ -122,3 +123,34 @@ class TestLinkSymbolToFootprint:
         sym = lib.symbols[0]
         props = {p.key: p.value for p in sym.properties}
         assert props["Footprint"] == "kipartbridge:STM32C071RBT6"
+
+
+class TestFacets:
+    def test_symbol_facets(self, tmp_path):
+        from benchmarks import synthetic
+        path = tmp_path / "r.kicad_sym"
+        body = synthetic.symbol_body("RN", pins=4, reference="RN?", units=2)
+        path.write_text(f"(kicad_symbol_lib (version 20211014) (generator test)\n{body}\n)\n")
+        sym = SymbolLib.from_file(str(path)).symbols[0]
+        assert symbol_facets(sym) == {"pin_count": 4, "unit_count": 2, "reference": "RN"}
+
+    def test_footprint_facets(self, tmp_path):
+        from benchmarks import synthetic
+        path = tmp_path / "fp.kicad_mod"
+        path.write_text(synthetic.footprint_text("QFN-16", pads=16))
+        facets = footprint_facets(Footprint.from_file(str(path)))
+        assert facets == {"package": "QFN-16", "pad_count": 16, "mount_type": "smd",
+                          "courtyard_x_min": -2.0, "courtyard_y_min": -2.0,
+                          "courtyard_x_max": 2.0, "courtyard_y_max": 2.0}
+
+        path.write_text(synthetic.footprint_text("DIP-8", pads=8, smd=False))
+        assert footprint_facets(Footprint.from_file(str(path)))["mount_type"] == "tht"
+
+    def test_normalize_footprint_returns_facets(self, ul_fixture_path, tmp_path):
+        component = UltraLibrarianExtractor().extract(ul_fixture_path, str(tmp_path / "extract"))
+        fp_dir = tmp_path / "kipartbridge.pretty"
+        fp_dir.mkdir()
+        name, facets = normalize_footprint(component, str(fp_dir), str(tmp_path), with_facets=True)
+        assert name == "STM32C071RBT6"
+        assert facets["pad_count"] > 0
+        assert facets["mount_type"] == "smd"
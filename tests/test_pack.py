@@ -0,0 +1,134 @@
+"""Tests for library pack/unpack archives."""
+
+import io
+import os
+
+import pytest
+
+import main
+import pack
+from benchmarks import synthetic
+from database import ComponentDB
+from symbol_view import SymbolLibView
+
+
+pytestmark = pytest.mark.library(layouts=("ultra_librarian", "samacsys", "snapeda"), step_size=64 * 1024)
+
+
+def tree(root):
+    files = {}
+    for sub in ("kipartbridge.pretty", "3dmodels"):
+        for name in os.listdir(os.path.join(root, sub)):
+            if not name.startswith("."):
+                with open(os.path.join(root, sub, name), "rb") as f:
+                    files[f"{sub}/{name}"] = f.read()
+    with open(os.path.join(root, "kipartbridge.kicad_sym"), "rb") as f:
+        files["kipartbridge.kicad_sym"] = f.read()
+    return files
+
+
+def rows(root):
+    db = ComponentDB(os.path.join(root, "components.db"))
+    try:
+        return {r["mpn"]: (r["symbol_name"], r["footprint_name"], r["pin_count"])
+                for r in db.conn.execute("SELECT * FROM components")}
+    finally:
+        db.close()
+
+
+def test_round_trip(library, tmp_path, monkeypatch):
+    # Small chunks so files span several of them
+    monkeypatch.setattr(pack, "PACK_CHUNK_SIZE", 16 * 1024)
+    archive = str(tmp_path / "lib.kpack")
+    report = pack.pack_library(library, archive, threads=2)
+    assert report["components"] == 3
+    assert report["members"] == 2 + 3 + 3
+    assert report["bytes_out"] < report["bytes_in"]
+    # The database backup it was packed from is gone
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+    dest = str(tmp_path / "restored")
+    report = pack.unpack_library(archive, dest)
+    assert report["files"] == 8
+    assert tree(dest) == tree(library)
+    assert rows(dest) == rows(library)
+    with pytest.raises(pack.PackError):
+        pack.unpack_library(archive, dest)
+    pack.unpack_library(archive, dest, overwrite=True)
+
+
+def test_compressed_models_are_stored(library, tmp_path):
+    mpn = synthetic.mpn_for(0)
+    with open(os.path.join(library, "3dmodels", f"{mpn}.stpz"), "wb") as f:
+        f.write(os.urandom(4096))
+    archive = str(tmp_path / "lib.kpack")
+    report = pack.pack_library(library, archive)
+    assert report["stored_chunks"] >= 1
+    with pack._Reader(archive) as reader:
+        member = reader.members[f"3dmodels/{mpn}.stpz"]
+        assert member["chunks"] == [[4096, True]]
+
+
+def test_unpack_single_component(library, tmp_path, monkeypatch):
+    monkeypatch.setattr(pack, "PACK_CHUNK_SIZE", 4096)
+    archive = str(tmp_path / "lib.kpack")
+    pack.pack_library(library, archive)
+    mpn = synthetic.mpn_for(1)
+
+    # Only the chunks the component needs are read
+    read = []
+    real = pack._Reader._chunk
+    monkeypatch.setattr(pack._Reader, "_chunk",
+                        lambda self, offset, length, stored: read.append(length) or real(self, offset, length, stored))
+    dest = str(tmp_path / "teammate")
+    report = pack.unpack_library(archive, dest, components=[mpn])
+    assert report["components"] == [mpn]
+    assert report["files"] == 2
+    assert sum(read) < os.path.getsize(archive) / 2
+
+    assert rows(dest) == {mpn: rows(library)[mpn]}
+    with SymbolLibView(os.path.join(dest, "kipartbridge.kicad_sym")) as view:
+        assert view.names() == [mpn]
+    with pytest.raises(pack.PackError, match="NOPE"):
+        pack.unpack_library(archive, dest, components=["NOPE"])
+
+
+def test_damaged_pack(library, tmp_path):
+    archive = str(tmp_path / "lib.kpack")
+    pack.pack_library(library, archive)
+    with open(archive, "r+b") as f:
+        f.seek(len(pack.PACK_MAGIC) + 10)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(pack.PackError):
+        pack.unpack_library(archive, str(tmp_path / "restored"))
+    with open(str(tmp_path / "junk"), "wb") as f:
+        f.write(b"not a pack at all, just some bytes")
+    with pytest.raises(pack.PackError):
+        pack.unpack_library(str(tmp_path / "junk"), str(tmp_path / "restored2"))
+
+
+def test_pack_rpcs(library, tmp_path):
+    archive = str(tmp_path / "lib.kpack")
+    resp = main.handle_jsonrpc({"id": 1, "method": "pack_library",
+                                "params": {"library_root": library, "archive": archive}})
+    assert resp["result"]["components"] == 3
+    resp = main.handle_jsonrpc({"id": 2, "method": "unpack_library",
+                                "params": {"library_root": str(tmp_path / "new"), "archive": archive}})
+    assert len(resp["result"]["components"]) == 3
+
+
+@pytest.mark.parametrize("name", ["../escaped.txt", "3dmodels/../../escaped.txt", "3dmodels/.hidden",
+                                  "kipartbridge.pretty/sub/x.kicad_mod", "/tmp/escaped.txt", "notes.txt"])
+def test_hostile_member_names_are_rejected(tmp_path, name):
+    archive = str(tmp_path / "evil.kpack")
+    with open(archive, "wb") as out:
+        writer = pack._Writer(out, pool=None, window=1)
+        writer.add(name, io.BytesIO(b"gotcha"), 0.0, compress=False)
+        writer.finish({"version": 1, "chunk_size": pack.PACK_CHUNK_SIZE, "components": {}})
+    root = tmp_path / "deep" / "root"
+    with pytest.raises(pack.PackError, match="outside the library layout"):
+        pack.unpack_library(archive, str(root))
+    assert not any(p.name == "escaped.txt" for p in tmp_path.rglob("*"))
+    assert not os.path.exists("/tmp/escaped.txt")
@@ -0,0 +1,89 @@
+"""Tests for the profiling module."""
+
+import os
+import pstats
+import pytest
+
+import main
+import profiling
+from benchmarks import synthetic
+from limits import get_limits
+from profiling import configure_sampling, run_profiled, sampled_profile_kind
+
+
+def _work(n):
+    return sum(i * i for i in range(n))
+
+
+@pytest.fixture
+def staging_file(tmp_path):
+    path = tmp_path / "1700000000_part.zip"
+    path.write_bytes(b"")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def reset_sampling():
+    yield
+    configure_sampling(0.0)
+
+
+class TestRunProfiled:
+    def test_cpu_writes_prof_next_to_staging_file(self, staging_file):
+        result, paths = run_profiled("cpu", staging_file, _work, 1000)
+        assert result == _work(1000)
+        assert len(paths) == 2
+        prof_path, report_path = paths
+        assert prof_path.endswith(".prof")
+        assert os.path.dirname(prof_path) == os.path.dirname(staging_file)
+        assert os.path.basename(prof_path).startswith(os.path.basename(staging_file))
+        # Loadable by pstats
+        pstats.Stats(prof_path)
+        assert "_work" in open(report_path).read()
+
+    def test_memory_writes_allocation_report(self, staging_file):
+        result, paths = run_profiled("memory", staging_file, lambda: [bytes(1024) for _ in range(100)])
+        assert len(result) == 100
+        assert len(paths) == 1
+        report = open(paths[0]).read()
+        assert "peak=" in report
+        assert "allocation sites" in report
+
+    def test_unknown_kind(self, staging_file):
+        with pytest.raises(ValueError):
+            run_profiled("gpu", staging_file, _work, 10)
+
+    def test_concurrent_run_is_unprofiled(self, staging_file):
+        with profiling._profile_lock:
+            result, paths = run_profiled("cpu", staging_file, _work, 10)
+        assert result == _work(10)
+        assert paths == []
+
+
+class TestProfiledImport:
+    def test_parse_work_is_in_cpu_report(self, tmp_path):
+        assert get_limits()["isolate_parsing"]
+        zip_path = synthetic.build_zip("samacsys", str(tmp_path / "part.zip"), synthetic.mpn_for(0), pins=8,
+                                       step_size=4096)
+        result = main.process_download(zip_path, library_root=str(tmp_path / "lib"), profile="cpu")
+        assert result.status == "success"
+        report = open(next(p for p in result.profile_paths if p.endswith(".cpu.txt"))).read()
+        # Symbol and footprint both parsed where the profiler saw them
+        assert "kiutils" in report
+        stats = pstats.Stats(next(p for p in result.profile_paths if p.endswith(".prof")))
+        functions = {(os.path.basename(path), name) for path, _, name in stats.stats}
+        assert ("normalizer.py", "prepare_symbol") in functions
+        assert ("normalizer.py", "normalize_footprint") in functions
+
+
+class TestSampling:
+    def test_disabled_by_default(self):
+        assert all(sampled_profile_kind() is None for _ in range(100))
+
+    def test_always(self):
+        configure_sampling(1.0, "memory")
+        assert sampled_profile_kind() == "memory"
+
+    def test_rejects_bad_rate(self):
+        with pytest.raises(ValueError):
+            configure_sampling(1.5)
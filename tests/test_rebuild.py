@@ -0,0 +1,136 @@
+"""Tests for the full-library rebuild."""
+
+import os
+
+import pytest
+
+import main
+import rebuild
+from benchmarks import synthetic
+from database import ComponentDB
+from verify import footprint_models, symbol_links
+
+N_PARTS = 4
+
+pytestmark = pytest.mark.library(parts=N_PARTS)
+
+
+def fp_path(root, mpn):
+    return os.path.join(root, "kipartbridge.pretty", f"{mpn}.kicad_mod")
+
+
+def damage(root):
+    """Strip model references from every footprint and footprint links from every symbol."""
+    for i in range(N_PARTS):
+        mpn = synthetic.mpn_for(i)
+        with open(fp_path(root, mpn), "w") as f:
+            f.write(synthetic.footprint_text(mpn))
+    sym_path = os.path.join(root, "kipartbridge.kicad_sym")
+    text = open(sym_path).read()
+    with open(sym_path, "w") as f:
+        f.write(text.replace('"kipartbridge:', '"'))
+
+
+def assert_rebuilt(root):
+    for i in range(N_PARTS):
+        mpn = synthetic.mpn_for(i)
+        assert footprint_models(fp_path(root, mpn))["models"] == [f"${{KIPARTBRIDGE_3DMODELS}}/{mpn}.stp"]
+    links = symbol_links(os.path.join(root, "kipartbridge.kicad_sym"))
+    assert links == {synthetic.mpn_for(i): f"kipartbridge:{synthetic.mpn_for(i)}" for i in range(N_PARTS)}
+
+
+def test_rebuild_restores_links_and_models(library):
+    damage(library)
+    report = rebuild.rebuild_library(library, workers=1)
+    assert report["footprints"] == {"total": N_PARTS, "rebuilt": N_PARTS, "skipped": 0, "errors": []}
+    assert report["symbols"] == N_PARTS
+    assert report["linked"] == N_PARTS
+    assert not report["resumed"]
+    assert not os.path.exists(os.path.join(library, rebuild.REBUILD_CHECKPOINT))
+    assert_rebuilt(library)
+
+
+def test_rebuild_on_process_pool(library):
+    damage(library)
+    report = rebuild.rebuild_library(library, workers=2)
+    assert report["footprints"]["rebuilt"] == N_PARTS
+    assert_rebuilt(library)
+
+
+def test_interrupted_rebuild_resumes(library, monkeypatch):
+    damage(library)
+    real = rebuild._rebuild_footprint
+    calls = []
+
+    def flaky(fp_dir, models_dir, name):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        calls.append(name)
+        return real(fp_dir, models_dir, name)
+
+    monkeypatch.setattr(rebuild, "_rebuild_footprint", flaky)
+    with pytest.raises(KeyboardInterrupt):
+        rebuild.rebuild_library(library, workers=1)
+    assert os.path.exists(os.path.join(library, rebuild.REBUILD_CHECKPOINT))
+
+    monkeypatch.setattr(rebuild, "_rebuild_footprint", real)
+    report = rebuild.rebuild_library(library, workers=1)
+    assert report["resumed"]
+    assert report["footprints"]["skipped"] == 2
+    assert report["footprints"]["rebuilt"] == N_PARTS - 2
+    assert_rebuilt(library)
+
+    # --restart ignores a leftover checkpoint
+    with open(os.path.join(library, rebuild.REBUILD_CHECKPOINT), "w") as f:
+        f.write(f"footprint\t{synthetic.mpn_for(0)}\nfootprint\tpartial")
+    report = rebuild.rebuild_library(library, workers=1, restart=True)
+    assert report["footprints"]["skipped"] == 0
+
+
+def test_failed_footprints_are_retried(library):
+    with open(fp_path(library, synthetic.mpn_for(0)), "w") as f:
+        f.write("(footprint")
+    report = rebuild.rebuild_library(library, workers=1)
+    assert [e["name"] for e in report["footprints"]["errors"]] == [synthetic.mpn_for(0)]
+    assert os.path.exists(os.path.join(library, rebuild.REBUILD_CHECKPOINT))
+
+    with open(fp_path(library, synthetic.mpn_for(0)), "w") as f:
+        f.write(synthetic.footprint_text(synthetic.mpn_for(0)))
+    report = rebuild.rebuild_library(library, workers=1)
+    assert report["footprints"]["rebuilt"] == 1
+    assert report["symbols"] == 0    # already done by the first run
+    assert not os.path.exists(os.path.join(library, rebuild.REBUILD_CHECKPOINT))
+
+
+def test_rebuild_rpc(library):
+    resp = main.handle_jsonrpc({"id": 1, "method": "rebuild_library",
+                                "params": {"library_root": library, "workers": 1}})
+    assert resp["result"]["footprints"]["rebuilt"] == N_PARTS
+
+
+def test_rebuild_refreshes_facets(library):
+    mpn = synthetic.mpn_for(0)
+    db = ComponentDB(os.path.join(library, "components.db"))
+    try:
+        before = db.get_component(mpn)
+        db.conn.execute("UPDATE components SET pin_count = NULL, pad_count = 0, mount_type = NULL, "
+                        "has_3d_model = 0")
+        db.conn.commit()
+    finally:
+        db.close()
+    os.remove(os.path.join(library, "3dmodels", f"{synthetic.mpn_for(1)}.stp"))
+
+    report = rebuild.rebuild_library(library, workers=1)
+    assert report["components_updated"] == N_PARTS
+    db = ComponentDB(os.path.join(library, "components.db"))
+    try:
+        after = db.get_component(mpn)
+        assert not db.get_component(synthetic.mpn_for(1))["has_3d_model"]
+    finally:
+        db.close()
+    for column in ("pin_count", "unit_count", "pad_count", "mount_type", "courtyard_x_min",
+                   "has_3d_model", "package", "reference"):
+        assert after[column] == before[column], column
+
+    # Nothing left to change
+    assert rebuild.rebuild_library(library, workers=1)["components_updated"] == 0
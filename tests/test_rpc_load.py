@@ -0,0 +1,41 @@
+"""Tests for the JSON-RPC load generator's response accounting."""
+
+import argparse
+import io
+import json
+
+from benchmarks.rpc_load import LoadRun
+
+
+def load_args(**overrides):
+    args = dict(rate=20.0, duration=1.0, mix="process_download=1,ping=1", seed=1, seed_components=10,
+                zip_pool=2, pins=8, step_mb=0.01, sidecar_binary=None)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_notifications_are_not_framing_errors():
+    run = LoadRun(load_args())
+    run.pending = {1: ("ping", 0.0), 2: ("process_download", 0.0)}
+    lines = [
+        {"jsonrpc": "2.0", "id": 1, "result": "pong"},
+        {"jsonrpc": "2.0", "method": "bom-results", "params": {"id": 2, "results": []}},
+        {"jsonrpc": "2.0", "id": 2, "result": {"status": "success"}},
+        {"jsonrpc": "2.0", "method": "library-changed", "params": {"cursor": 3}},
+        {"jsonrpc": "2.0", "id": 99, "result": None},
+    ]
+    stream = io.StringIO("".join(json.dumps(m) + "\n" for m in lines) + "KiPartBridge log line\n")
+    run._read_stdout(stream)
+    assert run.notifications == {"bom-results": 1, "library-changed": 1}
+    # The unknown id and the stray log line
+    assert run.framing_errors == 2
+    assert run.latency["ping"].count == 1
+    assert not run.pending
+
+
+def test_load_run_against_sidecar():
+    # process_download is followed by library-changed notifications
+    report = LoadRun(load_args()).run()
+    assert report["completed"] == report["sent"] > 0
+    assert report["framing_errors"] == 0
+    assert report["notifications"].get("library-changed", 0) > 0
@@ -0,0 +1,27 @@
+"""Tests for the sidecar settings file."""
+
+import json
+
+from settings import get_settings_path, load_settings, get_setting, update_settings
+
+
+def test_missing_file_means_defaults():
+    assert load_settings() == {}
+    assert get_setting("library_root", "dflt") == "dflt"
+
+
+def test_update_and_remove(isolated_user_config):
+    update_settings({"library_root": "/a", "other": 1})
+    assert get_settings_path() == str(isolated_user_config / "settings.json")
+    assert json.load(open(get_settings_path())) == {"library_root": "/a", "other": 1}
+
+    update_settings({"library_root": None})
+    assert load_settings() == {"other": 1}
+
+
+def test_picks_up_external_edits():
+    update_settings({"library_root": "/a"})
+    with open(get_settings_path(), "w") as f:
+        json.dump({"library_root": "/edited/by/hand"}, f)
+    # Different size, so the cached parse is invalidated
+    assert get_setting("library_root") == "/edited/by/hand"
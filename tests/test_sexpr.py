@@ -0,0 +1,101 @@
+"""Tests for the streaming s-expression tokenizer."""
+
+import io
+import pytest
+
+import sexpr
+from sexpr import ATOM, LPAREN, RPAREN, STRING, iter_tokens
+
+
+SYMBOL_LIB = b'''(kicad_symbol_lib (version 20211014) (generator kipartbridge)
+  (symbol "a1b2c3d4-0000-1111-2222-333344445555" (property "Reference" "X"))
+  (symbol "LM358" (in_bom yes) (on_board yes)
+    (property "Reference" "U" (at 0 0 0))
+    (property "MPN" "LM358\\"DR" (at 0 0 0))
+    (symbol "LM358_0_1" (rectangle (start -5 5) (end 5 -5)))
+  )
+  (symbol "NE555")
+)
+'''
+
+
+def _tokens(data, chunk_size=sexpr.CHUNK_SIZE):
+    return [(k, v) for k, v, _ in iter_tokens(io.BytesIO(data), chunk_size=chunk_size)]
+
+
+class TestTokens:
+    def test_kinds(self):
+        assert _tokens(b'(pin "1" 2.54)') == [
+            (LPAREN, None), (ATOM, "pin"), (STRING, "1"), (ATOM, "2.54"), (RPAREN, None)]
+
+    def test_escapes(self):
+        assert _tokens(rb'("a \"b\" \\c\nd")')[1] == (STRING, 'a "b" \\c\nd')
+
+    def test_offsets(self):
+        data = b'(a\n  (b "x"))'
+        offsets = [o for _, _, o in iter_tokens(io.BytesIO(data))]
+        assert [data[o:o + 1] for o in offsets] == [b"(", b"a", b"(", b"b", b'"', b")", b")"]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 64])
+    def test_chunk_boundaries(self, chunk_size):
+        assert _tokens(SYMBOL_LIB, chunk_size) == _tokens(SYMBOL_LIB)
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 16])
+    def test_forms_across_chunk_boundaries(self, chunk_size):
+        forms = list(sexpr.iter_forms(io.BytesIO(SYMBOL_LIB), depth=1, chunk_size=chunk_size))
+        assert forms == list(sexpr.iter_forms(io.BytesIO(SYMBOL_LIB), depth=1))
+        assert [(h, a) for h, a, _ in forms][:3] == [
+            ("version", "20211014"), ("generator", "kipartbridge"),
+            ("symbol", "a1b2c3d4-0000-1111-2222-333344445555")]
+        assert all(SYMBOL_LIB[o:o + 1] == b"(" for _, _, o in forms)
+
+    def test_unterminated_string(self):
+        with pytest.raises(ValueError, match="Unterminated"):
+            _tokens(b'(a "oops)')
+        with pytest.raises(ValueError, match="Unterminated"):
+            list(sexpr.iter_forms(io.BytesIO(b'(a (b "oops)'), depth=1))
+
+
+class TestHelpers:
+    def test_first_symbol_name_skips_uuid(self):
+        assert sexpr.first_symbol_name(io.BytesIO(SYMBOL_LIB), skip=lambda n: "-" in n) == "LM358"
+
+    def test_sub_symbols_are_not_top_level(self):
+        assert list(sexpr.iter_symbol_names(io.BytesIO(SYMBOL_LIB))) == [
+            "a1b2c3d4-0000-1111-2222-333344445555", "LM358", "NE555"]
+
+    def test_several_forms_per_line(self):
+        data = b'(kicad_symbol_lib (version 1) (symbol "A") (symbol "B" (symbol "B_0_1")) (symbol "C"))'
+        assert list(sexpr.iter_symbol_names(io.BytesIO(data))) == ["A", "B", "C"]
+
+    def test_footprint_name(self, tmp_path):
+        path = tmp_path / "fp.kicad_mod"
+        path.write_text('(footprint "SOIC-8" (layer "F.Cu")\n  (property "Reference" "REF**"))\n')
+        assert sexpr.footprint_name(str(path)) == "SOIC-8"
+        assert sexpr.find_property(str(path), "Reference", parent="footprint") == "REF**"
+
+    def test_legacy_module_name(self):
+        assert sexpr.footprint_name(io.BytesIO(b'(module SOIC-8 (layer F.Cu))')) == "SOIC-8"
+
+    def test_find_property(self):
+        assert sexpr.find_property(io.BytesIO(SYMBOL_LIB), "Reference") == "X"
+        assert sexpr.find_property(io.BytesIO(SYMBOL_LIB), "MPN") is None
+
+    def test_stops_early(self):
+        stream = io.BytesIO(b'(kicad_symbol_lib (symbol "A")' + b' (symbol "Z")' * 200000 + b')')
+        assert sexpr.first_symbol_name(stream) == "A"
+        assert stream.tell() <= 2 * sexpr.CHUNK_SIZE
+
+
+class TestParse:
+    def test_atoms_and_strings(self):
+        expr = sexpr.parse('(lib (name "x") (disabled))')
+        assert expr == ["lib", ["name", "x"], ["disabled"]]
+        assert isinstance(expr[0], sexpr.Atom)
+        assert not isinstance(expr[1][1], sexpr.Atom)
+
+    def test_unbalanced(self):
+        with pytest.raises(ValueError):
+            sexpr.parse("(a (b)")
+        with pytest.raises(ValueError):
+            sexpr.parse("(a))")
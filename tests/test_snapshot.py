@@ -0,0 +1,91 @@
+"""Tests for library snapshots and rollback."""
+
+import os
+
+import pytest
+
+import main
+import snapshot
+from batch import import_batch
+from benchmarks import synthetic
+from database import ComponentDB
+from models import ImportJob
+from settings import update_settings
+
+
+pytestmark = pytest.mark.library(parts=2)
+
+
+def mpns(root):
+    db = ComponentDB(os.path.join(root, "components.db"))
+    try:
+        return sorted(r["mpn"] for r in db.conn.execute("SELECT mpn FROM components"))
+    finally:
+        db.close()
+
+
+def test_snapshot_links_immutable_files(library):
+    manifest = snapshot.create_snapshot(library, label="first try")
+    assert manifest["name"].endswith("-first_try")
+    # 2 footprints + 2 models linked; symbol lib, DB and both lib tables copied
+    assert manifest["files"] == {"linked": 4, "copied": 4}
+    snap = os.path.join(library, snapshot.SNAPSHOT_DIR, manifest["name"])
+    fp = f"{synthetic.mpn_for(0)}.kicad_mod"
+    assert os.path.samefile(os.path.join(snap, "kipartbridge.pretty", fp),
+                            os.path.join(library, "kipartbridge.pretty", fp))
+    assert not os.path.samefile(os.path.join(snap, "components.db"), os.path.join(library, "components.db"))
+    assert snapshot.list_snapshots(library) == [manifest]
+
+
+def test_restore_rolls_back_an_import(library, import_part):
+    manifest = snapshot.create_snapshot(library)
+    sym_before = open(os.path.join(library, "kipartbridge.kicad_sym")).read()
+    import_part(library, 2)
+    # An overwrite replaces the file; the snapshot keeps the old inode's content
+    fp_path = os.path.join(library, "kipartbridge.pretty", f"{synthetic.mpn_for(0)}.kicad_mod")
+    fp_before = open(fp_path).read()
+    import_part(library, 0)
+    assert mpns(library) == sorted(synthetic.mpn_for(i) for i in range(3))
+
+    report = snapshot.restore_snapshot(library, manifest["name"])
+    assert report["footprints"]["removed"] == 1
+    assert report["models"]["removed"] == 1
+    assert mpns(library) == sorted(synthetic.mpn_for(i) for i in range(2))
+    assert open(os.path.join(library, "kipartbridge.kicad_sym")).read() == sym_before
+    assert open(fp_path).read() == fp_before
+    assert not os.path.exists(os.path.join(library, "kipartbridge.pretty", f"{synthetic.mpn_for(2)}.kicad_mod"))
+
+    # The state before the restore was saved and can be restored in turn
+    safety = report["safety_snapshot"]
+    assert [m["name"] for m in snapshot.list_snapshots(library)] == [safety, manifest["name"]]
+    snapshot.restore_snapshot(library, safety)
+    assert len(mpns(library)) == 3
+
+
+def test_restore_unknown_snapshot(library):
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.restore_snapshot(library, "nope")
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.restore_snapshot(library, "../lib")
+
+
+def test_auto_snapshot_before_batch(library, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_KEEP_AUTO", 2)
+    update_settings({"snapshot_before_batch": True})
+    for i in range(3):
+        zip_path = synthetic.build_zip("samacsys", str(tmp_path / f"b{i}.zip"), f"BATCH-{i}", pins=8)
+        assert import_batch([ImportJob(zip_path=zip_path)], library_root=library, workers=1)[0].status == "success"
+    autos = [m for m in snapshot.list_snapshots(library) if m["auto"]]
+    assert len(autos) == 2
+    assert autos[0]["label"] == "batch"
+
+
+def test_snapshot_rpcs(library):
+    created = main.handle_jsonrpc({"id": 1, "method": "create_snapshot",
+                                   "params": {"library_root": library}})["result"]
+    listed = main.handle_jsonrpc({"id": 2, "method": "list_snapshots",
+                                  "params": {"library_root": library}})["result"]
+    assert listed == [created]
+    resp = main.handle_jsonrpc({"id": 3, "method": "restore_snapshot",
+                                "params": {"library_root": library, "name": "missing"}})
+    assert "No snapshot" in resp["error"]["message"]
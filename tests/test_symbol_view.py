@@ -0,0 +1,100 @@
+"""Tests for the lazy .kicad_sym view."""
+
+import pytest
+from kiutils.symbol import SymbolLib
+
+import symbol_view
+from symbol_view import SymbolLibView, replace_symbol
+from normalizer import link_symbol_to_footprint
+from metrics import METRICS
+from benchmarks import synthetic
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    symbol_view.clear_cache()
+    yield
+    symbol_view.clear_cache()
+
+
+@pytest.fixture
+def library(tmp_path):
+    path = tmp_path / "lib.kicad_sym"
+    path.write_text(synthetic.symbol_library(["AAA", "BBB", "CCC"], pins=4))
+    return str(path)
+
+
+def _footprint(path, name):
+    symbol = next(s for s in SymbolLib.from_file(path).symbols if s.entryName == name)
+    return {p.key: p.value for p in symbol.properties}["Footprint"]
+
+
+class TestView:
+    def test_names_in_order(self, library):
+        with SymbolLibView(library) as view:
+            assert view.names() == ["AAA", "BBB", "CCC"]
+            assert "BBB" in view and "BBB_0_1" not in view
+            assert len(view) == 3
+
+    def test_raw_span_is_whole_form(self, library):
+        with SymbolLibView(library) as view:
+            raw = view.raw("BBB")
+        assert raw.startswith(b'(symbol "BBB"') and raw.endswith(b")")
+        assert b'(symbol "BBB_1_1"' in raw and b'"CCC"' not in raw
+
+    def test_materializes_one_symbol(self, library):
+        with SymbolLibView(library) as view:
+            symbol = view.symbol("CCC")
+        assert symbol.entryName == "CCC"
+        assert len(symbol.units) == 2
+
+    def test_missing_symbol(self, library):
+        with SymbolLibView(library) as view:
+            with pytest.raises(KeyError):
+                view.span("ZZZ")
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.kicad_sym"
+        path.write_text("")
+        with SymbolLibView(str(path)) as view:
+            assert view.names() == []
+
+    def test_index_cached_until_file_changes(self, library):
+        SymbolLibView(library).close()
+        before = METRICS.snapshot()["caches"]["symbol_index"]
+        SymbolLibView(library).close()
+        after = METRICS.snapshot()["caches"]["symbol_index"]
+        assert after["hits"] == before["hits"] + 1
+
+
+class TestReplace:
+    def test_only_target_span_changes(self, library):
+        with open(library, "rb") as f:
+            original = f.read()
+        with SymbolLibView(library) as view:
+            start, end = view.span("BBB")
+            symbol = view.symbol("BBB")
+        replace_symbol(library, "BBB", symbol)
+
+        with open(library, "rb") as f:
+            updated = f.read()
+        assert updated[:start] == original[:start]
+        assert updated.endswith(original[end:])
+        assert [s.entryName for s in SymbolLib.from_file(library).symbols] == ["AAA", "BBB", "CCC"]
+
+    def test_index_shifted_after_replace(self, library):
+        link_symbol_to_footprint(library, "AAA", "kipartbridge", "A_LONG_FOOTPRINT_NAME")
+        with SymbolLibView(library) as view:
+            cached = {name: view.raw(name) for name in view.names()}
+        symbol_view.clear_cache()
+        with SymbolLibView(library) as view:
+            assert cached == {name: view.raw(name) for name in view.names()}
+
+    def test_link_symbol_to_footprint(self, library):
+        link_symbol_to_footprint(library, "CCC", "kipartbridge", "CCC")
+        assert _footprint(library, "CCC") == "kipartbridge:CCC"
+        assert _footprint(library, "AAA") == ""
+
+    def test_link_missing_symbol(self, library):
+        with pytest.raises(ValueError, match="not found"):
+            link_symbol_to_footprint(library, "ZZZ", "kipartbridge", "ZZZ")
@@ -0,0 +1,133 @@
+"""Tests for the delta export to a shared folder."""
+
+import os
+import sqlite3
+
+import pytest
+
+import main
+import sync
+from benchmarks import synthetic
+from settings import update_settings
+
+
+def same_tree(a, b):
+    for sub in ("kipartbridge.pretty", "3dmodels"):
+        names = sorted(n for n in os.listdir(os.path.join(a, sub)) if not n.startswith("."))
+        assert names == sorted(os.listdir(os.path.join(b, sub)))
+        for n in names:
+            with open(os.path.join(a, sub, n), "rb") as fa, open(os.path.join(b, sub, n), "rb") as fb:
+                assert fa.read() == fb.read()
+    with open(os.path.join(a, "kipartbridge.kicad_sym"), "rb") as fa, \
+            open(os.path.join(b, "kipartbridge.kicad_sym"), "rb") as fb:
+        assert fa.read() == fb.read()
+
+
+def test_first_export_copies_everything(library, tmp_path):
+    dest = str(tmp_path / "share")
+    report = sync.sync_library(library, dest)
+    assert report["files"]["total"] == 6
+    assert report["files"]["copied"] == 6
+    assert report["database_copied"]
+    assert report["symbols"]["blocks_changed"] == report["symbols"]["blocks"] > 0
+    assert report["symbols"]["bytes_written"] == os.path.getsize(os.path.join(library, "kipartbridge.kicad_sym"))
+    same_tree(library, dest)
+    conn = sqlite3.connect(os.path.join(dest, "components.db"))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM components").fetchone()[0] == 3
+    finally:
+        conn.close()
+
+
+def test_second_export_copies_only_changes(library, import_part, tmp_path, monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_BLOCK_SIZE", 1024)
+    dest = str(tmp_path / "share")
+    sync.sync_library(library, dest)
+    report = sync.sync_library(library, dest)
+    assert report["files"]["copied"] == 0
+    assert report["files"]["unchanged"] == 6
+    assert report["symbols"]["blocks_changed"] == report["symbols"]["bytes_written"] == 0
+    assert not report["database_copied"]
+
+    # New part: its files are copied and only the tail of the symbol library
+    import_part(library, 3)
+    os.remove(os.path.join(library, "3dmodels", f"{synthetic.mpn_for(0)}.stp"))
+    exported = os.path.join(dest, "kipartbridge.kicad_sym")
+    with open(exported, "rb") as reader:
+        before = reader.read()
+        report = sync.sync_library(library, dest)
+        # A reader holding the old copy open still sees it whole
+        reader.seek(0)
+        assert reader.read() == before
+    assert report["files"]["copied"] == 2
+    assert report["files"]["deleted"] == 1
+    assert report["database_copied"]
+    assert 0 < report["symbols"]["blocks_changed"] < report["symbols"]["blocks"]
+    assert report["symbols"]["bytes_written"] == os.path.getsize(os.path.join(library, "kipartbridge.kicad_sym"))
+    same_tree(library, dest)
+
+
+def test_touched_but_identical_file_is_not_copied(library, tmp_path):
+    dest = str(tmp_path / "share")
+    sync.sync_library(library, dest)
+    fp = os.path.join(library, "kipartbridge.pretty", f"{synthetic.mpn_for(1)}.kicad_mod")
+    st = os.stat(fp)
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    report = sync.sync_library(library, dest)
+    assert report["files"]["copied"] == 0
+
+
+def test_symbol_library_changed_on_share_is_copied_whole(library, import_part, tmp_path):
+    dest = str(tmp_path / "share")
+    sync.sync_library(library, dest)
+    import_part(library, 3)
+    with open(os.path.join(dest, "kipartbridge.kicad_sym"), "a") as f:
+        f.write("\n; edited on the share\n")
+    report = sync.sync_library(library, dest)
+    assert report["symbols"]["blocks_changed"] == report["symbols"]["blocks"]
+    same_tree(library, dest)
+
+
+def test_resaved_symbol_library_is_not_written(library, tmp_path):
+    dest = str(tmp_path / "share")
+    sync.sync_library(library, dest)
+    exported = os.path.join(dest, "kipartbridge.kicad_sym")
+    inode = os.stat(exported).st_ino
+    sym_path = os.path.join(library, "kipartbridge.kicad_sym")
+    st = os.stat(sym_path)
+    os.utime(sym_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    report = sync.sync_library(library, dest)
+    assert report["symbols"]["blocks_changed"] == report["symbols"]["bytes_written"] == 0
+    assert os.stat(exported).st_ino == inode
+    # The new signature is recorded, so the next run does not hash it again
+    assert sync._load_manifest(dest)["symbols"]["sig"][0] == os.stat(sym_path).st_mtime_ns
+
+
+def test_files_not_in_manifest_are_left_alone(library, tmp_path):
+    dest = str(tmp_path / "share")
+    os.makedirs(os.path.join(dest, "3dmodels"))
+    stray = os.path.join(dest, "3dmodels", "teammate.step")
+    with open(stray, "w") as f:
+        f.write("ISO-10303-21;")
+    sync.sync_library(library, dest)
+    sync.sync_library(library, dest, full=True)
+    assert os.path.exists(stray)
+
+
+def test_destination_from_settings(library, tmp_path):
+    with pytest.raises(ValueError):
+        sync.sync_library(library)
+    with pytest.raises(ValueError):
+        sync.sync_library(library, library)
+    update_settings({"sync_destination": str(tmp_path / "share")})
+    resp = main.handle_jsonrpc({"id": 1, "method": "sync_library", "params": {"library_root": library}})
+    assert resp["result"]["files"]["copied"] == 6
+
+
+def test_removed_symbol_library_is_removed_from_share(library, tmp_path):
+    dest = str(tmp_path / "share")
+    sync.sync_library(library, dest)
+    os.remove(os.path.join(library, "kipartbridge.kicad_sym"))
+    report = sync.sync_library(library, dest)
+    assert report["symbols"]["blocks"] == 0
+    assert not os.path.exists(os.path.join(dest, "kipartbridge.kicad_sym"))
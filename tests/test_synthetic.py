@@ -0,0 +1,67 @@
+"""Tests that synthetic provider ZIPs match what the classifier and extractors expect."""
+
+import os
+import pytest
+from kiutils.symbol import SymbolLib
+from kiutils.footprint import Footprint
+
+from models import Provider
+from provider_classifier import classify
+from extractors import get_extractor
+from benchmarks import synthetic
+
+
+MPN = "SYN00042-QFN15"
+
+
+@pytest.mark.parametrize("layout, provider", [
+    ("ultra_librarian", Provider.ULTRA_LIBRARIAN),
+    ("ultra_librarian_legacy", Provider.ULTRA_LIBRARIAN),
+    ("samacsys", Provider.SAMACSYS),
+    ("snapeda", Provider.SNAPEDA),
+    ("generic_legacy", Provider.GENERIC),
+])
+def test_layout_classifies_and_extracts(layout, provider, tmp_path):
+    zip_path = synthetic.build_zip(layout, str(tmp_path / f"{layout}.zip"), MPN,
+                                   pins=24, step_size=4096)
+    assert classify(zip_path) == provider
+
+    component = get_extractor(provider).extract(zip_path, str(tmp_path / "out"))
+    assert component.symbol_file is not None
+    assert component.footprint_file is not None
+    if layout.endswith("legacy"):
+        assert component.symbol_format == "legacy_lib"
+    else:
+        assert component.mpn == MPN
+        assert component.model_step is not None
+
+
+def test_ultra_librarian_has_footprint_variants(tmp_path):
+    zip_path = synthetic.build_zip("ultra_librarian", str(tmp_path / "ul.zip"), MPN, pins=24)
+    component = get_extractor(Provider.ULTRA_LIBRARIAN).extract(zip_path, str(tmp_path / "out"))
+    assert len(component.footprint_files) == 3
+    assert not os.path.basename(component.footprint_file)[:-len(".kicad_mod")].endswith(("-L", "-M"))
+
+
+def test_files_parse_with_kiutils(tmp_path):
+    sym_path = tmp_path / "lib.kicad_sym"
+    sym_path.write_text(synthetic.symbol_library(["A1", "B2"], pins=10))
+    lib = SymbolLib.from_file(str(sym_path))
+    assert [s.entryName for s in lib.symbols] == ["A1", "B2"]
+
+    fp_path = tmp_path / "fp.kicad_mod"
+    fp_path.write_text(synthetic.footprint_text("FP1", pads=10))
+    fp = Footprint.from_file(str(fp_path))
+    assert fp.entryName == "FP1"
+    assert len(fp.pads) == 10
+
+
+def test_step_size_is_configurable():
+    data = synthetic.step_bytes("M", 100_000)
+    assert data.startswith(b"ISO-10303-21;")
+    assert 100_000 <= len(data) < 101_000
+
+
+def test_target_library_size(tmp_path):
+    path = synthetic.build_target_library(str(tmp_path / "t.kicad_sym"), 25)
+    assert len(SymbolLib.from_file(path).symbols) == 25
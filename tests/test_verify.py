@@ -0,0 +1,121 @@
+"""Tests for the library integrity scanner."""
+
+import os
+
+import pytest
+
+import main
+import verify
+from benchmarks import synthetic
+from database import ComponentDB
+
+
+pytestmark = pytest.mark.library(layouts=("ultra_librarian", "samacsys", "snapeda"))
+
+
+def kinds(report):
+    return sorted((i["kind"], i["name"]) for i in report["issues"])
+
+
+def test_clean_library(library):
+    report = verify.verify_library(library)
+    assert report["issues"] == []
+    assert report["counts"] == {"components": 3, "symbols": 3, "footprints": 3, "models": 3}
+    assert report["rescanned"] == {"footprints": 3, "models": 3}
+
+
+def test_reports_drift(library):
+    fp_dir = os.path.join(library, "kipartbridge.pretty")
+    models_dir = os.path.join(library, "3dmodels")
+    a, b, c = (synthetic.mpn_for(i) for i in range(3))
+    os.remove(os.path.join(fp_dir, f"{a}.kicad_mod"))
+    with open(os.path.join(models_dir, f"{b}.stp"), "wb") as f:
+        f.write(b"<html>not a model</html>")
+    with open(os.path.join(models_dir, "stray.step"), "wb") as f:
+        f.write(synthetic.step_bytes("stray", 1024))
+    with open(os.path.join(fp_dir, "broken.kicad_mod"), "w") as f:
+        f.write('(footprint "broken" (layer "F.Cu")')
+    db = ComponentDB(os.path.join(library, "components.db"))
+    db.delete_component(c)
+    db.close()
+
+    report = verify.verify_library(library)
+    assert kinds(report) == sorted([
+        ("missing_footprint", a),
+        ("broken_symbol_link", a),
+        ("orphaned_model", f"{a}.step"),
+        ("broken_model_ref", b),
+        ("missing_model", b),
+        ("orphaned_model", "stray.step"),
+        ("unreadable_footprint", "broken"),
+        ("orphaned_footprint", "broken"),
+        ("orphaned_symbol", c),
+        ("orphaned_footprint", c),
+    ])
+    assert report["fixed"] == []
+
+
+def test_fix_updates_rows(library):
+    a, b, _ = (synthetic.mpn_for(i) for i in range(3))
+    os.remove(os.path.join(library, "kipartbridge.pretty", f"{a}.kicad_mod"))
+    os.remove(os.path.join(library, "3dmodels", f"{b}.stp"))
+
+    report = verify.verify_library(library, fix=True)
+    assert {f["mpn"]: f["fields"] for f in report["fixed"]} == {
+        a: ["footprint_name", "has_3d_model"], b: ["has_3d_model"]}
+    db = ComponentDB(os.path.join(library, "components.db"))
+    try:
+        assert db.get_component(a)["footprint_name"] is None
+        assert db.get_component(b)["has_3d_model"] == 0
+    finally:
+        db.close()
+    # Fixed rows no longer disagree; the files are still reported
+    assert kinds(verify.verify_library(library)) == [
+        ("broken_model_ref", b), ("broken_symbol_link", a), ("orphaned_model", f"{a}.step")]
+
+
+def test_fix_deletes_rows_without_files(library, tmp_path):
+    db = ComponentDB(os.path.join(library, "components.db"))
+    db.upsert_component(mpn="GHOST", symbol_name="GHOST", footprint_name="GHOST")
+    db.close()
+    report = verify.verify_library(library, fix=True)
+    assert report["fixed"] == [{"mpn": "GHOST", "action": "deleted"}]
+
+
+def test_rescans_only_changed_files(library):
+    verify.verify_library(library)
+    assert verify.verify_library(library)["rescanned"] == {"footprints": 0, "models": 0}
+
+    a = synthetic.mpn_for(0)
+    fp_path = os.path.join(library, "kipartbridge.pretty", f"{a}.kicad_mod")
+    st = os.stat(fp_path)
+    os.utime(fp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    report = verify.verify_library(library)
+    assert report["rescanned"] == {"footprints": 1, "models": 0}
+    assert report["issues"] == []
+    assert verify.verify_library(library, full=True)["rescanned"] == {"footprints": 3, "models": 3}
+
+
+def test_footprints_on_process_pool(library, monkeypatch):
+    monkeypatch.setattr(verify, "VERIFY_POOL_MIN_FILES", 1)
+    report = verify.verify_library(library, full=True, workers=2)
+    assert report["issues"] == []
+    assert report["rescanned"]["footprints"] == 3
+
+
+def test_verify_rpc(library):
+    resp = main.handle_jsonrpc({"id": 1, "method": "verify_library", "params": {"library_root": library}})
+    assert resp["result"]["counts"]["components"] == 3
+    assert resp["result"]["issues"] == []
+
+
+def test_symbol_links_reads_footprint_property(tmp_path):
+    sym_path = tmp_path / "lib.kicad_sym"
+    sym_path.write_text(
+        '(kicad_symbol_lib (version 20231120)\n'
+        '  (symbol "A" (property "Reference" "U" (at 0 0 0)) (property "Footprint" "kipartbridge:A" (at 0 0 0)))\n'
+        '  (symbol "B" (property "Footprint" "lib:B \\"wide\\"" (at 0 0 0)))\n'
+        '  (symbol "C" (property "Reference" "U" (at 0 0 0))\n'
+        '    (symbol "C_1_1" (property "Footprint" "nested:C" (at 0 0 0))))\n'
+        ')\n')
+    assert verify.symbol_links(str(sym_path)) == {"A": "kipartbridge:A", "B": 'lib:B "wide"', "C": ""}
@@ -0,0 +1,75 @@
+"""Tests for the recycling import worker."""
+
+import os
+import pytest
+
+import main
+from settings import update_settings
+from workers import RecyclingWorker, WorkerDied
+from benchmarks import synthetic
+
+
+def _fail():
+    raise ValueError("bad part")
+
+
+def _exit():
+    os._exit(3)
+
+
+@pytest.fixture
+def worker():
+    w = RecyclingWorker(max_jobs=0, max_rss_bytes=0)
+    yield w
+    w.close()
+
+
+def test_runs_jobs_in_child(worker):
+    assert worker.run(os.getpid) != os.getpid()
+    assert worker.run(int, "42") == 42
+    with pytest.raises(ValueError, match="bad part"):
+        worker.run(_fail)
+    assert worker.stats()["jobs_total"] == 3
+
+
+def test_recycles_after_max_jobs(worker):
+    worker.max_jobs = 2
+    standby = worker.stats()["standby_pid"]
+    pids = [worker.run(os.getpid) for _ in range(5)]
+
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    # The pre-started standby took over
+    assert pids[2] == standby
+    stats = worker.stats()
+    assert stats["recycles"] == {"max_jobs": 2}
+    assert [h["pid"] for h in stats["rss_history"]] == pids
+    assert all(h["rss_bytes"] > 0 for h in stats["rss_history"])
+
+
+def test_recycles_past_rss_threshold(worker):
+    worker.max_rss_bytes = 1
+    assert worker.run(os.getpid) != worker.run(os.getpid)
+    assert worker.stats()["recycles"] == {"rss": 2}
+
+
+def test_crashed_child_is_replaced(worker):
+    with pytest.raises(WorkerDied, match="exit code 3"):
+        worker.run(_exit)
+    assert worker.run(int, "1") == 1
+    assert worker.stats()["recycles"] == {"crashed": 1}
+
+
+def test_process_download_in_worker(tmp_path):
+    update_settings({"import_worker": True, "worker_max_jobs": 1})
+    try:
+        for i in range(2):
+            zip_path = synthetic.build_zip("snapeda", str(tmp_path / f"{i}.zip"), synthetic.mpn_for(i), pins=8)
+            result = main.process_download(zip_path, library_root=str(tmp_path / "lib"))
+            assert result.status == "success"
+
+        stats = main.handle_jsonrpc({"id": 1, "method": "get_worker_stats"})["result"]
+        assert stats["enabled"]
+        assert stats["recycles"] == {"max_jobs": 2}
+        assert len({h["pid"] for h in stats["rss_history"]}) == 2
+    finally:
+        main.close_import_worker()